@@ -0,0 +1,276 @@
+#!/usr/bin/env mayapy
+# encoding: utf-8
+"""
+A declarative build plan for the rig builders.
+
+Instead of creating each node with PyMEL as it goes, a builder describes what it wants:
+nodes, parenting, world placement, attributes, connections, constraints, locks and deletes.
+execute_plan() then makes the whole plan in a few passes through the scene backend,
+one kind of operation at a time. The plan is plain python data, so it can be printed,
+counted or compared without touching a scene.
+
+    plan = build_plan.BuildPlan()
+    rigGroup = plan.add_group('l__door__rig__grp__')
+    oControl = plan.add_locator('l__door__ctrl__')
+    plan.parent(oControl, rigGroup)
+    print(plan.summary())
+    build_plan.execute_plan(plan)
+
+Nodes that aren't made by the plan (eg. the body rig groups) are referenced by their scene name.
+
+The door and wheel rigs emit plans, from car_rig_plans. Their builders read the guides first,
+then work out every icon radius, CV and world position from that data, before anything is made.
+build_body_rig() still builds with PyMEL, and hands its PyNodes to every other builder.
+
+execute_plan() batches what it can: one parent call for each parent, one setAttr for each
+translate, rotate or scale that is set one axis at a time, and one delete for the whole plan.
+"""
+
+import collections
+
+import scene_backend
+import build_profiler
+
+
+def _as_list(vector):
+    """Plans only hold plain python data, so PyMEL vectors and NumPy arrays become lists."""
+    if vector is None:
+        return None
+    return [float(x) for x in vector]
+
+
+class BuildPlan(object):
+    """A list of build steps, grouped by the pass that will execute them."""
+
+    def __init__(self):
+        # each node is a dict of: name, kind (node, group, locator, curve) and the kind's arguments.
+        self.nodes = []
+        # attributes to add to the nodes, before anything is parented.
+        self.newAttrs = []
+        self.parents = []
+        self.placements = []
+        self.attrs = []
+        self.connections = []
+        self.constraints = []
+        self.locks = []
+        self.deletes = []
+
+    def add_node(self, nodeType, name):
+        self.nodes.append({'kind': 'node', 'name': name, 'type': nodeType})
+        return name
+
+    def add_group(self, name):
+        self.nodes.append({'kind': 'group', 'name': name, 'type': 'transform'})
+        return name
+
+    def add_locator(self, name):
+        self.nodes.append({'kind': 'locator', 'name': name, 'type': 'transform'})
+        return name
+
+    def add_curve(self, name, points, degree=1, periodic=False, joint=False):
+        """joint=True puts the curve shape under a joint, like props_icon_lib.create_control_icon()."""
+        self.nodes.append({
+            'kind': 'curve', 'name': name, 'type': 'joint' if joint else 'transform',
+            'points': [[float(x) for x in p] for p in points], 'degree': degree, 'periodic': periodic,
+            })
+        return name
+
+    def add_attr(self, node, attrName, attrType='double', defaultValue=0.0, keyable=True):
+        """Add an attribute to a node. Returns the plug."""
+        self.newAttrs.append((node, attrName, attrType, defaultValue, keyable))
+        return '{}.{}'.format(node, attrName)
+
+    def parent(self, child, parentName):
+        self.parents.append((child, parentName))
+
+    def chain_parent(self, names):
+        """Parent each name under the one before it. Same as car_autorig.chain_parent()."""
+        for parentName, child in zip(names[:-1], names[1:]):
+            self.parent(child, parentName)
+
+    def place(self, node, translation=None, rotation=None):
+        """Set the world space position and/or rotation, after all of the parenting is done."""
+        self.placements.append((node, _as_list(translation), _as_list(rotation)))
+
+    def set_attr(self, plug, value, shape=False):
+        """plug is 'node.attr'. If shape is True, the attribute is set on the first shape of the node."""
+        self.attrs.append((plug, value, shape))
+
+    def connect(self, source, destination):
+        self.connections.append((source, destination))
+
+    def constrain(self, constraintType, driver, driven, name, maintainOffset=True, parent=None, translation=None,
+            skip=None):
+        """constraintType is the cmds name. eg. 'parentConstraint'
+        The constraint can be moved to translation and reparented, to keep the outliner tidy.
+        skip is the axes a point or orient constraint leaves alone. eg. ['y', 'z']
+        """
+        self.constraints.append({
+            'type': constraintType, 'driver': driver, 'driven': driven, 'name': name,
+            'maintainOffset': maintainOffset, 'parent': parent,
+            'translation': _as_list(translation), 'skip': list(skip) if skip else None,
+            })
+        return name
+
+    def lock(self, plug, locked=True, keyable=False, channelBox=False):
+        self.locks.append((plug, locked, keyable, channelBox))
+
+    def delete(self, node):
+        self.deletes.append(node)
+
+    def extend(self, other):
+        """Add every step of another plan onto the end of this one's passes."""
+        self.nodes.extend(other.nodes)
+        self.newAttrs.extend(other.newAttrs)
+        self.parents.extend(other.parents)
+        self.placements.extend(other.placements)
+        self.attrs.extend(other.attrs)
+        self.connections.extend(other.connections)
+        self.constraints.extend(other.constraints)
+        self.locks.extend(other.locks)
+        self.deletes.extend(other.deletes)
+
+    def created_names(self):
+        """The plan names of everything the plan creates. Constraints included."""
+        return [x['name'] for x in self.nodes] + [x['name'] for x in self.constraints]
+
+    def summary(self):
+        """The number of steps in each pass. Handy for comparing 2 builds."""
+        counts = {
+            'nodes': len(self.nodes),
+            'newAttrs': len(self.newAttrs),
+            'parents': len(self.parents),
+            'placements': len(self.placements),
+            'attrs': len(self.attrs),
+            'connections': len(self.connections),
+            'constraints': len(self.constraints),
+            'locks': len(self.locks),
+            'deletes': len(self.deletes),
+            }
+        for each in self.nodes:
+            key = 'nodes.' + each['kind']
+            counts[key] = counts.get(key, 0) + 1
+        return counts
+
+    def describe(self):
+        """A readable list of every step, in the order they will be executed."""
+        lines = []
+        for each in self.nodes:
+            lines.append('create {} {}'.format(each['kind'], each['name']))
+        for node, attrName, attrType, defaultValue, keyable in self.newAttrs:
+            lines.append('add {} {}.{}'.format(attrType, node, attrName))
+        for child, parentName in self.parents:
+            lines.append('parent {} -> {}'.format(child, parentName))
+        for node, translation, rotation in self.placements:
+            lines.append('place {} t={} r={}'.format(node, translation, rotation))
+        for plug, value, shape in self.attrs:
+            lines.append('set {}{} = {}'.format(plug, ' (shape)' if shape else '', value))
+        for source, destination in self.connections:
+            lines.append('connect {} -> {}'.format(source, destination))
+        for each in self.constraints:
+            lines.append('{} {} -> {} ({})'.format(each['type'], each['driver'], each['driven'], each['name']))
+        for plug, locked, keyable, channelBox in self.locks:
+            lines.append('lock {} locked={} keyable={} channelBox={}'.format(plug, locked, keyable, channelBox))
+        for node in self.deletes:
+            lines.append('delete {}'.format(node))
+        return lines
+
+
+@build_profiler.profile
+def execute_plan(plan, backend=None):
+    """Make everything in the plan, one pass at a time: create nodes, add attributes, parent,
+    place in world space, set attributes, connect, constrain, lock and delete.
+    Returns a dictionary of plan name: scene name, in case the scene had to rename something.
+    """
+    scene = backend or scene_backend.get_backend()
+    names = {}
+
+    def resolve(name):
+        return names.get(name, name)
+
+    def resolve_plug(plug):
+        node, attr = plug.split('.', 1)
+        return '{}.{}'.format(resolve(node), attr)
+
+    jointCurves = []
+    for each in plan.nodes:
+        if each['kind'] == 'group':
+            names[each['name']] = scene.group(name=each['name'])
+        elif each['kind'] == 'locator':
+            names[each['name']] = scene.spaceLocator(name=each['name'])
+        elif each['kind'] == 'curve' and each['type'] == 'joint':
+            # the curve transform can't take the name, the joint gets it and the shape.
+            oCurve = scene.curve(
+                    each['points'], degree=each['degree'], name=each['name'] + 'Shape', periodic=each['periodic'])
+            oJoint = scene.createNode('joint', name=each['name'])
+            scene.parent(scene.listRelatives(oCurve, shapes=True)[0], oJoint, shape=True)
+            jointCurves.append(oCurve)
+            names[each['name']] = oJoint
+        elif each['kind'] == 'curve':
+            names[each['name']] = scene.curve(
+                    each['points'], degree=each['degree'], name=each['name'], periodic=each['periodic'])
+        else:
+            names[each['name']] = scene.createNode(each['type'], name=each['name'])
+    if jointCurves:
+        scene.delete(jointCurves)
+
+    for node, attrName, attrType, defaultValue, keyable in plan.newAttrs:
+        scene.addAttr(resolve(node), attrName, attrType=attrType, defaultValue=defaultValue, keyable=keyable)
+
+    # one parent call for each parent. A child that is parented twice ends up under the last one.
+    lastParent = dict(plan.parents)
+    childrenOf = collections.OrderedDict()
+    for child in _unique(child for child, parentName in plan.parents):
+        childrenOf.setdefault(lastParent[child], []).append(child)
+    for parentName, children in childrenOf.items():
+        newNames = scene.parent([resolve(x) for x in children], resolve(parentName))
+        names.update(zip(children, newNames))
+
+    for node, translation, rotation in plan.placements:
+        scene.xform(resolve(node), translation=translation, rotation=rotation)
+
+    shapes = {}
+    attrValues = []
+    for plug, value, shape in plan.attrs:
+        node, attr = plug.split('.', 1)
+        if shape:
+            if node not in shapes:
+                shapes[node] = scene.listRelatives(resolve(node), shapes=True)[0]
+            plug = '{}.{}'.format(shapes[node], attr)
+        else:
+            plug = resolve_plug(plug)
+        attrValues.append((plug, value))
+    scene.setAttrs(attrValues)
+
+    for source, destination in plan.connections:
+        scene.connectAttr(resolve_plug(source), resolve_plug(destination), force=True)
+
+    for each in plan.constraints:
+        oCons = scene.constrain(
+                each['type'], resolve(each['driver']), resolve(each['driven']),
+                name=each['name'], maintainOffset=each['maintainOffset'], skip=each.get('skip'))
+        if each['translation']:
+            scene.xform(oCons, translation=each['translation'])
+        if each['parent']:
+            oCons = scene.parent(oCons, resolve(each['parent']))
+        names[each['name']] = oCons
+
+    for plug, locked, keyable, channelBox in plan.locks:
+        scene.lockAttr(resolve_plug(plug), locked=locked, keyable=keyable, channelBox=channelBox)
+
+    deletes = [x for x in _unique(resolve(node) for node in plan.deletes) if scene.objExists(x)]
+    if deletes:
+        scene.delete(deletes)
+
+    return names
+
+
+def _unique(values):
+    """The values without repeats, in the order they first came up."""
+    seen = set()
+    unique = []
+    for each in values:
+        if each not in seen:
+            seen.add(each)
+            unique.append(each)
+    return unique
@@ -0,0 +1,231 @@
+#!/usr/bin/env mayapy
+# encoding: utf-8
+"""
+An opt-in profiler for the rig builders. It is off by default, and costs one if statement per call when off.
+
+    import build_profiler
+    build_profiler.enable()
+    car_autorig.build_rig()
+
+Every function decorated with @build_profiler.profile becomes a stage. Smaller parts of a long
+function can be marked with begin('name') and end(), like an undo chunk.
+Each stage records its wall time, the nodes created by type, the connections made and
+the number of scene queries (calls to the common cmds and PyMEL query functions).
+Nested stages count towards their parents too. self_time leaves out the time spent in child stages.
+
+When the outermost stage finishes, a JSON report is written and a summary is printed,
+slowest stage first. Compare the reports between versions to catch regressions.
+"""
+
+import contextlib
+import json
+import os
+import tempfile
+import time
+from functools import wraps
+
+try:
+    import maya.cmds as cmds
+    import maya.api.OpenMaya as om2
+    import pymel.core as pm
+except ImportError:
+    cmds = None
+    om2 = None
+    pm = None
+
+
+# the functions counted as scene queries, while a profile is running.
+QUERY_COMMANDS = [
+    'ls', 'objExists', 'getAttr', 'listRelatives', 'listConnections',
+    'xform', 'exactWorldBoundingBox', 'nodeType',
+    ]
+QUERY_PYMEL = ['ls', 'objExists', 'listRelatives', 'listConnections']
+QUERY_METHODS = [
+    ('Attribute', ['get', 'inputs', 'outputs']),
+    ('Transform', ['getTranslation', 'getRotation', 'getBoundingBox', 'getShape', 'getShapes']),
+    ]
+
+_enabled = False
+_reportPath = None
+_stack = []
+_records = []
+_queries = [0]
+_callbackIds = []
+_patches = []
+
+
+def enable(reportPath=None):
+    """Turn profiling on. The report goes to reportPath, or a timestamped file in the temp folder."""
+    global _enabled, _reportPath
+    _enabled = True
+    _reportPath = reportPath
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def _stage_name(func, args):
+    """eg. build_wheel_rig(l__front_wheel__gid__) or build_guide(door, l_door_geo)"""
+    for each in args:
+        if hasattr(each, 'name') and callable(each.name):
+            return '{}({})'.format(func.__name__, each.name())
+    labels = [str(x) for x in args if isinstance(x, type(u'')) or isinstance(x, str)]
+    return '{}({})'.format(func.__name__, ', '.join(labels))
+
+
+def profile(func):
+    """Decorator. Records each call of func as a stage, when profiling is enabled."""
+    @wraps(func)
+    def _profiled(*args, **kwargs):
+        if not _enabled:
+            return func(*args, **kwargs)
+        with stage(_stage_name(func, args)):
+            return func(*args, **kwargs)
+    return _profiled
+
+
+@contextlib.contextmanager
+def stage(name):
+    """Record a block of code as a stage."""
+    if not _enabled:
+        yield
+        return
+    depth = len(_stack)
+    begin(name)
+    try:
+        yield
+    finally:
+        # close this stage, and any begin() that was left open inside it.
+        while len(_stack) > depth:
+            end()
+
+
+def begin(name):
+    """Open a stage. Close it with end()."""
+    if not _enabled:
+        return
+    if not _stack:
+        _start_session()
+    record = {
+        'name': name,
+        'depth': len(_stack),
+        'time': 0.0,
+        'self_time': 0.0,
+        'nodes': {},
+        'nodes_total': 0,
+        'connections': 0,
+        'queries': 0,
+        }
+    record['_start'] = time.time()
+    record['_queries'] = _queries[0]
+    record['_child_time'] = 0.0
+    _records.append(record)
+    _stack.append(record)
+
+
+def end():
+    """Close the last stage opened with begin()."""
+    if not _stack:
+        return
+    record = _stack.pop()
+    record['time'] = time.time() - record.pop('_start')
+    record['self_time'] = record['time'] - record.pop('_child_time')
+    record['queries'] = _queries[0] - record.pop('_queries')
+    if _stack:
+        _stack[-1]['_child_time'] += record['time']
+    else:
+        _end_session()
+
+
+def _node_added(mObject, clientData):
+    nodeType = om2.MFnDependencyNode(mObject).typeName
+    for record in _stack:
+        record['nodes'][nodeType] = record['nodes'].get(nodeType, 0) + 1
+        record['nodes_total'] += 1
+
+
+def _connection_made(srcPlug, destPlug, made, clientData):
+    if made:
+        for record in _stack:
+            record['connections'] += 1
+
+
+def _counted(func):
+    @wraps(func)
+    def _counting(*args, **kwargs):
+        _queries[0] += 1
+        return func(*args, **kwargs)
+    return _counting
+
+
+def _patch(owner, attrName):
+    original = getattr(owner, attrName, None)
+    if original is None:
+        return
+    _patches.append((owner, attrName, original))
+    setattr(owner, attrName, _counted(original))
+
+
+def _start_session():
+    del _records[:]
+    _queries[0] = 0
+    if om2:
+        _callbackIds.append(om2.MDGMessage.addNodeAddedCallback(_node_added, 'dependNode'))
+        _callbackIds.append(om2.MDGMessage.addConnectionCallback(_connection_made))
+    if cmds:
+        for each in QUERY_COMMANDS:
+            _patch(cmds, each)
+    if pm:
+        for each in QUERY_PYMEL:
+            _patch(pm, each)
+        for className, methods in QUERY_METHODS:
+            for each in methods:
+                # patch the class that defines the method, so every subclass is counted once.
+                owner = getattr(pm.nt, className, None) or getattr(pm, className)
+                _patch(owner, each)
+
+
+def _end_session():
+    for callbackId in _callbackIds:
+        om2.MMessage.removeCallback(callbackId)
+    del _callbackIds[:]
+    for owner, attrName, original in reversed(_patches):
+        setattr(owner, attrName, original)
+    del _patches[:]
+
+    reportPath = write_report(_records, _reportPath)
+    print_summary(_records)
+    print('Build profile written to: {}'.format(reportPath))
+
+
+def write_report(records, reportPath=None):
+    """Write the stage records to a JSON file, and return its path."""
+    if not reportPath:
+        reportPath = os.path.join(
+                tempfile.gettempdir(),
+                'build_profile_{}.json'.format(time.strftime('%Y%m%d_%H%M%S')))
+    report = {
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'total_time': sum([x['time'] for x in records if x['depth'] == 0]),
+        'stages': records,
+        }
+    with open(reportPath, 'w') as reportFile:
+        json.dump(report, reportFile, indent=4, sort_keys=True)
+    return reportPath
+
+
+def print_summary(records):
+    """Print one line per stage, slowest self_time first."""
+    print('{:<64} {:>9} {:>9} {:>7} {:>7} {:>7}'.format(
+        'stage', 'time', 'self', 'nodes', 'conns', 'queries'))
+    for record in sorted(records, key=lambda x: x['self_time'], reverse=True):
+        print('{:<64} {:>8.3f}s {:>8.3f}s {:>7} {:>7} {:>7}'.format(
+            '  ' * record['depth'] + record['name'],
+            record['time'], record['self_time'],
+            record['nodes_total'], record['connections'], record['queries']))
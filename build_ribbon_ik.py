@@ -1,6 +1,10 @@
 import pymel.core as pm
 import maya.cmds as mc
 import pymel.core.datatypes as dt
+import numpy as np
+import props_nurbs_lib
+import props_skin_lib
+import props_pin_lib
 #import maya.OpenMaya as om
 #import maya.OpenMayaUI as omui
 
@@ -38,7 +42,7 @@ def add_attr(myObj, oDataType, oParamName, oMin=None, oMax=None, oDefault=0.0):
 
 def pin_to_surface(oNurbs, uPos=0.5, vPos=0.5):
     #TODO: Parse whether it is a nurbsSurface shape or transform
-    #TODO: Can I support polygons?
+    # polygons are supported by props_pin_lib.pin_many_to_mesh()
     pointOnSurface = pm.createNode('pointOnSurfaceInfo')
     oNurbs.getShape().worldSpace.connect(pointOnSurface.inputSurface)
     # follicles remap from 0-1, but closestPointOnSurface must take minMaxRangeV into account
@@ -143,21 +147,40 @@ def connect_multiply(oDriven, oDriver, oMultiplyBy):
     return oMult
 
 
-def build_twist_ramp(prefix, controlObj, twistColl, twistAttrs=['rotateX']):
+def build_twist_ramp(prefix, controlObj, twistColl, twistAttrs=['rotateX'], compact=False):
     '''
     Take a collection of objects and twist them. This can drive the attribute of your choice, but it was written with ribbon-IK twist in mind.
     It uses a master remapValue that drives multiple remapValues to simulate a multi-in, multi-out array node.
+    compact=True gives the same twist with a single remapValue per object, and no master. See below.
     '''
-    # The master twist profile curve.
-    masterRemap = pm.createNode('remapValue', n='{}_master_ribbon_lerp_MAP'.format(prefix))
-    masterRemap.inputMax.set(len(twistColl)) # set the range to the count of twist objects.
-    masterRemap.value[0].value_Interp.set(2) # set to smooth interpolation. #TODO: Add a parameter to change this on the fly.
-
     pStart = add_attr(controlObj, 'double', '{}_start'.format(prefix), oMin=None, oMax=None, oDefault=0.0)
     pEnd = add_attr(controlObj, 'double', '{}_end'.format(prefix), oMin=None, oMax=None, oDefault=0.0)
     twistStart = add_attr(controlObj, 'double', '{}_start_position'.format(prefix), oMin=0.0, oMax=1.0, oDefault=0.0)
     twistEnd = add_attr(controlObj, 'double', '{}_end_position'.format(prefix), oMin=0.0, oMax=1.0, oDefault=1.0)
     twistType = add_attr(controlObj, 'long', '{}_interpolation'.format(prefix), oMin=0, oMax=2, oDefault=2) # 0 none 1 linear 2 smooth 3 spline
+
+    if compact:
+        # Each object's position along the chain is known at build time, so it is baked into inputValue.
+        # inputMin/inputMax stretch the default 0-1 profile curve between the start and end positions,
+        # and outputMin/outputMax turn the profile straight into start + profile * (end - start).
+        # That is the same lerp as the MLT/ADD/REVERSE network, from 1 node per object instead of 4.
+        for i, each in enumerate(twistColl):
+            twistProfile = pm.createNode('remapValue', n='{}_lerp_profile_{}_MAP'.format(prefix, i+1))
+            twistProfile.inputValue.set(i / float(len(twistColl)))
+            twistStart.connect(twistProfile.inputMin)
+            twistEnd.connect(twistProfile.inputMax)
+            twistType.connect(twistProfile.value[0].value_Interp)
+            pStart.connect(twistProfile.outputMin)
+            pEnd.connect(twistProfile.outputMax)
+            for twistAttr in twistAttrs:
+                twistProfile.outValue.connect(pm.PyNode('{}.{}'.format(each.name(), twistAttr)), force=True)
+        return
+
+    # The master twist profile curve.
+    masterRemap = pm.createNode('remapValue', n='{}_master_ribbon_lerp_MAP'.format(prefix))
+    masterRemap.inputMax.set(len(twistColl)) # set the range to the count of twist objects.
+    masterRemap.value[0].value_Interp.set(2) # set to smooth interpolation. #TODO: Add a parameter to change this on the fly.
+
     twistStart.connect(masterRemap.value[0].value_Position)
     twistEnd.connect(masterRemap.value[1].value_Position)
     twistType.connect(masterRemap.value[0].value_Interp)
@@ -200,33 +223,32 @@ def build_twist_ramp(prefix, controlObj, twistColl, twistAttrs=['rotateX']):
             twistAdd.output2D.output2Dx.connect(pm.PyNode('{}.{}'.format(each.name(), twistAttr)), force=True)
 
 
-def many_follicles(obj, uCount, vCount):
-    oFolls = []
+def many_follicles(obj, uCount, vCount, positions=None):
+    """Pin a grid of uCount x vCount follicles to the surface, with a group and a joint under each.
+    If positions are given, there is one follicle at the closest point to each position instead.
+    All the follicles are pinned in one pass. See props_pin_lib.
+    Each follicle keeps its u_param and v_param sliders (0 to 100), driving its parameterU and parameterV.
+    """
     pName = obj.name()
     oRoot = pm.group(n=pName.replace('ribbon','follicles'), em=True)
 
-    for j in range(vCount):
-        for i in range(uCount):
-            pm.select(None)
-            if uCount == 1:
-                uPos = 0.5
-            else:
-                uPos = i/(uCount-1.00)
-            if vCount == 1:
-                vPos = 0.5
-            else:
-                vPos = j/(vCount-1.00)
-            oFoll = create_follicle(obj, i+1, uPos, vPos)
-            pm.rename(oFoll.getParent(), pName + '_{}_foll'.format(i+1))
-            oLoc = pm.group(n=pName + '_{}_grp'.format(i+1), em=True)
-            oLoc.setTranslation(oFoll.getTranslation(space='world'), space='world')
-            oJoint = pm.joint(n=pName + '_{}_jnt'.format(i+1))
-            oJoint.setTranslation(oFoll.getTranslation(space='world'), space='world')
-            pm.parent(oLoc, oFoll)
-            pm.parent(oFoll, oRoot)
-            oLoc.r.set([0, 0, 0])
-            pm.select(None)
-            oFolls.append(oFoll)
+    if positions is None:
+        params = props_pin_lib.surface_grid_params(obj, uCount, vCount)
+        count = len(params)
+    else:
+        params = None
+        count = len(positions)
+    # the index only counts along U, same as before.
+    names = ['{}_{}_foll'.format(pName, (i % uCount) + 1 if positions is None else i + 1) for i in range(count)]
+    pins, report = props_pin_lib.pin_many_to_surface(obj, positions=positions, params=params, names=names, parent=oRoot, percentAttrs=True)
+
+    oFolls = []
+    for i, pin in enumerate(pins):
+        index = (i % uCount) + 1 if positions is None else i + 1
+        # the group and the joint sit exactly on the follicle, so they are made as children with no offset.
+        oLoc = mc.createNode('transform', name=pName + '_{}_grp'.format(index), parent=pin)
+        mc.createNode('joint', name=pName + '_{}_jnt'.format(index), parent=oLoc)
+        oFolls.append(pm.PyNode(pin))
 
     return oFolls
 
@@ -253,26 +275,39 @@ def skin_geometry(oJoints, oGeo, pName):
     return oSkin
 
 
-def create_a_tangent_curve(inputCurve, tangent='side'):
+def create_a_tangent_curve(inputCurve, tangent='side', frames='fixed'):
     '''
     'up' uses -Y as upvector to get a ribbon that is oriented horizontally.
     'side' finds the side tangent then uses that as an upvector, to get a ribbon that is oriented vertically.
+    frames='fixed' moves the whole curve sideways by the tangent of the first CV segment. Bendy curves can flip.
+    frames='transport' starts from the same side vector, then carries it down the curve with parallel-transport frames,
+    so every CV is moved sideways from its own part of the curve. That holds up through 180 bends.
     '''
     curveB = pm.duplicate(inputCurve, n=inputCurve.name().replace('crv','tangentcrv'))[0]
 
     # create a normalized tangent vector to move the new curve sideways.
     curveVector = curveB.cv[1].getPosition(space='world') - curveB.cv[0].getPosition(space='world')
-    #TODO: It might make more sense to always move tagentially to the bend in the curve. ie. towards the direction of the planar side. For example, if it bends up and down, tangent to the side. If you had a 180 bend, it could flip.
     if tangent == 'side':
         tangentPos = dt.cross(curveVector.normal(), dt.Vector(0,0,-1))
     else:
         tangentPos = dt.cross(curveVector.normal(), dt.Vector(0,-1,0))
-    pm.move(curveB.cv, tangentPos * 2.0, relative=True)
+
+    if frames == 'transport':
+        # sample densely, and include the param each CV pulls on the most, to read the side vector of every CV.
+        curve = props_nurbs_lib.NurbsCurve.from_maya(curveB)
+        cvParams = curve.greville_params()
+        params = np.union1d(np.linspace(*curve.param_range(), num=len(cvParams) * 8 + 1), cvParams)
+        normals = curve.transport_frames(params, list(tangentPos))[1]
+        newPositions = curve.cvs + normals[np.searchsorted(params, cvParams)] * 2.0
+        curveB.setCVs([dt.Point(*x) for x in newPositions], space='world')
+        curveB.updateCurve()
+    else:
+        pm.move(curveB.cv, tangentPos * 2.0, relative=True)
 
     return curveB
 
 
-def fixed_length_ik(sparseCurve, denseCurve, namePrefix, sparseCurveB=None, denseCurveB=None, tangent='side'):
+def fixed_length_ik(sparseCurve, denseCurve, namePrefix, sparseCurveB=None, denseCurveB=None, tangent='side', frames='transport'):
     '''
     Creates 2 splineIK chains. Those chains skin 2 more curves. Those curves create a loft which creates a ribbon with follicles.
     This gives you full rotation control like a ribbon IK. But fixed-length like spline-IK. SplineIK twist is start-to-end only. This is more flexible for twisting.
@@ -282,9 +317,9 @@ def fixed_length_ik(sparseCurve, denseCurve, namePrefix, sparseCurveB=None, dens
     densePoints = [x.getPosition(space='world') for x in denseCurve.cv]
 
     if not sparseCurveB:
-        sparseCurveB = create_a_tangent_curve(sparseCurve, tangent=tangent)
+        sparseCurveB = create_a_tangent_curve(sparseCurve, tangent=tangent, frames=frames)
     if not denseCurveB:
-        denseCurveB = create_a_tangent_curve(denseCurve, tangent=tangent)
+        denseCurveB = create_a_tangent_curve(denseCurve, tangent=tangent, frames=frames)
 
     sparsePointsB = [x.getPosition(space='world') for x in sparseCurveB.cv]
     densePointsB = [x.getPosition(space='world') for x in denseCurveB.cv]
@@ -320,21 +355,18 @@ def fixed_length_ik(sparseCurve, denseCurve, namePrefix, sparseCurveB=None, dens
             )
 
     # skin dense curves to dense joints, then manually set the weights because the last joint won't have any influence.
+    # each CV gets its own joint. The whole weight matrix is written at once, instead of a skinPercent per CV.
     skinCls = skin_geometry(controlJoints, sparseCurve, '{}_splineik_crv_A_skincluster'.format(namePrefix))
-    for i, each in enumerate(controlJoints):
-        pm.skinPercent( skinCls, sparseCurve.cv[i], transformValue=[(controlJoints[i], 1)])
+    props_skin_lib.set_skin_weights(skinCls, props_skin_lib.one_to_one_weights(skinCls), controlJoints)
 
     skinCls = skin_geometry(controlJoints, sparseCurveB, '{}_splineik_crv_B_skincluster'.format(namePrefix))
-    for i, each in enumerate(controlJoints):
-        pm.skinPercent( skinCls, sparseCurveB.cv[i], transformValue=[(controlJoints[i], 1)])
+    props_skin_lib.set_skin_weights(skinCls, props_skin_lib.one_to_one_weights(skinCls), controlJoints)
 
     skinCls = skin_geometry(denseJointsA, denseCurve, '{}_ribbon_crv_A_skincluster'.format(namePrefix))
-    for i, each in enumerate(denseJointsA):
-        pm.skinPercent( skinCls, denseCurve.cv[i], transformValue=[(denseJointsA[i], 1)])
+    props_skin_lib.set_skin_weights(skinCls, props_skin_lib.one_to_one_weights(skinCls), denseJointsA)
 
     skinCls = skin_geometry(denseJointsB, denseCurveB, '{}_ribbon_crv_B_skincluster'.format(namePrefix))
-    for i, each in enumerate(denseJointsB):
-        pm.skinPercent( skinCls, denseCurveB.cv[i], transformValue=[(denseJointsB[i], 1)])
+    props_skin_lib.set_skin_weights(skinCls, props_skin_lib.one_to_one_weights(skinCls), denseJointsB)
     
     # loft the dense curves
     oRibbon = pm.loft(
@@ -353,18 +385,9 @@ def fixed_length_ik(sparseCurve, denseCurve, namePrefix, sparseCurveB=None, dens
     
     # add follicles to the loft surface
 
-    folls = many_follicles(oRibbon[0], len(denseJointsA), 1)
-    build_twist_ramp(namePrefix, rigControlsGrp, [x.getChildren(type='transform')[0] for x in folls], twistAttrs=['rotateX'])
-
-    numSpans = oRibbon[0].spansUV.get()[0]
-    oNode = pm.createNode('closestPointOnSurface', n='ZZZTEMP')
-    oRibbon[0].worldSpace.connect(oNode.inputSurface, force=True)
-    for foll, loc in zip(folls, densePoints):
-        ### SNIPPET: Move a follicle to closest point near an object
-        oNode.inPosition.set(loc)
-        foll.u_param.set(oNode.parameterU.get() / oRibbon[0].spansU.get() * 100.0)
-        foll.v_param.set(oNode.parameterV.get() / oRibbon[0].spansV.get() * 100.0)
-    pm.delete(oNode)
+    # one follicle at the closest point to each dense point, all solved at once from the ribbon's CVs.
+    folls = many_follicles(oRibbon[0], len(denseJointsA), 1, positions=densePoints)
+    build_twist_ramp(namePrefix, rigControlsGrp, [x.getChildren(type='transform')[0] for x in folls], twistAttrs=['rotateX'], compact=True)
 
     # parent all the stuff under the rig group
     pm.parent(controlJoints[0], rigControlsGrp)
@@ -391,14 +414,14 @@ def fixed_length_ik(sparseCurve, denseCurve, namePrefix, sparseCurveB=None, dens
     return folls
     
 
-def ribbon_ik(sparseCurve, denseCurve, namePrefix, sparseCurveB=None, tangent='side'):
+def ribbon_ik(sparseCurve, denseCurve, namePrefix, sparseCurveB=None, tangent='side', frames='transport'):
     '''
     Creates a stretchy ribbon IK.
     '''
     rigGroup = pm.group(n='{}_ribbon_rig_grp'.format(namePrefix), em=True)
 
     if not sparseCurveB:
-        sparseCurveB = create_a_tangent_curve(sparseCurve, tangent=tangent)
+        sparseCurveB = create_a_tangent_curve(sparseCurve, tangent=tangent, frames=frames)
 
     sparsePoints = [x.getPosition(space='world') for x in sparseCurve.cv]
     sparsePointsB = [x.getPosition(space='world') for x in sparseCurveB.cv]
@@ -428,24 +451,15 @@ def ribbon_ik(sparseCurve, denseCurve, namePrefix, sparseCurveB=None, tangent='s
         )
     pm.delete(sparseCurveB)
     
+    # each row of CVs gets its own control joint.
     skinCls = skin_geometry(controlJoints, oRibbon[0], '{}_splineik_crv_A_skincluster'.format(namePrefix))
-    for i, each in enumerate(controlJoints):
-        pm.skinPercent( skinCls, oRibbon[0].cv[i], transformValue=[(controlJoints[i], 1)])
+    props_skin_lib.set_skin_weights(skinCls, props_skin_lib.one_to_one_weights(skinCls), controlJoints)
 
     # add follicles to the loft surface
 
-    folls = many_follicles(oRibbon[0], len(densePoints), 1)
-    build_twist_ramp(namePrefix, rigControlsGrp, [x.getParent().getChildren(type='transform')[0] for x in folls], twistAttrs=['rotateX'])
-
-    numSpans = oRibbon[0].spansUV.get()[0]
-    oNode = pm.createNode('closestPointOnSurface', n='ZZZTEMP')
-    oRibbon[0].worldSpace.connect(oNode.inputSurface, force=True)
-    for foll, loc in zip(folls, densePoints):
-        ### SNIPPET: Move a follicle to closest point near an object
-        oNode.inPosition.set(loc)
-        foll.u_param.set(oNode.parameterU.get() / oRibbon[0].spansU.get() * 100.0)
-        foll.v_param.set(oNode.parameterV.get() / oRibbon[0].spansV.get() * 100.0)
-    pm.delete(oNode)
+    # one follicle at the closest point to each dense point, all solved at once from the ribbon's CVs.
+    folls = many_follicles(oRibbon[0], len(densePoints), 1, positions=densePoints)
+    build_twist_ramp(namePrefix, rigControlsGrp, [x.getParent().getChildren(type='transform')[0] for x in folls], twistAttrs=['rotateX'], compact=True)
 
     # parent all the stuff under the rig group
     pm.parent(controlJoints[0], rigControlsGrp)
@@ -14,7 +14,8 @@ but the rigger can manually select, add and remove geo from a guide.
 
 #TODO: Solve how to deal with the tires and entire car turning. Currently this only works in translateZ.
 #TODO: Add options to set orientation of the vehicle. Currently this assumes the vehicle is pointing +Z
-#TODO: Add a surface-following scheme. OR a tool that "solves" wheel rotation after animation has been done.
+#TODO: Add a surface-following scheme.
+# wheel_spin_bake.py "solves" the wheel rotation after animation has been done.
 
 __version__ = '0.76'
 import traceback
@@ -42,9 +43,21 @@ import maya.OpenMaya as om
 import maya.OpenMayaUI as omui
 
 import props_icon_lib
+import props_geo_lib
+import props_skin_lib
+import build_plan
+import build_profiler
+import car_rig_plans
+import scene_backend
+import scene_snapshot
+import guide_meta
+import props_naming_lib
+import props_cmds_lib
 
 import os
 import math
+import json
+import hashlib
 #import envtools
 #import json
 from functools import wraps
@@ -80,7 +93,10 @@ def maya_main_window():
 
 class CarRiggingTools(QtWidgets.QDialog):
 
-    def __init__(self, parent=maya_main_window()):
+    def __init__(self, parent=None):
+        # the main window is found when the UI opens, not when this module is imported.
+        if parent is None:
+            parent = maya_main_window()
         super(CarRiggingTools, self).__init__(parent)
 
     def create(self):
@@ -297,22 +313,22 @@ class CarRiggingTools(QtWidgets.QDialog):
     def find_existing_guides(self):
         """Searches for existing guides when the GUI first opens and adds them to the list."""
 
-        # find any existing GIDs that already exist in the scene.
-        gidColl = [x for x in pm.ls('*__gid__', type='transform') if pm.objExists(x.name() + '.gid_type')]
+        # find any existing GIDs that already exist in the scene. The snapshot reads them all in one pass.
+        snapshot = scene_snapshot.get_snapshot()
 
         gid = {}
 
         for gidType in self.addButtonTypes:
-            gid[gidType] = [x for x in gidColl if x.gid_type.get() == gidType]
+            gid[gidType] = snapshot.by_type(gidType)
             for eachGid in gid[gidType]:
-                if pm.objExists(eachGid.name() + '.gid_basename'):
-                    if eachGid.gid_basename.get():
-                        gidName = eachGid.gid_basename.get()
+                if 'gid_basename' in eachGid.attrs:
+                    if eachGid.basename:
+                        gidName = eachGid.basename
                     else: gidName = 'DEBUG BASENAME WAS BLANK'
                 else:
                     gidName = 'DEBUG BASENAME ATTR MISSING'
 
-                self.oGidList[gidName] = [gidName, gidType, eachGid]
+                self.oGidList[gidName] = [gidName, gidType, pm.PyNode(eachGid.longName)]
                 if not gidName in self.oGidTable[gidType]:
                     self.oGidTable[gidType].append(gidName)
 
@@ -336,8 +352,7 @@ class CarRiggingTools(QtWidgets.QDialog):
         sideKey = {'l': 'left_', 'r': 'right_', 'm': '', 'x': ''} # turn the side letter into a side word.
         for oGeo in oGeoGroups:
             # find the biggest geo by boundingBox volume. Use it to name the guide.
-            sizeComp = [bb_volume(x) for x in oGeo]
-            biggestGeo = oGeo[sizeComp.index(max(sizeComp))]
+            biggestGeo = oGeo[props_geo_lib.biggest_box_index(props_geo_lib.get_bounding_boxes(oGeo))]
             #TODO: Check for name clashes first.
             # eg. l__front_seat__geo__ would become "left_front_seat"
             biggestBaseName = '{}'.format(biggestGeo)
@@ -347,6 +362,7 @@ class CarRiggingTools(QtWidgets.QDialog):
             else:
                 guideCounter += 1
                 eachGid = build_guide(geoType, biggestBaseName, oGeo)
+                scene_snapshot.invalidate_snapshot()
                 self.oGidList[biggestBaseName] = [biggestBaseName, geoType, eachGid]
                 if not biggestBaseName in self.oGidTable[geoType]:
                     self.oGidTable[geoType].append(biggestBaseName)
@@ -368,6 +384,13 @@ class CarRiggingTools(QtWidgets.QDialog):
 
     def auto_add_guides(self):
         """Automatically searches the geometry in the scene and builds default sets of guides."""
+        # every add_guide() refreshes the guide list. Share one snapshot until a guide is actually added.
+        with scene_snapshot.snapshot_scope():
+            self._auto_add_guides()
+        print('Vehicle guides successfully built.')
+
+
+    def _auto_add_guides(self):
         self.refresh_guide_data()
         geoTypes = {
             'body': '*_body_*_msh__',
@@ -384,7 +407,6 @@ class CarRiggingTools(QtWidgets.QDialog):
                 geoFilter = [x for x in geoFilter if not any([match in x.name() for match in ['steering', 'drive']])]
             self.add_guide(geoKey, geoFilter)
         self.refresh_guide_data()
-        print('Vehicle guides successfully built.')
 
 
     def update_meta_info(self, oGeo):
@@ -398,7 +420,7 @@ class CarRiggingTools(QtWidgets.QDialog):
         listCount = self.geoList.count()
         for i in xrange(listCount):
             self.geoList.takeItem(listCount-1-i) # take in reverse to avoid index errors
-        self.geoList.addItems([x for x in oGeo.gid_geo.get().split(',')])
+        self.geoList.addItems(guide_meta.read_guide_meta(oGeo).geo)
 
 
     def clear_meta_info(self):
@@ -425,20 +447,15 @@ class CarRiggingTools(QtWidgets.QDialog):
                 currentGuide = self.guideTable.currentItem()
                 guideName = currentGuide.text(0)
                 oGuide = self.oGidList[guideName][2]
-                guideGeo = oGuide.gid_geo.get().split(',')
-                [guideGeo.pop(i) for i, x in enumerate(guideGeo) if x == ''] # filter out any blanks
+                guideMeta = guide_meta.read_guide_meta(oGuide)
                 # Get selected geo. Filter for 1: only the transforms who 2: have a mesh shape
                 firstFilter = [x for x in pm.selected(type='transform') if x.getShape()]
                 geoFilter = [x for x in firstFilter if type(x.getShape()) == pm.nodetypes.Mesh]
-                for eachGeo in geoFilter:
-                    geoName = eachGeo.name()
-                    # 1: check if the geo is in the list
-                    if geoName not in guideGeo:
-                        # 2: append the geo to the list
-                        guideGeo.append(geoName)
-                # 3: write the list to the metalist
-                oGuide.gid_geo.set(','.join(guideGeo))
-                # 4: refresh the geo table list
+                # 1: append any geo that isn't in the guide yet
+                guideMeta.add_geo([x.name() for x in geoFilter])
+                # 2: write it back to the guide
+                guide_meta.write_guide_meta(oGuide, guideMeta)
+                # 3: refresh the geo table list
                 self.update_meta_info(self.oGidList[guideName][2])
         else:
             print('No guide is selected.')
@@ -450,15 +467,11 @@ class CarRiggingTools(QtWidgets.QDialog):
                 currentGuide = self.guideTable.currentItem()
                 guideName = currentGuide.text(0)
                 oGuide = self.oGidList[guideName][2]
-                guideGeo = oGuide.gid_geo.get().split(',')
-                [guideGeo.pop(i) for i, x in enumerate(guideGeo) if x == ''] # filter out any blanks
-                for eachGeo in self.geoList.selectedItems():
-                    geoName = eachGeo.text()
-                    # 1: delete the geo from the metalist
-                    if geoName in guideGeo:
-                        guideGeo.pop(guideGeo.index(geoName))
-                # 2: write the metalist back to the meta attribute
-                oGuide.gid_geo.set(','.join(guideGeo))
+                guideMeta = guide_meta.read_guide_meta(oGuide)
+                # 1: delete the geo from the guide
+                guideMeta.remove_geo([x.text() for x in self.geoList.selectedItems()])
+                # 2: write it back to the guide
+                guide_meta.write_guide_meta(oGuide, guideMeta)
                 # 3: refresh the geo table list
                 self.update_meta_info(self.oGidList[guideName][2])
         else:
@@ -472,7 +485,7 @@ class CarRiggingTools(QtWidgets.QDialog):
             curSel = each.text(0)
             category = each.parent().text(0)
             oGuide = self.oGidList[curSel][2]
-            guideGeo = oGuide.gid_geo.get().split(',')
+            guideGeo = guide_meta.read_guide_meta(oGuide).geo
             ### TODO: 2. Check first for geo guide conflicts (geo in 2 guides, except body.)
             ### If a conflict, how do I solve that?
             ### 3. delete the existing guide
@@ -553,9 +566,7 @@ class CarRiggingTools(QtWidgets.QDialog):
             curSel = curItem.text(0)
             # if not curItem.parent() then this is a header item
             if curSel in self.oGidList and curItem.parent():
-                metaGeo = self.oGidList[curSel][2].gid_geo.get()
-                geoList = metaGeo.split(',')
-                [geoList.pop(i) for i, x in enumerate(geoList) if x == ''] # filter out any blanks
+                geoList = guide_meta.read_guide_meta(self.oGidList[curSel][2]).geo
                 if geoList:
                     pm.select(geoList)
                 else:
@@ -591,71 +602,29 @@ def find_closest_vert(geo, pos):
         geoList = geo
     else:
         geoList = [geo]
-    closestVerts = []
-    for eachGeo in geoList:
-        nodeDagPath = om.MObject()
-        selectionList = om.MSelectionList()
-        selectionList.add(eachGeo.name())
-        nodeDagPath = om.MDagPath()
-        selectionList.getDagPath(0, nodeDagPath)
-
-        mfnMesh = om.MFnMesh(nodeDagPath)
-
-        pointA = om.MPoint(pos[0], pos[1], pos[2])
-        pointB = om.MPoint()
-        space = om.MSpace.kWorld
-
-        util = om.MScriptUtil()
-        util.createFromInt(0)
-        idPointer = util.asIntPtr()
-
-        mfnMesh.getClosestPoint(pointA, pointB, space, idPointer)
-        idx = om.MScriptUtil(idPointer).asInt()
-
-        # getClosestPoint() finds a point on a face. Next find the closest vertex to that point.
-        faceVerts = [eachGeo.vtx[i] for i in eachGeo.f[idx].getVertices()]
-        # measure each from the original pos
-        compareFaceVerts = [(pos - x.getPosition(space='world')).length() for x in faceVerts]
-        # and get the index of the shortest one
-        closestIndex = compareFaceVerts.index(min(compareFaceVerts))
-        closestVerts.append(faceVerts[closestIndex])
-        
-    # Now we have the closest vertex for each geo. Find the closest out of those ones.
-    compareVerts = [(pos - x.getPosition(space='world')).length() for x in closestVerts]
-    # and get the index of the shortest one
-    closestIndex = compareVerts.index(min(compareVerts))
-    finalClosest = closestVerts[closestIndex]
-    return (finalClosest, finalClosest.getPosition())
+    # each mesh is exported once into a cached KD-tree, instead of walking the face verts with PyMEL.
+    geoIndices, vertIndices, vertPositions = props_geo_lib.closest_vertices(geoList, [pos])
+    finalClosest = geoList[geoIndices[0]].vtx[int(vertIndices[0])]
+    return (finalClosest, dt.Point(vertPositions[0].tolist()))
+
+
+def closest_vert_positions(geoColl, positions):
+    """The world position of the closest vertex to each position, as dt.Points, all answered in one query."""
+    geoIndices, vertIndices, vertPositions = props_geo_lib.closest_vertices(list(geoColl), [list(x) for x in positions])
+    return [dt.Point(x.tolist()) for x in vertPositions]
 
 
 def add_a_keyable_attribute(myObj, oDataType, oParamName, oMin=None, oMax=None, oDefault=0.0):
     """Adds an attribute that shows up in the channel box; returns the newly created attribute."""
-    oFullName = '.'.join( [str(myObj),oParamName] )
-    if pm.objExists(oFullName):
-        return pm.PyNode(oFullName)
-    else:
-        myObj.addAttr(oParamName, at=oDataType, keyable=True, dv=oDefault)
-        myAttr = pm.PyNode(myObj + '.' + oParamName)
-        if oMin != None:
-            myAttr.setMin(oMin)
-        if oMax != None:
-            myAttr.setMax(oMax)
-        pm.setAttr(myAttr, e=True, channelBox=True)
-        pm.setAttr(myAttr, e=True, keyable=True)
-        return myAttr
+    # made through cmds. Only the attribute that is handed back is a PyMEL object.
+    plugs = props_cmds_lib.add_keyable_attributes([myObj], oDataType, oParamName, oMin, oMax, oDefault)
+    return pm.Attribute(plugs[0])
 
 
 def add_meta_attribute(myObj, oParamName, oValue):
     """Adds a string attribute into "extra" attributes. Useful for meta information."""
-    oFullName = '.'.join( [str(myObj),oParamName] )
-    if pm.objExists(oFullName):
-        pm.PyNode(str(oFullName)).set(oValue) # if it exists, just set the value
-        return pm.PyNode(oFullName)
-    else:
-        myObj.addAttr(oParamName, dt='string')
-        oParam = pm.PyNode(str(oFullName))
-        oParam.set(oValue)
-        return oParam
+    plugs = props_cmds_lib.set_string_attributes([myObj], oParamName, oValue)
+    return pm.Attribute(plugs[0])
 
 
 def lock_main_params(oNode, pLocked=False, pChannelBox=True, pKeyable=True, pParams=None):
@@ -665,29 +634,24 @@ def lock_main_params(oNode, pLocked=False, pChannelBox=True, pKeyable=True, pPar
     example: lock_main_params('locator1', pLocked=True, pParams=['.tx','.rz'])
     example: lock_main_params(pm.PyNode('locator1'), pLocked=False, pChannel=True)
     """
-    if pParams == None:
-        pParams = ['.tx','.ty','.tz','.rx','.ry','.rz','.sx','.sy','.sz','.v']
     if oNode:
-        for param in pParams:
-            try:
-                pm.setAttr( pm.Attribute(oNode + param), keyable = pKeyable)
-                pm.setAttr( pm.Attribute(oNode + param), channelBox = pChannelBox)
-                pm.setAttr( pm.Attribute(oNode + param), lock = pLocked)
-            except:
-                print('{} lock failed on node: {}.'.format(param, oNode))
-                continue
+        # one cmds.setAttr per param, instead of three PyMEL Attributes.
+        failed = props_cmds_lib.lock_params([oNode], pLocked, pChannelBox, pKeyable, pParams)
+        for plug in failed:
+            print('.{} lock failed on node: {}.'.format(plug.rsplit('.', 1)[-1], oNode))
 
 
 def create_rig_joint(jointName='unnamed_sjnt', radius=1.0):
-    pm.select(None)
-    oJoint = pm.joint(n=jointName, r=radius)
+    oJoint = pm.PyNode(props_cmds_lib.create_joints([jointName], radius=radius)[0])
     pm.select(None)
     return oJoint
 
 
-def skin_geometry(oJoints, oGeo, pName):
-    """A simple skinCluster command with my preferred prefs."""
-    pm.skinCluster(oJoints, oGeo,
+def skin_geometry(oJoints, oGeo, pName, weights=None):
+    """A simple skinCluster command with my preferred prefs.
+    weights is an optional (vertices x joints) matrix, written in one go after binding. See props_skin_lib.
+    """
+    oSkin = pm.skinCluster(oJoints, oGeo,
             bindMethod=0, # closest distance
             dropoffRate=1.0,
             maximumInfluences=1,
@@ -698,6 +662,9 @@ def skin_geometry(oJoints, oGeo, pName):
             weightDistribution=1, # neighbors
             name=pName,
         )
+    if weights is not None:
+        props_skin_lib.set_skin_weights(oSkin, weights, oJoints)
+    return oSkin
 
 
 def find_group_bb(geoColl):
@@ -706,17 +673,17 @@ def find_group_bb(geoColl):
     I wrote this specifically for the wheel geometry. It might not be very useful as a generic function.
     """
     if geoColl:
-        # find the Y value of the bottom of the tire
-        bottomBB = min([x.getBoundingBox().min()[1] for x in geoColl])
-
         # find the center of the combined mass of the whole geometry group
-        totalBox = dt.BoundingBox()
-        [ totalBox.expand(x.getBoundingBox().min()) for x in geoColl]
-        [ totalBox.expand(x.getBoundingBox().max()) for x in geoColl]
+        geoBoxes = props_geo_lib.get_bounding_boxes(geoColl)
+        totalBB = props_geo_lib.total_bounding_box(geoBoxes)
+        totalBox = props_geo_lib.to_bounding_box(totalBB)
         bbCenter = totalBox.center()
 
+        # find the Y value of the bottom of the tire
+        bottomBB = float(totalBB[1])
+
         # find the inner and outer X value of the width of the tire
-        edgesBB = [ totalBox.min()[0], totalBox.max()[0] ]
+        edgesBB = [ float(totalBB[0]), float(totalBB[3]) ]
         if edgesBB[0] < 0.0:
             # reverse X if the wheel is on the left vs. the right side.
             edgesBBFlip = list(reversed(edgesBB))
@@ -730,8 +697,7 @@ def find_group_bb(geoColl):
 
 
 def bb_volume(obj):
-    oBB = obj.getBoundingBox()
-    return oBB.width() * oBB.height() * oBB.depth()
+    return float(props_geo_lib.box_volumes(props_geo_lib.get_bounding_boxes([obj]))[0])
 
 
 def group_geometry_masses(geoColl):
@@ -740,56 +706,24 @@ def group_geometry_masses(geoColl):
     eg. A intersects with B. B intersects with A and C. C intersects with B.
     [ABC] is a single group. Even if A and C do not intersect.
     """
-    oGeoColl = [pm.PyNode(x) for x in geoColl] # initialize as PyNodes.
-    bbGroups = []
-    smallBBs = []
-    for i, each in enumerate(oGeoColl):
-        # slightly shrink the boundingBox to avoid clumping doors which are modelled right beside each other.
-        fullBB = each.getBoundingBox()
-        smallBB = dt.BoundingBox()
-        
-        # next, I only want to scale the 2 longest sides. 2 doors beside each other should shrink.
-        # But a handle that is sitting on the broad side of the door should not.
-        fullScale = [fullBB.width(), fullBB.height(), fullBB.depth()]
-        
-        # get the shortest axis with an integer truth-table. example: [0, 0, 1] means Z is the shortest width
-        shortTrue = [x == min(fullScale) for x in fullScale]
-        # use the truth table as an index to choose whether to use the center or edge
-        for axis in fullBB:
-            comparisonPos = [
-                [fullBB.center()[0], axis[0]][ shortTrue[0] ],
-                [fullBB.center()[1], axis[1]][ shortTrue[1] ],
-                [fullBB.center()[2], axis[2]][ shortTrue[2] ],
-                ]
-            # scale the BB relative to its center point.
-            smallBB.expand(get_midpoint(axis, comparisonPos, 0.03)) # the smaller the number, the less the BB shrinks.
-        smallBBs.append(smallBB)
-        
-    for i, each in enumerate(oGeoColl):
-        group = [x for j, x in enumerate(oGeoColl) if smallBBs[i].intersects(smallBBs[j])]
-        bbGroups.append(group)
-    # iterate over each geo again. Gather each group that it belongs to in one joined group.
-    for each in oGeoColl:
-        # find the index of each group that contains this geo. Reverse the matches so I can pop them safely later.
-        matchingGroups = list(reversed(sorted( [i for i, x in enumerate(bbGroups) if each in x] )))
-        # Create a new list of the matching groups. This clumps all the matching groups together.
-        newList = [bbGroups[i] for i in matchingGroups]
-        # Cycle through the list of lists and then use set() to filter out duplicates.
-        newListUnique = list(set( [item for subitem in newList for item in subitem] ))
-        # Then pop those old groups out of bbGroups, leaving only the clumps.
-        [bbGroups.pop(i) for i in matchingGroups]
-        # The append the clumped group to bbGroups
-        bbGroups.append(newListUnique)
-    return bbGroups
+    # initialize as PyNodes, and skip any geo that was passed twice.
+    oGeoColl = []
+    seen = set()
+    for each in [pm.PyNode(x) for x in geoColl]:
+        if each.longName() not in seen:
+            seen.add(each.longName())
+            oGeoColl.append(each)
+
+    # slightly shrink the boundingBox to avoid clumping doors which are modelled right beside each other.
+    smallBBs = props_geo_lib.shrink_bounding_boxes(props_geo_lib.get_bounding_boxes(oGeoColl), 0.03)
+
+    # sweep-and-prune the boxes and merge every intersecting pair with a union-find.
+    bbGroups = props_geo_lib.cluster_boxes(smallBBs)
+    return [[oGeoColl[i] for i in group] for group in bbGroups]
 
 
 def chain_parent(oColl):
-    for oParent, oChild in zip(oColl[0:-1], oColl[1:]):
-        try:
-            pm.parent(oChild, None)
-            pm.parent(oChild, oParent)
-        except:
-            continue
+    props_cmds_lib.chain_parent(oColl)
 
 
 def pnt_ws(pnt):
@@ -847,17 +781,17 @@ def cEasing(bx, by, cx, cy, density=10, direction='up'):
 #################################################
 
 
+@build_profiler.profile
 def build_body_guide(section, basename, geoColl, guideParent):
-    constraintParent = pm.PyNode('x__element__gid_driven__grp__')
-    totalBox = dt.BoundingBox()
-    [ totalBox.expand(x.getBoundingBox().min()) for x in geoColl ]
-    [ totalBox.expand(x.getBoundingBox().max()) for x in geoColl ]
+    constraintParent = props_naming_lib.find_node('x', 'element', 'gid_driven', 'grp')
+    geoBoxes = props_geo_lib.get_bounding_boxes(geoColl)
+    totalBB = props_geo_lib.total_bounding_box(geoBoxes)
+    totalBox = props_geo_lib.to_bounding_box(totalBB)
 
     side = 'm'
 
     # find the biggest geo by boundingBox volume
-    sizeComp = [bb_volume(x) for x in geoColl]
-    biggestGeo = geoColl[sizeComp.index(max(sizeComp))]
+    biggestGeo = geoColl[props_geo_lib.biggest_box_index(geoBoxes)]
 
     scaleFactor = [1.25, 1.0, 1.05]
     controlScale = [totalBox.width() * scaleFactor[0], 1.0, totalBox.depth() * scaleFactor[2]]
@@ -876,14 +810,16 @@ def build_body_guide(section, basename, geoColl, guideParent):
             'square',
             '{side}__{section}__{base}_main__gid__'.format(**nameStructure),
             controlScale,
-            offset=controlOffset
+            offset=controlOffset,
+            color=17
             )
 
     ### PARTS ###
     oBody = props_icon_lib.create_control_icon(
             'square',
             '{side}__{section}__{base}_cog__gidloc__'.format(**nameStructure),
-            controlScale
+            controlScale,
+            color=18
             )
 
     # connect a meta network which will be used in the build stage.
@@ -892,13 +828,13 @@ def build_body_guide(section, basename, geoColl, guideParent):
     oMeta = add_meta_attribute(oRig, 'gid_basename', basename)
     oMeta = add_meta_attribute(oRig, 'gid_front_side', 'mid')
     oMeta = add_meta_attribute(oRig, 'gid_ctrl_name', '{}__{}'.format(side, basename))
-    oMetaRoot = add_meta_attribute(oRigRoot, 'gid_root', 'meta_' + oRigRoot.name().split('__')[2])
-    oMetaRootSource = add_meta_attribute(oRig, 'gid_root', 'meta_' + oRigRoot.name().split('__')[2])
+    oMetaRoot = add_meta_attribute(oRigRoot, 'gid_root', props_naming_lib.meta_name(oRigRoot))
+    oMetaRootSource = add_meta_attribute(oRig, 'gid_root', props_naming_lib.meta_name(oRigRoot))
     oMetaGeo = add_meta_attribute(oRig, 'gid_geo', ','.join([str(x) for x in geoColl]))
     oMetaRootSource.connect(oMetaRoot)
 
     for oNode in [oBody]: # this is a list for if I add additional GID controls later
-        metaName = 'meta_' + oNode.name().split('__')[2]
+        metaName = props_naming_lib.meta_name(oNode)
         metaAttrName = metaName.replace(basename, section)
         oMeta = add_meta_attribute(oNode, metaAttrName, metaAttrName)
         oMetaRig = add_meta_attribute(oRig, metaAttrName, metaAttrName)
@@ -910,44 +846,27 @@ def build_body_guide(section, basename, geoColl, guideParent):
     oBody.ty.set((totalBox.min()[1] + totalBox.center()[1]) * 0.5) # halfway between center and bottom
     oBody.tz.set(controlOffset[2])
 
-    oRig.getShape().overrideEnabled.set(True)
-    oRig.getShape().overrideColor.set(17)
-    oBody.getShape().overrideEnabled.set(True)
-    oBody.getShape().overrideColor.set(18)
-
     return oRig
 
 
+@build_profiler.profile
 def build_wheel_guide(section, basename, geoColl, guideParent, initRadius=1.0):
     """Creates a simple guide rig for placing a tire rig.
     Also chooses smart default positions based on the bounding box of the tire geo.
     """
-    constraintParent = pm.PyNode('x__element__gid_driven__grp__')
+    constraintParent = props_naming_lib.find_node('x', 'element', 'gid_driven', 'grp')
 
-    totalBox = dt.BoundingBox()
-    [ totalBox.expand(x.getBoundingBox().min()) for x in geoColl ]
-    [ totalBox.expand(x.getBoundingBox().max()) for x in geoColl ]
+    geoBoxes = props_geo_lib.get_bounding_boxes(geoColl)
+    totalBB = props_geo_lib.total_bounding_box(geoBoxes)
+    totalBox = props_geo_lib.to_bounding_box(totalBB)
 
-    if totalBox.center()[0] > 0.00:
-        rigFlip = 1.0
-        side = 'l'
-    elif totalBox.center()[0] == 0.0:
-        rigFlip = 1.0
-        side = 'm'
-    else:
-        rigFlip = -1.0
-        side = 'r'
+    side = props_geo_lib.classify_sides(totalBB)[0]
+    rigFlip = -1.0 if side == 'r' else 1.0
 
-    if totalBox.center()[2] > 0.05:
-        frontOrBack = 'front'
-    elif totalBox.center()[2] == 0.0:
-        frontOrBack = 'mid'
-    else:
-        frontOrBack = 'back'
+    frontOrBack = props_geo_lib.classify_fronts(totalBB, 0.05)[0]
 
     # find the biggest geo by boundingBox volume
-    sizeComp = [bb_volume(x) for x in geoColl]
-    biggestGeo = geoColl[sizeComp.index(max(sizeComp))]
+    biggestGeo = geoColl[props_geo_lib.biggest_box_index(geoBoxes)]
 
     # Store the components of names in a dictionary for readable formatting strings.
     nameStructure = {
@@ -989,16 +908,16 @@ def build_wheel_guide(section, basename, geoColl, guideParent, initRadius=1.0):
     oMeta = add_meta_attribute(oRig, 'gid_ctrl_name', '{side}__{front}_{base}'.format(**nameStructure))
     oMetaRoot = add_meta_attribute(
             oRigRoot, 'gid_root',
-            'meta_' + oRigRoot.name().split('__')[2].replace(frontOrBack + '_','')
+            props_naming_lib.meta_name(oRigRoot, remove=frontOrBack + '_')
             )
     oMetaRootSource = add_meta_attribute(
             oRig, 'gid_root',
-            'meta_' + oRigRoot.name().split('__')[2].replace(frontOrBack + '_','')
+            props_naming_lib.meta_name(oRigRoot, remove=frontOrBack + '_')
             )
     oMetaGeo = add_meta_attribute(oRig, 'gid_geo', ','.join([str(x) for x in geoColl]))
     oMetaRootSource.connect(oMetaRoot)
     for oNode in partsColl:
-        metaName = 'meta_' + oNode.name().split('__')[2]
+        metaName = props_naming_lib.meta_name(oNode)
         metaAttrName = metaName.replace(basename, section).replace(frontOrBack + '_','')
         oMeta = add_meta_attribute(oNode, metaAttrName, metaAttrName)
         oMetaRig = add_meta_attribute(oRig, metaAttrName, metaAttrName)
@@ -1059,40 +978,25 @@ def build_wheel_guide(section, basename, geoColl, guideParent, initRadius=1.0):
     return oRig
 
 
+@build_profiler.profile
 def build_door_guide(section, basename, geoColl, guideParent):
     """Build a door guide. Use the first geo in geoColl as the main door.
     The follow geo will be accessories, windows, mirrors, etc.
     """
-    constraintParent = pm.PyNode('x__element__gid_driven__grp__')
+    constraintParent = props_naming_lib.find_node('x', 'element', 'gid_driven', 'grp')
 
-    totalBox = geoColl[0].getBoundingBox()
-    totalBox = dt.BoundingBox()
-    [ totalBox.expand(x.getBoundingBox().min()) for x in geoColl ]
-    [ totalBox.expand(x.getBoundingBox().max()) for x in geoColl ]
+    geoBoxes = props_geo_lib.get_bounding_boxes(geoColl)
+    totalBB = props_geo_lib.total_bounding_box(geoBoxes)
+    totalBox = props_geo_lib.to_bounding_box(totalBB)
 
-    if totalBox.center()[0] > 0.0:
-        rigFlip = 1.0
-        side = 'l'
-    elif totalBox.center()[0] == 0.0:
-        rigFlip = 1.0
-        side = 'm'
-    else:
-        rigFlip = -1.0
-        side = 'r'
-
-    if totalBox.center()[2] > 0.0:
-        frontOrBack = 'front'
-        rigFront = 1.0
-    elif totalBox.center()[2] == 0.0:
-        frontOrBack = 'mid'
-        rigFront = -1.0
-    else:
-        frontOrBack = 'back'
-        rigFront = -1.0
+    side = props_geo_lib.classify_sides(totalBB)[0]
+    rigFlip = -1.0 if side == 'r' else 1.0
+
+    frontOrBack = props_geo_lib.classify_fronts(totalBB, 0.0)[0]
+    rigFront = 1.0 if frontOrBack == 'front' else -1.0
 
     # find the biggest geo by boundingBox volume
-    sizeComp = [bb_volume(x) for x in geoColl]
-    biggestGeo = geoColl[sizeComp.index(max(sizeComp))]
+    biggestGeo = geoColl[props_geo_lib.biggest_box_index(geoBoxes)]
 
     # Store the components of names in a dictionary for readable formatting strings.
     nameStructure = {
@@ -1121,16 +1025,16 @@ def build_door_guide(section, basename, geoColl, guideParent):
     oMeta = add_meta_attribute(oRig, 'gid_ctrl_name', '{side}__{front}_{base}'.format(**nameStructure))
     oMetaRoot = add_meta_attribute(
             oRigRoot, 'gid_root',
-            'meta_' + oRigRoot.name().split('__')[2].replace(frontOrBack + '_','')
+            props_naming_lib.meta_name(oRigRoot, remove=frontOrBack + '_')
             )
     oMetaRootSource = add_meta_attribute(
             oRig, 'gid_root',
-            'meta_' + oRigRoot.name().split('__')[2].replace(frontOrBack + '_','')
+            props_naming_lib.meta_name(oRigRoot, remove=frontOrBack + '_')
             )
     oMetaGeo = add_meta_attribute(oRig, 'gid_geo', ','.join([str(x) for x in geoColl]))
     oMetaRootSource.connect(oMetaRoot)
     for oNode in []:
-        metaName = 'meta_' + oNode.name().split('__')[2]
+        metaName = props_naming_lib.meta_name(oNode)
         metaAttrName = metaName.replace(basename, section).replace(frontOrBack + '_','')
         oMeta = add_meta_attribute(oNode, metaAttrName, metaAttrName)
         oMetaRig = add_meta_attribute(oRig, metaAttrName, metaAttrName)
@@ -1153,7 +1057,7 @@ def build_door_guide(section, basename, geoColl, guideParent):
             closestPos = [totalBox.max()[0] + (8.0 * rigFlip), totalBox.center()[1], zPos + (1.0 * rigFront)]
         else:
             closestPos = [totalBox.min()[0] + (8.0 * rigFlip), totalBox.center()[1], zPos + (1.0 * rigFront)]
-    _, hingePos = find_closest_vert(geoColl, dt.Vector(closestPos))
+    hingePos, = closest_vert_positions(geoColl, [closestPos])
     oRig.setTranslation(hingePos, space='world')
     if side == 'l':
         oRig.rx.set(180)
@@ -1168,28 +1072,21 @@ def build_door_guide(section, basename, geoColl, guideParent):
     return oRig
 
 
+@build_profiler.profile
 def build_steering_guide(section, basename, geoColl, guideParent):
-    constraintParent = pm.PyNode('x__element__gid_driven__grp__')
+    constraintParent = props_naming_lib.find_node('x', 'element', 'gid_driven', 'grp')
 
-    totalBox = dt.BoundingBox()
-    [ totalBox.expand(x.getBoundingBox().min()) for x in geoColl ]
-    [ totalBox.expand(x.getBoundingBox().max()) for x in geoColl ]
+    geoBoxes = props_geo_lib.get_bounding_boxes(geoColl)
+    totalBB = props_geo_lib.total_bounding_box(geoBoxes)
+    totalBox = props_geo_lib.to_bounding_box(totalBB)
 
     pos = [totalBox.center()[0], totalBox.max()[1], totalBox.min()[2]]
 
-    if totalBox.center()[0] > 0.0:
-        rigFlip = 1.0
-        side = 'l'
-    elif totalBox.center()[0] == 0.0:
-        rigFlip = 1.0
-        side = 'm'
-    else:
-        rigFlip = -1.0
-        side = 'r'
+    side = props_geo_lib.classify_sides(totalBB)[0]
+    rigFlip = -1.0 if side == 'r' else 1.0
 
     # find the biggest geo by boundingBox volume
-    sizeComp = [bb_volume(x) for x in geoColl]
-    biggestGeo = geoColl[sizeComp.index(max(sizeComp))]
+    biggestGeo = geoColl[props_geo_lib.biggest_box_index(geoBoxes)]
 
     # Store the components of names in a dictionary for readable formatting strings.
     nameStructure = {
@@ -1214,13 +1111,13 @@ def build_steering_guide(section, basename, geoColl, guideParent):
     oMeta = add_meta_attribute(oRig, 'gid_basename', basename)
     oMeta = add_meta_attribute(oRig, 'gid_front_side', 'mid')
     oMeta = add_meta_attribute(oRig, 'gid_ctrl_name', '{side}__{base}'.format(**nameStructure))
-    oMetaRoot = add_meta_attribute(oRigRoot, 'gid_root', 'meta_' + oRigRoot.name().split('__')[2])
-    oMetaRootSource = add_meta_attribute(oRig, 'gid_root', 'meta_' + oRigRoot.name().split('__')[2])
+    oMetaRoot = add_meta_attribute(oRigRoot, 'gid_root', props_naming_lib.meta_name(oRigRoot))
+    oMetaRootSource = add_meta_attribute(oRig, 'gid_root', props_naming_lib.meta_name(oRigRoot))
     oMetaGeo = add_meta_attribute(oRig, 'gid_geo', ','.join([str(x) for x in geoColl]))
     oMetaRootSource.connect(oMetaRoot)
 
     for oNode in [oSteeringBase, oSteeringWidth]:
-        metaName = 'meta_' + oNode.name().split('__')[2]
+        metaName = props_naming_lib.meta_name(oNode)
         metaAttrName = metaName.replace(basename, section)
         oMeta = add_meta_attribute(oNode, metaAttrName, metaAttrName)
         oMetaRig = add_meta_attribute(oRig, metaAttrName, metaAttrName)
@@ -1237,10 +1134,11 @@ def build_steering_guide(section, basename, geoColl, guideParent):
 
     # sample above and below the steering wheel to find the angle of the steering column.
     # This will likely fail except in circular steering wheels.
-    closestPos = [pos[0], pos[1] + 4.0, pos[2]]
-    _, topSteeringPos = find_closest_vert(geoColl, dt.Vector(closestPos))
-    closestPos = [pos[0], totalBox.min()[1], pos[2] - 4.0]
-    _, bottomSteeringPos = find_closest_vert(geoColl, dt.Vector(closestPos))
+    # the column samples depend on these two, so they are a second query.
+    topSteeringPos, bottomSteeringPos = closest_vert_positions(geoColl, [
+            [pos[0], pos[1] + 4.0, pos[2]],
+            [pos[0], totalBox.min()[1], pos[2] - 4.0],
+            ])
 
     midSteeringPos = (topSteeringPos + bottomSteeringPos) * 0.5
     # find a vector perpindicular to the steering wheel to find the position down the steering column geo.
@@ -1248,8 +1146,10 @@ def build_steering_guide(section, basename, geoColl, guideParent):
     crossVector = findCross.normal() * (bottomSteeringPos-topSteeringPos).length()
     crossPos = midSteeringPos + (bottomSteeringPos - topSteeringPos).cross(crossVector)
     # sample slightly above and below the bottom column, to try and find the center position
-    _, columnPosTop = find_closest_vert(geoColl, dt.Vector(crossPos + dt.Vector(0.0, 0.5, 0.0)))
-    _, columnPosBottom = find_closest_vert(geoColl, dt.Vector(crossPos + dt.Vector(0.0, -0.5, 0.0)))
+    columnPosTop, columnPosBottom = closest_vert_positions(geoColl, [
+            crossPos + dt.Vector(0.0, 0.5, 0.0),
+            crossPos + dt.Vector(0.0, -0.5, 0.0),
+            ])
     # columnPos is the bottom of the steering column
     columnPos = (columnPosTop + columnPosBottom) * 0.5
 
@@ -1284,33 +1184,21 @@ def build_steering_guide(section, basename, geoColl, guideParent):
     return oRig
 
 
+@build_profiler.profile
 def build_seat_guide(section, basename, geoColl, guideParent):
-    constraintParent = pm.PyNode('x__element__gid_driven__grp__')
+    constraintParent = props_naming_lib.find_node('x', 'element', 'gid_driven', 'grp')
 
-    totalBox = dt.BoundingBox()
-    [ totalBox.expand(x.getBoundingBox().min()) for x in geoColl]
-    [ totalBox.expand(x.getBoundingBox().max()) for x in geoColl]
+    geoBoxes = props_geo_lib.get_bounding_boxes(geoColl)
+    totalBB = props_geo_lib.total_bounding_box(geoBoxes)
+    totalBox = props_geo_lib.to_bounding_box(totalBB)
 
-    if totalBox.center()[0] > 0.0:
-        rigFlip = 1.0
-        side = 'l'
-    elif totalBox.center()[0] == 0.0:
-        rigFlip = 1.0
-        side = 'm'
-    else:
-        rigFlip = -1.0
-        side = 'r'
+    side = props_geo_lib.classify_sides(totalBB)[0]
+    rigFlip = -1.0 if side == 'r' else 1.0
 
-    if totalBox.center()[2] > 0.05:
-        frontOrBack = 'front'
-    elif totalBox.center()[2] == 0.0:
-        frontOrBack = 'mid'
-    else:
-        frontOrBack = 'back'
+    frontOrBack = props_geo_lib.classify_fronts(totalBB, 0.05)[0]
 
     # find the biggest geo by boundingBox volume
-    sizeComp = [bb_volume(x) for x in geoColl]
-    biggestGeo = geoColl[sizeComp.index(max(sizeComp))]
+    biggestGeo = geoColl[props_geo_lib.biggest_box_index(geoBoxes)]
 
     scaleFactor = [1.0, 1.0, 1.0]
 
@@ -1329,7 +1217,8 @@ def build_seat_guide(section, basename, geoColl, guideParent):
     oRig = props_icon_lib.create_control_icon(
             'square',
             '{side}__{section}__{front}_{base}__gid__'.format(**nameStructure),
-            [totalBox.width() + scaleFactor[0], 1.0, totalBox.depth() + scaleFactor[2]]
+            [totalBox.width() + scaleFactor[0], 1.0, totalBox.depth() + scaleFactor[2]],
+            color=6 if rigFlip == 1.0 else 13
             )
 
     ### PARTS ###
@@ -1337,7 +1226,8 @@ def build_seat_guide(section, basename, geoColl, guideParent):
     oSeatBack = props_icon_lib.create_control_icon(
             'square',
             '{side}__{section}__{front}_{base}_rear_pivot__gidloc__'.format(**nameStructure),
-            [totalBox.width() + scaleFactor[0], 1.0, totalBox.depth() + scaleFactor[2]]
+            [totalBox.width() + scaleFactor[0], 1.0, totalBox.depth() + scaleFactor[2]],
+            color=18 if rigFlip == 1.0 else 20
             )
 
     # connect a meta network which will be used in the build stage.
@@ -1348,17 +1238,17 @@ def build_seat_guide(section, basename, geoColl, guideParent):
     oMeta = add_meta_attribute(oRig, 'gid_ctrl_name', '{side}__{front}_{base}'.format(**nameStructure))
     oMetaRoot = add_meta_attribute(
             oRigRoot, 'gid_root',
-            'meta_' + oRigRoot.name().split('__')[2].replace(frontOrBack + '_','')
+            props_naming_lib.meta_name(oRigRoot, remove=frontOrBack + '_')
             )
     oMetaRootSource = add_meta_attribute(
             oRig, 'gid_root',
-            'meta_' + oRigRoot.name().split('__')[2].replace(frontOrBack + '_','')
+            props_naming_lib.meta_name(oRigRoot, remove=frontOrBack + '_')
             )
     oMetaGeo = add_meta_attribute(oRig, 'gid_geo', ','.join([str(x) for x in geoColl]))
     oMetaRootSource.connect(oMetaRoot)
 
     for oNode in [oSeatBack]:
-        metaName = 'meta_' + oNode.name().split('__')[2].replace('{front}_{base}_'.format(**nameStructure),'')
+        metaName = props_naming_lib.meta_name(oNode, remove='{front}_{base}_'.format(**nameStructure))
         metaAttrName = metaName.replace(basename, section)
         oMeta = add_meta_attribute(oNode, metaAttrName, metaAttrName)
         oMetaRig = add_meta_attribute(oRig, metaAttrName, metaAttrName)
@@ -1369,62 +1259,37 @@ def build_seat_guide(section, basename, geoColl, guideParent):
 
     pos = totalBox.center()
 
-    # set a point in FRONT of the seat, to attempt to find the front edge of the seat.
-    closestPos = [pos[0], pos[1] + 1.0, totalBox.max()[2] + 4.0]
-    _, seatEdgePos = find_closest_vert(geoColl, dt.Vector(closestPos))
-    # set a point ABOVE the seat, to attempt to find the top edge of the seat.
-    closestPos = [pos[0], pos[1] + 8.0, pos[2] + 2.0]
-    _, seatTopPos = find_closest_vert(geoColl, dt.Vector(closestPos))
+    # set a point in FRONT of the seat, to attempt to find the front edge of the seat,
+    # and a point ABOVE the seat, to attempt to find the top edge of the seat.
+    seatEdgePos, seatTopPos = closest_vert_positions(geoColl, [
+            [pos[0], pos[1] + 1.0, totalBox.max()[2] + 4.0],
+            [pos[0], pos[1] + 8.0, pos[2] + 2.0],
+            ])
 
     oRigRoot.setTranslation([pos[0], seatEdgePos[1], pos[2]], space='world')
     oSeatBack.setTranslation([pos[0], seatEdgePos[1] + 0.2, seatTopPos[2]], space='world')
 
-    if rigFlip == 1.0:
-        oRig.getShape().overrideEnabled.set(True)
-        oSeatBack.getShape().overrideEnabled.set(True)
-        oRig.getShape().overrideColor.set(6)
-        oSeatBack.getShape().overrideColor.set(18)
-    else:
-        oRig.getShape().overrideEnabled.set(True)
-        oSeatBack.getShape().overrideEnabled.set(True)
-        oRig.getShape().overrideColor.set(13)
-        oSeatBack.getShape().overrideColor.set(20)
-
     return oRig
 
 
+@build_profiler.profile
 def build_piston_guide(section, basename, geoColl, guideParent):
     """Build guide for a piston mechanic."""
-    constraintParent = pm.PyNode('x__element__gid_driven__grp__')
+    constraintParent = props_naming_lib.find_node('x', 'element', 'gid_driven', 'grp')
 
-    totalBox = dt.BoundingBox()
-    [ totalBox.expand(x.getBoundingBox().min()) for x in geoColl ]
-    [ totalBox.expand(x.getBoundingBox().max()) for x in geoColl ]
+    geoBoxes = props_geo_lib.get_bounding_boxes(geoColl)
+    totalBB = props_geo_lib.total_bounding_box(geoBoxes)
+    totalBox = props_geo_lib.to_bounding_box(totalBB)
 
-    if totalBox.center()[0] > 0.0:
-        rigFlip = 1.0
-        side = 'l'
-    elif totalBox.center()[0] == 0.0:
-        rigFlip = 1.0
-        side = 'm'
-    else:
-        rigFlip = -1.0
-        side = 'r'
+    side = props_geo_lib.classify_sides(totalBB)[0]
+    rigFlip = -1.0 if side == 'r' else 1.0
 
-    if totalBox.center()[2] > 0.05:
-        frontOrBack = 'front'
-    elif totalBox.center()[2] == 0.0:
-        frontOrBack = 'mid'
-    else:
-        frontOrBack = 'back'
+    frontOrBack = props_geo_lib.classify_fronts(totalBB, 0.05)[0]
 
-    controlScale = dt.BoundingBox()
-    controlScale.expand(totalBox.min() * 1.08)
-    controlScale.expand(totalBox.max() * 1.08)
+    controlScale = (props_geo_lib.box_sizes(totalBB) * 1.08).tolist()
 
     # find the biggest geo by boundingBox volume
-    sizeComp = [bb_volume(x) for x in geoColl]
-    biggestGeo = geoColl[sizeComp.index(max(sizeComp))]
+    biggestGeo = geoColl[props_geo_lib.biggest_box_index(geoBoxes)]
 
     # Store the components of names in a dictionary for readable formatting strings.
     nameStructure = {
@@ -1437,7 +1302,7 @@ def build_piston_guide(section, basename, geoColl, guideParent):
     oRigRoot = pm.group(n='{side}__{section}__{base}_gid_root__grp__'.format(**nameStructure), em=True)
     oRig = props_icon_lib.create_control_icon(
             'square', '{side}__{section}__{base}_top_piston__gid__'.format(**nameStructure),
-            [controlScale.width(), controlScale.height(), controlScale.depth()]
+            controlScale, color=18 if rigFlip == 1.0 else 20
             )
     oBottomPiston = pm.spaceLocator(n='{side}__{section}__{base}_bottom_piston__gid__'.format(**nameStructure))
 
@@ -1463,11 +1328,11 @@ def build_piston_guide(section, basename, geoColl, guideParent):
     oMeta = add_meta_attribute(oRig, 'gid_ctrl_name', '{side}__{front}_{base}'.format(side, frontOrBack, basename))
     oMetaRoot = add_meta_attribute(
             oRigRoot, 'gid_root',
-            'meta_' + oRigRoot.name().split('__')[2].replace(frontOrBack + '_','')
+            props_naming_lib.meta_name(oRigRoot, remove=frontOrBack + '_')
             )
     oMetaRootSource = add_meta_attribute(
             oRig, 'gid_root',
-            'meta_' + oRigRoot.name().split('__')[2].replace(frontOrBack + '_','')
+            props_naming_lib.meta_name(oRigRoot, remove=frontOrBack + '_')
             )
     oMetaGeo = add_meta_attribute(oRig, 'gid_geo', ','.join([str(x) for x in geoColl]))
     oMetaRootSource.connect(oMetaRoot)
@@ -1475,58 +1340,41 @@ def build_piston_guide(section, basename, geoColl, guideParent):
     oMetaPivot = add_meta_attribute(oBottomPiston, 'meta_piston_pivot', 'meta_piston_pivot')
     oMetaPivotRig.connect(oMetaPivot)
     for oNode in []:
-        metaName = 'meta_' + oNode.name().split('__')[2]
+        metaName = props_naming_lib.meta_name(oNode)
         metaAttrName = metaName.replace(basename, section).replace(frontOrBack + '_','')
         oMeta = add_meta_attribute(oNode, metaAttrName, metaAttrName)
         oMetaRig = add_meta_attribute(oRig, metaAttrName, metaAttrName)
         oMetaRig.connect(oMeta)
 
-    oRig.getShape().overrideEnabled.set(True)
     if rigFlip == 1.0:
-        oRig.getShape().overrideColor.set(18)
         oBottomPiston.getShape().overrideColor.set(18)
     else:
-        oRig.getShape().overrideColor.set(20)
         oBottomPiston.getShape().overrideColor.set(20)
 
     return oRig
 
 
 
+@build_profiler.profile
 def build_jiggly_bits_guide(section, basename, geoColl, guideParent):
     """Build guides for all the extra bits, like mirrors, stick-shift,
     bumpers, or whatever needs to have a basic transform.
     """
-    constraintParent = pm.PyNode('x__element__gid_driven__grp__')
+    constraintParent = props_naming_lib.find_node('x', 'element', 'gid_driven', 'grp')
 
-    totalBox = dt.BoundingBox()
-    [ totalBox.expand(x.getBoundingBox().min()) for x in geoColl]
-    [ totalBox.expand(x.getBoundingBox().max()) for x in geoColl]
+    geoBoxes = props_geo_lib.get_bounding_boxes(geoColl)
+    totalBB = props_geo_lib.total_bounding_box(geoBoxes)
+    totalBox = props_geo_lib.to_bounding_box(totalBB)
 
-    if totalBox.center()[0] > 0.0:
-        rigFlip = 1.0
-        side = 'l'
-    elif totalBox.center()[0] == 0.0:
-        rigFlip = 1.0
-        side = 'm'
-    else:
-        rigFlip = -1.0
-        side = 'r'
+    side = props_geo_lib.classify_sides(totalBB)[0]
+    rigFlip = -1.0 if side == 'r' else 1.0
 
-    if totalBox.center()[2] > 0.05:
-        frontOrBack = 'front'
-    elif totalBox.center()[2] == 0.0:
-        frontOrBack = 'mid'
-    else:
-        frontOrBack = 'back'
+    frontOrBack = props_geo_lib.classify_fronts(totalBB, 0.05)[0]
 
-    controlScale = dt.BoundingBox()
-    controlScale.expand(totalBox.min() * 1.08)
-    controlScale.expand(totalBox.max() * 1.08)
+    controlScale = (props_geo_lib.box_sizes(totalBB) * 1.08).tolist()
 
     # find the biggest geo by boundingBox volume
-    sizeComp = [bb_volume(x) for x in geoColl]
-    biggestGeo = geoColl[sizeComp.index(max(sizeComp))]
+    biggestGeo = geoColl[props_geo_lib.biggest_box_index(geoBoxes)]
 
     # Store the components of names in a dictionary for readable formatting strings.
     nameStructure = {
@@ -1539,7 +1387,7 @@ def build_jiggly_bits_guide(section, basename, geoColl, guideParent):
     oRigRoot = pm.group(n='{side}__{section}__{base}_gid_root__grp__'.format(**nameStructure), em=True)
     oRig = props_icon_lib.create_control_icon(
             'box', '{side}__{section}__{base}_main__gid__'.format(**nameStructure),
-            [controlScale.width(), controlScale.height(), controlScale.depth()]
+            controlScale, color=18 if rigFlip == 1.0 else 20
             )
     oPivot = pm.spaceLocator(n='{side}__{section}__jiggle_pivot__gid__'.format(**nameStructure))
 
@@ -1557,10 +1405,10 @@ def build_jiggly_bits_guide(section, basename, geoColl, guideParent):
     oMeta = add_meta_attribute(oRig, 'gid_ctrl_name', '{side}__{front}_{base}'.format(**nameStructure))
     oMetaRoot = add_meta_attribute(
             oRigRoot, 'gid_root',
-            'meta_' + oRigRoot.name().split('__')[2].replace(frontOrBack + '_','')
+            props_naming_lib.meta_name(oRigRoot, remove=frontOrBack + '_')
             )
     oMetaRootSource = add_meta_attribute(oRig, 'gid_root',
-            'meta_' + oRigRoot.name().split('__')[2].replace(frontOrBack + '_','')
+            props_naming_lib.meta_name(oRigRoot, remove=frontOrBack + '_')
             )
     oMetaGeo = add_meta_attribute(oRig, 'gid_geo', ','.join([str(x) for x in geoColl]))
     oMetaRootSource.connect(oMetaRoot)
@@ -1568,38 +1416,45 @@ def build_jiggly_bits_guide(section, basename, geoColl, guideParent):
     oMetaPivot = add_meta_attribute(oPivot, 'meta_jiggle_pivot', 'meta_jiggle_pivot')
     oMetaPivotRig.connect(oMetaPivot)
     for oNode in []:
-        metaName = 'meta_' + oNode.name().split('__')[2]
+        metaName = props_naming_lib.meta_name(oNode)
         metaAttrName = metaName.replace(basename, section).replace(frontOrBack + '_','')
         oMeta = add_meta_attribute(oNode, metaAttrName, metaAttrName)
         oMetaRig = add_meta_attribute(oRig, metaAttrName, metaAttrName)
         oMetaRig.connect(oMeta)
 
-    oRig.getShape().overrideEnabled.set(True)
-    if rigFlip == 1.0:
-        oRig.getShape().overrideColor.set(18)
-    else:
-        oRig.getShape().overrideColor.set(20)
-
     return oRig
 
 
+def is_child_of(scene, node, parentName):
+    """True if node is directly under parentName. Compares short names, like the rest of the builders."""
+    return any([x.split('|')[-1] == parentName for x in scene.listRelatives(node, parent=True)])
+
+
 @undo
+@build_profiler.profile
 def build_guide(section, basename, geoColl):
 
     oGuide = None
+    # the meshes may have been edited since the last guide.
+    props_geo_lib.clear_vertex_trees()
 
+    # the groups are made through the scene backend. The guide builders below still use PyMEL.
+    scene = scene_backend.get_backend()
     guideParentName = 'x__element__main_guide_group__grp__'
-    if not pm.objExists(guideParentName):
-        guideParent = pm.group(em=True, n=guideParentName)
+    if not scene.objExists(guideParentName):
+        scene.group(name=guideParentName)
     else:
-        guideParent = pm.PyNode(guideParentName)
+        scene.setAttr(guideParentName + '.v', 1) # build_rig() hides the guides when it keeps them.
 
     constraintParentName = 'x__element__gid_driven__grp__'
-    if not pm.objExists(constraintParentName):
-        constraintParent = pm.group(em=True, n=constraintParentName)
-    else:
-        constraintParent = pm.PyNode(constraintParentName)
-    pm.parent(constraintParent, guideParent)
+    if not scene.objExists(constraintParentName):
+        scene.group(name=constraintParentName, parent=guideParentName)
+    elif not is_child_of(scene, constraintParentName, guideParentName):
+        scene.parent(constraintParentName, guideParentName)
+    guideParent = scene.wrap(guideParentName)
+    constraintParent = scene.wrap(constraintParentName)
+    # the guide builders find it by name. Index it, so they don't have to look it up.
+    props_naming_lib.get_name_index().add(constraintParent)
 
     # BODY
     if section == 'body':
@@ -1630,6 +1485,8 @@ def build_guide(section, basename, geoColl):
     if section == 'jiggly':
         oGuide = build_jiggly_bits_guide(section, basename, geoColl, guideParent)
 
+    if oGuide:
+        guide_meta.migrate_guide(oGuide)
 
     return oGuide
 
@@ -1639,11 +1496,13 @@ def build_guide(section, basename, geoColl):
 #################################################
 
 
+@build_profiler.profile
 def build_body_rig(section, rigGuide, wheelGuides):
     # init the parts of the rig guide
+    guideMeta = guide_meta.read_guide_meta(rigGuide)
     metaGuideRoot = pm.PyNode(rigGuide.name() + '.' + 'gid_root').outputs()[0]
     metaCarCog = pm.PyNode(rigGuide.name() + '.' + 'meta_body_cog').outputs()[0]
-    constraintParent = pm.PyNode('x__constraints__grp__')
+    constraintParent = props_naming_lib.find_node('x', None, 'constraints', 'grp')
 
     # group the wheels into their pairs, left and right and front and back. (DEBUG this on motorcycles.)
     leftWheelGuides =  [gid for gid in wheelGuides if gid.gid_side.get() in ['l', 'm']] # mid goes to left side.
@@ -1651,17 +1510,15 @@ def build_body_rig(section, rigGuide, wheelGuides):
     frontWheelGuides = [gid for gid in wheelGuides if gid.gid_front_side.get() in ['front', 'mid']] # mid goes to front.
     rearWheelGuides =  [gid for gid in wheelGuides if gid.gid_front_side.get() in ['back']]
 
-    geoColl = rigGuide.gid_geo.get().split(',')
-    [geoColl.pop(i) for i, x in enumerate(geoColl) if x == ''] # filter out any blanks
-    geoColl = [pm.PyNode(x) for x in geoColl]
+    geoColl = [pm.PyNode(x) for x in guideMeta.geo]
 
-    totalBox = dt.BoundingBox()
-    [ totalBox.expand(x.getBoundingBox().min()) for x in geoColl ]
-    [ totalBox.expand(x.getBoundingBox().max()) for x in geoColl ]
+    geoBoxes = props_geo_lib.get_bounding_boxes(geoColl)
+    totalBB = props_geo_lib.total_bounding_box(geoBoxes)
+    totalBox = props_geo_lib.to_bounding_box(totalBB)
 
-    side = rigGuide.gid_side.get()
-    basename = rigGuide.gid_basename.get()
-    ctrlName = rigGuide.gid_ctrl_name.get()
+    side = guideMeta.side
+    basename = guideMeta.basename
+    ctrlName = guideMeta.ctrlName
     ctrlPos = metaCarCog.getTranslation(space='world')
 
     # Store the components of names in a dictionary for readable formatting strings.
@@ -1727,6 +1584,10 @@ def build_body_rig(section, rigGuide, wheelGuides):
     auto5 = pm.group(empty=True, n='m__element__root_offset__ctrl__')
     chain_parent([auto1, auto2, auto3, auto4, auto5])
     add_a_keyable_attribute(auto1, 'double', 'globalSize', oDefault=1)
+    # the other rig builders find these by name.
+    nameIndex = props_naming_lib.get_name_index()
+    for each in [auto1, auto2, auto3, auto4, auto5]:
+        nameIndex.add(each)
 
     ##### BUILD THE BASE RIG #####
     #TODO: DEBUG THIS. I have no idea what the base names were.
@@ -1758,11 +1619,14 @@ def build_body_rig(section, rigGuide, wheelGuides):
             'square', nCtrlOffset + 'ShapeTemp',
             [totalBox.width() + 1.0, 1.0, totalBox.depth() + 1.0], offset=[0, 0.1, totalBox.center()[2] - ctrlPos[2]])
 
-    oFrontAxleRoot = pm.group(n=nFrontAxle.replace('__ctrl__','__ctrlroot__'), em=True)
-    oRearAxleRoot = pm.group(n=nRearAxle.replace('__ctrl__','__ctrlroot__'), em=True)
+    oFrontAxleRoot = pm.group(n=props_naming_lib.with_role(nFrontAxle, 'ctrlroot'), em=True)
+    oRearAxleRoot = pm.group(n=props_naming_lib.with_role(nRearAxle, 'ctrlroot'), em=True)
     #TODO: Set an offset based on the geo bounding box.
-    oFrontAxle = props_icon_lib.create_control_icon('rings', nFrontAxle, [0.5, 0.5, 0.5], offset=[0, 2.0, 6.0])
-    oRearAxle = props_icon_lib.create_control_icon('rings', nRearAxle, [0.5, 0.5, 0.5], offset=[0, 2.0, -6.0])
+    oFrontAxle, oRearAxle, oWheelie = props_icon_lib.create_control_icons('rings', [
+            (nFrontAxle, [0.5, 0.5, 0.5], [0, 2.0, 6.0], 17),
+            (nRearAxle, [0.5, 0.5, 0.5], [0, 2.0, -6.0], 17),
+            (nWheelie, [0.5, 0.5, 0.5], False, 17),
+            ])
 
     oFrontAxleRoot.setTranslation(frontTiltPos, space='world')
     oFrontAxle.setTranslation(frontTiltPos, space='world')
@@ -1770,11 +1634,7 @@ def build_body_rig(section, rigGuide, wheelGuides):
     oRearAxle.setTranslation(rearTiltPos, space='world')
 
     # "pop-a-wheelie" control. For now, it is named body_tilt.
-    oWheelieRoot = pm.group(n=nWheelie.replace('__ctrl__','__ctrlroot__'), em=True)
-    oWheelie = props_icon_lib.create_control_icon('rings', nWheelie, [0.5, 0.5, 0.5])
-    for ctrl in [oWheelie, oFrontAxle, oRearAxle]:
-        ctrl.getShape().overrideEnabled.set(True)
-        ctrl.getShape().overrideColor.set(17)
+    oWheelieRoot = pm.group(n=props_naming_lib.with_role(nWheelie, 'ctrlroot'), em=True)
 
     # locators for controlling the pop-a-wheelie rotations
     tiltRoot =  pm.group(n='x__wheel_tilt_root__grp__')
@@ -1826,7 +1686,7 @@ def build_body_rig(section, rigGuide, wheelGuides):
     frontTiltPivot.setTranslation(frontTiltPos, space='world')
     rearTiltPivot.setTranslation(rearTiltPos, space='world')
 
-    rigGroup = pm.PyNode('x__additive_rig__grp__')
+    rigGroup = props_naming_lib.find_node('x', None, 'additive_rig', 'grp')
     oPosition = pm.PyNode(nPosition)
     oTrajectory = pm.PyNode(nTrajectory)
     oCtrlRootGrp = pm.PyNode(nCtrlRootGrp)
@@ -1866,10 +1726,12 @@ def build_body_rig(section, rigGuide, wheelGuides):
         add_a_keyable_attribute(oPosition, 'double', paramName, oMin=0, oMax=1, oDefault=1)
 
     # use the car icons instead of the standard icons (square arrow box instead of circle, for example.)
-    props_icon_lib.swap_shape(oPosition, shPosition)
-    props_icon_lib.swap_shape(oTrajectory, shTrajectory)
-    props_icon_lib.swap_shape(oCtrlRoot, shCtrlRoot)
-    props_icon_lib.swap_shape(oCtrlOffset, shCtrlOffset)
+    props_icon_lib.swap_shapes([
+            (oPosition, shPosition),
+            (oTrajectory, shTrajectory),
+            (oCtrlRoot, shCtrlRoot),
+            (oCtrlOffset, shCtrlOffset),
+            ])
 
     oWheelieRoot.setTranslation(wheeliePos, space='world')
     oWheelie.setTranslation(wheeliePos, space='world')
@@ -1879,7 +1741,7 @@ def build_body_rig(section, rigGuide, wheelGuides):
     oPosition.globalSize.connect(oWheelieRoot.sx)
     oPosition.globalSize.connect(oWheelieRoot.sy)
     oPosition.globalSize.connect(oWheelieRoot.sz)
-    pm.parentConstraint(pm.PyNode('m__element__root_offset__ctrl__'), oWheelieRoot, mo=True)
+    pm.parentConstraint(props_naming_lib.find_node('m', 'element', 'root_offset', 'ctrl'), oWheelieRoot, mo=True)
 
     pm.parent(oBodySkin, oSkinGroup)
     oCons = pm.parentConstraint(oCtrlOffset, oBodySkin, mo=True,
@@ -1905,7 +1767,7 @@ def build_body_rig(section, rigGuide, wheelGuides):
     oPosition.globalSize.connect(tiltRoot.sy)
     oPosition.globalSize.connect(tiltRoot.sz)
     oCons = pm.parentConstraint(oRearAxle, tiltRoot, mo=True,
-            n=tiltRoot.name().replace('__grp__','__parentconstraint__'))
+            n=props_naming_lib.with_role(tiltRoot, 'parentconstraint'))
     oCons = pm.parentConstraint(rearTilt, oCtrlRootGrp, mo=True,
             n='m__wheel_tilt_constraint__parentconstraint__')
 
@@ -1917,14 +1779,11 @@ def build_body_rig(section, rigGuide, wheelGuides):
     if frontWheelGuides:
         # build the front arrow control that rotates all front wheels at once.
         oWheelTurnRoot = pm.group(n=nWheelTurnRoot, em=True)
-        oWheelTurn = props_icon_lib.create_control_icon('arrow', nWheelTurn, [0.5, 0.5, 0.5], offset=[0, 0.2, 0])
+        oWheelTurn = props_icon_lib.create_control_icon('arrow', nWheelTurn, [0.5, 0.5, 0.5], offset=[0, 0.2, 0], color=6)
 
         oWheelTurnRoot.setTranslation(wheelTurnPos, space='world')
         oWheelTurn.setTranslation(wheelTurnPos, space='world')
-        
-        oWheelTurn.getShape().overrideEnabled.set(True)
-        oWheelTurn.getShape().overrideColor.set(6)
-        
+
         chain_parent([oPartsGroup, oWheelTurnRoot, oWheelTurn])
         oPosition.globalSize.connect(oWheelTurnRoot.sx)
         oPosition.globalSize.connect(oWheelTurnRoot.sy)
@@ -1934,6 +1793,8 @@ def build_body_rig(section, rigGuide, wheelGuides):
         lock_main_params(oWheelTurn, pLocked=True, pChannelBox=False, pKeyable=False, pParams=lockParams)
 
         # a hack based on curve point numbers to move the control arrow into place.
+        # the CVs are moved, so the arrow can't keep a shared shape.
+        props_icon_lib.make_unique_shapes([oWheelTurn])
         arrowPos1 = sum([pnt_ws(x) for x in oPosition.cv[14:18]]) / (len(oPosition.cv[14:18]) * 1.0)
         arrowPos2 = sum([pnt_ws(x) for x in oWheelTurn.cv[2:6]]) / (len(oWheelTurn.cv[2:6]) * 1.0)
         pm.move(oWheelTurn.cv[2:6], [0, 0, arrowPos1[2] - arrowPos2[2]], relative=True)
@@ -1958,7 +1819,6 @@ def build_body_rig(section, rigGuide, wheelGuides):
 
     #####oVis2.outColorR.connect(oWheelie.lodVisibility, force=True)
 
-    pm.delete(metaGuideRoot)
     # a collection of parts the rest of the rig will reference.
     bodyRigParts = {
         'riggroup': rigGroup,
@@ -1981,324 +1841,73 @@ def build_body_rig(section, rigGuide, wheelGuides):
     return bodyRigParts
 
 
-def build_wheel_rig(section, rigGuide, bodyRig):
-    # init the parts of the rig guide and the body rig
-    parentObj = bodyRig['trajectory']
-    rigPosition = bodyRig['position']
-    wheelPin = bodyRig['wheelpin']
-    mainRigGroup = bodyRig['riggroup']
-    bodyControlRoot = bodyRig['controlroot']
-    partsGroup = bodyRig['partsgroup']
-    skinGroup = bodyRig['skingroup']
-    wheelsGroup = bodyRig['wheelsgroup']
-    wheelTurn = bodyRig['wheelturn']
-    componentsGroup = bodyRig['components']
-    constraintParent = pm.PyNode('x__constraints__grp__')
-
-    metaGuideRoot = pm.PyNode(rigGuide.name() + '.' + 'gid_root').outputs()[0]
+def read_wheel_guide(rigGuide, bodyRig):
+    """Everything the wheel rig needs from the guide and the body rig, as the plain data of
+    car_rig_plans.wheel_rig_plan(). Nothing is made here.
+    """
+    guideMeta = guide_meta.read_guide_meta(rigGuide)
     metaBase = pm.PyNode(rigGuide.name() + '.' + 'meta_wheel_base').outputs()[0]
     metaInner = pm.PyNode(rigGuide.name() + '.' + 'meta_wheel_inner').outputs()[0]
     metaAltPivot = pm.PyNode(rigGuide.name() + '.' + 'meta_wheel_alternate_pivot').outputs()[0]
     metaRadius = rigGuide.getShape().inputs()[0] # the radius value of the circle in the guide
 
-    basename = rigGuide.gid_basename.get()
-    ctrlName = rigGuide.gid_ctrl_name.get()
-    side = rigGuide.gid_side.get()
-    frontOrBack = rigGuide.gid_front_side.get()
-
-    # .gid_geo stores the names of the geo from the guide process in a comma-separated string.
+    # the guide meta stores the names of the geo from the guide process.
     # It is NOT assumed that geometry was specified.
-    geoColl = rigGuide.gid_geo.get().split(',')
-    [geoColl.pop(i) for i, x in enumerate(geoColl) if x == ''] # filter out any blanks
-    geoColl = [pm.PyNode(x) for x in geoColl]
-
-    totalBox = dt.BoundingBox()
-    [ totalBox.expand(x.getBoundingBox().min()) for x in geoColl ]
-    [ totalBox.expand(x.getBoundingBox().max()) for x in geoColl ]
-
-    wheelCenterPos = (metaBase.getTranslation(space='world') + metaInner.getTranslation(space='world')) * 0.5
-    #TODO: Test on motorocycle, where wheel is in middle.
-    if wheelCenterPos[0] > 0.00:
-        rigFlip = 1.0
-    elif wheelCenterPos[0] == 0.0:
-        rigFlip = 1.0
-    else:
-        rigFlip = -1.0
-
-    # get a vector to offset the arrow indicator out of the tire. An icon which shows the tire spinning.
-    bbCenter = totalBox.center()
-    bbMax = totalBox.max()
-    arrowName = '{}_pivot__sjnt__'.format(ctrlName)
-
-    # create all the parts
-    rigGroup = pm.group(n='{}_rig__grp__'.format(ctrlName), em=True)
-    oWheelBaseRoot = pm.group(n='{}_base__root__'.format(ctrlName), em=True)
-    oWheelBase = pm.group(n='{}_base__loc__'.format(ctrlName), em=True)
-    oWheelPivotZero = pm.group(n='{}_pivot__zero__'.format(ctrlName), em=True)
-    oWheelPivotRoot = pm.group(n='{}_pivot__root__'.format(ctrlName), em=True)
-    oWheelPivot = pm.group(n='{}_pivot__loc__'.format(ctrlName), em=True)
-    oWheelSkin = props_icon_lib.create_control_icon('arrow', arrowName, [0.1, 0.1, 0.1], joint=True)
-    oInner = pm.group(n='{}_inner__loc__'.format(ctrlName), em=True)
-    oOuter = pm.group(n='{}_outer__loc__'.format(ctrlName), em=True)
-    oControlZero = pm.group(n='{}_ctrl_zero__root__'.format(ctrlName), em=True)
-    oControlRoot = pm.group(n='{}_ctrl__root__'.format(ctrlName), em=True)
-    oControlDriver = pm.group(n='{}_ctrl__driver__'.format(ctrlName), em=True)
-    oControlFollow = pm.group(n='{}_ctrl_follow__grp__'.format(ctrlName), em=True)
-    oWobble = pm.group(n='{}_wheel_wobble__grp__'.format(ctrlName), em=True)
-    oControl = pm.circle(n='{}_offset__ctrl__'.format(ctrlName), nr=(1, 0, 0), sections=24, ch=True)[0]
-    oControl2 = pm.circle(n='{}__ctrl__'.format(ctrlName), nr=(1, 0, 0), sections=24, ch=True)[0]
-    localWheelPin = pm.group(n='{}_wheel_pin__hook__'.format(ctrlName), em=True)
-
-    # modify the position of the oWheelSkin arrow so it sits outside of the wheel. It is the turn indicator.
-    # Also instead of an arrow, use a saw-tooth pattern to make a thick line
-    height = metaRadius.radius.get() * 0.25
-    curvePoints = [pnt for pnt in props_icon_lib.sawtooth_wave_pattern(height, width=height*0.2, segments=30)]
-    sawCurve = pm.curve( name='temporary_saw_curve', d=1, p=curvePoints )
-    props_icon_lib.swap_shape(oWheelSkin, sawCurve)
-    wheelSkinShape = oWheelSkin.getShape()
-    arrowOffset = [(bbCenter[0] - bbMax[0]) * rigFlip * -1.2, bbMax[1] * 0.35, 0]
-    pm.move(wheelSkinShape.cv, arrowOffset, r=True)
-    #pm.rotate(wheelSkinShape.cv, [0, -90, 0], r=True, fo=True)
-    #pm.rotate(wheelSkinShape.cv, [0, 0, -90], r=True, fo=True)
-    wheelSkinShape.overrideDisplayType.set(1) # template
-
-    oControl.getShape().overrideEnabled.set(1)
-    oControl2.getShape().overrideEnabled.set(1)
-    oWheelSkin.getShape().overrideEnabled.set(1)
-    #####bodyRig['vis2'].outColorR.connect(oControl.lodVisibility, force=True)
-    #####bodyRig['vis2'].outColorR.connect(oControl2.lodVisibility, force=True)
-    #####bodyRig['vis2'].outColorR.connect(oWheelSkin.lodVisibility, force=True)
-
-    # A parameter for manually turning the wheel, in addition to all other inputs
-    add_a_keyable_attribute(oControl2, 'double', 'wheel_manual_spin')
-    pManualSpin = pm.PyNode(oControl2.name() + '.' + 'wheel_manual_spin')
-
-    # create the hierarchy
-    chain_parent(
-            [wheelsGroup, rigGroup, oWheelBaseRoot, oWheelBase, oWheelPivotZero, oWheelPivotRoot,
-            oControl, oWheelPivot, oWobble, oWheelSkin])
-    pm.parent(oInner, oOuter, oWheelBaseRoot)
-    chain_parent([rigGroup, oControlZero, oControlRoot, oControlDriver, oControlFollow, oControl2])
-    pm.parent(localWheelPin, wheelPin)
-
-    ### create a pivot to constrain the tire to.
-    centerXZ = (metaBase.getTranslation(space='world') + metaInner.getTranslation(space='world')) * 0.5
-    centerY = rigGuide.getTranslation(space='world')
-    centerOfWheel = [centerXZ[0], centerY[1], centerXZ[2]]
-    centerAltPivot = metaAltPivot.getTranslation(space='world')
-    centerAltXZ = metaAltPivot.getTranslation(space='world')
-    centerAltXZ.y = 0.0
-
-    oWheelBaseRoot.setTranslation(centerAltXZ, space='world')
-    oWheelBase.setTranslation(centerAltXZ, space='world')
-    oWheelPivotZero.setTranslation(centerAltPivot, space='world')
-    oWheelPivotRoot.setTranslation(centerAltPivot, space='world')
-    oWheelPivot.setTranslation(centerAltPivot, space='world')
-    oWobble.setTranslation(centerOfWheel, space='world')
-    oWheelSkin.setTranslation(centerOfWheel, space='world')
-    oInner.setTranslation(metaInner.getTranslation(space='world'), space='world')
-    oOuter.setTranslation(metaBase.getTranslation(space='world'), space='world')
-    oControlZero.setTranslation(centerAltPivot, space='world')
-    oControlRoot.setTranslation(centerAltPivot, space='world')
-    oControlDriver.setTranslation(centerAltPivot, space='world')
-    oControlFollow.setTranslation(centerAltPivot, space='world')
-    oControl.setTranslation(centerAltPivot, space='world')
-    oControl2.setTranslation(centerAltPivot, space='world')
-    localWheelPin.setTranslation(wheelPin.getTranslation(space='world'), space='world')
-
-    if geoColl:
-        for each in geoColl:
-            geoBaseName = each.name()
-            # set the translation of the constraints, otherwise it interferes with the bounding box!
-            oCons = pm.parentConstraint(oWheelSkin, each, mo=True,
-                    n='{}__{}__{}_{}__parentconstraint__'.format(side, section, basename, geoBaseName))
-            oCons.setTranslation(centerOfWheel, space='world')
-            pm.parent(oCons, constraintParent)
-            oCons = pm.scaleConstraint(oWheelSkin, each, mo=True,
-                    n='{}__{}__{}_{}__scaleconstraint__'.format(side, section, basename, geoBaseName))
-            oCons.setTranslation(centerOfWheel, space='world')
-            pm.parent(oCons, constraintParent)
-
-    # create the utility nodes that drive the rotation of the wheel.
-    mult360 = pm.createNode('multiplyDivide', n='{}_rig_360__mlt__'.format(ctrlName))
-    dividePI = pm.createNode('multiplyDivide', n='{}_rig_pi__mlt__'.format(ctrlName))
-    dividePI.operation.set(2) # divide
-    # this PMA will combine both the auto-control and the auto-driver. When the entire car is translating.
-    mult360Add = pm.createNode('plusMinusAverage', n='{}_rig_auto_driver__add__'.format(ctrlName))
-    # this plusMinusAverage will combine all the various channels to rotate the tire
-    tireRotateADD = pm.createNode('plusMinusAverage', n='{}_rig_rotation_driver__add__'.format(ctrlName))
-    # tiltRemap takes the sideways translation of the control and rotates the tire sideways.
-    # The rotatePivot is animated to give it a rocking effect.
-    tiltRemap = pm.createNode('remapValue', n='{}_rig_tilt__map__'.format(ctrlName))
-    tiltCondition = pm.createNode('condition', n='{}_rig_tilt__cond__'.format(ctrlName))
-
-    oControl2.tz.connect(mult360Add.input2D[0].input2Dx)
-    oControlDriver.tz.connect(mult360Add.input2D[1].input2Dx)
-    mult360Add.output2Dx.connect(mult360.input1X)
-
-    oControl.t.connect(oControlFollow.t)
-
-    oControl2.tz.connect(oWheelPivotRoot.tz)
-    oControl2.r.connect(oWobble.r)
-    oControl2.rotateOrder.set(3) # xzy
-    oWobble.rotateOrder.set(3) # xzy
-
-    # turn the front wheels in rotateY based on the wheel turn arrow control.
-    if wheelTurn and frontOrBack in ['front', 'mid']:
-        wheelTurn.ry.connect(oWheelBaseRoot.ry)
-        wheelTurn.ry.connect(oControlFollow.ry)
-
-    oControl.getShape().inputs()[0].radius.set(metaRadius.radius.get() * 0.85)
-    oControl.getShape().inputs()[0].centerX.set(oOuter.tx.get() * 1.5)
-    oControl2.getShape().inputs()[0].radius.set(metaRadius.radius.get() * 0.7)
-    oControl2.getShape().inputs()[0].centerX.set(oOuter.tx.get() * 1.6)
-
-    # create a pointed end on the controllers so you can tell how they are rotating
-    ctrlCVs = oControl.getShape().cv
-    topPoint = ctrlCVs[1].getPosition(space='world') + [0, 0.05*metaRadius.radius.get(), 0]
-    ctrlCVs[0].setPosition(topPoint, space='world')
-    ctrlCVs[2].setPosition(topPoint, space='world')
-    ctrlCVs[1].setPosition(topPoint, space='world')
+    geoColl = [pm.PyNode(x) for x in guideMeta.geo]
+    geoBoxes = props_geo_lib.get_bounding_boxes(geoColl)
+    totalBox = props_geo_lib.to_bounding_box(props_geo_lib.total_bounding_box(geoBoxes))
 
-    ctrlCVs = oControl2.getShape().cv
-    topPoint = ctrlCVs[1].getPosition(space='world') + [0, 0.05*metaRadius.radius.get(), 0]
-    ctrlCVs[0].setPosition(topPoint, space='world')
-    ctrlCVs[2].setPosition(topPoint, space='world')
-    ctrlCVs[1].setPosition(topPoint, space='world')
-
-    pm.delete(oControl, ch=True)
-    pm.delete(oControl2, ch=True)
-
-    mult360.input2X.set(360)
-    mult360.outputX.connect(dividePI.input1X)
-    dividePI.input2X.set(math.pi * 2.0 * metaRadius.radius.get())
-    dividePI.outputX.connect(tireRotateADD.input2D[1].input2Dx)
-
-    # connect manual rotation and multiply by 360 so 1 = one turn.
-    oManualUnit = pm.createNode('unitConversion', n='{}_rig_manual__unit__'.format(ctrlName))
-    oManualUnit.conversionFactor.set(360)
-    oManualUnit2 = pm.createNode('unitConversion', n='{}_rig_manual2__unit__'.format(ctrlName))
-    oManualUnit2.conversionFactor.set(math.pi * 2.0)
-    pManualSpin.connect(oManualUnit.input)
-    pManualSpin.connect(oManualUnit2.input)
-    oManualUnit.output.connect(tireRotateADD.input2D[2].input2Dx)
-    oManualUnit2.output.connect(oWheelSkin.rx)
-
-    wheelExpression = False
-    if wheelExpression:
-        pass
-    else:
-        #TODO: edit out unecessary nodes. oWheelPivot is now controlled by an expression.
-        tireRotateADD.output2Dx.connect(oWheelPivot.rx)
-
-    if wheelExpression:
-        # add an expression to control the wheel in all directions of movement.    
-        # add the directionReader locator, 5 units behind the wheel.
-        #TODO: Add an on off integer attribute on the master control, PER wheel.
-        #TODO: Unhook the existing translateZ parameter. OR make it a switch. When auto is off, then it reads the nodes instead.
-        #TODO: Try to make a more general kind of direction that doesn't rely on the getAttr -t.
-        directionReader = pm.spaceLocator(n='{}__{}_dir_reader__loc__'.format(side, frontOrBack))
-        pm.parent(directionReader, oControl)
-        directionReader.t.set([0, 0, -5.0])
-        paramName = '{}_{}_auto_wheel'.format(rigGuide.gid_side.get(), rigGuide.gid_front_side.get())
-        onOffSwitch = '{}.{}'.format(rigPosition.name(), paramName)
-        # the expression. It uses getAttr -t to sample time one frame before:
-        lastPos1 = 'getAttr -t ( frame -1 ) {}'.format(oControlDriver.name())
-        lastPos2 = 'getAttr -t ( frame -1 ) {}'.format(oControlFollow.name())
-        expList = [
-            'if ({} == 1){{'.format(onOffSwitch),
-            '    float $tau = 6.28318530718;',
-            '    float $twoPir = {} * 2.0 * $tau;'.format( metaRadius.radius.get() ),
-            '    // Measure which way the car is facing',
-            '    float $tireWS[] = `xform -q -ws -t {}`;'.format( oWheelSkin.name() ),
-            '    float $dirWS[] = `xform -q -ws -t {}`;'.format( directionReader.name() ),
-            '    vector $carFacing = << $tireWS[0] - $dirWS[0], $tireWS[1] - $dirWS[1], $tireWS[2] - $dirWS[2] >>;',
-            '    // Measure the current and last positions',
-            '    vector $curPos = <<',
-            '        {}.translateX + {}.translateX,'.format(oControlDriver.name(), oControlFollow.name()),
-            '        {}.translateY + {}.translateY,'.format(oControlDriver.name(), oControlFollow.name()),
-            '        {}.translateZ + {}.translateZ'.format(oControlDriver.name(), oControlFollow.name()),
-            '        >>;',
-            '    float $lastPosX = `{}.tx` + `{}.tx`;'.format(lastPos1, lastPos2),
-            '    float $lastPosY = `{}.ty` + `{}.ty`;'.format(lastPos1, lastPos2),
-            '    float $lastPosZ = `{}.tz` + `{}.tz`;'.format(lastPos1, lastPos2),
-            '    vector $lastPos = <<$lastPosX, $lastPosY, $lastPosZ>>;',
-            '    vector $movement = $curPos - $lastPos;',
-            '    // measure the direction (reverse or forward) of the cars motion using dot product',
-            '    float $carReverse = dot(unit($movement), unit($carFacing));',
-            '    float $carDirection = 0.0;',
-            '    if ($carReverse >= 0){',
-            '            $carDirection = 1.0;',
-            '    }else{',
-            '            $carDirection = -1.0;',
-            '    }',
-            '    float $rotateWheel = ((mag($movement) * $twoPir) * $carDirection);',
-            '    {pivot}.rotateX = {pivot}.rotateX + $rotateWheel;'.format(pivot = oWheelPivot),
-            '}',
-        ]
-
-        pm.expression( name='{}__{}_wheel_turn__expr__'.format(side, frontOrBack), s='\n'.join(expList))
-
-    # set the tilt parameters
-    oControl2.tx.connect(tiltRemap.inputValue)
-    tiltRemap.outValue.connect(oWheelBase.rz)
-    # values which mean 1.0 will be a 45 degree rotation. 2.0 will be 90.
-    #TODO: Set this as an option or a sane value based on rig world scale.
-    tiltAmount = 80
-    tiltRemap.inputMin.set(-tiltAmount)
-    tiltRemap.inputMax.set(tiltAmount)
-    tiltRemap.outputMin.set(180)
-    tiltRemap.outputMax.set(-180)
-
-    tiltCondition.operation.set(3) # greater or equal
-    oControl2.tx.connect(tiltCondition.firstTerm)
+    # the *_auto_wheel switch on the position control turns the auto spin on and off for each wheel.
+    rigPosition = bodyRig['position']
+    autoWheelParam = '{}_{}_auto_wheel'.format(guideMeta.side, guideMeta.frontSide)
+    wheelTurn = bodyRig['wheelturn']
 
-    if rigFlip == 1.0:
-        oInner.tx.connect(tiltCondition.colorIfFalseR)
-        oOuter.tx.connect(tiltCondition.colorIfTrueR)
-    else:
-        oInner.tx.connect(tiltCondition.colorIfTrueR)
-        oOuter.tx.connect(tiltCondition.colorIfFalseR)
+    return {
+        'ctrlName': guideMeta.ctrlName,
+        'side': guideMeta.side,
+        'basename': guideMeta.basename,
+        'frontSide': guideMeta.frontSide,
+        'geo': [x.name() for x in geoColl],
+        'radius': metaRadius.radius.get(),
+        'guidePosition': list(rigGuide.getTranslation(space='world')),
+        'basePosition': list(metaBase.getTranslation(space='world')),
+        'innerPosition': list(metaInner.getTranslation(space='world')),
+        'altPivotPosition': list(metaAltPivot.getTranslation(space='world')),
+        'bbCenter': list(totalBox.center()),
+        'bbMax': list(totalBox.max()),
+        'wheelsGroup': bodyRig['wheelsgroup'].name(),
+        'wheelPin': bodyRig['wheelpin'].name(),
+        'wheelPinPosition': list(bodyRig['wheelpin'].getTranslation(space='world')),
+        'wheelTurn': wheelTurn.name() if wheelTurn else None,
+        'trajectory': bodyRig['trajectory'].name(),
+        'constraintParent': props_naming_lib.find_node('x', None, 'constraints', 'grp').name(),
+        'positionCtrl': props_naming_lib.find_node('m', 'element', 'position', 'ctrl').name(),
+        'rootCtrl': props_naming_lib.find_node('m', 'element', 'root', 'ctrl').name(),
+        'rootJointOrig': props_naming_lib.find_node('m', 'element', 'root', 'ctrl_jorig').name(),
+        'autoWheel': rigPosition.attr(autoWheelParam).name() if rigPosition.hasAttr(autoWheelParam) else None,
+        }
 
-    tiltCondition.outColorR.connect(oWheelBase.rotatePivotX)
 
-    if rigFlip == 1.0:
-        oControl.getShape().overrideColor.set(13)
-        oControl2.getShape().overrideColor.set(20)
-        oWheelSkin.getShape().overrideColor.set(20)
-    else:
-        oControl.getShape().overrideColor.set(6)
-        oControl2.getShape().overrideColor.set(18)
-        oWheelSkin.getShape().overrideColor.set(18)
+@build_profiler.profile
+def build_wheel_rig(section, rigGuide, bodyRig):
+    """The wheel reads its guide once, and makes its rig from a build_plan.BuildPlan.
+    Only the lattice and its blendshapes are still made with PyMEL, after the plan is executed.
+    """
+    componentsGroup = bodyRig['components']
+    guideData = read_wheel_guide(rigGuide, bodyRig)
+    ctrlName = guideData['ctrlName']
+    side = guideData['side']
+    basename = guideData['basename']
 
-    #TODO: Add a local wheel pin for each wheel, for special cases like the motorcycle fork.
-    oCons = pm.parentConstraint(localWheelPin, oControlDriver, mo=True,
-            n='{}__{}__{}_driver__parentconstraint__'.format(side, section, basename))
-    oCons.setTranslation(centerOfWheel, space='world')
-    #####pm.parent(oCons, constraintParent)
-    oCons = pm.pointConstraint(localWheelPin, oWheelBaseRoot, mo=True,
-            n='{}__{}__{}_base_root__pointconstraint__'.format(side, section, basename))
-    oCons.setTranslation(centerOfWheel, space='world')
-    #####pm.parent(oCons, constraintParent)
-    oCons = pm.parentConstraint(pm.PyNode('m__element__position__ctrl__'), oControlRoot, mo=True,
-            n='{}__{}__{}_wheel_root__parentconstraint__'.format(side, section, basename))
-    oCons = pm.parentConstraint(pm.PyNode('m__element__root__ctrl__'), oControlZero, mo=True,
-            n='{}__{}__{}_wheel_zero__parentconstraint__'.format(side, section, basename))
-    oCons = pm.parentConstraint(pm.PyNode('m__element__root__ctrl__'), rigGroup, mo=True,
-            n='{}__{}__{}_rig_position__parentconstraint__'.format(side, section, basename))
-    oCons = pm.orientConstraint(parentObj, oWheelPivotZero, skip=['y', 'z'], mo=True,
-            n='{}__{}__{}_wheelpivotzero__orientconstraint__'.format(side, section, basename))
-    oCons = pm.orientConstraint(parentObj, oControlFollow, skip=['y', 'z'], mo=True,
-            n='{}__{}__{}_wheelctrlfollow__orientconstraint__'.format(side, section, basename))
-
-    trajectoryChild = pm.PyNode('m__element__root__ctrl_jorig__')
-    oCons = pm.pointConstraint(trajectoryChild, localWheelPin, skip=['x', 'z'], mo=True,
-            n='{}__{}__{}_wheels_hook__pointconstraint__'.format(side, section, basename))
+    plan, parts = car_rig_plans.wheel_rig_plan(section, guideData)
+    names = build_plan.execute_plan(plan)
 
-    lockParams = ['.sx','.sy','.sz','.v']
-    lock_main_params(oControl, pLocked=True, pChannelBox=False, pKeyable=False, pParams=lockParams)
-    lock_main_params(oControl2, pLocked=True, pChannelBox=False, pKeyable=False, pParams=lockParams)
-    oWheelSkin.drawStyle.set(2) # hide the bone
+    geoColl = [pm.PyNode(x) for x in guideData['geo']]
+    centerOfWheel = parts['center']
+    rigGroup = pm.PyNode(names[parts['riggroup']])
+    oControl = pm.PyNode(names[parts['control']])
+    oControl2 = pm.PyNode(names[parts['control2']])
+    oWheelPivotRoot = pm.PyNode(names[parts['pivotroot']])
 
     # Add a lattice for deforming the wheel
     #NOTE: When creating lattices, watch for bugs where there are any transforms below the geo.
@@ -2307,13 +1916,16 @@ def build_wheel_rig(section, rigGuide, bodyRig):
         latticeRows = 18
         wheelBB = find_group_bb(geoColl)
         latticeCenter = [centerOfWheel[0], (centerOfWheel[1]+wheelBB[0])*0.5, centerOfWheel[2]]
+        build_profiler.begin('wheel lattice')
         pm.select(geoColl)
         latticeName = '{}__lattice__'.format(ctrlName)
         oFFD, oLattice, oBase = pm.lattice(divisions=[2,latticeRows,2], n=latticeName, oc=True, ol=1)
         oFFD.local.set(False)
         oFFD.localInfluenceT.set(6)
+        build_profiler.end()
 
         # Duplicate the lattice to act as a blendshape
+        build_profiler.begin('wheel blendshape targets')
         # a little hack since duplicating a lattice duplicates the base. Parent the base temporarily.
         origParent = oBase.getParent()
         pm.parent(oBase, oLattice)
@@ -2353,18 +1965,19 @@ def build_wheel_rig(section, rigGuide, bodyRig):
         for i in xrange(latticeRows):
             pm.move(oSkewBS.getShape().pt[0][i], (i/float(latticeRows))*skewAmount, 0, 0, r=True)
             pm.move(oSkewBS.getShape().pt[1][i], (i/float(latticeRows))*skewAmount, 0, 0, r=True)
+        build_profiler.end()
 
         oBB = wheelBB[4] # the totalBox from find_group_bb()
 
         #latticeScale = [oBB.width(), oBB.height() * 0.5, oBB.depth()]
         #oLattice.scale.set(latticeScale)
         #oBase.scale.set(latticeScale)
-        pm.parentConstraint(oControl, oLattice,
+        oCons = pm.parentConstraint(oControl, oLattice,
                 n='{}__{}__{}_squash_lattice__parentconstraint__'.format(side, section, basename),
                 mo=True)
         oCons.setTranslation(centerOfWheel, space='world')
         #####pm.parent(oCons, constraintParent)
-        pm.parentConstraint(oControl, oBase,
+        oCons = pm.parentConstraint(oControl, oBase,
                 n='{}__{}__{}_squash_lattice_base__parentconstraint__'.format(side, section, basename),
                 mo=True)
         oCons.setTranslation(centerOfWheel, space='world')
@@ -2377,6 +1990,7 @@ def build_wheel_rig(section, rigGuide, bodyRig):
         oLattice.pt[1][0][0]
 
         pm.parent(oLattice, oBase, rigGroup)
+        build_profiler.begin('wheel blendshape')
         oBlend = pm.blendShape(oSquashBS, oSkewBS, oLattice, n='{}_squash__blendshape__'.format(ctrlName))[0]
 
         # create 2 remapValues to drive the squash blendshape
@@ -2392,13 +2006,14 @@ def build_wheel_rig(section, rigGuide, bodyRig):
         oControl2.ty.connect(squashRemap.inputValue)
         oControl2.ty.connect(squashClamp.inputValue)
         squashRemap.outValue.connect(oBlend.w[0]) # the squash blendshape target
-        pm.PyNode('m__element__root_offset__ctrl__').tx.connect(oSkewMLT.input1X)
+        props_naming_lib.find_node('m', 'element', 'root_offset', 'ctrl').tx.connect(oSkewMLT.input1X)
         oSkewMLT.outputX.connect(oBlend.w[1]) # the skew side-to-side blendshape target
         squashClamp.outValue.connect(oWheelPivotRoot.ty)
+        build_profiler.end()
 
-    pm.delete(metaGuideRoot)
 
 
+@build_profiler.profile
 def build_seat_rig(section, rigGuide, bodyRig):
     # init the parts of the rig guide
     parentObj = bodyRig['trajectory']
@@ -2407,41 +2022,35 @@ def build_seat_rig(section, rigGuide, bodyRig):
     bodyOffset = bodyRig['body']
     skinGroup = bodyRig['skingroup']
     rigPosition = bodyRig['position']
-    constraintParent = pm.PyNode('x__constraints__grp__')
+    constraintParent = props_naming_lib.find_node('x', None, 'constraints', 'grp')
 
+    guideMeta = guide_meta.read_guide_meta(rigGuide)
     metaGuideRoot = pm.PyNode(rigGuide.name() + '.' + 'gid_root').outputs()[0]
     metaRearPivot = pm.PyNode(rigGuide.name() + '.' + 'meta_rear_pivot').outputs()[0]
 
-    basename = rigGuide.gid_basename.get()
-    ctrlName = rigGuide.gid_ctrl_name.get()
-    side = rigGuide.gid_side.get()
-    frontOrBack = rigGuide.gid_front_side.get()
+    basename = guideMeta.basename
+    ctrlName = guideMeta.ctrlName
+    side = guideMeta.side
+    frontOrBack = guideMeta.frontSide
 
-    geoColl = rigGuide.gid_geo.get().split(',')
-    [geoColl.pop(i) for i, x in enumerate(geoColl) if x == ''] # filter out any blanks
-    geoColl = [pm.PyNode(x) for x in geoColl]
+    geoColl = [pm.PyNode(x) for x in guideMeta.geo]
 
-    totalBox = dt.BoundingBox()
-    [ totalBox.expand(x.getBoundingBox().min()) for x in geoColl ]
-    [ totalBox.expand(x.getBoundingBox().max()) for x in geoColl ]
+    geoBoxes = props_geo_lib.get_bounding_boxes(geoColl)
+    totalBB = props_geo_lib.total_bounding_box(geoBoxes)
+    totalBox = props_geo_lib.to_bounding_box(totalBB)
 
-    if totalBox.center()[0] > 0.0:
-        rigFlip = 1.0
-    elif totalBox.center()[0] == 0.0:
-        rigFlip = 1.0
-    else:
-        rigFlip = -1.0
+    rigFlip = -1.0 if props_geo_lib.classify_sides(totalBB)[0] == 'r' else 1.0
 
     # create all the parts
     rigGroup = pm.group(n='{}_rig__grp__'.format(ctrlName), em=True)
     oSeatRoot = pm.group(em=True, n='{}__ctrlroot__'.format(ctrlName))
     oSeatRearRoot = pm.group(em=True, n='{}_rear__ctrlroot__'.format(ctrlName))
-    oSeat = props_icon_lib.create_control_icon(
-            'square', '{}__ctrl__'.format(ctrlName),
-            [totalBox.width() * 1.1, 1.0, totalBox.depth() * 1.1], offset=[0, 0.25, 0])
-    oSeatRear = props_icon_lib.create_control_icon(
-            'square', '{}_rear__ctrl__'.format(ctrlName),
-            [totalBox.width() * 1.1, 1.0, totalBox.depth() * 0.65], offset=[0, 0.5, 0])
+    oSeat, oSeatRear = props_icon_lib.create_control_icons('square', [
+            ('{}__ctrl__'.format(ctrlName), [totalBox.width() * 1.1, 1.0, totalBox.depth() * 1.1], [0, 0.25, 0],
+                6 if rigFlip == 1.0 else 13),
+            ('{}_rear__ctrl__'.format(ctrlName), [totalBox.width() * 1.1, 1.0, totalBox.depth() * 0.65], [0, 0.5, 0],
+                18 if rigFlip == 1.0 else 20),
+            ])
     oSeatJoint = create_rig_joint('{}__skjnt__'.format(ctrlName), radius=0.3)
     oSeatRearJoint = create_rig_joint('{}_rear__skjnt__'.format(ctrlName), radius=0.3)
 
@@ -2463,12 +2072,12 @@ def build_seat_rig(section, rigGuide, bodyRig):
         each.sy.unlock()
         each.sz.unlock()
         #TODO: I'm constraining the geo to not double-transform. Figure something more robust out.
-        oCons = pm.parentConstraint(pm.PyNode('x__additive_rig__grp__'), each,
+        oCons = pm.parentConstraint(props_naming_lib.find_node('x', None, 'additive_rig', 'grp'), each,
                 n='{}__{}__{}_{}__parentconstraint__'.format(side, section, basename, each.name()),
                 mo=True)
         oCons.setTranslation(totalBox.center(), space='world')
         pm.parent(oCons, constraintParent)
-        oCons = pm.scaleConstraint(pm.PyNode('x__additive_rig__grp__'), each,
+        oCons = pm.scaleConstraint(props_naming_lib.find_node('x', None, 'additive_rig', 'grp'), each,
                 n='{}__{}__{}_{}__scaleconstraint__'.format(side, section, basename, each.name()),
                 mo=True)
         oCons.setTranslation(totalBox.center(), space='world')
@@ -2497,17 +2106,6 @@ def build_seat_rig(section, rigGuide, bodyRig):
             n='{}__{}__{}_rear_skin__scaleconstraint__'.format(side, section, basename),
             mo=True)
 
-    if rigFlip == 1.0:
-        oSeat.getShape().overrideEnabled.set(True)
-        oSeatRear.getShape().overrideEnabled.set(True)
-        oSeat.getShape().overrideColor.set(6)
-        oSeatRear.getShape().overrideColor.set(18)
-    else:
-        oSeat.getShape().overrideEnabled.set(True)
-        oSeatRear.getShape().overrideEnabled.set(True)
-        oSeat.getShape().overrideColor.set(13)
-        oSeatRear.getShape().overrideColor.set(20)
-
     #####bodyRig['vis2'].outColorR.connect(oSeat.lodVisibility, force=True)
     #####bodyRig['vis2'].outColorR.connect(oSeatRear.lodVisibility, force=True)
 
@@ -2520,117 +2118,71 @@ def build_seat_rig(section, rigGuide, bodyRig):
     lock_main_params(oSeat, pLocked=True, pChannelBox=False, pKeyable=False, pParams=lockParams)
     lock_main_params(oSeatRear, pLocked=True, pChannelBox=False, pKeyable=False, pParams=lockParams)
 
-    pm.delete(metaGuideRoot)
 
 
-def build_door_rig(section, rigGuide, bodyRig):
-    # init the parts of the rig guide
-    parentObj = bodyRig['trajectory']
-    mainRigGroup = bodyRig['riggroup']
-    partsGroup = bodyRig['partsgroup']
-    skinGroup = bodyRig['skingroup']
-    constraintParent = pm.PyNode('x__constraints__grp__')
-
-    metaGuideRoot = pm.PyNode(rigGuide.name() + '.' + 'gid_root').outputs()[0]
-
-    basename = rigGuide.gid_basename.get()
-    ctrlName = rigGuide.gid_ctrl_name.get()
-    side = rigGuide.gid_side.get()
-    frontOrBack = rigGuide.gid_front_side.get()
-
-    geoColl = rigGuide.gid_geo.get().split(',')
-    [geoColl.pop(i) for i, x in enumerate(geoColl) if x == ''] # filter out any blanks
-    geoColl = [pm.PyNode(x) for x in geoColl]
-
-    totalBox = dt.BoundingBox()
-    [ totalBox.expand(x.getBoundingBox().min()) for x in geoColl ]
-    [ totalBox.expand(x.getBoundingBox().max()) for x in geoColl ]
-
-    if totalBox.center()[0] > 0.0:
-        rigFlip = 1.0
-    elif totalBox.center()[0] == 0.0:
-        rigFlip = 1.0
-    else:
-        rigFlip = -1.0
-
-    # create all the parts
-    rigGroup = pm.group(n='{}_rig__grp__'.format(ctrlName), em=True)
-    oControlRoot = pm.group(n='{}_door__ctrlroot__'.format(ctrlName), em=True)
-    oControl = props_icon_lib.create_control_icon('box', '{}_door__ctrl__'.format(ctrlName), [0.5, 2.0, 0.5])
-
-    oControlRoot.setTranslation(rigGuide.getTranslation(space='world'), space='world')
-    oControl.setTranslation(rigGuide.getTranslation(space='world'), space='world')
-    oControlRoot.setRotation(rigGuide.getRotation(space='world'), space='world')
-    oControl.setRotation(rigGuide.getRotation(space='world'), space='world')
-
-    for each in geoColl:
-        eachName = each.name()
-        oCons = pm.parentConstraint(oControl, each,
-                n='{}__{}__{}_{}__parentconstraint__'.format(side, section, basename, eachName),
-                mo=True)
-        oCons.setTranslation(totalBox.center(), space='world')
-        pm.parent(oCons, constraintParent)
-        oCons = pm.scaleConstraint(oControl, each,
-                n='{}__{}__{}_{}__scaleconstraint__'.format(side, section, basename, eachName),
-                mo=True)
-        oCons.setTranslation(totalBox.center(), space='world')
-        pm.parent(oCons, constraintParent)
-
-    chain_parent([partsGroup, rigGroup, oControlRoot, oControl])
-
-    oControl.getShape().overrideEnabled.set(True)
-    if rigFlip == 1.0:
-        oControl.getShape().overrideColor.set(6)
-    else:
-        oControl.getShape().overrideColor.set(13)
-    #####bodyRig['vis2'].outColorR.connect(oControl.lodVisibility, force=True)
-
-    pm.parentConstraint(pm.PyNode('m__element__root_offset__ctrl__'), rigGroup,
-            n='{}__{}__{}_riggrp__parentconstraint__'.format(side, section, basename),
-            mo=True)
-    pm.scaleConstraint(pm.PyNode('m__element__root_offset__ctrl__'), rigGroup,
-            n='{}__{}__{}_riggrp__scaleconstraint__'.format(side, section, basename),
-            mo=True)
+def read_door_guide(rigGuide, bodyRig):
+    """Everything the door rig needs from the guide and the body rig, as the plain data of
+    car_rig_plans.door_rig_plan(). Nothing is made here.
+    """
+    guideMeta = guide_meta.read_guide_meta(rigGuide)
+    geoColl = [pm.PyNode(x) for x in guideMeta.geo]
+    totalBB = props_geo_lib.total_bounding_box(props_geo_lib.get_bounding_boxes(geoColl))
+
+    return {
+        'ctrlName': guideMeta.ctrlName,
+        'side': guideMeta.side,
+        'basename': guideMeta.basename,
+        'geo': [x.name() for x in geoColl],
+        'rigFlip': -1.0 if props_geo_lib.classify_sides(totalBB)[0] == 'r' else 1.0,
+        'bbCenter': props_geo_lib.box_centers(totalBB).tolist(),
+        'position': list(rigGuide.getTranslation(space='world')),
+        'rotation': list(rigGuide.getRotation(space='world')),
+        'partsGroup': bodyRig['partsgroup'].name(),
+        'constraintParent': 'x__constraints__grp__',
+        'rootOffset': 'm__element__root_offset__ctrl__',
+        }
 
-    lockParams = ['.sx','.sy','.sz','.v']
-    lock_main_params(oControl, pLocked=True, pChannelBox=False, pKeyable=False, pParams=lockParams)
 
-    pm.delete(metaGuideRoot)
+@build_profiler.profile
+def build_door_rig(section, rigGuide, bodyRig, plan=None):
+    """The door only reads from the scene. Everything it makes goes into a build_plan.BuildPlan.
+    Pass in a plan to collect several rigs and execute them together, otherwise it is executed right away.
+    """
+    executeNow = plan is None
+    plan = car_rig_plans.door_rig_plan(section, read_door_guide(rigGuide, bodyRig), plan)
+    if executeNow:
+        build_plan.execute_plan(plan)
+    return plan
 
 
+@build_profiler.profile
 def build_steering_rig(section, rigGuide, bodyRig):
     # init the parts of the rig guide
     parentObj = bodyRig['trajectory']
     mainRigGroup = bodyRig['riggroup']
     partsGroup = bodyRig['partsgroup']
     skinGroup = bodyRig['skingroup']
-    constraintParent = pm.PyNode('x__constraints__grp__')
+    constraintParent = props_naming_lib.find_node('x', None, 'constraints', 'grp')
 
+    guideMeta = guide_meta.read_guide_meta(rigGuide)
     metaGuideRoot = pm.PyNode(rigGuide.name() + '.' + 'gid_root').outputs()[0]
     metaWheelBase = pm.PyNode(rigGuide.name() + '.' + 'meta_steering_base').outputs()[0]
     metaWheelWidth = pm.PyNode(rigGuide.name() + '.' + 'meta_steering_width').outputs()[0]
 
     controlRadius = metaWheelWidth.tx.get() * 1.0
 
-    basename = rigGuide.gid_basename.get()
-    ctrlName = rigGuide.gid_ctrl_name.get()
-    side = rigGuide.gid_side.get()
-    frontOrBack = rigGuide.gid_front_side.get()
+    basename = guideMeta.basename
+    ctrlName = guideMeta.ctrlName
+    side = guideMeta.side
+    frontOrBack = guideMeta.frontSide
 
-    geoColl = rigGuide.gid_geo.get().split(',')
-    [geoColl.pop(i) for i, x in enumerate(geoColl) if x == ''] # filter out any blanks
-    geoColl = [pm.PyNode(x) for x in geoColl]
+    geoColl = [pm.PyNode(x) for x in guideMeta.geo]
 
-    totalBox = dt.BoundingBox()
-    [ totalBox.expand(x.getBoundingBox().min()) for x in geoColl ]
-    [ totalBox.expand(x.getBoundingBox().max()) for x in geoColl ]
+    geoBoxes = props_geo_lib.get_bounding_boxes(geoColl)
+    totalBB = props_geo_lib.total_bounding_box(geoBoxes)
+    totalBox = props_geo_lib.to_bounding_box(totalBB)
 
-    if totalBox.center()[0] > 0.0:
-        rigFlip = 1.0
-    elif totalBox.center()[0] == 0.0:
-        rigFlip = 1.0
-    else:
-        rigFlip = -1.0
+    rigFlip = -1.0 if props_geo_lib.classify_sides(totalBB)[0] == 'r' else 1.0
 
     # create all the parts
     rigGroup = pm.group(n='{}_rig__grp__'.format(ctrlName), em=True)
@@ -2665,27 +2217,28 @@ def build_steering_rig(section, rigGuide, bodyRig):
         oControl.getShape().overrideColor.set(13)
     #####bodyRig['vis2'].outColorR.connect(oControl.lodVisibility, force=True)
 
-    pm.parentConstraint(pm.PyNode('m__element__root_offset__ctrl__'), rigGroup,
+    pm.parentConstraint(props_naming_lib.find_node('m', 'element', 'root_offset', 'ctrl'), rigGroup,
             n='{}__{}__{}_riggrp__parentconstraint__'.format(side, section, basename),
             mo=True)
-    pm.scaleConstraint(pm.PyNode('m__element__root_offset__ctrl__'), rigGroup,
+    pm.scaleConstraint(props_naming_lib.find_node('m', 'element', 'root_offset', 'ctrl'), rigGroup,
             n='{}__{}__{}_riggrp__scaleconstraint__'.format(side, section, basename),
             mo=True)
 
     lockParams = ['.sx','.sy','.sz','.v']
     lock_main_params(oControl, pLocked=True, pChannelBox=False, pKeyable=False, pParams=lockParams)
 
-    pm.delete(metaGuideRoot)
 
 
+@build_profiler.profile
 def build_piston_rig(section, rigGuide, bodyRig):
     # init the parts of the rig guide
     parentObj = bodyRig['trajectory']
     mainRigGroup = bodyRig['riggroup']
     partsGroup = bodyRig['partsgroup']
     skinGroup = bodyRig['skingroup']
-    constraintParent = pm.PyNode('x__constraints__grp__')
+    constraintParent = props_naming_lib.find_node('x', None, 'constraints', 'grp')
 
+    guideMeta = guide_meta.read_guide_meta(rigGuide)
     metaGuideRoot = pm.PyNode(rigGuide.name() + '.' + 'gid_root').outputs()[0]
     metaWheelBase = pm.PyNode(rigGuide.name() + '.' + 'meta_piston_pivot').outputs()[0]
 
@@ -2693,25 +2246,18 @@ def build_piston_rig(section, rigGuide, bodyRig):
     topRot = rigGuide.getRotation(space='world')
     botPos = metaWheelBase.getTranslation(space='world')
 
-    basename = rigGuide.gid_basename.get()
-    ctrlName = rigGuide.gid_ctrl_name.get()
-    side = rigGuide.gid_side.get()
-    frontOrBack = rigGuide.gid_front_side.get()
+    basename = guideMeta.basename
+    ctrlName = guideMeta.ctrlName
+    side = guideMeta.side
+    frontOrBack = guideMeta.frontSide
 
-    geoColl = rigGuide.gid_geo.get().split(',')
-    [geoColl.pop(i) for i, x in enumerate(geoColl) if x == ''] # filter out any blanks
-    geoColl = [pm.PyNode(x) for x in geoColl]
+    geoColl = [pm.PyNode(x) for x in guideMeta.geo]
 
-    totalBox = dt.BoundingBox()
-    [ totalBox.expand(x.getBoundingBox().min()) for x in geoColl ]
-    [ totalBox.expand(x.getBoundingBox().max()) for x in geoColl ]
+    geoBoxes = props_geo_lib.get_bounding_boxes(geoColl)
+    totalBB = props_geo_lib.total_bounding_box(geoBoxes)
+    totalBox = props_geo_lib.to_bounding_box(totalBB)
 
-    if totalBox.center()[0] > 0.0:
-        rigFlip = 1.0
-    elif totalBox.center()[0] == 0.0:
-        rigFlip = 1.0
-    else:
-        rigFlip = -1.0
+    rigFlip = -1.0 if props_geo_lib.classify_sides(totalBB)[0] == 'r' else 1.0
 
     # create all the parts
     rigGroup = pm.group(n='{}_piston_rig__grp__'.format(ctrlName), em=True)
@@ -2777,12 +2323,12 @@ def build_piston_rig(section, rigGuide, bodyRig):
         each.sy.unlock()
         each.sz.unlock()
         #TODO: I'm constraining the geo to not double-transform. Figure something more robust out.
-        oCons = pm.parentConstraint(pm.PyNode('x__additive_rig__grp__'), each,
+        oCons = pm.parentConstraint(props_naming_lib.find_node('x', None, 'additive_rig', 'grp'), each,
                 n='{}__{}__{}_{}__parentconstraint__'.format(side, section, basename, each.name()),
                 mo=True)
         oCons.setTranslation(totalBox.center(), space='world')
         pm.parent(oCons, constraintParent)
-        oCons = pm.scaleConstraint(pm.PyNode('x__additive_rig__grp__'), each, mo=True,
+        oCons = pm.scaleConstraint(props_naming_lib.find_node('x', None, 'additive_rig', 'grp'), each, mo=True,
                 n='{}__{}__{}_{}__scaleconstraint__'.format(side, section, basename, each.name()))
         oCons.setTranslation(totalBox.center(), space='world')
         pm.parent(oCons, constraintParent)
@@ -2811,43 +2357,39 @@ def build_piston_rig(section, rigGuide, bodyRig):
     # 3. upper twist
     # 4. lower twist
 
-    pm.parentConstraint(pm.PyNode('m__element__root_offset__ctrl__'), rigGroup,
+    pm.parentConstraint(props_naming_lib.find_node('m', 'element', 'root_offset', 'ctrl'), rigGroup,
             n='{}__{}__{}_riggrp__parentconstraint__'.format(side, section, basename),
             mo=True)
-    pm.scaleConstraint(pm.PyNode('m__element__root_offset__ctrl__'), rigGroup,
+    pm.scaleConstraint(props_naming_lib.find_node('m', 'element', 'root_offset', 'ctrl'), rigGroup,
             n='{}__{}__{}_riggrp__scaleconstraint__'.format(side, section, basename),
             mo=True)
 
-    pm.delete(metaGuideRoot)
 
 
+@build_profiler.profile
 def build_jiggly_bits_rig(section, rigGuide, bodyRig):
     # init the parts of the rig guide
     parentObj = bodyRig['trajectory']
     mainRigGroup = bodyRig['riggroup']
     partsGroup = bodyRig['partsgroup']
     skinGroup = bodyRig['skingroup']
-    constraintParent = pm.PyNode('x__constraints__grp__')
+    constraintParent = props_naming_lib.find_node('x', None, 'constraints', 'grp')
 
+    guideMeta = guide_meta.read_guide_meta(rigGuide)
     metaGuideRoot = rigGuide.gid_root.outputs()[0]
     metaPivot = rigGuide.meta_jiggle_pivot.outputs()[0]
 
-    basename = rigGuide.gid_basename.get()
-    ctrlName = rigGuide.gid_ctrl_name.get()
-    side = rigGuide.gid_side.get()
-    frontOrBack = rigGuide.gid_front_side.get()
+    basename = guideMeta.basename
+    ctrlName = guideMeta.ctrlName
+    side = guideMeta.side
+    frontOrBack = guideMeta.frontSide
 
-    geoColl = [pm.PyNode(x) for x in rigGuide.gid_geo.get().split(',')]
-    totalBox = dt.BoundingBox()
-    [ totalBox.expand(x.getBoundingBox().min()) for x in geoColl ]
-    [ totalBox.expand(x.getBoundingBox().max()) for x in geoColl ]
+    geoColl = [pm.PyNode(x) for x in guideMeta.geo]
+    geoBoxes = props_geo_lib.get_bounding_boxes(geoColl)
+    totalBB = props_geo_lib.total_bounding_box(geoBoxes)
+    totalBox = props_geo_lib.to_bounding_box(totalBB)
 
-    if totalBox.center()[0] > 0.0:
-        rigFlip = 1.0
-    elif totalBox.center()[0] == 0.0:
-        rigFlip = 1.0
-    else:
-        rigFlip = -1.0
+    rigFlip = -1.0 if props_geo_lib.classify_sides(totalBB)[0] == 'r' else 1.0
 
     # create all the parts
     rigGroup = pm.group(n='{}_rig__grp__'.format(ctrlName), em=True)
@@ -2869,10 +2411,10 @@ def build_jiggly_bits_rig(section, rigGuide, bodyRig):
 
     chain_parent([partsGroup, rigGroup, oControlRoot, oControl])
 
-    pm.parentConstraint(pm.PyNode('m__element__root_offset__ctrl__'), rigGroup,
+    pm.parentConstraint(props_naming_lib.find_node('m', 'element', 'root_offset', 'ctrl'), rigGroup,
             n='{}__{}__{}_riggrp__parentconstraint__'.format(side, section, basename),
             mo=True)
-    pm.scaleConstraint(pm.PyNode('m__element__root_offset__ctrl__'),
+    pm.scaleConstraint(props_naming_lib.find_node('m', 'element', 'root_offset', 'ctrl'),
             rigGroup, n='{}__{}__{}_riggrp__scaleconstraint__'.format(side, section, basename),
             mo=True)
 
@@ -2883,61 +2425,215 @@ def build_jiggly_bits_rig(section, rigGuide, bodyRig):
         oControl.getShape().overrideColor.set(13)
     #####bodyRig['vis2'].outColorR.connect(oControl.lodVisibility, force=True)
 
-    # just grab the shape from the guide
-    props_icon_lib.swap_shape(oControl, rigGuide)
+    # just grab the shape from the guide. Keep the guide, so it is still there for the next build.
+    props_icon_lib.swap_shapes([(oControl, rigGuide)], deleteSource=False)
 
     lockParams = ['.sx','.sy','.sz','.v']
     lock_main_params(oControl, pLocked=True, pChannelBox=False, pKeyable=False, pParams=lockParams)
 
-    pm.delete(metaGuideRoot)
     #TODO: for every bit, have a skinning joint and a base joint. A lot of the geo will not be separated.
 
 
+def guide_fingerprint(rigGuide, snapshot=None):
+    """Returns a hash of everything a subsystem rig is built from: the world matrix and curve shape
+    of every node in the guide, the gid_* meta attributes and the gid_geo meshes.
+    If the hash hasn't changed since the last build, the rig doesn't need to be built again.
+    snapshot: a scene_snapshot.SceneSnapshot to read the gid_* attributes from, instead of the scene.
+    """
+    metaGuideRoot = rigGuide.gid_root.outputs()[0].longName()
+    guideNodes = cmds.listRelatives(metaGuideRoot, allDescendents=True, type='transform', fullPath=True) or []
+    guideShapes = cmds.listRelatives(metaGuideRoot, allDescendents=True, type='nurbsCurve', fullPath=True) or []
+
+    guideData = []
+    # round the matrices, so floating point noise doesn't count as a change.
+    for each in [metaGuideRoot] + sorted(guideNodes):
+        guideData.append([each, [round(x, 5) for x in cmds.xform(each, q=True, ws=True, matrix=True)]])
+    for each in sorted(guideShapes):
+        guideData.append([each, [[round(x, 5) for x in cv] for cv in cmds.getAttr(each + '.cv[*]')]])
+    guideRecord = snapshot.guide(rigGuide.longName()) if snapshot else None
+    if guideRecord:
+        for attr in sorted(guideRecord.attrs):
+            if attr.startswith('gid_'):
+                guideData.append([attr, guideRecord.attrs[attr]])
+    else:
+        for attr in sorted(cmds.listAttr(rigGuide.longName(), userDefined=True) or []):
+            if attr.startswith('gid_'):
+                guideData.append([attr, cmds.getAttr('{}.{}'.format(rigGuide.longName(), attr))])
+    guideMeta = guide_meta.meta_from_attrs(guideRecord.attrs) if guideRecord else guide_meta.read_guide_meta(rigGuide)
+    guideData.append(props_geo_lib.hash_meshes(guideMeta.geo))
+    return hashlib.md5(json.dumps(guideData, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def read_build_record():
+    """The last build of each subsystem, stored in the scene.
+    { guideName: {'type': gidType, 'fingerprint': hash, 'nodes': [uuids], 'parts': {key: uuid}} }
+    parts is only stored for the body, so the other rigs can be rebuilt without rebuilding it.
+    """
+    recordPlug = 'x__rig_build__network__.build_record'
+    if not cmds.objExists(recordPlug):
+        return {}
+    return json.loads(cmds.getAttr(recordPlug) or '{}')
+
+
+def write_build_record(record):
+    recordName = 'x__rig_build__network__'
+    if not cmds.objExists(recordName):
+        cmds.createNode('network', name=recordName)
+    add_meta_attribute(pm.PyNode(recordName), 'build_record', json.dumps(record, sort_keys=True))
+
+
+def scene_uuids():
+    return set(cmds.ls(uuid=True) or [])
+
+
+def record_resolves(recordEntry):
+    """True if every node the last build of a subsystem made, and every body part, is still in the scene.
+    A rig that was deleted by hand is out of date, even if its guide hasn't changed.
+    """
+    uuids = set(recordEntry['nodes']) | set(recordEntry.get('parts', {}).values())
+    if not uuids:
+        return True
+    # cmds.ls() with an empty list returns the whole scene, hence the check above.
+    return uuids.issubset(cmds.ls(list(uuids), uuid=True) or [])
+
+
+def teardown_rig(recordEntry):
+    """Delete every node the last build of a subsystem made. Anything already deleted is skipped."""
+    existingNodes = cmds.ls(recordEntry['nodes'], long=True) or []
+    if existingNodes:
+        cmds.delete(existingNodes)
+
+
+def build_tracked_rig(record, fingerprint, gid, builder, *args):
+    """Run a build_*_rig function, and record the nodes it made, so the rig can be torn down later."""
+    beforeBuild = scene_uuids()
+    result = builder(*args)
+    record[gid.name()] = {
+        'type': gid.gid_type.get(),
+        'fingerprint': fingerprint,
+        'nodes': sorted(scene_uuids() - beforeBuild),
+        }
+    return result
+
+
 @undo
-def build_rig():
+@build_profiler.profile
+def build_rig(incremental=True, keepGuides=True):
+    """Builds the vehicle rig from the guides.
+    incremental: Only rebuild the subsystems whose guide_fingerprint() changed since the last build.
+        The body is built from the wheel guides, and everything else is parented under it,
+        so a change to the body or to any wheel still rebuilds everything.
+    keepGuides: Hide the guides instead of deleting them, so they can be nudged and built again.
+    """
+    # the scene may have changed since the last build, so nodes and meshes are looked up fresh.
+    props_naming_lib.clear_name_index()
+    props_geo_lib.clear_vertex_trees()
+    scene = scene_backend.get_backend()
     constraintParentName = 'x__constraints__grp__'
-    if not pm.objExists(constraintParentName):
-        constraintParent = pm.group(em=True, n=constraintParentName)
-    else:
-        constraintParent = pm.PyNode(constraintParentName)
+    if not scene.objExists(constraintParentName):
+        scene.group(name=constraintParentName)
+    constraintParent = scene.wrap(constraintParentName)
+    props_naming_lib.get_name_index().add(constraintParent)
 
-    # find the existing GIDs from when the guide rig was built.
-    gidColl = [x for x in pm.ls('*__gid__', type='transform') if pm.objExists(x.name() + '.gid_type')]
+    # find the existing GIDs from when the guide rig was built. The guides don't change during the build, so read them once.
+    snapshot = scene_snapshot.get_snapshot()
+    gidNodes = { x.longName: pm.PyNode(x.longName) for x in snapshot }
+    gidColl = [gidNodes[x.longName] for x in snapshot]
 
     # group each type of guides into a dictionary key.
     gidTypes = ['body', 'wheel', 'seat', 'door', 'steering', 'piston', 'jiggly']
-    gids = { gidType: [x for x in gidColl if x.gid_type.get() == gidType] for gidType in gidTypes }
+    gids = { gidType: [gidNodes[x.longName] for x in snapshot.by_type(gidType)] for gidType in gidTypes }
 
     # I assume that there will only be one body
     if not gids['body']:
         print('It seems there is no body guide rig. Quitting.')
         return False
 
+    # compare every guide against the last build, and tear down the rigs that are out of date.
+    fingerprints = { x.name(): guide_fingerprint(x, snapshot) for x in gidColl }
+    record = read_build_record()
+    resolved = { name: record_resolves(entry) for name, entry in record.items() }
+    bodyGuides = sorted([x.name() for x in gids['body'] + gids['wheel']])
+    lastBodyGuides = sorted([name for name, entry in record.items() if entry['type'] in ['body', 'wheel']])
+    fullRebuild = (
+            not incremental
+            or bodyGuides != lastBodyGuides
+            or any([record[name]['fingerprint'] != fingerprints[name] or not resolved[name] for name in bodyGuides])
+            )
+    staleRigs = [
+            name for name in record
+            if fullRebuild or name not in fingerprints or record[name]['fingerprint'] != fingerprints[name]
+            or not resolved[name]
+            ]
+    for name in staleRigs:
+        teardown_rig(record.pop(name))
+    if not fullRebuild:
+        print('Rebuilding {} changed rigs: {}'.format(
+            len([x for x in gidColl if x.name() not in record]),
+            ', '.join([x.name() for x in gidColl if x.name() not in record])))
+
     gid = gids['body'][0]
-    # pass the wheel guides into the body to build the common middle controls.
-    oBodyRig = build_body_rig('body', gid, gids['wheel'])
+    if gid.name() in record:
+        # the body is up to date. Find its parts from the last build. record_resolves() checked they are all there.
+        oBodyRig = {
+            key: pm.PyNode(cmds.ls(uuid, long=True)[0])
+            for key, uuid in record[gid.name()]['parts'].items()
+            }
+    else:
+        # pass the wheel guides into the body to build the common middle controls.
+        oBodyRig = build_tracked_rig(record, fingerprints[gid.name()], gid, build_body_rig, 'body', gid, gids['wheel'])
+        record[gid.name()]['parts'] = {
+            key: cmds.ls(oNode.longName(), uuid=True)[0] for key, oNode in oBodyRig.items()
+            }
 
     for gid in gids['wheel']:
-        build_wheel_rig('wheel', gid, oBodyRig)
+        if gid.name() not in record:
+            build_tracked_rig(record, fingerprints[gid.name()], gid, build_wheel_rig, 'wheel', gid, oBodyRig)
 
     for gid in gids['seat']:
-        build_seat_rig('seat', gid, oBodyRig)
+        if gid.name() not in record:
+            build_tracked_rig(record, fingerprints[gid.name()], gid, build_seat_rig, 'seat', gid, oBodyRig)
 
+    # the doors are collected into one plan, and made in bulk once the other builders are done.
+    rigPlan = build_plan.BuildPlan()
+    doorPlans = {}
     for gid in gids['door']:
-        build_door_rig('door', gid, oBodyRig)
+        if gid.name() not in record:
+            doorPlans[gid] = build_door_rig('door', gid, oBodyRig, plan=build_plan.BuildPlan())
+            rigPlan.extend(doorPlans[gid])
 
     for gid in gids['steering']:
-        build_steering_rig('steering', gid, oBodyRig)
+        if gid.name() not in record:
+            build_tracked_rig(record, fingerprints[gid.name()], gid, build_steering_rig, 'steering', gid, oBodyRig)
 
     for gid in gids['piston']:
-        build_piston_rig('piston', gid, oBodyRig)
+        if gid.name() not in record:
+            build_tracked_rig(record, fingerprints[gid.name()], gid, build_piston_rig, 'piston', gid, oBodyRig)
 
     for gid in gids['jiggly']:
-        build_jiggly_bits_rig('jiggly', gid, oBodyRig)
+        if gid.name() not in record:
+            build_tracked_rig(record, fingerprints[gid.name()], gid, build_jiggly_bits_rig, 'jiggly', gid, oBodyRig)
+
+    planNames = build_plan.execute_plan(rigPlan)
+    for gid, doorPlan in doorPlans.items():
+        createdNodes = [planNames[x] for x in doorPlan.created_names()]
+        record[gid.name()] = {
+            'type': 'door',
+            'fingerprint': fingerprints[gid.name()],
+            'nodes': sorted(cmds.ls(createdNodes, uuid=True) or []),
+            }
+
+    # a builder can delete nodes an earlier one made. Only record what is left, so record_resolves() holds.
+    for entry in record.values():
+        entry['nodes'] = sorted(cmds.ls(entry['nodes'], uuid=True) or []) if entry['nodes'] else []
+    write_build_record(record)
 
     guideParentName = 'x__element__main_guide_group__grp__'
-    if pm.objExists(guideParentName):
-        pm.delete(guideParentName)
+    if scene.objExists(guideParentName):
+        if keepGuides:
+            scene.setAttr(guideParentName + '.v', 0)
+        else:
+            scene.delete(guideParentName)
 
     ##### SET DEFAULT ATTRIBUTES. If not 0, then it will add an extra override attribute to the transform. #####
     #####oControls = pm.ls('*__ctrl__', type='transform')
@@ -2950,21 +2646,30 @@ def build_rig():
     #####pm.parent(pm.PyNode('sandbox'), None)
 
 
-# Development workaround for PySide winEvent error (Maya 2014)
-# Make sure the UI is deleted before recreating
-try:
-    car_tools
-    car_tools.deleteLater()
-except NameError:
-    pass
+# kept through reload(), so show() can still close the dialog that is open.
+car_tools = globals().get('car_tools')
 
-# Create UI object
-car_tools = CarRiggingTools()
 
-# Delete the UI if errors occur to avoid causing winEvent and event errors
-try:
-    car_tools.create()
-    car_tools.show()
-except:
-    car_tools.deleteLater()
-    traceback.print_exc()
+def show():
+    """Open the Auto Autorigger. Importing this module doesn't, so use show() or props_launcher."""
+    global car_tools
+    # Development workaround for PySide winEvent error (Maya 2014)
+    # Make sure the UI is deleted before recreating
+    if car_tools is not None:
+        car_tools.deleteLater()
+
+    # Create UI object
+    car_tools = CarRiggingTools()
+
+    # Delete the UI if errors occur to avoid causing winEvent and event errors
+    try:
+        car_tools.create()
+        car_tools.show()
+    except:
+        car_tools.deleteLater()
+        traceback.print_exc()
+    return car_tools
+
+
+if __name__ == '__main__':
+    show()
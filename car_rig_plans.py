@@ -0,0 +1,284 @@
+#!/usr/bin/env mayapy
+# encoding: utf-8
+"""
+The BuildPlans of the car rigs that are made in bulk: the doors and the wheels.
+
+car_autorig reads each guide into a dictionary of plain data first: names, world positions,
+bounding boxes and the wheel radius. Everything else, like the icon CVs and the placements,
+is worked out here from that data, so a plan can be made and counted without Maya.
+
+    plan = car_rig_plans.door_rig_plan('door', car_autorig.read_door_guide(rigGuide, bodyRig))
+    print(plan.summary())
+    build_plan.execute_plan(plan)
+"""
+
+import math
+
+import numpy as np
+
+import build_plan
+import props_icon_lib
+
+LOCK_PARAMS = ['.sx', '.sy', '.sz', '.v']
+
+
+def _lock_params(plan, node):
+    for param in LOCK_PARAMS:
+        plan.lock(node + param, locked=True, keyable=False, channelBox=False)
+
+
+def door_rig_plan(section, guideData, plan=None):
+    """The door rig, from the data of car_autorig.read_door_guide(). Adds to plan when given. Returns the plan.
+    guideData keys:
+        ctrlName, side, basename, geo: from the guide meta.
+        rigFlip: 1.0 on the left, -1.0 on the right.
+        bbCenter: the center of the door geo.
+        position, rotation: the world position and rotation of the guide.
+        partsGroup, constraintParent, rootOffset: the names of the body rig nodes the door goes under.
+    """
+    plan = plan or build_plan.BuildPlan()
+    ctrlName = guideData['ctrlName']
+    nameParts = (guideData['side'], section, guideData['basename'])
+
+    # create all the parts
+    rigGroup = plan.add_group('{}_rig__grp__'.format(ctrlName))
+    oControlRoot = plan.add_group('{}_door__ctrlroot__'.format(ctrlName))
+    iconLib = props_icon_lib.icon_library('box')
+    oControl = plan.add_curve('{}_door__ctrl__'.format(ctrlName),
+            props_icon_lib.icon_points('box', [0.5, 2.0, 0.5]),
+            degree=iconLib['degree'], periodic=iconLib['closed'])
+
+    plan.chain_parent([guideData['partsGroup'], rigGroup, oControlRoot, oControl])
+    plan.place(oControlRoot, guideData['position'], guideData['rotation'])
+    plan.place(oControl, guideData['position'], guideData['rotation'])
+
+    for eachName in guideData['geo']:
+        plan.constrain('parentConstraint', oControl, eachName,
+                '{}__{}__{}_{}__parentconstraint__'.format(*nameParts + (eachName,)),
+                parent=guideData['constraintParent'], translation=guideData['bbCenter'])
+        plan.constrain('scaleConstraint', oControl, eachName,
+                '{}__{}__{}_{}__scaleconstraint__'.format(*nameParts + (eachName,)),
+                parent=guideData['constraintParent'], translation=guideData['bbCenter'])
+
+    plan.set_attr(oControl + '.overrideEnabled', True, shape=True)
+    plan.set_attr(oControl + '.overrideColor', 6 if guideData['rigFlip'] == 1.0 else 13, shape=True)
+
+    plan.constrain('parentConstraint', guideData['rootOffset'], rigGroup,
+            '{}__{}__{}_riggrp__parentconstraint__'.format(*nameParts))
+    plan.constrain('scaleConstraint', guideData['rootOffset'], rigGroup,
+            '{}__{}__{}_riggrp__scaleconstraint__'.format(*nameParts))
+
+    _lock_params(plan, oControl)
+    return plan
+
+
+def wheel_control_points(radius, centerX, pointHeight):
+    """The CVs of a wheel control: a circle facing X, with a point on top, so you can see it turn."""
+    points = props_icon_lib.circle_points(radius, sections=24, center=[centerX, 0.0, 0.0])
+    points[0:3] = points[1] + [0.0, pointHeight, 0.0]
+    return points
+
+
+def wheel_rig_plan(section, guideData, plan=None):
+    """The wheel rig, from the data of car_autorig.read_wheel_guide(). Adds to plan when given.
+    Returns the plan and a dictionary of the parts the lattice is hooked up to afterwards.
+    guideData keys:
+        ctrlName, side, basename, frontSide, geo: from the guide meta.
+        radius: the radius of the guide circle.
+        guidePosition, basePosition, innerPosition, altPivotPosition: world positions of the guide nodes.
+        bbCenter, bbMax: the center and the top corner of the wheel geo.
+        wheelsGroup, wheelPin, wheelTurn, trajectory, constraintParent: body rig node names. wheelTurn can be None.
+        positionCtrl, rootCtrl, rootJointOrig: the names of the main controls the wheel follows.
+        autoWheel: the name of the *_auto_wheel plug that switches the auto spin, or None.
+    """
+    plan = plan or build_plan.BuildPlan()
+    ctrlName = guideData['ctrlName']
+    nameParts = (guideData['side'], section, guideData['basename'])
+    radius = guideData['radius']
+
+    basePos = np.asarray(guideData['basePosition'], dtype=float)
+    innerPos = np.asarray(guideData['innerPosition'], dtype=float)
+    centerAltPivot = np.asarray(guideData['altPivotPosition'], dtype=float)
+    centerXZ = (basePos + innerPos) * 0.5
+    rigFlip = -1.0 if centerXZ[0] < 0.0 else 1.0
+    centerOfWheel = [centerXZ[0], guideData['guidePosition'][1], centerXZ[2]]
+    centerAltXZ = [centerAltPivot[0], 0.0, centerAltPivot[2]]
+
+    # create all the parts
+    rigGroup = plan.add_group('{}_rig__grp__'.format(ctrlName))
+    oWheelBaseRoot = plan.add_group('{}_base__root__'.format(ctrlName))
+    oWheelBase = plan.add_group('{}_base__loc__'.format(ctrlName))
+    oWheelPivotZero = plan.add_group('{}_pivot__zero__'.format(ctrlName))
+    oWheelPivotRoot = plan.add_group('{}_pivot__root__'.format(ctrlName))
+    oWheelPivot = plan.add_group('{}_pivot__loc__'.format(ctrlName))
+    oInner = plan.add_group('{}_inner__loc__'.format(ctrlName))
+    oOuter = plan.add_group('{}_outer__loc__'.format(ctrlName))
+    oControlZero = plan.add_group('{}_ctrl_zero__root__'.format(ctrlName))
+    oControlRoot = plan.add_group('{}_ctrl__root__'.format(ctrlName))
+    oControlDriver = plan.add_group('{}_ctrl__driver__'.format(ctrlName))
+    oControlFollow = plan.add_group('{}_ctrl_follow__grp__'.format(ctrlName))
+    oWobble = plan.add_group('{}_wheel_wobble__grp__'.format(ctrlName))
+    localWheelPin = plan.add_group('{}_wheel_pin__hook__'.format(ctrlName))
+
+    # the turn indicator is a thick saw-tooth line, sitting outside of the wheel.
+    height = radius * 0.25
+    arrowOffset = [
+            (guideData['bbCenter'][0] - guideData['bbMax'][0]) * rigFlip * -1.2, guideData['bbMax'][1] * 0.35, 0.0]
+    sawPoints = np.array(list(props_icon_lib.sawtooth_wave_pattern(height, width=height*0.2, segments=30)))
+    oWheelSkin = plan.add_curve('{}_pivot__sjnt__'.format(ctrlName), sawPoints + arrowOffset, joint=True)
+    plan.set_attr(oWheelSkin + '.radius', 0.5)
+    plan.set_attr(oWheelSkin + '.overrideDisplayType', 1, shape=True) # template
+
+    # the controls are circles around the outside of the wheel. oOuter sits at the base, under oWheelBaseRoot.
+    outerX = basePos[0] - centerAltXZ[0]
+    oControl = plan.add_curve('{}_offset__ctrl__'.format(ctrlName),
+            wheel_control_points(radius * 0.85, outerX * 1.5, 0.05 * radius), degree=3, periodic=True)
+    oControl2 = plan.add_curve('{}__ctrl__'.format(ctrlName),
+            wheel_control_points(radius * 0.7, outerX * 1.6, 0.05 * radius), degree=3, periodic=True)
+    for each in [oControl, oControl2, oWheelSkin]:
+        plan.set_attr(each + '.overrideEnabled', 1, shape=True)
+
+    # A parameter for manually turning the wheel, in addition to all other inputs
+    pManualSpin = plan.add_attr(oControl2, 'wheel_manual_spin')
+
+    # create the hierarchy
+    plan.chain_parent(
+            [guideData['wheelsGroup'], rigGroup, oWheelBaseRoot, oWheelBase, oWheelPivotZero, oWheelPivotRoot,
+            oControl, oWheelPivot, oWobble, oWheelSkin])
+    plan.parent(oInner, oWheelBaseRoot)
+    plan.parent(oOuter, oWheelBaseRoot)
+    plan.chain_parent([rigGroup, oControlZero, oControlRoot, oControlDriver, oControlFollow, oControl2])
+    plan.parent(localWheelPin, guideData['wheelPin'])
+
+    plan.place(oWheelBaseRoot, centerAltXZ)
+    plan.place(oWheelBase, centerAltXZ)
+    for each in [oWheelPivotZero, oWheelPivotRoot, oWheelPivot]:
+        plan.place(each, centerAltPivot)
+    plan.place(oWobble, centerOfWheel)
+    plan.place(oWheelSkin, centerOfWheel)
+    plan.place(oInner, innerPos)
+    plan.place(oOuter, basePos)
+    for each in [oControlZero, oControlRoot, oControlDriver, oControlFollow, oControl, oControl2]:
+        plan.place(each, centerAltPivot)
+    plan.place(localWheelPin, guideData['wheelPinPosition'])
+
+    # set the translation of the constraints, otherwise it interferes with the bounding box!
+    for eachName in guideData['geo']:
+        plan.constrain('parentConstraint', oWheelSkin, eachName,
+                '{}__{}__{}_{}__parentconstraint__'.format(*nameParts + (eachName,)),
+                parent=guideData['constraintParent'], translation=centerOfWheel)
+        plan.constrain('scaleConstraint', oWheelSkin, eachName,
+                '{}__{}__{}_{}__scaleconstraint__'.format(*nameParts + (eachName,)),
+                parent=guideData['constraintParent'], translation=centerOfWheel)
+
+    # create the utility nodes that drive the rotation of the wheel.
+    mult360 = plan.add_node('multiplyDivide', '{}_rig_360__mlt__'.format(ctrlName))
+    dividePI = plan.add_node('multiplyDivide', '{}_rig_pi__mlt__'.format(ctrlName))
+    plan.set_attr(dividePI + '.operation', 2) # divide
+    # this PMA will combine both the auto-control and the auto-driver. When the entire car is translating.
+    mult360Add = plan.add_node('plusMinusAverage', '{}_rig_auto_driver__add__'.format(ctrlName))
+    # this plusMinusAverage will combine all the various channels to rotate the tire
+    tireRotateADD = plan.add_node('plusMinusAverage', '{}_rig_rotation_driver__add__'.format(ctrlName))
+    # tiltRemap takes the sideways translation of the control and rotates the tire sideways.
+    # The rotatePivot is animated to give it a rocking effect.
+    tiltRemap = plan.add_node('remapValue', '{}_rig_tilt__map__'.format(ctrlName))
+    tiltCondition = plan.add_node('condition', '{}_rig_tilt__cond__'.format(ctrlName))
+    # the driver's translateZ spins the wheel, times the auto wheel switch. Spin that follows steering
+    # and reversing is baked afterwards by wheel_spin_bake.
+    autoWheelSwitch = plan.add_node('multDoubleLinear', '{}_rig_auto_wheel__mlt__'.format(ctrlName))
+    plan.connect(oControlDriver + '.tz', autoWheelSwitch + '.input1')
+    if guideData['autoWheel']:
+        plan.connect(guideData['autoWheel'], autoWheelSwitch + '.input2')
+    else:
+        plan.set_attr(autoWheelSwitch + '.input2', 1.0)
+
+    plan.connect(oControl2 + '.tz', mult360Add + '.input2D[0].input2Dx')
+    plan.connect(autoWheelSwitch + '.output', mult360Add + '.input2D[1].input2Dx')
+    plan.connect(mult360Add + '.output2Dx', mult360 + '.input1X')
+
+    plan.connect(oControl + '.t', oControlFollow + '.t')
+
+    plan.connect(oControl2 + '.tz', oWheelPivotRoot + '.tz')
+    plan.connect(oControl2 + '.r', oWobble + '.r')
+    plan.set_attr(oControl2 + '.rotateOrder', 3) # xzy
+    plan.set_attr(oWobble + '.rotateOrder', 3) # xzy
+
+    # turn the front wheels in rotateY based on the wheel turn arrow control.
+    if guideData['wheelTurn'] and guideData['frontSide'] in ['front', 'mid']:
+        plan.connect(guideData['wheelTurn'] + '.ry', oWheelBaseRoot + '.ry')
+        plan.connect(guideData['wheelTurn'] + '.ry', oControlFollow + '.ry')
+
+    plan.set_attr(mult360 + '.input2X', 360)
+    plan.connect(mult360 + '.outputX', dividePI + '.input1X')
+    plan.set_attr(dividePI + '.input2X', math.pi * 2.0 * radius)
+    plan.connect(dividePI + '.outputX', tireRotateADD + '.input2D[1].input2Dx')
+
+    # connect manual rotation and multiply by 360 so 1 = one turn.
+    oManualUnit = plan.add_node('unitConversion', '{}_rig_manual__unit__'.format(ctrlName))
+    plan.set_attr(oManualUnit + '.conversionFactor', 360)
+    oManualUnit2 = plan.add_node('unitConversion', '{}_rig_manual2__unit__'.format(ctrlName))
+    plan.set_attr(oManualUnit2 + '.conversionFactor', math.pi * 2.0)
+    plan.connect(pManualSpin, oManualUnit + '.input')
+    plan.connect(pManualSpin, oManualUnit2 + '.input')
+    plan.connect(oManualUnit + '.output', tireRotateADD + '.input2D[2].input2Dx')
+    plan.connect(oManualUnit2 + '.output', oWheelSkin + '.rx')
+
+    plan.connect(tireRotateADD + '.output2Dx', oWheelPivot + '.rx')
+
+    # set the tilt parameters
+    plan.connect(oControl2 + '.tx', tiltRemap + '.inputValue')
+    plan.connect(tiltRemap + '.outValue', oWheelBase + '.rz')
+    # values which mean 1.0 will be a 45 degree rotation. 2.0 will be 90.
+    #TODO: Set this as an option or a sane value based on rig world scale.
+    tiltAmount = 80
+    plan.set_attr(tiltRemap + '.inputMin', -tiltAmount)
+    plan.set_attr(tiltRemap + '.inputMax', tiltAmount)
+    plan.set_attr(tiltRemap + '.outputMin', 180)
+    plan.set_attr(tiltRemap + '.outputMax', -180)
+
+    plan.set_attr(tiltCondition + '.operation', 3) # greater or equal
+    plan.connect(oControl2 + '.tx', tiltCondition + '.firstTerm')
+
+    if rigFlip == 1.0:
+        plan.connect(oInner + '.tx', tiltCondition + '.colorIfFalseR')
+        plan.connect(oOuter + '.tx', tiltCondition + '.colorIfTrueR')
+    else:
+        plan.connect(oInner + '.tx', tiltCondition + '.colorIfTrueR')
+        plan.connect(oOuter + '.tx', tiltCondition + '.colorIfFalseR')
+
+    plan.connect(tiltCondition + '.outColorR', oWheelBase + '.rotatePivotX')
+
+    colors = [13, 20, 20] if rigFlip == 1.0 else [6, 18, 18]
+    for each, color in zip([oControl, oControl2, oWheelSkin], colors):
+        plan.set_attr(each + '.overrideColor', color, shape=True)
+
+    #TODO: Add a local wheel pin for each wheel, for special cases like the motorcycle fork.
+    plan.constrain('parentConstraint', localWheelPin, oControlDriver,
+            '{}__{}__{}_driver__parentconstraint__'.format(*nameParts), translation=centerOfWheel)
+    plan.constrain('pointConstraint', localWheelPin, oWheelBaseRoot,
+            '{}__{}__{}_base_root__pointconstraint__'.format(*nameParts), translation=centerOfWheel)
+    plan.constrain('parentConstraint', guideData['positionCtrl'], oControlRoot,
+            '{}__{}__{}_wheel_root__parentconstraint__'.format(*nameParts))
+    plan.constrain('parentConstraint', guideData['rootCtrl'], oControlZero,
+            '{}__{}__{}_wheel_zero__parentconstraint__'.format(*nameParts))
+    plan.constrain('parentConstraint', guideData['rootCtrl'], rigGroup,
+            '{}__{}__{}_rig_position__parentconstraint__'.format(*nameParts))
+    plan.constrain('orientConstraint', guideData['trajectory'], oWheelPivotZero,
+            '{}__{}__{}_wheelpivotzero__orientconstraint__'.format(*nameParts), skip=['y', 'z'])
+    plan.constrain('orientConstraint', guideData['trajectory'], oControlFollow,
+            '{}__{}__{}_wheelctrlfollow__orientconstraint__'.format(*nameParts), skip=['y', 'z'])
+    plan.constrain('pointConstraint', guideData['rootJointOrig'], localWheelPin,
+            '{}__{}__{}_wheels_hook__pointconstraint__'.format(*nameParts), skip=['x', 'z'])
+
+    _lock_params(plan, oControl)
+    _lock_params(plan, oControl2)
+    plan.set_attr(oWheelSkin + '.drawStyle', 2) # hide the bone
+
+    parts = {
+        'riggroup': rigGroup,
+        'control': oControl,
+        'control2': oControl2,
+        'pivotroot': oWheelPivotRoot,
+        'center': centerOfWheel,
+        }
+    return plan, parts
@@ -1,5 +1,8 @@
 import pymel.core as pm
 
+import props_nurbs_lib
+import props_pin_lib
+
 
 def pin_to_surface(oNurbs, sourceObj=None, uPos=0.5, vPos=0.5):
     """
@@ -13,15 +16,15 @@ def pin_to_surface(oNurbs, sourceObj=None, uPos=0.5, vPos=0.5):
     will be placed as close as possible. Otherwise, specify U and V coordinates.
     Pass a PyNode transform, shape node or valid string name.
     3. uPos and vPos can be specified, and default to 0.5
+    Polygon meshes are pinned by their UVs instead. See props_pin_lib.pin_many_to_mesh()
     """
     
-    #TODO: Can I support polygons?
     # Parse whether it is a nurbsSurface shape or transform
     if type(oNurbs) == str and pm.objExists(oNurbs):
         oNurbs = pm.PyNode(oNurbs)
     if type(oNurbs) == pm.nodetypes.Transform:
         pass
-    elif type(oNurbs) == pm.nodetypes.NurbsSurface:
+    elif type(oNurbs) in [pm.nodetypes.NurbsSurface, pm.nodetypes.Mesh]:
         oNurbs = oNurbs.getTransform()
     elif type(oNurbs) == list:
         pm.warning('Specify a NurbsSurface, not a list.')
@@ -30,6 +33,18 @@ def pin_to_surface(oNurbs, sourceObj=None, uPos=0.5, vPos=0.5):
         pm.warning('Invalid surface object specified.')
         return False
     
+    if type(oNurbs.getShape()) == pm.nodetypes.Mesh:
+        if sourceObj:
+            sourceObj = pm.PyNode(sourceObj)
+            if isinstance(sourceObj, pm.nodetypes.Shape):
+                sourceObj = sourceObj.getTransform()
+            pins, report = props_pin_lib.pin_many_to_mesh(
+                    oNurbs, positions=[sourceObj.getTranslation(space='world')], names=[oNurbs.name() + '_foll1'])
+        else:
+            pins, report = props_pin_lib.pin_many_to_mesh(
+                    oNurbs, uvs=[[uPos, vPos]], names=[oNurbs.name() + '_foll1'])
+        return pm.PyNode(pins[0]).getShape()
+
     pointOnSurface = pm.createNode('pointOnSurfaceInfo')
     oNurbs.getShape().worldSpace.connect(pointOnSurface.inputSurface)
     # follicles remap from 0-1, but closestPointOnSurface must take minMaxRangeV into account
@@ -51,12 +66,10 @@ def pin_to_surface(oNurbs, sourceObj=None, uPos=0.5, vPos=0.5):
         else:
             pm.warning('Invalid sourceObj specified.')
             return False        
-        oNode = pm.createNode('closestPointOnSurface', n='ZZZTEMP')
-        oNurbs.worldSpace.connect(oNode.inputSurface, force=True)
-        oNode.inPosition.set(sourceObj.getTranslation(space='world'))
-        uPos = oNode.parameterU.get()
-        vPos = oNode.parameterV.get()
-        pm.delete(oNode)
+        surface = props_nurbs_lib.NurbsSurface.from_maya(oNurbs)
+        paramsU, paramsV = surface.closest_params([sourceObj.getTranslation(space='world')])
+        uPos = float(paramsU[0])
+        vPos = float(paramsV[0])
 
     pName = '{}_foll#'.format(oNurbs.name())
     result = pm.spaceLocator(n=pName).getShape()
@@ -111,13 +124,15 @@ def pin_to_surface(oNurbs, sourceObj=None, uPos=0.5, vPos=0.5):
 
 
 def many_follicles(obj, countU, countV, vDir='U', radius=1.0):
+    """Pin a grid of countU x countV follicles, with a root and a joint under each. Returns the locator shapes.
+    All the follicles are pinned in one pass. See props_pin_lib.
+    """
     pName = obj.name()
     oRoot = pm.spaceLocator(n=pName.replace('_ribbon','') + '_follicles')
     pm.delete(oRoot.getShape())
-    allFolls = []
+    params = []
     for i in range(0,countU):
         for j in range(0, countV):
-            pm.select(None)
             if countU == 1:
                 uPos = 0.5
             else:
@@ -127,22 +142,20 @@ def many_follicles(obj, countU, countV, vDir='U', radius=1.0):
             else:
                 vPos = (j/(countV-1.00)) * 1.0 #NOTE: I recently changed this to have a range of 0-10
             if vDir == 'U':
-                oFoll = pin_to_surface(obj, None, uPos, vPos)
+                params.append([uPos, vPos])
             else:
                 # reverse the direction of the follicles
-                oFoll = pin_to_surface(obj, None, vPos, uPos)
-            oLoc = pm.group(em=True, n=pName + '_ROOT#')
-            oLoc.setTranslation(oFoll.getTransform().getTranslation(space='world'), space='world')
-            oJoint = pm.joint(n=pName + '_joint#', radius=radius)
-            oJoint.setTranslation(oFoll.getTransform().getTranslation(space='world'), space='world')
-            #pm.parent(oJoint, oLoc)
-            pm.parent(oLoc, oFoll.getTransform())
-            pm.parent(oFoll.getTransform(), oRoot)
-            oLoc.rx.set(0.0)
-            oLoc.ry.set(0.0)
-            oLoc.rz.set(0.0)
-            pm.select(None)
-            allFolls.append(oFoll)
+                params.append([vPos, uPos])
+    names = ['{}_foll{}'.format(pName, i + 1) for i in range(len(params))]
+    pins, report = props_pin_lib.pin_many_to_surface(obj, params=params, names=names, parent=oRoot)
+
+    allFolls = []
+    for i, pin in enumerate(pins):
+        # the root and the joint sit exactly on the follicle, so they are made as children with no offset.
+        oLoc = pm.createNode('transform', n='{}_ROOT{}'.format(pName, i + 1), parent=pin)
+        oJoint = pm.createNode('joint', n='{}_joint{}'.format(pName, i + 1), parent=oLoc)
+        oJoint.radius.set(radius)
+        allFolls.append(pm.PyNode(pin).getShape())
     return allFolls
 
 def add_attr(myObj, oDataType, oParamName, oMin=None, oMax=None, oDefault=None):
@@ -0,0 +1,187 @@
+#!/usr/bin/env mayapy
+# encoding: utf-8
+"""
+The meta information of a rig guide, stored as one JSON string attribute and read into a GuideMeta.
+
+A guide used to keep everything in separate gid_* strings, with its geometry comma-joined in gid_geo.
+Now gid_data holds all of it:
+
+    {"version": 1, "type": "wheel", "side": "l", "basename": "front_tire", "front_side": "front",
+     "ctrl_name": "l__front_front_tire", "root": "meta_wheel_gid_root",
+     "geo": ["l__front_tire__msh__", ...], "links": ["meta_wheel_base", ...]}
+
+links are the meta_* attributes that connect the guide to its other guide nodes.
+
+gid_data is the one that counts. The old gid_* attributes are still written next to it,
+so older versions of the tools can read the guides. Guides made before gid_data
+are read from their old attributes, and migrate_guide() gives them a gid_data.
+
+    meta = guide_meta.read_guide_meta(rigGuide)
+    if 'l__door__msh__' not in meta:
+        meta.add_geo(['l__door__msh__'])
+        guide_meta.write_guide_meta(rigGuide, meta)
+"""
+
+import json
+
+try:
+    import maya.cmds as cmds
+except ImportError:
+    cmds = None
+
+META_ATTR = 'gid_data'
+META_VERSION = 1
+
+# GuideMeta field: (gid_data key, old attribute)
+_FIELDS = [
+    ('gidType', 'type', 'gid_type'),
+    ('side', 'side', 'gid_side'),
+    ('basename', 'basename', 'gid_basename'),
+    ('frontSide', 'front_side', 'gid_front_side'),
+    ('ctrlName', 'ctrl_name', 'gid_ctrl_name'),
+    ('root', 'root', 'gid_root'),
+    ]
+
+
+def split_geo(geoString):
+    """The names in an old comma-joined gid_geo string, without blanks."""
+    return [x for x in (geoString or '').split(',') if x]
+
+
+class GuideMeta(object):
+    """The meta information of one guide. Membership tests on the geo are set lookups."""
+
+    def __init__(self, gidType=None, side=None, basename=None, frontSide=None, ctrlName=None, root=None, geo=None, links=None):
+        self.gidType = gidType
+        self.side = side
+        self.basename = basename
+        self.frontSide = frontSide
+        self.ctrlName = ctrlName
+        self.root = root
+        self.links = list(links or [])
+        self._geo = []
+        self._geoSet = set()
+        self.add_geo(geo or [])
+
+    def __repr__(self):
+        return 'GuideMeta({!r}, {!r}, {} geo)'.format(self.gidType, self.basename, len(self._geo))
+
+    def __contains__(self, geoName):
+        return str(geoName) in self._geoSet
+
+    @property
+    def geo(self):
+        """The geo names, in the order they were added."""
+        return list(self._geo)
+
+    def add_geo(self, geoNames):
+        """Add geo names that aren't in the guide yet. Returns the names that were added."""
+        added = []
+        for each in geoNames:
+            each = str(each)
+            if each and each not in self._geoSet:
+                self._geo.append(each)
+                self._geoSet.add(each)
+                added.append(each)
+        return added
+
+    def remove_geo(self, geoNames):
+        """Remove geo names from the guide. Returns the names that were removed."""
+        removing = set(str(x) for x in geoNames) & self._geoSet
+        if removing:
+            self._geo = [x for x in self._geo if x not in removing]
+            self._geoSet -= removing
+        return [x for x in geoNames if str(x) in removing]
+
+    def to_dict(self):
+        data = {'version': META_VERSION, 'geo': list(self._geo), 'links': list(self.links)}
+        for field, key, attrName in _FIELDS:
+            data[key] = getattr(self, field)
+        return data
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), sort_keys=True)
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get('version', META_VERSION) > META_VERSION:
+            raise ValueError('The guide meta is version {}. This tool reads up to version {}.'.format(data['version'], META_VERSION))
+        kwargs = dict((field, data.get(key)) for field, key, attrName in _FIELDS)
+        return cls(geo=data.get('geo'), links=data.get('links'), **kwargs)
+
+    @classmethod
+    def from_json(cls, jsonString):
+        return cls.from_dict(json.loads(jsonString))
+
+    @classmethod
+    def from_legacy(cls, attrs):
+        """Build from the old attributes. attrs is {attrName: string} of the guide's gid_* and meta_* attributes."""
+        kwargs = dict((field, attrs.get(attrName)) for field, key, attrName in _FIELDS)
+        links = sorted([x for x in attrs if x.startswith('meta_')])
+        return cls(geo=split_geo(attrs.get('gid_geo')), links=links, **kwargs)
+
+    def legacy_attrs(self):
+        """The old gid_* attributes, as {attrName: string}, for tools that don't know gid_data yet."""
+        attrs = dict((attrName, getattr(self, field)) for field, key, attrName in _FIELDS if getattr(self, field) is not None)
+        attrs['gid_geo'] = ','.join(self._geo)
+        return attrs
+
+
+def meta_from_attrs(attrs):
+    """A GuideMeta from {attrName: string}, like scene_snapshot.GuideRecord.attrs. No scene access."""
+    if attrs.get(META_ATTR):
+        return GuideMeta.from_json(attrs[META_ATTR])
+    return GuideMeta.from_legacy(attrs)
+
+
+def _legacy_attrs(node):
+    attrs = {}
+    for attrName in cmds.listAttr(node, userDefined=True) or []:
+        if attrName.startswith(('gid_', 'meta_')):
+            if cmds.getAttr('{}.{}'.format(node, attrName), type=True) == 'string':
+                attrs[attrName] = cmds.getAttr('{}.{}'.format(node, attrName)) or ''
+    return attrs
+
+
+def has_guide_meta(guide):
+    plug = '{}.{}'.format(guide, META_ATTR)
+    return cmds.objExists(plug) and bool(cmds.getAttr(plug))
+
+
+def read_guide_meta(guide):
+    """The GuideMeta of a guide node (a name or PyNode). Falls back to the old attributes when there is no gid_data."""
+    node = str(guide)
+    plug = '{}.{}'.format(node, META_ATTR)
+    if cmds.objExists(plug):
+        jsonString = cmds.getAttr(plug)
+        if jsonString:
+            return GuideMeta.from_json(jsonString)
+    return GuideMeta.from_legacy(_legacy_attrs(node))
+
+
+def write_guide_meta(guide, meta, legacy=True):
+    """Store meta as the gid_data of the guide. With legacy, also write the old gid_* attributes to match."""
+    node = str(guide)
+    values = {META_ATTR: meta.to_json()}
+    if legacy:
+        values.update(meta.legacy_attrs())
+    for attrName, value in sorted(values.items()):
+        plug = '{}.{}'.format(node, attrName)
+        if not cmds.objExists(plug):
+            cmds.addAttr(node, longName=attrName, dataType='string')
+        cmds.setAttr(plug, value, type='string')
+    return meta
+
+
+def migrate_guide(guide):
+    """Give an old guide a gid_data, built from its old attributes. Returns True if it needed it."""
+    if has_guide_meta(guide):
+        return False
+    write_guide_meta(guide, read_guide_meta(guide), legacy=False)
+    return True
+
+
+def migrate_scene(pattern='*__gid__'):
+    """Migrate every guide in the scene. Returns the names of the guides that were migrated."""
+    guides = [x for x in cmds.ls(pattern, type='transform') or [] if cmds.objExists(x + '.gid_type')]
+    return [x for x in guides if migrate_guide(x)]
@@ -0,0 +1,216 @@
+#!/usr/bin/env mayapy
+# encoding: utf-8
+"""
+Fast versions of the small helpers every builder calls hundreds of times.
+
+They work on plain node names and take lists, so a whole batch costs a few cmds calls
+instead of a handful of PyMEL objects per node. Nodes can be given as names, PyNodes,
+or OpenMaya 2.0 MObjects, MObjectHandles and MDagPaths.
+The scene is only changed through cmds, so everything stays undoable.
+OpenMaya is only used to track nodes that are being reparented, and to read matrices.
+
+The PyMEL helpers in car_autorig and props_tools keep their signatures, and call these.
+
+    plugs = props_cmds_lib.add_keyable_attributes(controls, 'double', 'wheel_spin')
+    props_cmds_lib.lock_params(controls, locked=True, params=['.sx', '.sy', '.sz'])
+"""
+
+try:
+    import maya.cmds as cmds
+    import maya.api.OpenMaya as om2
+except ImportError:
+    cmds = None
+    om2 = None
+
+MAIN_PARAMS = ['.tx', '.ty', '.tz', '.rx', '.ry', '.rz', '.sx', '.sy', '.sz', '.v']
+
+
+def _as_list(nodes):
+    if isinstance(nodes, (list, tuple, set)):
+        return list(nodes)
+    return [nodes]
+
+
+def node_name(node):
+    """A name cmds can use for node: a string, PyNode, MObject, MObjectHandle or MDagPath."""
+    if om2 is not None:
+        if isinstance(node, om2.MObjectHandle):
+            node = node.object()
+        if isinstance(node, om2.MDagPath):
+            return node.fullPathName()
+        if isinstance(node, om2.MObject):
+            if node.hasFn(om2.MFn.kDagNode):
+                return om2.MDagPath.getAPathTo(node).fullPathName()
+            return om2.MFnDependencyNode(node).name()
+    return str(node)
+
+
+def node_names(nodes):
+    return [node_name(x) for x in _as_list(nodes)]
+
+
+def node_handle(node):
+    """An MObjectHandle for node, or None if it is None or doesn't exist.
+    A handle follows its node through renames and reparenting.
+    """
+    if node is None:
+        return None
+    if isinstance(node, om2.MObjectHandle):
+        return node if node.isValid() else None
+    if isinstance(node, om2.MDagPath):
+        node = node.node()
+    if not isinstance(node, om2.MObject):
+        selList = om2.MSelectionList()
+        try:
+            selList.add(str(node))
+        except RuntimeError:
+            return None
+        node = selList.getDependNode(0)
+    if node.isNull():
+        return None
+    return om2.MObjectHandle(node)
+
+
+def node_handles(nodes):
+    """An MObjectHandle for each node, with None for the ones that don't exist."""
+    return [node_handle(x) for x in _as_list(nodes)]
+
+
+def _is_valid(handle):
+    """False for None, and for a node that was deleted after its handle was made."""
+    return handle is not None and handle.isValid()
+
+
+def _handle_path(handle):
+    return om2.MDagPath.getAPathTo(handle.object()).fullPathName()
+
+
+def add_keyable_attributes(nodes, attrType, attrName, minValue=None, maxValue=None, default=0.0):
+    """Add a keyable attribute to every node that doesn't have it yet. Returns the 'node.attr' plug names.
+    An attribute that already exists is left alone, like add_a_keyable_attribute().
+    """
+    kwargs = {'longName': attrName, 'attributeType': attrType, 'keyable': True, 'defaultValue': default}
+    if minValue is not None:
+        kwargs['minValue'] = minValue
+    if maxValue is not None:
+        kwargs['maxValue'] = maxValue
+    plugs = []
+    for each in node_names(nodes):
+        plug = '{}.{}'.format(each, attrName)
+        if not cmds.objExists(plug):
+            cmds.addAttr(each, **kwargs)
+        plugs.append(plug)
+    return plugs
+
+
+def set_string_attributes(nodes, attrName, values):
+    """Set a string attribute on every node, adding it where it's missing. Returns the plug names.
+    values is one string for all of the nodes, or a list with one string per node.
+    """
+    names = node_names(nodes)
+    if not isinstance(values, (list, tuple)):
+        values = [values] * len(names)
+    plugs = []
+    for each, value in zip(names, values):
+        plug = '{}.{}'.format(each, attrName)
+        if not cmds.objExists(plug):
+            cmds.addAttr(each, longName=attrName, dataType='string')
+        cmds.setAttr(plug, value, type='string')
+        plugs.append(plug)
+    return plugs
+
+
+def lock_params(nodes, locked=False, channelBox=True, keyable=True, params=None):
+    """Set the keyable, channel box and lock state of params on every node, in one setAttr per plug.
+    params are like ['.tx', '.rz']. Defaults to translate, rotate, scale and visibility.
+    Returns the plugs that failed, eg. because they are connected or don't exist.
+    """
+    if params is None:
+        params = MAIN_PARAMS
+    failed = []
+    for each in node_names(nodes):
+        for param in params:
+            plug = each + param
+            try:
+                cmds.setAttr(plug, keyable=keyable, channelBox=channelBox, lock=locked)
+            except (RuntimeError, ValueError):
+                failed.append(plug)
+    return failed
+
+
+def create_joints(names, radius=1.0, parent=None):
+    """Create a joint for each name, without touching the selection. Returns their names."""
+    joints = []
+    for each in _as_list(names):
+        if parent:
+            oJoint = cmds.createNode('joint', name=each, parent=node_name(parent), skipSelect=True)
+        else:
+            oJoint = cmds.createNode('joint', name=each, skipSelect=True)
+        cmds.setAttr(oJoint + '.radius', radius)
+        joints.append(oJoint)
+    return joints
+
+
+def chain_parent(nodes):
+    """Parent each node under the one before it. Nodes already in place are skipped.
+    Nodes are tracked by MObjectHandle, because every parent call changes the paths below it.
+    Each handle is made when its pair comes up, so a missing or None node only fails the pairs it is in.
+    Returns the children that couldn't be parented, as names (or str() of what was given).
+    """
+    nodes = _as_list(nodes)
+    handles = {}
+    failed = []
+    for i in range(1, len(nodes)):
+        for index in (i - 1, i):
+            if index not in handles:
+                handles[index] = node_handle(nodes[index])
+        parentHandle, childHandle = handles[i - 1], handles[i]
+        if not _is_valid(childHandle):
+            failed.append(str(nodes[i]))
+            continue
+        if not _is_valid(parentHandle):
+            failed.append(_handle_path(childHandle))
+            continue
+        parentPath = _handle_path(parentHandle)
+        childPath = _handle_path(childHandle)
+        currentParent = cmds.listRelatives(childPath, parent=True, fullPath=True)
+        if currentParent and currentParent[0] == parentPath:
+            continue
+        try:
+            cmds.parent(childPath, parentPath)
+        except RuntimeError:
+            failed.append(childPath)
+    return failed
+
+
+def make_roots(nodes, suffix='npo'):
+    """Give each node a root group, in the same world position and rotation, under the node's old parent.
+    The root takes the node's name with the last _word swapped for suffix. Returns the root names.
+    Nodes that don't exist are skipped.
+    """
+    roots = []
+    for handle in node_handles(nodes):
+        if handle is None:
+            # nothing to give a root to.
+            continue
+        nodePath = _handle_path(handle)
+        shortName = nodePath.rsplit('|', 1)[-1]
+        rootName = shortName.replace(shortName.split('_')[-1], '') + suffix
+        nodeParent = cmds.listRelatives(nodePath, parent=True, fullPath=True)
+
+        worldMatrix = om2.MTransformationMatrix(om2.MMatrix(cmds.xform(nodePath, q=True, ws=True, matrix=True)))
+        rotation = worldMatrix.rotation(asQuaternion=False)
+        rotation.reorderIt(om2.MEulerRotation.kXYZ)
+
+        if nodeParent:
+            oRoot = cmds.createNode('transform', name=rootName, parent=nodeParent[0], skipSelect=True)
+        else:
+            oRoot = cmds.createNode('transform', name=rootName, skipSelect=True)
+        oRoot = cmds.ls(oRoot, long=True)[0]
+        cmds.xform(oRoot, ws=True, translation=list(worldMatrix.translation(om2.MSpace.kWorld)))
+        cmds.xform(oRoot, ws=True, rotation=[om2.MAngle(x).asDegrees() for x in (rotation.x, rotation.y, rotation.z)])
+        # the root doesn't move when the node goes under it, so its path stays good.
+        cmds.parent(nodePath, oRoot)
+        cmds.setAttr(oRoot + '.v', keyable=False, channelBox=False, lock=True)
+        roots.append(oRoot)
+    return roots
@@ -0,0 +1,405 @@
+#!/usr/bin/env mayapy
+# encoding: utf-8
+"""
+Geometry query helpers shared by the props tools and the vehicle autorig.
+The functions here work on plain floats instead of PyNodes, so that the heavy lifting
+(sorting, overlap tests, merging) doesn't pay for a PyMEL round trip per geo.
+
+A bounding box is stored as 6 floats: [minX, minY, minZ, maxX, maxY, maxZ]
+A collection of bounding boxes is an (N, 6) NumPy array, one row per geo.
+"""
+
+import hashlib
+
+import numpy as np
+
+try:
+    import maya.cmds as cmds
+    import maya.api.OpenMaya as om2
+    import pymel.core.datatypes as dt
+except ImportError:
+    # outside of Maya the array helpers still work, but the scene queries won't.
+    cmds = None
+    om2 = None
+    dt = None
+
+
+def get_bounding_boxes(geoColl):
+    """Returns an (N, 6) array of world space bounding boxes, one row per geo in geoColl.
+    geoColl can be PyNodes or names. All the boxes are read in one pass through the API,
+    instead of calling getBoundingBox() again and again on the same PyNodes.
+    """
+    boxes = np.zeros((len(geoColl), 6))
+    names = [str(x) for x in geoColl]
+    # MSelectionList merges duplicates, so only query each unique name once.
+    uniqueNames = []
+    seen = set()
+    for name in names:
+        if name not in seen:
+            seen.add(name)
+            uniqueNames.append(name)
+    selList = om2.MSelectionList()
+    for name in uniqueNames:
+        selList.add(name)
+
+    uniqueBoxes = {}
+    for i, name in enumerate(uniqueNames):
+        uniqueBoxes[name] = _world_bounding_box(selList.getDagPath(i))
+    for i, name in enumerate(names):
+        boxes[i] = uniqueBoxes[name]
+    return boxes
+
+
+def _world_bounding_box(dagPath):
+    """The world space box of every (non-intermediate) shape directly below a transform."""
+    worldBox = om2.MBoundingBox()
+    shapeFound = False
+    for i in range(dagPath.numberOfShapesDirectlyBelow()):
+        shapePath = om2.MDagPath(dagPath)
+        shapePath.extendToShape(i)
+        shapeNode = om2.MFnDagNode(shapePath)
+        if shapeNode.isIntermediateObject:
+            continue
+        shapeBox = shapeNode.boundingBox
+        shapeBox.transformUsing(shapePath.inclusiveMatrix())
+        worldBox.expand(shapeBox)
+        shapeFound = True
+    if not shapeFound:
+        # groups and shapes themselves. Let Maya work it out.
+        return cmds.exactWorldBoundingBox(dagPath.fullPathName())
+    boxMin = worldBox.min
+    boxMax = worldBox.max
+    return [boxMin.x, boxMin.y, boxMin.z, boxMax.x, boxMax.y, boxMax.z]
+
+
+def to_bounding_box(box):
+    """Turns a 6 float box into a dt.BoundingBox, for the code that still wants one."""
+    return dt.BoundingBox(dt.Point(list(box[:3])), dt.Point(list(box[3:6])))
+
+
+def total_bounding_box(boxes):
+    """The combined bounding box of a whole (N, 6) array. An empty array returns an empty box at origin."""
+    boxes = np.asarray(boxes, dtype=float).reshape(-1, 6)
+    if not len(boxes):
+        return np.zeros(6)
+    return np.concatenate([boxes[:, :3].min(axis=0), boxes[:, 3:].max(axis=0)])
+
+
+def box_centers(boxes):
+    """The center point of each box. Works on a single box or an (N, 6) array."""
+    boxes = np.asarray(boxes, dtype=float)
+    return (boxes[..., :3] + boxes[..., 3:]) * 0.5
+
+
+def box_sizes(boxes):
+    """The width, height and depth of each box. Works on a single box or an (N, 6) array."""
+    boxes = np.asarray(boxes, dtype=float)
+    return boxes[..., 3:] - boxes[..., :3]
+
+
+def box_volumes(boxes):
+    """The volume of each box. Works on a single box or an (N, 6) array."""
+    return np.prod(box_sizes(boxes), axis=-1)
+
+
+def biggest_box_index(boxes):
+    """The index of the box with the biggest volume. The first one wins a tie."""
+    return int(np.argmax(box_volumes(np.asarray(boxes).reshape(-1, 6))))
+
+
+def classify_sides(boxes):
+    """Returns a side letter for each box center: 'l' for +X, 'r' for -X and 'm' when exactly at 0."""
+    centerX = box_centers(np.asarray(boxes).reshape(-1, 6))[:, 0]
+    sideNames = np.array(['r', 'm', 'l'], dtype=object)
+    return sideNames[np.sign(centerX).astype(int) + 1].tolist()
+
+
+def classify_fronts(boxes, threshold=0.05):
+    """Returns 'front', 'mid' or 'back' for each box center, depending on Z. (The vehicle points +Z.)
+    A center between 0.0 and the threshold counts as 'back', the same as the guides always did.
+    """
+    centerZ = box_centers(np.asarray(boxes).reshape(-1, 6))[:, 2]
+    frontNames = np.array(['back', 'mid', 'front'], dtype=object)
+    return frontNames[(centerZ > threshold) * 2 + (centerZ == 0.0)].tolist()
+
+
+def shrink_bounding_boxes(boxes, weight=0.03):
+    """Slightly shrink each bounding box towards its center, but only on the 2 longest sides.
+    2 doors modelled right beside each other should shrink apart.
+    But a handle that is sitting on the broad side of the door should still touch the door.
+    weight is the same blend as get_midpoint(). The smaller the number, the less the BB shrinks.
+    """
+    boxes = np.asarray(boxes, dtype=float).reshape(-1, 6)
+    sizes = box_sizes(boxes)
+    centers = box_centers(boxes)
+    # the shortest axis (or axes, if they tie) keeps its original edges.
+    shortest = sizes == sizes.min(axis=1)[:, np.newaxis]
+    smallMin = np.where(shortest, boxes[:, :3], boxes[:, :3] + (centers - boxes[:, :3]) * weight)
+    smallMax = np.where(shortest, boxes[:, 3:], boxes[:, 3:] + (centers - boxes[:, 3:]) * weight)
+    return np.hstack([smallMin, smallMax])
+
+
+def boxes_intersect(boxA, boxB):
+    """True if the 2 boxes overlap or touch on all 3 axes."""
+    for i in range(3):
+        if boxA[i] > boxB[i+3] or boxB[i] > boxA[i+3]:
+            return False
+    return True
+
+
+def find_box_overlaps(boxes):
+    """A sweep-and-prune broad phase. Returns a list of (i, j) index pairs of intersecting boxes.
+    The boxes are sorted along the axis with the biggest spread, and each box is only
+    tested against the boxes whose interval on that axis is still "open".
+    For vehicle geo that is spread along the car, this is close to linear instead of all-pairs.
+    """
+    # plain lists index a lot faster than NumPy rows in a python loop.
+    boxes = np.asarray(boxes, dtype=float).reshape(-1, 6).tolist()
+    if not boxes:
+        return []
+    spread = [max(box[i] for box in boxes) - min(box[i] for box in boxes) for i in range(3)]
+    axis = spread.index(max(spread))
+
+    order = sorted(range(len(boxes)), key=lambda i: boxes[i][axis])
+    overlaps = []
+    active = []
+    for i in order:
+        boxMin = boxes[i][axis]
+        # prune any box that ends before this one starts. It can't touch anything later either.
+        active = [j for j in active if boxes[j][axis+3] >= boxMin]
+        for j in active:
+            if boxes_intersect(boxes[i], boxes[j]):
+                overlaps.append((j, i))
+        active.append(i)
+    return overlaps
+
+
+def _find_root(parents, i):
+    """Union-find lookup with path halving."""
+    while parents[i] != i:
+        parents[i] = parents[parents[i]]
+        i = parents[i]
+    return i
+
+
+def cluster_boxes(boxes):
+    """Groups boxes that intersect into clusters, and returns a list of lists of indices.
+    eg. A intersects with B. B intersects with A and C. C intersects with B.
+    [ABC] is a single cluster. Even if A and C do not intersect.
+    Clusters are ordered by their first member, and the members keep their input order.
+    """
+    parents = list(range(len(boxes)))
+    for i, j in find_box_overlaps(boxes):
+        rootI = _find_root(parents, i)
+        rootJ = _find_root(parents, j)
+        if rootI != rootJ:
+            parents[max(rootI, rootJ)] = min(rootI, rootJ)
+
+    clusters = {}
+    order = []
+    for i in range(len(boxes)):
+        root = _find_root(parents, i)
+        if root not in clusters:
+            clusters[root] = []
+            order.append(root)
+        clusters[root].append(i)
+    return [clusters[root] for root in order]
+
+
+class VertexTree(object):
+    """A KD-tree over an (N, 3) array of vertex positions, for nearest vertex queries.
+    The points are split at the median of their widest axis until a node has LEAF_SIZE points or less.
+    The leaves are tested with NumPy, so only the descent through the tree runs in python.
+    """
+    LEAF_SIZE = 16
+
+    def __init__(self, points):
+        self.points = np.asarray(points, dtype=float).reshape(-1, 3)
+        # parallel lists, one entry per node. A node with left == -1 is a leaf.
+        self._axis = []
+        self._split = []
+        self._left = []
+        self._right = []
+        self._start = []
+        self._end = []
+        self._order = np.arange(len(self.points))
+        if len(self.points):
+            self._build()
+        # the points in leaf order, so each leaf is one contiguous slice.
+        self._leafPoints = self.points[self._order]
+
+    def _add_node(self, start, end):
+        self._axis.append(0)
+        self._split.append(0.0)
+        self._left.append(-1)
+        self._right.append(-1)
+        self._start.append(start)
+        self._end.append(end)
+        return len(self._start) - 1
+
+    def _build(self):
+        stack = [self._add_node(0, len(self.points))]
+        while stack:
+            node = stack.pop()
+            start, end = self._start[node], self._end[node]
+            if end - start <= self.LEAF_SIZE:
+                continue
+            nodePoints = self.points[self._order[start:end]]
+            axis = int(np.argmax(nodePoints.max(axis=0) - nodePoints.min(axis=0)))
+            mid = (end - start) // 2
+            partition = np.argpartition(nodePoints[:, axis], mid)
+            self._order[start:end] = self._order[start:end][partition]
+            self._axis[node] = axis
+            self._split[node] = float(self.points[self._order[start + mid], axis])
+            self._left[node] = self._add_node(start, start + mid)
+            self._right[node] = self._add_node(start + mid, end)
+            stack.extend([self._left[node], self._right[node]])
+
+    def _query_one(self, pos):
+        bestDist = float('inf')
+        bestIndex = -1
+        # each entry is a node and the smallest squared distance anything inside it could be.
+        stack = [(0, 0.0)]
+        while stack:
+            node, bound = stack.pop()
+            if bound >= bestDist:
+                continue
+            if self._left[node] == -1:
+                start = self._start[node]
+                leafDist = ((self._leafPoints[start:self._end[node]] - pos) ** 2).sum(axis=1)
+                closest = int(np.argmin(leafDist))
+                if leafDist[closest] < bestDist:
+                    bestDist = float(leafDist[closest])
+                    bestIndex = int(self._order[start + closest])
+                continue
+            diff = pos[self._axis[node]] - self._split[node]
+            if diff < 0.0:
+                near, far = self._left[node], self._right[node]
+            else:
+                near, far = self._right[node], self._left[node]
+            # push the far side first, so the near side is searched first.
+            stack.append((far, max(bound, diff * diff)))
+            stack.append((near, bound))
+        return bestIndex, bestDist ** 0.5
+
+    def query(self, positions):
+        """Returns (indices, distances) of the closest point for each of the (M, 3) positions."""
+        positions = np.asarray(positions, dtype=float).reshape(-1, 3)
+        indices = np.full(len(positions), -1, dtype=int)
+        distances = np.full(len(positions), np.inf)
+        if not len(self.points):
+            return indices, distances
+        for i, pos in enumerate(positions):
+            indices[i], distances[i] = self._query_one(pos)
+        return indices, distances
+
+
+# mesh path: (signature, VertexTree). A tree is reused until the signature of the mesh changes.
+_vertexTrees = {}
+
+
+def get_mesh_points(geo):
+    """Returns an (N, 3) array of the world space vertex positions of a mesh, exported in one call."""
+    selList = om2.MSelectionList()
+    selList.add(str(geo))
+    mfnMesh = om2.MFnMesh(selList.getDagPath(0))
+    return np.array([(p.x, p.y, p.z) for p in mfnMesh.getPoints(om2.MSpace.kWorld)], dtype=float).reshape(-1, 3)
+
+
+def _tree_signature(shapePath):
+    """Changes when the mesh is moved, or its topology or bounding box changes, without exporting its points.
+    A deformation that stays inside the old bounding box doesn't change it. clear_vertex_trees() catches those.
+    """
+    mfnMesh = om2.MFnMesh(shapePath)
+    box = mfnMesh.boundingBox
+    return (mfnMesh.numVertices, mfnMesh.numPolygons, tuple(shapePath.inclusiveMatrix()),
+            (box.min.x, box.min.y, box.min.z, box.max.x, box.max.y, box.max.z))
+
+
+def get_vertex_tree(geo):
+    """Returns the cached VertexTree of a mesh, and rebuilds it if the mesh was moved or reshaped.
+    The points are only exported when the tree is built.
+    """
+    selList = om2.MSelectionList()
+    selList.add(str(geo))
+    shapePath = selList.getDagPath(0)
+    if shapePath.apiType() == om2.MFn.kTransform:
+        shapePath.extendToShape()
+    meshPath = shapePath.fullPathName()
+    signature = _tree_signature(shapePath)
+    cached = _vertexTrees.get(meshPath)
+    if cached is None or cached[0] != signature:
+        cached = (signature, VertexTree(get_mesh_points(meshPath)))
+        _vertexTrees[meshPath] = cached
+    return cached[1]
+
+
+def clear_vertex_trees():
+    """Forget every cached VertexTree. build_guide() and build_rig() do this first, because the meshes may
+    have been edited since, in ways the signature doesn't see.
+    """
+    _vertexTrees.clear()
+
+
+def closest_vertices(geoColl, positions):
+    """Find the closest vertex out of all of the meshes in geoColl, for each of the (M, 3) positions.
+    Returns 3 arrays: the index into geoColl, the vertex index on that mesh and the world position.
+    When 2 meshes are the same distance away, the first one in geoColl wins.
+    """
+    positions = np.asarray(positions, dtype=float).reshape(-1, 3)
+    geoIndices = np.zeros(len(positions), dtype=int)
+    vertIndices = np.full(len(positions), -1, dtype=int)
+    vertPositions = np.zeros((len(positions), 3))
+    bestDist = np.full(len(positions), np.inf)
+    for i, geo in enumerate(geoColl):
+        tree = get_vertex_tree(geo)
+        indices, distances = tree.query(positions)
+        closer = distances < bestDist
+        bestDist[closer] = distances[closer]
+        geoIndices[closer] = i
+        vertIndices[closer] = indices[closer]
+        vertPositions[closer] = tree.points[indices[closer]]
+    return geoIndices, vertIndices, vertPositions
+
+
+def _rest_mesh(dagPath):
+    """The MFnMesh of the points a mesh has before it is deformed: its Orig intermediate shape,
+    the one without an input. A mesh without deformers is its own rest mesh.
+    """
+    transformPath = om2.MDagPath(dagPath)
+    if transformPath.apiType() != om2.MFn.kTransform:
+        transformPath.pop()
+    for i in range(transformPath.childCount()):
+        child = transformPath.child(i)
+        if not child.hasFn(om2.MFn.kMesh):
+            continue
+        shapeNode = om2.MFnDagNode(child)
+        if shapeNode.isIntermediateObject and not shapeNode.findPlug('inMesh', False).isDestination:
+            return om2.MFnMesh(child)
+    return om2.MFnMesh(dagPath)
+
+
+def hash_meshes(geoColl):
+    """An md5 hex digest of the names, rest points and face layout of the meshes in geoColl.
+    It changes when a mesh is remodelled, so it can tell if a build is out of date.
+    The points are read in object space, from before any deformers, so posing or moving the rig doesn't change it.
+    """
+    digest = hashlib.md5()
+    for geo in geoColl:
+        digest.update(str(geo).encode('utf-8'))
+        selList = om2.MSelectionList()
+        selList.add(str(geo))
+        dagPath = selList.getDagPath(0)
+        try:
+            mfnMesh = _rest_mesh(dagPath)
+        except RuntimeError:
+            # not a mesh. The object space bounding box is the best I can do.
+            box = om2.MFnDagNode(dagPath).boundingBox
+            digest.update(np.array([box.min.x, box.min.y, box.min.z, box.max.x, box.max.y, box.max.z]).tobytes())
+            continue
+        faceCounts, faceVerts = mfnMesh.getVertices()
+        restPoints = [(p.x, p.y, p.z) for p in mfnMesh.getPoints(om2.MSpace.kObject)]
+        digest.update(np.array(restPoints, dtype=float).reshape(-1, 3).tobytes())
+        digest.update(np.array(faceCounts, dtype=np.int32).tobytes())
+        digest.update(np.array(faceVerts, dtype=np.int32).tobytes())
+    return digest.hexdigest()
@@ -1,15 +1,47 @@
 #!/usr/bin/env mayapy
 # encoding: utf-8
 
-import pymel.core as pm
-import pymel.core.datatypes as dt
-import maya.cmds as cmds
-import maya.OpenMaya as om
-import maya.OpenMayaUI as omui
-
 import os
 import posixpath
 import math
+import json
+import hashlib
+
+import numpy as np
+
+try:
+    import maya.cmds as cmds
+    import maya.api.OpenMaya as om2
+except ImportError:
+    # outside of Maya the icons and controls still build through a MemoryBackend, but swap_shapes() won't.
+    cmds = None
+    om2 = None
+
+import scene_backend
+
+
+# Studio icons can be added without editing this module. Point this at JSON icon files,
+# or folders of them, separated like PATH. They are loaded after the built-in icons.
+ICON_PATH_ENV = 'PROPS_ICON_PATH'
+
+# iconName: {description, points, degree, closed}. Built once per session by _icon_registry().
+_iconRegistry = {}
+
+# The order of a control spec given as a tuple. See create_control_icons().
+CONTROL_SPEC_KEYS = ['name', 'scale', 'offset', 'color', 'joint', 'parent']
+
+# Controls with the same icon, scale, offset and color can share one instanced shape.
+# The shapes are kept under a hidden group. Off by default. See create_control_icons().
+SHARED_SHAPES = False
+SHARED_SHAPES_GROUP = 'x__control_shapes__grp__'
+
+# The arrows of the arrowBox icon: the 2 CVs at the base of each arrow, and the CVs of the arrow.
+_arrowBoxArrows = [
+    ((21, 27), list(range(21, 28))),
+    ((11, 5), list(range(5, 12))),
+    ((3, 29), list(range(29, 33)) + list(range(0, 4))),
+    ((13, 19), list(range(13, 20))),
+    ]
 
 
 def pnt_ws(pnt, pSpace='world'):
@@ -17,10 +49,9 @@ def pnt_ws(pnt, pSpace='world'):
     return pnt.getPosition(space=pSpace)
 
 
-def icon_library(iconKey):
-    #TODO: Store this library somewhere (a file, or JSON or something.)
+def _builtin_icons():
     # This is a nested dictionary of information that procedurally draws controller icons.
-    # It is used by create_control_icon()
+    # It is only built once, by _icon_registry(). Use icon_library() to look up an icon.
     controlIconLib = {}
     '''
     controlIconLib['iconName'] = {}
@@ -341,80 +372,277 @@ def icon_library(iconKey):
     controlIconLib['iconName']['degree'] = 1
     controlIconLib['iconName']['closed'] = True
 
-    return controlIconLib[iconKey]
+    return controlIconLib
 
 
-def create_control_icon(iconType, iconName, iconScale, joint=False, offset=False):
-    ### Read from a dictionary or JSON or Alembic file that stores point information
-    iconLib = icon_library(iconType)
-    pPoints = iconLib['points']
-    pD = iconLib['degree']
+def _icon_entry(points, degree=1, closed=True, description=''):
+    """Store the points as a read-only (N, 3) float array, so the shared entry can't be edited by accident."""
+    pointArray = np.array(points, dtype=float).reshape(-1, 3)
+    pointArray.flags.writeable = False
+    return {
+        'description': description,
+        'points': pointArray,
+        'degree': int(degree),
+        'closed': bool(closed),
+        }
 
-    controlCurve = pm.curve( name=iconName, d=pD, p=pPoints )
 
-    controlCurve.s.set(iconScale)
-    pm.makeIdentity(controlCurve, apply=True)
+def _icon_registry():
+    """Build the registry the first time it is needed: the built-in icons, then the studio icon files."""
+    if not _iconRegistry:
+        for iconName, iconData in _builtin_icons().items():
+            _iconRegistry[iconName] = _icon_entry(
+                    iconData['points'], iconData.get('degree', 1),
+                    iconData.get('closed', True), iconData.get('description', ''))
+        for iconPath in os.environ.get(ICON_PATH_ENV, '').split(os.pathsep):
+            if iconPath:
+                load_icon_path(iconPath)
+    return _iconRegistry
 
-    if iconLib['closed'] == True:
-        oName = controlCurve.name()
-        pm.closeCurve( controlCurve, ch=False, ps=True, rpo=True )
-        controlCurve = pm.PyNode(oName)
 
+def icon_library(iconKey):
+    """Returns the icon's dictionary of description, points, degree and closed.
+    points is a read-only (N, 3) float array. Copy it before editing.
+    """
+    return _icon_registry()[iconKey]
+
+
+def icon_names():
+    return sorted(_icon_registry().keys())
+
+
+def register_icon(iconName, points, degree=1, closed=True, description=''):
+    """Add an icon to the library, or replace one. eg. a studio specific icon."""
+    _icon_registry()[iconName] = _icon_entry(points, degree, closed, description)
+    return iconName
+
+
+def load_icon_file(filePath):
+    """Register every icon in a JSON file. The file is a dictionary in the same layout as icon_library():
+    {"iconName": {"description": "", "points": [[0.0, 0.0, 0.0], ...], "degree": 1, "closed": true}}
+    """
+    with open(filePath, 'r') as iconFile:
+        iconData = json.load(iconFile)
+    for iconName, each in iconData.items():
+        register_icon(
+                iconName, each['points'], each.get('degree', 1),
+                each.get('closed', True), each.get('description', ''))
+    return sorted(iconData.keys())
+
+
+def load_icon_path(iconPath):
+    """Load a JSON icon file, or every .json file in a folder."""
+    if os.path.isdir(iconPath):
+        iconNames = []
+        for fileName in sorted(os.listdir(iconPath)):
+            if fileName.lower().endswith('.json'):
+                iconNames.extend(load_icon_file(os.path.join(iconPath, fileName)))
+        return iconNames
+    return load_icon_file(iconPath)
+
+
+def save_icon_file(filePath, iconNames=None):
+    """Write icons to a JSON file that load_icon_file() can read. Defaults to every icon."""
+    registry = _icon_registry()
+    iconData = {}
+    for iconName in iconNames or registry.keys():
+        each = registry[iconName]
+        iconData[iconName] = {
+            'description': each['description'],
+            'points': each['points'].tolist(),
+            'degree': each['degree'],
+            'closed': each['closed'],
+            }
+    with open(filePath, 'w') as iconFile:
+        json.dump(iconData, iconFile, indent=4, sort_keys=True)
+    return filePath
+
+
+def icon_points(iconType, iconScale, offset=False):
+    """Returns a new (N, 3) array of the icon's final points: scaled, arrow corrected and offset.
+    These are the CVs create_control_icon() makes, without having to edit the curve afterwards.
+    """
+    iconScale = np.asarray(iconScale, dtype=float) * np.ones(3)
+    points = icon_library(iconType)['points'] * iconScale
 
     # A hack to make sure the arrows on arrowBox are uniformly scaled, relative to the width:height ratio.
     if iconType == 'arrowBox':
         axes = [iconScale[0], iconScale[2]]
         scaleFactor = min(axes) / max(axes)
+        axis = 0 if axes[0] > axes[1] else 2
+        for (cvA, cvB), cvIndices in _arrowBoxArrows:
+            oPivot = (points[cvA, axis] + points[cvB, axis]) * 0.5
+            points[cvIndices, axis] = oPivot + (points[cvIndices, axis] - oPivot) * scaleFactor
 
-        if iconScale[0] > iconScale[2]:
-            oPivot = (pnt_ws(controlCurve.cv[21]) + pnt_ws(controlCurve.cv[27])) * 0.5
-            pm.scale(controlCurve.cv[21:27], scaleFactor, 1, 1, r=True, p=oPivot)
-            oPivot = (pnt_ws(controlCurve.cv[11]) + pnt_ws(controlCurve.cv[5])) * 0.5
-            pm.scale(controlCurve.cv[5:11], scaleFactor, 1, 1, r=True, p=oPivot)
-
-            oPivot = (pnt_ws(controlCurve.cv[3]) + pnt_ws(controlCurve.cv[29])) * 0.5
-            pm.scale(controlCurve.cv[29:32], scaleFactor, 1, 1, r=True, p=oPivot)
-            pm.scale(controlCurve.cv[0:3], scaleFactor, 1, 1, r=True, p=oPivot)
+    if offset:
+        points += np.asarray(offset, dtype=float)
+    return points
 
-            oPivot = (pnt_ws(controlCurve.cv[13]) + pnt_ws(controlCurve.cv[19])) * 0.5
-            pm.scale(controlCurve.cv[13:19], scaleFactor, 1, 1, r=True, p=oPivot)
-        else:
-            oPivot = (pnt_ws(controlCurve.cv[21]) + pnt_ws(controlCurve.cv[27])) * 0.5
-            pm.scale(controlCurve.cv[21:27], 1, 1, scaleFactor, r=True, p=oPivot)
-            oPivot = (pnt_ws(controlCurve.cv[11]) + pnt_ws(controlCurve.cv[5])) * 0.5
-            pm.scale(controlCurve.cv[5:11], 1, 1, scaleFactor, r=True, p=oPivot)
 
-            oPivot = (pnt_ws(controlCurve.cv[3]) + pnt_ws(controlCurve.cv[29])) * 0.5
-            pm.scale(controlCurve.cv[29:32], 1, 1, scaleFactor, r=True, p=oPivot)
-            pm.scale(controlCurve.cv[0:3], 1, 1, scaleFactor, r=True, p=oPivot)
+def _periodic_points(points):
+    """The points of a closed icon, without the last point when the icon already returns to its start.
+    Closing it again would add a zero length span. The backend wraps the curve around itself.
+    """
+    points = [tuple(p) for p in points]
+    if len(points) > 1 and points[0] == points[-1]:
+        points = points[:-1]
+    return points
 
-            oPivot = (pnt_ws(controlCurve.cv[13]) + pnt_ws(controlCurve.cv[19])) * 0.5
-            pm.scale(controlCurve.cv[13:19], 1, 1, scaleFactor, r=True, p=oPivot)
-
-    if offset:
-        pm.move(controlCurve.cv, offset, relative=True)
 
+def create_control_icon(iconType, iconName, iconScale, joint=False, offset=False, shared=None, color=None):
+    ### The points are finished before the curve is made, so each control is a single curve command,
+    ### with no history and no component edits afterwards.
     ### Pick a particular default if not defined (circle?)
     ### scale, rotate and transform appropriately (using placing functions)
-    ### color and style the curve
     ### set the icon in proper layers
-    ### shape parent as necessary
-    if joint:
-        controlCurve.rename(controlCurve.name() + 'Shape')
-        pm.select(None)
-        oJoint = pm.joint(n=iconName, r=0.5)
-        pm.select(None)
-        pm.parent(controlCurve.getShapes(), oJoint, shape=True, relative=True)
-        pm.delete(controlCurve)
-        return oJoint
+    ### color is an overrideColor index. Pass it in, rather than setting it on the shape afterwards,
+    ### so a shared shape is only shared by the controls of the same color.
+    spec = {'name': iconName, 'scale': iconScale, 'offset': offset, 'joint': joint, 'color': color}
+    return create_control_icons(iconType, [spec], shared=shared)[0]
+
+
+def _control_spec(spec):
+    """A spec can be a dictionary, or a tuple in the order of CONTROL_SPEC_KEYS. Missing keys get the defaults."""
+    if not isinstance(spec, dict):
+        spec = dict(zip(CONTROL_SPEC_KEYS, spec))
+    controlSpec = {'scale': [1.0, 1.0, 1.0], 'offset': False, 'color': None, 'joint': False, 'parent': None}
+    controlSpec.update(spec)
+    return controlSpec
 
-    return controlCurve
+
+def _create_unique_controls(scene, iconType, specs):
+    """Each control gets its own curve shape. Returns the control names."""
+    iconLib = icon_library(iconType)
+    pD = iconLib['degree']
+
+    curveNames = []
+    for spec in specs:
+        pPoints = icon_points(iconType, spec['scale'], spec['offset'])
+        # a joint gets the shape, so the temporary curve transform can't take the name.
+        curveName = spec['name'] + 'Shape' if spec['joint'] else spec['name']
+        if iconLib['closed'] == True:
+            curveNames.append(scene.curve(_periodic_points(pPoints), degree=pD, name=curveName, periodic=True))
+        else:
+            curveNames.append(scene.curve(pPoints, degree=pD, name=curveName))
+    # every curve has exactly one shape.
+    shapeNames = [scene.listRelatives(x, shapes=True)[0] for x in curveNames]
+
+    ### color and style the curve
+    for spec, shapeName in zip(specs, shapeNames):
+        if spec['color'] is not None:
+            scene.setAttr(shapeName + '.overrideEnabled', True)
+            scene.setAttr(shapeName + '.overrideColor', spec['color'])
+
+    ### shape parent as necessary
+    controlNames = list(curveNames)
+    for i, (spec, shapeName) in enumerate(zip(specs, shapeNames)):
+        if spec['joint']:
+            oJoint = scene.createNode('joint', name=spec['name'])
+            scene.setAttr(oJoint + '.radius', 0.5)
+            scene.parent(shapeName, oJoint, shape=True)
+            controlNames[i] = oJoint
+    jointCurves = [x for x, spec in zip(curveNames, specs) if spec['joint']]
+    if jointCurves:
+        scene.delete(jointCurves)
+    return controlNames
+
+
+def create_control_icons(iconType, controlSpecs, shared=None):
+    """Create many controls of the same icon in one pass. Returns the controls in the same order as controlSpecs.
+    Each spec is a dictionary, or a tuple of (name, scale, offset, color, joint, parent). Only the name is required.
+    color is an overrideColor index. joint=True makes a joint control, like create_control_icon().
+    shared=True instances one shape into every control with the same icon, scale, offset and color.
+    It defaults to SHARED_SHAPES. Use make_unique_shapes() before editing the shape of a shared control.
+    The controls are built through scene_backend: PyNodes in Maya, names in a MemoryBackend.
+    eg. create_control_icons('rings', [('l__front_axle__ctrl__', [0.5, 0.5, 0.5], [0, 2, 6], 17)])
+    """
+    specs = [_control_spec(x) for x in controlSpecs]
+    if not specs:
+        return []
+    scene = scene_backend.get_backend()
+    if shared is None:
+        shared = SHARED_SHAPES
+    if shared:
+        controlNames = _create_shared_controls(scene, iconType, specs)
+    else:
+        controlNames = _create_unique_controls(scene, iconType, specs)
+
+    # one parent command for each parent, instead of one for each control.
+    parentOrder = []
+    for spec in specs:
+        if spec['parent'] and str(spec['parent']) not in parentOrder:
+            parentOrder.append(str(spec['parent']))
+    for parentName in parentOrder:
+        indices = [i for i, spec in enumerate(specs) if str(spec['parent']) == parentName]
+        newNames = scene.parent([controlNames[i] for i in indices], parentName)
+        for i, newName in zip(indices, newNames):
+            controlNames[i] = newName
+
+    return [scene.wrap(x) for x in controlNames]
+
+
+def _shared_shape(scene, iconType, spec):
+    """Returns the path of the shape that every control like spec shares. It is made the first time it is needed."""
+    iconScale = np.asarray(spec['scale'], dtype=float) * np.ones(3)
+    offset = np.asarray(spec['offset'] or [0.0, 0.0, 0.0], dtype=float)
+    key = (iconType, [round(float(x), 6) for x in iconScale], [round(float(x), 6) for x in offset], spec['color'])
+    keyHash = hashlib.md5(repr(key).encode('utf-8')).hexdigest()[:8]
+    templateName = 'x__{}_{}__shape__tmpl__'.format(iconType, keyHash)
+
+    if not scene.objExists(templateName):
+        if not scene.objExists(SHARED_SHAPES_GROUP):
+            scene.createNode('transform', name=SHARED_SHAPES_GROUP)
+            scene.setAttr(SHARED_SHAPES_GROUP + '.visibility', False)
+        templateSpec = dict(spec, name=templateName, joint=False)
+        oTemplate = _create_unique_controls(scene, iconType, [templateSpec])[0]
+        scene.parent(oTemplate, SHARED_SHAPES_GROUP)
+    return scene.listRelatives(templateName, shapes=True)[0]
+
+
+def _create_shared_controls(scene, iconType, specs):
+    """Each control is an empty transform (or joint) with an instance of the shared shape. Returns the control names."""
+    controlNames = []
+    for spec in specs:
+        templateShape = _shared_shape(scene, iconType, spec)
+        if spec['joint']:
+            oControl = scene.createNode('joint', name=spec['name'])
+            scene.setAttr(oControl + '.radius', 0.5)
+        else:
+            oControl = scene.createNode('transform', name=spec['name'])
+        scene.parent(templateShape, oControl, shape=True, add=True)
+        controlNames.append(oControl)
+    return controlNames
+
+
+def make_unique_shapes(controls):
+    """Give each control its own copy of any shape it shares, so it can be edited without changing the others.
+    Controls that don't share a shape are left alone.
+    """
+    scene = scene_backend.get_backend()
+    for oControl in controls:
+        controlName = str(oControl)
+        for shapePath in scene.listRelatives(controlName, shapes=True):
+            if len(scene.listRelatives(shapePath, allParents=True)) < 2:
+                continue
+            scene.uninstanceShape(shapePath, controlName)
+
+
+def circle_points(radius, sections=8, center=(0.0, 0.0, 0.0)):
+    """The CVs of a periodic cubic circle in the YZ plane, like cmds.circle(normal=(1, 0, 0)).
+    The CVs sit a little outside the radius, so the curve passes through it. CV 1 is at the top.
+    """
+    angles = (np.arange(sections) - 1) * 2.0 * math.pi / sections
+    cvRadius = radius * 6.0 / (4.0 + 2.0 * math.cos(2.0 * math.pi / sections))
+    points = np.zeros((sections, 3))
+    points[:, 1] = cvRadius * np.cos(angles)
+    points[:, 2] = cvRadius * np.sin(angles)
+    return points + np.asarray(center, dtype=float)
 
 
 def sawtooth_wave_pattern(height, width, segments):
     """ Create a generator of points that make a saw-tooth wave shape |_|-|_|-|_|-| """
     heightPoints = [1.0 * height, -1.0 * height]
-    segmentRange = xrange(-segments, segments+1)
+    segmentRange = range(-segments, segments+1)
     widthPoints = [(x/float(segments) * width) for x in segmentRange]
 
     for each, each2 in zip(widthPoints[0::2], widthPoints[1::2]):
@@ -429,17 +657,63 @@ def sawtooth_wave_pattern(height, width, segments):
     yield [0.0, heightPoints[1], widthPoints[-1]]
         
 
-def swap_shape(oParent, oChild):
-    if oParent.getShape():
-        shapeName = oParent.getShape().name()
-        shapeColor = oParent.getShape().overrideColor.get()
-        oChild.getShape().overrideColor.set(shapeColor)
-    oChild.getShape().overrideEnabled.set(True)
-    pm.delete(oParent.getShapes())
-    if oChild.getParent() != oParent:
-        pm.parent(oChild, oParent)
-    pm.makeIdentity(oChild, apply=True, t=1, r=1, s=1)
-    pm.parent(oChild.getShape(), oParent, shape=True, relative=True)
-    pm.delete(oChild)
+def _dag_path(node):
+    selList = om2.MSelectionList()
+    selList.add(str(node))
+    return selList.getDagPath(0)
+
+
+def _curve_shapes(node):
+    return cmds.listRelatives(str(node), shapes=True, type='nurbsCurve', fullPath=True) or []
+
+
+def _curve_data(shapePath, inverseMatrix):
+    """The setAttr arguments of a nurbsCurve .cc, with the CVs moved from world space by inverseMatrix."""
+    fnCurve = om2.MFnNurbsCurve(_dag_path(shapePath))
+    worldPoints = np.array([[p.x, p.y, p.z, 1.0] for p in fnCurve.cvPositions(om2.MSpace.kWorld)])
+    localPoints = worldPoints.dot(inverseMatrix)[:, :3]
+    knots = list(fnCurve.knots())
+    # the API counts the forms from 1 (open, closed, periodic), the curve data from 0.
+    data = [fnCurve.degree, fnCurve.numSpans, fnCurve.form - 1, False, 3, len(knots), tuple(knots)]
+    return data + [len(localPoints)] + [tuple(p) for p in localPoints]
+
+
+def swap_shapes(shapePairs, deleteSource=True):
+    """Replace the curve shapes of each target with the curve shapes of its source, in one pass.
+    shapePairs is a list of (target, source). The source CVs are written straight into the target's
+    own shapes, in the target's local space, so the curve stays where the source was in the world.
+    The target keeps its color. The sources are deleted, unless deleteSource is False.
+    """
+    # writing into a shared shape would change every control that uses it.
+    make_unique_shapes([oTarget for oTarget, oSource in shapePairs])
+    for oTarget, oSource in shapePairs:
+        targetName = str(oTarget)
+        inverseMatrix = np.array(list(_dag_path(targetName).inclusiveMatrixInverse())).reshape(4, 4)
+        targetShapes = _curve_shapes(targetName)
+        sourceShapes = _curve_shapes(oSource)
+
+        shapeColor = None
+        for shapePath in (targetShapes + sourceShapes)[:1]:
+            shapeColor = cmds.getAttr(shapePath + '.overrideColor')
+        # curves with history would be rebuilt by their inputs, so they get replaced instead of reused.
+        reusable = [x for x in targetShapes if not cmds.listConnections(x + '.create', source=True, destination=False)]
+        oldShapes = [x for x in cmds.listRelatives(targetName, shapes=True, fullPath=True) or [] if x not in reusable]
+
+        for i, sourceShape in enumerate(sourceShapes):
+            if i < len(reusable):
+                shapePath = reusable[i]
+            else:
+                shapePath = cmds.createNode('nurbsCurve', name=targetName.split('|')[-1] + 'Shape', parent=targetName)
+            cmds.setAttr(shapePath + '.cc', *_curve_data(sourceShape, inverseMatrix), type='nurbsCurve')
+            cmds.setAttr(shapePath + '.overrideEnabled', True)
+            cmds.setAttr(shapePath + '.overrideColor', shapeColor)
+        oldShapes += reusable[len(sourceShapes):]
+        if oldShapes:
+            cmds.delete(oldShapes)
+
+    if deleteSource:
+        cmds.delete([str(oSource) for oTarget, oSource in shapePairs])
 
 
+def swap_shape(oParent, oChild):
+    swap_shapes([(oParent, oChild)])
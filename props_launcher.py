@@ -0,0 +1,53 @@
+#!/usr/bin/env mayapy
+# encoding: utf-8
+"""
+Opens the rigging tools, importing each one only when it is first asked for.
+
+Importing this module is cheap. It doesn't import PySide, PyMEL or any of the tools,
+and nothing here builds UI until launch() is called. Use it for shelf buttons:
+
+    import props_launcher
+    props_launcher.launch('props_tools')
+
+The tool modules don't open anything when they are imported, so they can also be
+imported by other tools, or timed by startup_benchmark.
+"""
+
+import importlib
+
+# tool name: (module, entry point, method to call on what the entry point returns)
+TOOLS = {
+    'props_tools': ('props_tools', 'show', None),
+    'car_autorig': ('car_autorig', 'show', None),
+    'rgb_color_tool': ('rgb_color_tool', 'ColorToolRGB', 'create_ui'),
+    }
+
+# the tools import each other through the tenave package when there is one.
+_PACKAGE = __name__.rpartition('.')[0]
+
+
+def tool_names():
+    return sorted(TOOLS)
+
+
+def module_name(toolName):
+    """The full module name of a tool, inside the package this launcher was imported from."""
+    moduleName = TOOLS[toolName][0]
+    return '{}.{}'.format(_PACKAGE, moduleName) if _PACKAGE else moduleName
+
+
+def load_tool(toolName):
+    """Import the module of a tool, without opening it. It is only imported the first time."""
+    if toolName not in TOOLS:
+        raise KeyError('Unknown tool "{}". Try one of: {}'.format(toolName, ', '.join(tool_names())))
+    return importlib.import_module(module_name(toolName))
+
+
+def launch(toolName):
+    """Import a tool if it hasn't been yet, and open it. Returns what the entry point returns."""
+    module = load_tool(toolName)
+    moduleName, entryName, methodName = TOOLS[toolName]
+    result = getattr(module, entryName)()
+    if methodName:
+        getattr(result, methodName)()
+    return result
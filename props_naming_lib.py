@@ -0,0 +1,192 @@
+#!/usr/bin/env mayapy
+# encoding: utf-8
+"""
+The side__section__base__role__ naming convention, parsed and formatted in one place.
+
+    m__element__root_offset__ctrl__     side m, section element, base root_offset, role ctrl
+    x__constraints__grp__               side x, no section, base constraints, role grp
+
+Each part is words joined by single underscores. The section is optional. The name always ends in '__'.
+
+    parts = props_naming_lib.parse_name('l__wheel__front_gid_root__grp__')
+    parts.base                                          # 'front_gid_root'
+    props_naming_lib.with_role(nFrontAxle, 'ctrlroot')  # 'm__front_axle_pivot__ctrlroot__'
+
+find_node() looks a node up by its parts in a NameIndex, so the builders don't resolve
+the same name strings into PyNodes over and over:
+
+    rootOffset = props_naming_lib.find_node('m', 'element', 'root_offset', 'ctrl')
+"""
+
+import re
+from collections import namedtuple
+
+try:
+    import maya.cmds as cmds
+    import maya.api.OpenMaya as om2
+    import pymel.core as pm
+except ImportError:
+    cmds = None
+    om2 = None
+    pm = None
+
+_PART = r'[A-Za-z0-9]+(?:_[A-Za-z0-9]+)*'
+NAME_PATTERN = re.compile(r'^(?P<side>[a-z])__(?:(?P<section>{0})__)?(?P<base>{0})__(?P<role>{0})__$'.format(_PART))
+_TOKEN_SEPARATOR = re.compile(r'__')
+
+# parse_name() is called with the same few hundred names again and again.
+_parsedNames = {}
+
+
+class NameParts(namedtuple('NameParts', 'side section base role')):
+    """The parts of a conventional name. section is None when the name has none."""
+    __slots__ = ()
+
+    def format(self):
+        return format_name(self.side, self.section, self.base, self.role)
+
+    def with_role(self, role):
+        return self._replace(role=role)
+
+
+def short_name(name):
+    """The node name without its DAG path or namespace. name can be a string or PyNode."""
+    return str(name).rsplit('|', 1)[-1].rsplit(':', 1)[-1]
+
+
+def parse_name(name):
+    """The NameParts of a name, or None if it doesn't follow the convention."""
+    name = short_name(name)
+    if name not in _parsedNames:
+        match = NAME_PATTERN.match(name)
+        _parsedNames[name] = NameParts(**match.groupdict()) if match else None
+    return _parsedNames[name]
+
+
+def format_name(side, section, base, role):
+    """The conventional name of the parts. Leave out the section with None."""
+    if section:
+        return '{}__{}__{}__{}__'.format(side, section, base, role)
+    return '{}__{}__{}__'.format(side, base, role)
+
+
+def name_tokens(name):
+    """The name split on double underscores. Works on names that don't follow the convention too."""
+    return _TOKEN_SEPARATOR.split(short_name(name))
+
+
+def with_role(name, role):
+    """The same name with a different role. eg. the __ctrlroot__ of a __ctrl__."""
+    tokens = name_tokens(name)
+    if len(tokens) < 3 or tokens[-1]:
+        raise ValueError('"{}" does not end in a __role__.'.format(name))
+    tokens[-2] = role
+    return '__'.join(tokens)
+
+
+def meta_name(name, remove=None):
+    """The meta_* attribute name the guides link a node by: 'meta_' and the third token of the name,
+    with remove taken out of it. On guide names, the third token is the base.
+    """
+    token = name_tokens(name)[2]
+    if remove:
+        token = token.replace(remove, '')
+    return 'meta_' + token
+
+
+def control_base(name):
+    """A short word to name a control after some geo. The base of a conventional name,
+    or the second word of anything else, like 'car_body_geo'.
+    """
+    parts = parse_name(name)
+    if parts:
+        return parts.base
+    return short_name(name).split('_')[1]
+
+
+def _node_handle(oNode):
+    """An OpenMaya 2.0 MObjectHandle for a PyNode, made once when the node is indexed."""
+    selList = om2.MSelectionList()
+    selList.add(oNode.longName() if hasattr(oNode, 'longName') else oNode.name())
+    return om2.MObjectHandle(selList.getDependNode(0))
+
+
+class NameIndex(object):
+    """A reverse index from NameParts to nodes.
+    Nodes are resolved the first time they are asked for, and kept with an MObjectHandle. A kept node is
+    checked through its handle before it is handed out, so a deleted or renamed node is resolved again,
+    instead of returned stale. The builders add() the nodes they make, so those are never resolved by name.
+    scan() also indexes every conventional node in the scene, for find().
+    """
+
+    def __init__(self):
+        self._nodes = {}
+        self._paths = {}
+
+    def __len__(self):
+        return len(set(self._nodes) | set(self._paths))
+
+    def clear(self):
+        self._nodes.clear()
+        self._paths.clear()
+
+    def scan(self, pattern='*__'):
+        """Index every node name matching pattern that follows the convention. Returns the count."""
+        self._paths.clear()
+        for each in cmds.ls(pattern, long=True) or []:
+            parts = parse_name(each)
+            if parts and parts not in self._paths:
+                self._paths[parts] = each
+        return len(self._paths)
+
+    def add(self, node):
+        """Index a node (a PyNode) made during the build, so it is never resolved by name."""
+        parts = parse_name(node.name())
+        if parts:
+            self._nodes[parts] = (node, _node_handle(node))
+        return parts
+
+    def _is_current(self, parts, handle):
+        """True if the node of handle still exists, and still has the name of parts."""
+        if not handle.isValid():
+            return False
+        return short_name(om2.MFnDependencyNode(handle.object()).name()) == parts.format()
+
+    def node(self, side, section, base, role):
+        """The node of the parts, as a PyNode. Raises like pm.PyNode() if it doesn't exist."""
+        parts = NameParts(side, section, base, role)
+        entry = self._nodes.get(parts)
+        if entry is not None:
+            if self._is_current(parts, entry[1]):
+                return entry[0]
+            del self._nodes[parts]
+        path = self._paths.pop(parts, None)
+        oNode = pm.PyNode(path if path and cmds.objExists(path) else parts.format())
+        self._nodes[parts] = (oNode, _node_handle(oNode))
+        return oNode
+
+    def find(self, side=None, section=None, base=None, role=None):
+        """Every indexed name matching the parts given, sorted. Run scan() first to search the whole scene."""
+        query = {'side': side, 'section': section, 'base': base, 'role': role}
+        found = set()
+        for parts in set(self._nodes) | set(self._paths):
+            if all(value is None or getattr(parts, key) == value for key, value in query.items()):
+                found.add(parts.format())
+        return sorted(found)
+
+
+_nameIndex = NameIndex()
+
+
+def get_name_index():
+    return _nameIndex
+
+
+def clear_name_index():
+    """Forget every indexed node. build_rig() does this first, because the scene may have changed since the last build."""
+    _nameIndex.clear()
+
+
+def find_node(side, section, base, role):
+    """Look up a node by its name parts in the shared NameIndex."""
+    return _nameIndex.node(side, section, base, role)
@@ -0,0 +1,417 @@
+#!/usr/bin/env mayapy
+# encoding: utf-8
+"""
+A NumPy NURBS evaluator, for finding curve and surface parameters without temporary Maya nodes.
+
+The CVs and knots are read from the scene once. After that, any number of points can be evaluated,
+or have their closest parameters found, in one vectorized call:
+
+    ribbon = props_nurbs_lib.NurbsSurface.from_maya('l__belt_ribbon_loft')
+    paramsU, paramsV = ribbon.closest_params(follicleTargets)
+
+Knots are stored the Maya way, with numCVs + degree - 1 values. Weights are ignored, so rational
+curves and surfaces are treated as if every weight was 1.0. Periodic curves and surfaces are clamped
+to their parameter range, instead of wrapping around.
+The basis functions follow The NURBS Book (Piegl & Tiller), algorithm A2.2.
+"""
+
+import numpy as np
+
+try:
+    import maya.api.OpenMaya as om2
+except ImportError:
+    # everything except from_maya() works outside of Maya.
+    om2 = None
+
+
+def _as_points(positions):
+    """Positions can be PyMEL points, lists or arrays. Returns an (N, 3) float array."""
+    return np.array([[p[0], p[1], p[2]] for p in positions], dtype=float).reshape(-1, 3)
+
+
+def _full_knots(knots):
+    """Maya leaves out the first and last knot. They never change the curve, so repeat the end knots."""
+    knots = np.asarray(knots, dtype=float)
+    return np.concatenate([knots[:1], knots, knots[-1:]])
+
+
+def find_spans(degree, knots, params):
+    """The knot span index of each param. knots is the full knot vector."""
+    lastSpan = len(knots) - degree - 2
+    spans = np.searchsorted(knots, params, side='right') - 1
+    return np.clip(spans, degree, lastSpan)
+
+
+def basis_functions(degree, knots, spans, params):
+    """Returns an (N, degree + 1) array of the non-zero basis functions of each param."""
+    count = len(params)
+    basis = np.zeros((count, degree + 1))
+    basis[:, 0] = 1.0
+    left = np.zeros((count, degree + 1))
+    right = np.zeros((count, degree + 1))
+    for j in range(1, degree + 1):
+        left[:, j] = params - knots[spans + 1 - j]
+        right[:, j] = knots[spans + j] - params
+        saved = np.zeros(count)
+        for r in range(j):
+            denominator = right[:, r + 1] + left[:, j - r]
+            safe = denominator != 0.0
+            temp = np.where(safe, basis[:, r] / np.where(safe, denominator, 1.0), 0.0)
+            basis[:, r] = saved + right[:, r + 1] * temp
+            saved = left[:, j - r] * temp
+        basis[:, j] = saved
+    return basis
+
+
+def _derivative_cvs(cvs, knots, degree, axis=0):
+    """The CVs of the derivative of a B-spline, along one axis of the CV array.
+    The derivative has degree - 1, and uses the knots without their first and last value.
+    """
+    cvs = np.moveaxis(cvs, axis, 0)
+    count = len(cvs) - 1
+    spans = knots[degree + 1:degree + 1 + count] - knots[1:1 + count]
+    spans = np.where(spans == 0.0, 1.0, spans).reshape((-1,) + (1,) * (cvs.ndim - 1))
+    derivative = degree * (cvs[1:] - cvs[:-1]) / spans
+    return np.moveaxis(derivative, 0, axis)
+
+
+def _quaternion_multiply(a, b):
+    """Hamilton product of two (N, 4) arrays of (w, x, y, z) quaternions. a is applied after b."""
+    aw, av = a[:, :1], a[:, 1:]
+    bw, bv = b[:, :1], b[:, 1:]
+    return np.hstack([aw * bw - (av * bv).sum(axis=1)[:, None], aw * bv + bw * av + np.cross(av, bv)])
+
+
+def _quaternion_rotate(q, vectors):
+    """Rotate each (N, 3) vector by its unit (w, x, y, z) quaternion."""
+    w, v = q[:, :1], q[:, 1:]
+    uv = np.cross(v, vectors)
+    return vectors + 2.0 * (w * uv + np.cross(v, uv))
+
+
+def _minimal_rotations(tangents):
+    """The smallest rotation from each unit tangent to the next, as (N-1, 4) quaternions."""
+    dots = (tangents[:-1] * tangents[1:]).sum(axis=1)[:, None]
+    rotations = np.hstack([1.0 + dots, np.cross(tangents[:-1], tangents[1:])])
+    lengths = np.sqrt((rotations ** 2).sum(axis=1))[:, None]
+    # a tangent that reverses between two samples has no single smallest rotation. Leave it alone.
+    return np.where(lengths > 1e-12, rotations / np.where(lengths > 1e-12, lengths, 1.0), [1.0, 0.0, 0.0, 0.0])
+
+
+def _accumulate_rotations(rotations):
+    """Running products of (N, 4) quaternions, so item i is every rotation up to i applied in order.
+    A doubling scan: log2(N) vectorized steps instead of a Python loop over every sample.
+    """
+    total = np.array(rotations, dtype=float)
+    offset = 1
+    while offset < len(total):
+        total[offset:] = _quaternion_multiply(total[offset:], total[:-offset])
+        offset *= 2
+    return total
+
+
+class NurbsCurve(object):
+    """A NURBS curve, evaluated in NumPy. cvs is (numCVs, 3). knots are Maya knots."""
+
+    def __init__(self, cvs, knots, degree):
+        self.cvs = np.asarray(cvs, dtype=float).reshape(-1, 3)
+        self.knots = _full_knots(knots)
+        self.degree = int(degree)
+        self._derivative = None
+
+    @classmethod
+    def from_maya(cls, node, space='world'):
+        """Read a curve once, from a transform or nurbsCurve shape name (or PyNode)."""
+        fnCurve = om2.MFnNurbsCurve(_shape_path(node))
+        mSpace = om2.MSpace.kWorld if space == 'world' else om2.MSpace.kObject
+        cvs = [[p.x, p.y, p.z] for p in fnCurve.cvPositions(mSpace)]
+        return cls(cvs, list(fnCurve.knots()), fnCurve.degree)
+
+    def param_range(self):
+        return self.knots[self.degree], self.knots[-self.degree - 1]
+
+    def points(self, params):
+        """Returns an (N, 3) array of the positions at params."""
+        params = np.clip(np.asarray(params, dtype=float).ravel(), *self.param_range())
+        if self.degree < 0 or not len(self.cvs):
+            return np.zeros((len(params), 3))
+        spans = find_spans(self.degree, self.knots, params)
+        basis = basis_functions(self.degree, self.knots, spans, params)
+        indices = spans[:, None] - self.degree + np.arange(self.degree + 1)
+        return np.einsum('na,nak->nk', basis, self.cvs[indices])
+
+    def derivative(self):
+        """The first derivative, as another NurbsCurve. A degree 0 curve has a derivative of 0."""
+        if self._derivative is None:
+            if self.degree > 0:
+                derivative = NurbsCurve([], [0.0], self.degree - 1)
+                derivative.cvs = _derivative_cvs(self.cvs, self.knots, self.degree)
+                derivative.knots = self.knots[1:-1]
+            else:
+                derivative = NurbsCurve([], [0.0, 0.0], -1)
+            self._derivative = derivative
+        return self._derivative
+
+    def evaluate(self, params, derivatives=0):
+        """Returns a list of (N, 3) arrays: the positions, then each derivative up to the count asked for."""
+        params = np.clip(np.asarray(params, dtype=float).ravel(), *self.param_range())
+        results = []
+        curve = self
+        for i in range(derivatives + 1):
+            if curve.degree < 0:
+                results.append(np.zeros((len(params), 3)))
+            else:
+                results.append(curve.points(params))
+                curve = curve.derivative()
+        return results
+
+    def greville_params(self):
+        """The parameter each CV has the most pull on: the average of its degree knots."""
+        windows = np.arange(len(self.cvs))[:, None] + 1 + np.arange(self.degree)
+        return np.clip(self.knots[windows].mean(axis=1), *self.param_range())
+
+    def transport_frames(self, params, normal):
+        """Rotation minimizing (parallel transport) frames at sorted params.
+        normal is the side vector at the first param. It is carried down the curve by the smallest
+        rotation from each tangent to the next, so the frames never flip, even through 180 degree bends.
+        Sample densely, because each step is assumed to turn less than 180 degrees.
+        Returns (tangents, normals, binormals), each an (N, 3) array of unit vectors.
+        """
+        params = np.clip(np.asarray(params, dtype=float).ravel(), *self.param_range())
+        tangents = self.evaluate(params, derivatives=1)[1]
+        lengths = np.sqrt((tangents ** 2).sum(axis=1))
+        # a zero length tangent (stacked CVs) borrows the tangent of the closest sample before it.
+        valid = lengths > 1e-12
+        if not valid.any():
+            raise ValueError('The curve has no direction to build frames from.')
+        fill = np.maximum.accumulate(np.where(valid, np.arange(len(params)), 0))
+        fill[:np.argmax(valid)] = np.argmax(valid)
+        tangents = (tangents / np.where(valid, lengths, 1.0)[:, None])[fill]
+
+        normal = np.asarray(normal, dtype=float).reshape(3)
+        normal = normal - tangents[0] * normal.dot(tangents[0])
+        if np.sqrt(normal.dot(normal)) < 1e-9:
+            raise ValueError('The normal is parallel to the start of the curve.')
+        normal = normal / np.sqrt(normal.dot(normal))
+
+        rotations = _accumulate_rotations(_minimal_rotations(tangents))
+        normals = np.vstack([normal, _quaternion_rotate(rotations, np.tile(normal, (len(rotations), 1)))])
+        # clean up the rounding error of the long chain of products.
+        normals -= tangents * (normals * tangents).sum(axis=1)[:, None]
+        normals /= np.sqrt((normals ** 2).sum(axis=1))[:, None]
+        return tangents, normals, np.cross(tangents, normals)
+
+    def closest_params(self, positions, samples=8, starts=3, iterations=16, tolerance=1e-9):
+        """Returns the parameter of the closest point on the curve, for every position at once.
+        Each position starts at the starts nearest of samples points per span, each is refined with Newton steps,
+        and the closest result is kept. The nearest sample alone can sit in the dip next to the closest one.
+        """
+        positions = _as_points(positions)
+        paramMin, paramMax = self.param_range()
+        spanCount = max(1, len(np.unique(self.knots[self.degree:-self.degree or None])) - 1)
+        seeds = np.linspace(paramMin, paramMax, spanCount * samples + 1)
+        starts = max(1, min(starts, len(seeds)))
+        # one row per start, every position repeated for each.
+        nearest = _nearest(self.points(seeds), positions, count=starts)
+        params = seeds[nearest.T.ravel()]
+        targets = np.tile(positions, (starts, 1))
+        params = self._refine_params(params, targets, iterations, tolerance)
+        distances = ((self.points(params) - targets) ** 2).sum(axis=1).reshape(starts, len(positions))
+        return params.reshape(starts, len(positions))[distances.argmin(axis=0), np.arange(len(positions))]
+
+    def _refine_params(self, params, positions, iterations, tolerance):
+        """Newton steps from params towards the closest point of each position."""
+        paramMin, paramMax = self.param_range()
+        for i in range(iterations):
+            point, first, second = self.evaluate(params, derivatives=2)
+            offset = point - positions
+            slope = (offset * first).sum(axis=1)
+            curvature = (first * first).sum(axis=1) + (offset * second).sum(axis=1)
+            # where the distance isn't convex, Newton would head for a maximum. Gauss-Newton always goes downhill.
+            curvature = np.where(curvature > 1e-12, curvature, (first * first).sum(axis=1))
+            safe = curvature > 1e-12
+            step = np.where(safe, slope / np.where(safe, curvature, 1.0), 0.0)
+            # a full step can overshoot into the next dip of the curve. Halve it until it gets closer.
+            distances = (offset * offset).sum(axis=1)
+            newParams = np.clip(params - step, paramMin, paramMax)
+            for halving in range(8):
+                worse = ((self.points(newParams) - positions) ** 2).sum(axis=1) > distances
+                if not worse.any():
+                    break
+                step = np.where(worse, step * 0.5, step)
+                newParams = np.where(worse, np.clip(params - step, paramMin, paramMax), newParams)
+            else:
+                newParams = np.where(worse, params, newParams)
+            moved = np.abs(newParams - params).max() if len(params) else 0.0
+            params = newParams
+            if moved < tolerance:
+                break
+        return params
+
+
+class NurbsSurface(object):
+    """A NURBS surface, evaluated in NumPy. cvs is (numCVsInU, numCVsInV, 3). knots are Maya knots."""
+
+    def __init__(self, cvs, knotsU, knotsV, degreeU, degreeV):
+        self.cvs = np.asarray(cvs, dtype=float)
+        self.knotsU = _full_knots(knotsU)
+        self.knotsV = _full_knots(knotsV)
+        self.degreeU = int(degreeU)
+        self.degreeV = int(degreeV)
+        self._derivatives = {}
+
+    @classmethod
+    def from_maya(cls, node, space='world'):
+        """Read a surface once, from a transform or nurbsSurface shape name (or PyNode)."""
+        fnSurface = om2.MFnNurbsSurface(_shape_path(node))
+        mSpace = om2.MSpace.kWorld if space == 'world' else om2.MSpace.kObject
+        # Maya lists the CVs with U as the outer loop.
+        cvs = np.array([[p.x, p.y, p.z] for p in fnSurface.cvPositions(mSpace)])
+        cvs = cvs.reshape(fnSurface.numCVsInU, fnSurface.numCVsInV, 3)
+        return cls(cvs, list(fnSurface.knotsInU()), list(fnSurface.knotsInV()),
+                fnSurface.degreeInU, fnSurface.degreeInV)
+
+    def param_range(self):
+        """((minU, maxU), (minV, maxV)). Same as minMaxRangeU and minMaxRangeV."""
+        return ((self.knotsU[self.degreeU], self.knotsU[-self.degreeU - 1]),
+                (self.knotsV[self.degreeV], self.knotsV[-self.degreeV - 1]))
+
+    def span_count(self):
+        """The number of spans in U and V. Same as spansUV."""
+        counts = []
+        for knots, degree in [(self.knotsU, self.degreeU), (self.knotsV, self.degreeV)]:
+            counts.append(max(1, len(np.unique(knots[degree:len(knots) - degree])) - 1))
+        return tuple(counts)
+
+    def _clip(self, paramsU, paramsV):
+        rangeU, rangeV = self.param_range()
+        paramsU = np.clip(np.asarray(paramsU, dtype=float).ravel(), *rangeU)
+        paramsV = np.clip(np.asarray(paramsV, dtype=float).ravel(), *rangeV)
+        return paramsU, paramsV
+
+    def points(self, paramsU, paramsV):
+        """Returns an (N, 3) array of the positions at each (u, v)."""
+        paramsU, paramsV = self._clip(paramsU, paramsV)
+        if self.degreeU < 0 or self.degreeV < 0:
+            return np.zeros((len(paramsU), 3))
+        spansU = find_spans(self.degreeU, self.knotsU, paramsU)
+        spansV = find_spans(self.degreeV, self.knotsV, paramsV)
+        basisU = basis_functions(self.degreeU, self.knotsU, spansU, paramsU)
+        basisV = basis_functions(self.degreeV, self.knotsV, spansV, paramsV)
+        indicesU = spansU[:, None] - self.degreeU + np.arange(self.degreeU + 1)
+        indicesV = spansV[:, None] - self.degreeV + np.arange(self.degreeV + 1)
+        cvs = self.cvs[indicesU[:, :, None], indicesV[:, None, :]]
+        return np.einsum('na,nb,nabk->nk', basisU, basisV, cvs)
+
+    def derivative(self, direction):
+        """The first derivative in 'u' or 'v', as another NurbsSurface."""
+        if direction not in self._derivatives:
+            derivative = NurbsSurface(np.zeros((0, 0, 3)), [0.0], [0.0], self.degreeU, self.degreeV)
+            derivative.knotsU = self.knotsU
+            derivative.knotsV = self.knotsV
+            if direction == 'u':
+                derivative.degreeU = self.degreeU - 1
+                if self.degreeU > 0:
+                    derivative.cvs = _derivative_cvs(self.cvs, self.knotsU, self.degreeU, axis=0)
+                    derivative.knotsU = self.knotsU[1:-1]
+            else:
+                derivative.degreeV = self.degreeV - 1
+                if self.degreeV > 0:
+                    derivative.cvs = _derivative_cvs(self.cvs, self.knotsV, self.degreeV, axis=1)
+                    derivative.knotsV = self.knotsV[1:-1]
+            self._derivatives[direction] = derivative
+        return self._derivatives[direction]
+
+    def evaluate(self, paramsU, paramsV):
+        """Returns (S, Su, Sv, Suu, Suv, Svv): the positions and their first and second derivatives."""
+        paramsU, paramsV = self._clip(paramsU, paramsV)
+        surfaceU = self.derivative('u')
+        surfaceV = self.derivative('v')
+        return (
+            self.points(paramsU, paramsV),
+            surfaceU.points(paramsU, paramsV),
+            surfaceV.points(paramsU, paramsV),
+            surfaceU.derivative('u').points(paramsU, paramsV),
+            surfaceU.derivative('v').points(paramsU, paramsV),
+            surfaceV.derivative('v').points(paramsU, paramsV),
+            )
+
+    def frames(self, paramsU, paramsV):
+        """Returns the positions, normalized U tangents, normals and normalized V tangents.
+        The same vectors a pointOnSurfaceInfo node outputs.
+        """
+        point, tangentU, tangentV = self.evaluate(paramsU, paramsV)[:3]
+        normal = np.cross(tangentU, tangentV)
+        vectors = []
+        for vector in [tangentU, normal, tangentV]:
+            length = np.sqrt((vector ** 2).sum(axis=1))[:, None]
+            vectors.append(vector / np.where(length == 0.0, 1.0, length))
+        return [point] + vectors
+
+    def closest_params(self, positions, samples=8, iterations=16, tolerance=1e-9):
+        """Returns (paramsU, paramsV) of the closest point on the surface, for every position at once.
+        Each position starts at the nearest point of a grid with samples points per span,
+        then is refined with Newton steps.
+        """
+        positions = _as_points(positions)
+        (minU, maxU), (minV, maxV) = self.param_range()
+        spansU, spansV = self.span_count()
+        gridU, gridV = np.meshgrid(
+                np.linspace(minU, maxU, spansU * samples + 1),
+                np.linspace(minV, maxV, spansV * samples + 1),
+                indexing='ij')
+        gridU = gridU.ravel()
+        gridV = gridV.ravel()
+        nearest = _nearest(self.points(gridU, gridV), positions)
+        paramsU = gridU[nearest]
+        paramsV = gridV[nearest]
+
+        for i in range(iterations):
+            point, su, sv, suu, suv, svv = self.evaluate(paramsU, paramsV)
+            offset = point - positions
+            f = (offset * su).sum(axis=1)
+            g = (offset * sv).sum(axis=1)
+            a = (su * su).sum(axis=1) + (offset * suu).sum(axis=1)
+            b = (su * sv).sum(axis=1) + (offset * suv).sum(axis=1)
+            c = (sv * sv).sum(axis=1) + (offset * svv).sum(axis=1)
+            determinant = a * c - b * b
+            safe = np.abs(determinant) > 1e-12
+            determinant = np.where(safe, determinant, 1.0)
+            stepU = np.where(safe, (c * f - b * g) / determinant, 0.0)
+            stepV = np.where(safe, (a * g - b * f) / determinant, 0.0)
+            newU = np.clip(paramsU - stepU, minU, maxU)
+            newV = np.clip(paramsV - stepV, minV, maxV)
+            moved = max(np.abs(newU - paramsU).max(), np.abs(newV - paramsV).max()) if len(paramsU) else 0.0
+            paramsU, paramsV = newU, newV
+            if moved < tolerance:
+                break
+
+        # Newton can wander off from a bad start. Never return worse than the starting grid point.
+        distances = ((self.points(paramsU, paramsV) - positions) ** 2).sum(axis=1)
+        seedDistances = ((self.points(gridU[nearest], gridV[nearest]) - positions) ** 2).sum(axis=1)
+        worse = seedDistances < distances
+        paramsU[worse] = gridU[nearest][worse]
+        paramsV[worse] = gridV[nearest][worse]
+        return paramsU, paramsV
+
+
+def _nearest(samples, positions, chunkSize=256, count=None):
+    """The index of the nearest sample to each position. Done in chunks to keep the memory down.
+    With a count, the indices of the count nearest samples of each position instead, nearest first.
+    """
+    nearest = np.zeros((len(positions), count or 1), dtype=int)
+    for start in range(0, len(positions), chunkSize):
+        chunk = positions[start:start + chunkSize]
+        distances = ((chunk[:, None, :] - samples[None, :, :]) ** 2).sum(axis=2)
+        nearest[start:start + chunkSize] = np.argsort(distances, axis=1)[:, :count or 1]
+    return nearest if count else nearest[:, 0]
+
+
+def _shape_path(node):
+    """The dag path of the shape of node. node can be a transform or a shape, as a name or PyNode."""
+    selList = om2.MSelectionList()
+    selList.add(str(node))
+    dagPath = selList.getDagPath(0)
+    if dagPath.apiType() == om2.MFn.kTransform:
+        dagPath.extendToShape()
+    return dagPath
@@ -0,0 +1,599 @@
+#!/usr/bin/env mayapy
+# encoding: utf-8
+"""
+Pin many transforms to a surface in one call.
+
+pin_to_surface() in build_ribbon_ik and create_follicle builds a whole node network for every pin.
+pin_many_to_surface() solves every parameter at once with props_nurbs_lib, creates the nodes in one
+pass, and shares what it can between the pins of the same surface:
+    - With a uvPin node (Maya 2020 and later), one uvPin drives every pin of the surface,
+      straight into each pin's offsetParentMatrix. Each pin is only its transform and locator.
+    - Otherwise each pin gets a pointOnSurfaceInfo, fourByFourMatrix and decomposeMatrix,
+      the same network as pin_to_surface(), without the unitConversions.
+Each pin gets parameterU and parameterV attributes, to slide it around on the surface afterwards.
+With percentAttrs, the pins also get the u_param and v_param 0-100 sliders of the ribbon follicles, driving them.
+The pins should go under a group at the origin, because they are driven by world space matrices.
+
+Polygon meshes are pinned by UV with pin_many_to_mesh(). A MeshUvIndex (a grid over the UV triangles)
+finds the face and barycentric coordinates of any number of UVs at once, and a TriangleTree over
+the world space triangles finds the closest point to any number of world positions.
+It is cached per mesh, and rebuilt when the topology or the UVs change.
+"""
+
+import hashlib
+
+import numpy as np
+
+try:
+    import maya.cmds as cmds
+    import maya.api.OpenMaya as om2
+except ImportError:
+    cmds = None
+    om2 = None
+
+import props_nurbs_lib
+import props_geo_lib
+
+
+def has_uv_pin():
+    return 'uvPin' in (cmds.allNodeTypes() or [])
+
+
+def _surface_shape(surface):
+    surface = str(surface)
+    if cmds.nodeType(surface) == 'transform':
+        return cmds.listRelatives(surface, shapes=True, type='nurbsSurface', fullPath=True)[0]
+    return surface
+
+
+def _add_param_attrs(pinName, paramU, paramV, rangeU, rangeV):
+    """rangeU and rangeV are (min, max). None leaves that end open."""
+    for attrName, value, (minValue, maxValue) in [('parameterU', paramU, rangeU), ('parameterV', paramV, rangeV)]:
+        limits = {}
+        if minValue is not None:
+            limits['minValue'] = minValue
+        if maxValue is not None:
+            limits['maxValue'] = maxValue
+        cmds.addAttr(pinName, longName=attrName, attributeType='double', keyable=True, defaultValue=value, **limits)
+    return pinName + '.parameterU', pinName + '.parameterV'
+
+
+def _add_percent_attrs(pinName, paramPlugs, paramU, paramV, rangeU, rangeV):
+    """The u_param and v_param sliders of the ribbon follicles: 0 to 100 over the surface, driving paramPlugs.
+    Returns the conversion nodes.
+    """
+    nodes = []
+    for attrName, paramPlug, value, (minValue, maxValue) in [
+            ('u_param', paramPlugs[0], paramU, rangeU), ('v_param', paramPlugs[1], paramV, rangeV)]:
+        length = maxValue - minValue
+        percent = (value - minValue) / length * 100.0 if length else 0.0
+        cmds.addAttr(pinName, longName=attrName, attributeType='double', keyable=True, defaultValue=percent)
+        conversion = cmds.createNode('unitConversion', name='{}_{}_mult'.format(pinName.split('|')[-1], attrName))
+        cmds.setAttr(conversion + '.conversionFactor', 0.01 * length)
+        cmds.connectAttr('{}.{}'.format(pinName, attrName), conversion + '.input')
+        nodes.append(conversion)
+        if minValue:
+            offset = cmds.createNode('addDoubleLinear', name='{}_{}_add'.format(pinName.split('|')[-1], attrName))
+            cmds.setAttr(offset + '.input2', minValue)
+            cmds.connectAttr(conversion + '.output', offset + '.input1')
+            conversion = offset
+            nodes.append(offset)
+        cmds.connectAttr(conversion + '.output', paramPlug)
+    return nodes
+
+
+def _connect_point_on_surface(surfaceShape, pinName, paramPlugs):
+    """The per pin network of pin_to_surface(): position and tangents into a 4x4 matrix, then into the pin."""
+    pointOnSurface = cmds.createNode('pointOnSurfaceInfo', name=pinName + '_posi')
+    mtx = cmds.createNode('fourByFourMatrix', name=pinName + '_mtx')
+    outMatrix = cmds.createNode('decomposeMatrix', name=pinName + '_dcm')
+    cmds.connectAttr(surfaceShape + '.worldSpace[0]', pointOnSurface + '.inputSurface')
+    cmds.connectAttr(paramPlugs[0], pointOnSurface + '.parameterU')
+    cmds.connectAttr(paramPlugs[1], pointOnSurface + '.parameterV')
+    rows = [
+        ('normalizedTangentU', 0),
+        ('normalizedNormal', 1),
+        ('normalizedTangentV', 2),
+        ('position', 3),
+        ]
+    for attrName, row in rows:
+        for column, axis in enumerate('XYZ'):
+            cmds.connectAttr(
+                    '{}.{}{}'.format(pointOnSurface, attrName, axis),
+                    '{}.in{}{}'.format(mtx, row, column))
+    cmds.connectAttr(mtx + '.output', outMatrix + '.inputMatrix')
+    cmds.connectAttr(outMatrix + '.outputTranslate', pinName + '.translate')
+    cmds.connectAttr(outMatrix + '.outputRotate', pinName + '.rotate')
+    return [pointOnSurface, mtx, outMatrix]
+
+
+def pin_many_to_surface(surface, positions=None, params=None, names=None, parent=None, useUvPin=None, percentAttrs=False):
+    """Pin a transform to the surface for each position (world space) or each (u, v) in params.
+    Positions are pinned to the closest point on the surface. Returns (pins, report).
+    percentAttrs adds the u_param and v_param sliders (0 to 100) of the ribbon follicles, which then drive
+    parameterU and parameterV.
+    report counts the nodes: {'pins', 'nodes', 'shared_nodes', 'nodes_per_pin'}
+    useUvPin defaults to whether this Maya has the uvPin node.
+    """
+    surfaceShape = _surface_shape(surface)
+    surfaceName = cmds.listRelatives(surfaceShape, parent=True)[0]
+    nurbs = props_nurbs_lib.NurbsSurface.from_maya(surfaceShape)
+    rangeU, rangeV = nurbs.param_range()
+    if params is None:
+        paramsU, paramsV = nurbs.closest_params(positions)
+    else:
+        params = np.asarray(params, dtype=float).reshape(-1, 2)
+        paramsU = np.clip(params[:, 0], *rangeU)
+        paramsV = np.clip(params[:, 1], *rangeV)
+    if names is None:
+        names = ['{}_{}_pin'.format(surfaceName, i + 1) for i in range(len(paramsU))]
+    if useUvPin is None:
+        useUvPin = has_uv_pin()
+
+    sharedNodes = []
+    pinNodes = []
+    if useUvPin and len(paramsU):
+        uvPin = cmds.createNode('uvPin', name=surfaceName + '_uvpin')
+        cmds.connectAttr(surfaceShape + '.worldSpace[0]', uvPin + '.deformedGeometry')
+        cmds.setAttr(uvPin + '.normalizedIsoParms', False)
+        # match the pointOnSurfaceInfo network: X along U, Y along the normal.
+        cmds.setAttr(uvPin + '.tangentAxis', 0)
+        cmds.setAttr(uvPin + '.normalAxis', 1)
+        sharedNodes.append(uvPin)
+
+    parentFlags = {'parent': str(parent)} if parent else {}
+    pins = []
+    for i, (name, paramU, paramV) in enumerate(zip(names, paramsU, paramsV)):
+        pinName = cmds.createNode('transform', name=name, **parentFlags)
+        locatorName = cmds.createNode('locator', name=pinName.split('|')[-1] + 'Shape', parent=pinName)
+        paramPlugs = _add_param_attrs(pinName, float(paramU), float(paramV), rangeU, rangeV)
+        pinNodes.extend([pinName, locatorName])
+        if percentAttrs:
+            pinNodes.extend(_add_percent_attrs(pinName, paramPlugs, float(paramU), float(paramV), rangeU, rangeV))
+        if useUvPin:
+            cmds.connectAttr(paramPlugs[0], '{}.coordinate[{}].coordinateU'.format(uvPin, i))
+            cmds.connectAttr(paramPlugs[1], '{}.coordinate[{}].coordinateV'.format(uvPin, i))
+            cmds.connectAttr('{}.outputMatrix[{}]'.format(uvPin, i), pinName + '.offsetParentMatrix')
+        else:
+            pinNodes.extend(_connect_point_on_surface(surfaceShape, pinName, paramPlugs))
+        pins.append(pinName)
+
+    report = {
+        'pins': len(pins),
+        'nodes': len(pinNodes) + len(sharedNodes),
+        'shared_nodes': len(sharedNodes),
+        'nodes_per_pin': (len(pinNodes) + len(sharedNodes)) / float(max(1, len(pins))),
+        }
+    print('Pinned {pins} transforms to {surface} with {nodes} nodes ({nodes_per_pin:.2f} per pin).'.format(
+        surface=surfaceName, **report))
+    return pins, report
+
+
+def surface_grid_params(surface, countU, countV):
+    """Evenly spaced (u, v) params over the surface. A count of 1 sits in the middle. U is the inner loop."""
+    rangeU, rangeV = props_nurbs_lib.NurbsSurface.from_maya(_surface_shape(surface)).param_range()
+    params = []
+    for j in range(countV):
+        for i in range(countU):
+            uPos = 0.5 if countU == 1 else i / (countU - 1.0)
+            vPos = 0.5 if countV == 1 else j / (countV - 1.0)
+            params.append([
+                rangeU[0] + uPos * (rangeU[1] - rangeU[0]),
+                rangeV[0] + vPos * (rangeV[1] - rangeV[0]),
+                ])
+    return np.array(params).reshape(-1, 2)
+
+
+def _fan_triangles(faceCounts):
+    """Split every polygon into a fan of triangles. Returns (triangleFaces, (T, 3) face-vertex corners).
+    A fan is exact for convex polygons, which covers the quads and n-gons of a car body.
+    """
+    faceCounts = np.asarray(faceCounts, dtype=int)
+    faceStarts = np.cumsum(faceCounts) - faceCounts
+    triangleCounts = np.maximum(faceCounts - 2, 0)
+    triangleFaces = np.repeat(np.arange(len(faceCounts)), triangleCounts)
+    triangleStarts = np.cumsum(triangleCounts) - triangleCounts
+    fanIndex = np.arange(len(triangleFaces)) - np.repeat(triangleStarts, triangleCounts) + 1
+    firstCorners = faceStarts[triangleFaces]
+    corners = np.stack([firstCorners, firstCorners + fanIndex, firstCorners + fanIndex + 1], axis=1)
+    return triangleFaces, corners
+
+
+def _barycentric(points, a, b, c):
+    """Barycentric coordinates of points in the triangles abc. Works in 2D (UV) and 3D (on the plane)."""
+    v0 = b - a
+    v1 = c - a
+    v2 = points - a
+    d00 = (v0 * v0).sum(axis=1)
+    d01 = (v0 * v1).sum(axis=1)
+    d11 = (v1 * v1).sum(axis=1)
+    d20 = (v2 * v0).sum(axis=1)
+    d21 = (v2 * v1).sum(axis=1)
+    denominator = d00 * d11 - d01 * d01
+    denominator = np.where(np.abs(denominator) < 1e-20, 1.0, denominator)
+    v = (d11 * d20 - d01 * d21) / denominator
+    w = (d00 * d21 - d01 * d20) / denominator
+    return np.stack([1.0 - v - w, v, w], axis=1)
+
+
+def _closest_on_triangles(points, a, b, c):
+    """The closest point on each triangle abc to each point. Returns (closestPoints, barycentric)."""
+    barycentric = _barycentric(points, a, b, c)
+    closest = barycentric[:, :1] * a + barycentric[:, 1:2] * b + barycentric[:, 2:] * c
+    inside = (barycentric >= 0.0).all(axis=1)
+    distances = np.where(inside, ((closest - points) ** 2).sum(axis=1), np.inf)
+    # outside of the triangle, the closest point is on one of the edges.
+    for start, end in [(a, b), (b, c), (c, a)]:
+        edge = end - start
+        length = (edge * edge).sum(axis=1)
+        t = np.clip(((points - start) * edge).sum(axis=1) / np.where(length == 0.0, 1.0, length), 0.0, 1.0)
+        onEdge = start + t[:, None] * edge
+        edgeDistances = ((onEdge - points) ** 2).sum(axis=1)
+        better = edgeDistances < distances
+        closest[better] = onEdge[better]
+        distances[better] = edgeDistances[better]
+    return closest, np.clip(_barycentric(closest, a, b, c), 0.0, 1.0)
+
+
+class TriangleTree(object):
+    """A bounding volume tree over triangles, for closest point queries.
+    The triangles are split at the median of their centers along the widest axis, until a node has
+    LEAF_SIZE triangles or less. Each node keeps the bounding box of its triangles, and a node is only
+    searched when its box is closer than the best point found so far, so the answer is exact.
+    All of the positions go down the tree together, one level at a time, as NumPy arrays of
+    (position, node) pairs. Only the loop over the levels runs in python.
+    """
+    LEAF_SIZE = 8
+
+    def __init__(self, a, b, c):
+        """a, b and c are (T, 3) arrays of the triangle corners."""
+        self.corners = np.stack([np.asarray(x, dtype=float).reshape(-1, 3) for x in (a, b, c)], axis=1)
+        self._triangleMin = self.corners.min(axis=1)
+        self._triangleMax = self.corners.max(axis=1)
+        # parallel lists, one entry per node. A node with left == -1 is a leaf.
+        self._left = []
+        self._right = []
+        self._start = []
+        self._end = []
+        self._boxMin = []
+        self._boxMax = []
+        self._order = np.arange(len(self.corners))
+        if len(self.corners):
+            self._build()
+        # as arrays, to index with arrays of nodes.
+        self._left = np.array(self._left, dtype=int)
+        self._right = np.array(self._right, dtype=int)
+        self._start = np.array(self._start, dtype=int)
+        self._end = np.array(self._end, dtype=int)
+        self._boxMin = np.array(self._boxMin, dtype=float).reshape(-1, 3)
+        self._boxMax = np.array(self._boxMax, dtype=float).reshape(-1, 3)
+        # the triangles in leaf order, so each leaf is one contiguous slice.
+        self._leafCorners = self.corners[self._order]
+
+    def _add_node(self, start, end):
+        triangles = self._order[start:end]
+        self._left.append(-1)
+        self._right.append(-1)
+        self._start.append(start)
+        self._end.append(end)
+        self._boxMin.append(self._triangleMin[triangles].min(axis=0))
+        self._boxMax.append(self._triangleMax[triangles].max(axis=0))
+        return len(self._start) - 1
+
+    def _build(self):
+        centers = (self._triangleMin + self._triangleMax) * 0.5
+        stack = [self._add_node(0, len(self.corners))]
+        while stack:
+            node = stack.pop()
+            start, end = self._start[node], self._end[node]
+            if end - start <= self.LEAF_SIZE:
+                continue
+            nodeCenters = centers[self._order[start:end]]
+            axis = int(np.argmax(nodeCenters.max(axis=0) - nodeCenters.min(axis=0)))
+            mid = (end - start) // 2
+            partition = np.argpartition(nodeCenters[:, axis], mid)
+            self._order[start:end] = self._order[start:end][partition]
+            self._left[node] = self._add_node(start, start + mid)
+            self._right[node] = self._add_node(start + mid, end)
+            stack.extend([self._left[node], self._right[node]])
+
+    def _box_distances(self, nodes, positions):
+        """The squared distance from each position to the bounding box of its node. 0 inside of it."""
+        gap = np.maximum(np.maximum(self._boxMin[nodes] - positions, positions - self._boxMax[nodes]), 0.0)
+        return (gap * gap).sum(axis=1)
+
+    def _search_leaves(self, queries, nodes, positions, best):
+        """Test every triangle of each leaf against its query, and keep the closer ones in best.
+        best is (triangles, barycentric, squared distances), one row per position, updated in place.
+        """
+        counts = self._end[nodes] - self._start[nodes]
+        pairQueries = np.repeat(queries, counts)
+        slots = np.repeat(self._start[nodes] - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        corners = self._leafCorners[slots]
+        pairPositions = positions[pairQueries]
+        closest, weights = _closest_on_triangles(pairPositions, corners[:, 0], corners[:, 1], corners[:, 2])
+        pairDistances = ((closest - pairPositions) ** 2).sum(axis=1)
+        # the closest triangle of each query: sort by query, then distance, and take the first of each query.
+        order = np.lexsort((pairDistances, pairQueries))
+        first = order[np.concatenate([[True], pairQueries[order][1:] != pairQueries[order][:-1]])]
+        bestTriangles, bestWeights, bestDistances = best
+        closer = pairDistances[first] < bestDistances[pairQueries[first]]
+        first = first[closer]
+        bestDistances[pairQueries[first]] = pairDistances[first]
+        bestTriangles[pairQueries[first]] = self._order[slots[first]]
+        bestWeights[pairQueries[first]] = weights[first]
+
+    def _query_chunk(self, positions):
+        count = len(positions)
+        best = (np.full(count, -1, dtype=int), np.zeros((count, 3)), np.full(count, np.inf))
+        # follow the nearer box down to a leaf first, so most of the tree can be skipped after.
+        nodes = np.zeros(count, dtype=int)
+        inside = self._left[nodes] != -1
+        while inside.any():
+            where = np.nonzero(inside)[0]
+            left, right = self._left[nodes[where]], self._right[nodes[where]]
+            goLeft = self._box_distances(left, positions[where]) <= self._box_distances(right, positions[where])
+            nodes[where] = np.where(goLeft, left, right)
+            inside = self._left[nodes] != -1
+        self._search_leaves(np.arange(count), nodes, positions, best)
+
+        # then every (position, node) pair whose box could still hold something closer, a level at a time.
+        queries = np.arange(count)
+        nodes = np.zeros(count, dtype=int)
+        while len(queries):
+            keep = self._box_distances(nodes, positions[queries]) < best[2][queries]
+            queries, nodes = queries[keep], nodes[keep]
+            isLeaf = self._left[nodes] == -1
+            if isLeaf.any():
+                self._search_leaves(queries[isLeaf], nodes[isLeaf], positions, best)
+            queries, nodes = queries[~isLeaf], nodes[~isLeaf]
+            queries = np.repeat(queries, 2)
+            nodes = np.stack([self._left[nodes], self._right[nodes]], axis=1).ravel()
+        return best
+
+    def query(self, positions, chunkSize=1024):
+        """Returns (triangles, barycentric, distances) of the closest point for each of the (M, 3) positions.
+        triangles are -1 when there are no triangles. Done in chunks to keep the memory down.
+        """
+        positions = np.asarray(positions, dtype=float).reshape(-1, 3)
+        triangles = np.full(len(positions), -1, dtype=int)
+        barycentric = np.zeros((len(positions), 3))
+        distances = np.full(len(positions), np.inf)
+        if not len(self.corners):
+            return triangles, barycentric, distances
+        for start in range(0, len(positions), chunkSize):
+            chunk = slice(start, start + chunkSize)
+            triangles[chunk], barycentric[chunk], distances[chunk] = self._query_chunk(positions[chunk])
+        return triangles, barycentric, np.sqrt(distances)
+
+
+class MeshUvIndex(object):
+    """A grid over the UV triangles of a mesh, to find which face and barycentric coordinates
+    any number of UVs or world positions land on, in one vectorized query.
+    Build it with get_mesh_uv_index(), which caches it until the topology or the UVs change.
+    """
+
+    def __init__(self, uvs, faceCounts, vertexIds, uvIds):
+        """uvs is (numUVs, 2). faceCounts, vertexIds and uvIds are the face-vertex lists of MFnMesh.
+        uvIds has -1 for the face-vertices that have no UV.
+        """
+        self.uvs = np.asarray(uvs, dtype=float).reshape(-1, 2)
+        triangleFaces, corners = _fan_triangles(faceCounts)
+        self.triangleFaces = triangleFaces
+        self.triangleVertices = np.asarray(vertexIds, dtype=int)[corners]
+        self.triangleUvs = np.asarray(uvIds, dtype=int)[corners]
+        self._build_grid()
+        self._triangleTree = None
+        self._treePoints = None
+
+    @classmethod
+    def from_maya(cls, mesh, uvSet=None):
+        fnMesh = om2.MFnMesh(_mesh_path(mesh))
+        uvSet = uvSet or fnMesh.currentUVSetName()
+        faceCounts, vertexIds = fnMesh.getVertices()
+        uvCounts, faceUvIds = fnMesh.getAssignedUVs(uvSet)
+        faceCounts = np.array(faceCounts, dtype=int)
+        # only the faces with UVs are listed in faceUvIds, so spread them out to every face-vertex.
+        uvIds = np.full(len(vertexIds), -1, dtype=int)
+        hasUvs = np.repeat(np.array(uvCounts, dtype=int) > 0, faceCounts)
+        uvIds[hasUvs] = np.array(faceUvIds, dtype=int)
+        us, vs = fnMesh.getUVs(uvSet)
+        return cls(np.stack([np.array(us), np.array(vs)], axis=1), faceCounts, np.array(vertexIds), uvIds)
+
+    def _build_grid(self):
+        """Bucket each triangle into every grid cell its UV bounding box touches. Stored as flat arrays."""
+        hasUvs = (self.triangleUvs >= 0).all(axis=1)
+        self.uvTriangles = np.nonzero(hasUvs)[0]
+        triangleUvs = self.uvs[self.triangleUvs[self.uvTriangles]] if len(self.uvTriangles) else np.zeros((0, 3, 2))
+        self.gridMin = triangleUvs.reshape(-1, 2).min(axis=0) if len(triangleUvs) else np.zeros(2)
+        gridMax = triangleUvs.reshape(-1, 2).max(axis=0) if len(triangleUvs) else np.ones(2)
+        self.gridSize = max(1, int(np.sqrt(len(triangleUvs))))
+        self.cellSize = np.maximum((gridMax - self.gridMin) / self.gridSize, 1e-9)
+
+        cellMin = self._cells(triangleUvs.min(axis=1)) if len(triangleUvs) else np.zeros((0, 2), dtype=int)
+        cellMax = self._cells(triangleUvs.max(axis=1)) if len(triangleUvs) else np.zeros((0, 2), dtype=int)
+        spans = cellMax - cellMin + 1
+        cellCounts = spans[:, 0] * spans[:, 1]
+        owner = np.repeat(np.arange(len(cellCounts)), cellCounts)
+        local = np.arange(cellCounts.sum()) - np.repeat(np.cumsum(cellCounts) - cellCounts, cellCounts)
+        cellX = cellMin[owner, 0] + local % spans[owner, 0]
+        cellY = cellMin[owner, 1] + local // spans[owner, 0]
+        cellIds = cellY * self.gridSize + cellX
+        order = np.argsort(cellIds, kind='mergesort')
+        self.cellTriangles = self.uvTriangles[owner[order]]
+        self.cellCounts = np.bincount(cellIds, minlength=self.gridSize * self.gridSize)
+        self.cellStarts = np.cumsum(self.cellCounts) - self.cellCounts
+
+    def _cells(self, uvs):
+        cells = np.floor((uvs - self.gridMin) / self.cellSize).astype(int)
+        return np.clip(cells, 0, self.gridSize - 1)
+
+    def locate_uvs(self, uvs):
+        """Returns (faces, triangles, barycentric) for each (u, v). faces and triangles are -1 where no face has that UV.
+        The barycentric coordinates weigh the 3 corners of the triangle.
+        """
+        uvs = np.asarray(uvs, dtype=float).reshape(-1, 2)
+        triangles = np.full(len(uvs), -1, dtype=int)
+        barycentric = np.zeros((len(uvs), 3))
+        outside = ((uvs < self.gridMin - 1e-9) | (uvs > self.gridMin + self.cellSize * self.gridSize + 1e-9)).any(axis=1)
+        cells = self._cells(uvs)
+        cellIds = cells[:, 1] * self.gridSize + cells[:, 0]
+        starts = self.cellStarts[cellIds]
+        counts = np.where(outside, 0, self.cellCounts[cellIds])
+
+        # test the nth triangle of every cell at once, until everything is found.
+        for n in range(counts.max() if len(counts) else 0):
+            active = np.nonzero((triangles == -1) & (n < counts))[0]
+            if not len(active):
+                break
+            candidates = self.cellTriangles[starts[active] + n]
+            corners = self.uvs[self.triangleUvs[candidates]]
+            weights = _barycentric(uvs[active], corners[:, 0], corners[:, 1], corners[:, 2])
+            inside = (weights >= -1e-9).all(axis=1)
+            triangles[active[inside]] = candidates[inside]
+            barycentric[active[inside]] = weights[inside]
+
+        faces = np.where(triangles >= 0, self.triangleFaces[np.maximum(triangles, 0)], -1)
+        return faces, triangles, barycentric
+
+    def triangle_tree(self, points):
+        """The TriangleTree of the mesh with its vertices at points. It is kept until the points change."""
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        if self._triangleTree is None or not np.array_equal(self._treePoints, points):
+            corners = points[self.triangleVertices]
+            self._triangleTree = TriangleTree(corners[:, 0], corners[:, 1], corners[:, 2])
+            self._treePoints = points
+        return self._triangleTree
+
+    def closest_points(self, points, positions):
+        """Returns (faces, triangles, barycentric) of the closest point on the mesh to each world position.
+        points are the mesh's world space vertex positions. Every triangle is searched, through a TriangleTree.
+        """
+        triangles, barycentric, distances = self.triangle_tree(points).query(positions)
+        faces = np.where(triangles >= 0, self.triangleFaces[np.maximum(triangles, 0)], -1)
+        return faces, triangles, barycentric
+
+    def uvs_at(self, triangles, barycentric):
+        """The (u, v) of each barycentric point. Triangles without UVs give (nan, nan)."""
+        triangles = np.asarray(triangles, dtype=int)
+        uvIds = self.triangleUvs[np.maximum(triangles, 0)]
+        corners = self.uvs[np.maximum(uvIds, 0)]
+        uvs = (corners * np.asarray(barycentric)[:, :, None]).sum(axis=1)
+        uvs[(triangles < 0) | (uvIds < 0).any(axis=1)] = np.nan
+        return uvs
+
+
+# mesh path: (signature, MeshUvIndex)
+_meshUvIndexes = {}
+
+
+def _mesh_path(mesh):
+    selList = om2.MSelectionList()
+    selList.add(str(mesh))
+    dagPath = selList.getDagPath(0)
+    if dagPath.apiType() == om2.MFn.kTransform:
+        dagPath.extendToShape()
+    return dagPath
+
+
+def _mesh_signature(fnMesh, uvSet):
+    """Changes whenever the topology or the UVs change. Moving the points doesn't change it."""
+    faceCounts, vertexIds = fnMesh.getVertices()
+    uvCounts, uvIds = fnMesh.getAssignedUVs(uvSet)
+    us, vs = fnMesh.getUVs(uvSet)
+    meshHash = hashlib.md5()
+    for values, dtype in [(faceCounts, np.int32), (vertexIds, np.int32), (uvCounts, np.int32),
+                          (uvIds, np.int32), (us, np.float64), (vs, np.float64)]:
+        meshHash.update(np.array(values, dtype=dtype).tobytes())
+    return (fnMesh.numVertices, fnMesh.numFaces, fnMesh.numUVs(uvSet), meshHash.hexdigest())
+
+
+def get_mesh_uv_index(mesh, uvSet=None):
+    """Returns the cached MeshUvIndex of a mesh. It is rebuilt when the topology or the UVs change."""
+    dagPath = _mesh_path(mesh)
+    fnMesh = om2.MFnMesh(dagPath)
+    uvSet = uvSet or fnMesh.currentUVSetName()
+    key = (dagPath.fullPathName(), uvSet)
+    signature = _mesh_signature(fnMesh, uvSet)
+    cached = _meshUvIndexes.get(key)
+    if cached is None or cached[0] != signature:
+        cached = (signature, MeshUvIndex.from_maya(dagPath.fullPathName(), uvSet))
+        _meshUvIndexes[key] = cached
+    return cached[1]
+
+
+def clear_mesh_uv_indexes():
+    """Forget every cached MeshUvIndex. eg. when opening a new scene."""
+    _meshUvIndexes.clear()
+
+
+def pin_many_to_mesh(mesh, positions=None, uvs=None, names=None, parent=None, uvSet=None, useUvPin=None):
+    """Pin a transform to a polygon mesh for each world position, or each (u, v) in uvs.
+    Positions are pinned to the closest point on the mesh, found through the cached MeshUvIndex.
+    With a uvPin node, one uvPin drives every pin of the mesh. Otherwise each pin gets a follicle shape.
+    Returns (pins, report). report also has the 'faces' and 'barycentric' each pin landed on.
+    """
+    dagPath = _mesh_path(mesh)
+    meshShape = dagPath.fullPathName()
+    meshName = cmds.listRelatives(meshShape, parent=True)[0]
+    fnMesh = om2.MFnMesh(dagPath)
+    uvSet = uvSet or fnMesh.currentUVSetName()
+    uvIndex = get_mesh_uv_index(meshShape, uvSet)
+    if positions is not None:
+        points = props_geo_lib.get_mesh_points(meshShape)
+        faces, triangles, barycentric = uvIndex.closest_points(points, positions)
+        uvs = uvIndex.uvs_at(triangles, barycentric)
+    else:
+        uvs = np.asarray(uvs, dtype=float).reshape(-1, 2)
+        faces, triangles, barycentric = uvIndex.locate_uvs(uvs)
+    if np.isnan(uvs).any() or (faces < 0).any():
+        missing = int(((faces < 0) | np.isnan(uvs).any(axis=1)).sum())
+        cmds.warning('{} pins on {} have no UVs to stick to. Check the {} UV set.'.format(missing, meshName, uvSet))
+        uvs = np.nan_to_num(uvs)
+    if names is None:
+        names = ['{}_{}_pin'.format(meshName, i + 1) for i in range(len(uvs))]
+    if useUvPin is None:
+        useUvPin = has_uv_pin()
+
+    sharedNodes = []
+    pinNodes = []
+    if useUvPin and len(uvs):
+        uvPin = cmds.createNode('uvPin', name=meshName + '_uvpin')
+        cmds.connectAttr(meshShape + '.worldMesh[0]', uvPin + '.deformedGeometry')
+        cmds.setAttr(uvPin + '.uvSetName', uvSet, type='string')
+        sharedNodes.append(uvPin)
+
+    parentFlags = {'parent': str(parent)} if parent else {}
+    pins = []
+    for i, (name, uv) in enumerate(zip(names, uvs)):
+        pinName = cmds.createNode('transform', name=name, **parentFlags)
+        paramPlugs = _add_param_attrs(pinName, float(uv[0]), float(uv[1]), (None, None), (None, None))
+        pinNodes.append(pinName)
+        if useUvPin:
+            pinNodes.append(cmds.createNode('locator', name=pinName.split('|')[-1] + 'Shape', parent=pinName))
+            cmds.connectAttr(paramPlugs[0], '{}.coordinate[{}].coordinateU'.format(uvPin, i))
+            cmds.connectAttr(paramPlugs[1], '{}.coordinate[{}].coordinateV'.format(uvPin, i))
+            cmds.connectAttr('{}.outputMatrix[{}]'.format(uvPin, i), pinName + '.offsetParentMatrix')
+        else:
+            follicle = cmds.createNode('follicle', name=pinName.split('|')[-1] + 'Shape', parent=pinName)
+            cmds.connectAttr(meshShape + '.outMesh', follicle + '.inputMesh')
+            cmds.connectAttr(meshShape + '.worldMatrix[0]', follicle + '.inputWorldMatrix')
+            cmds.setAttr(follicle + '.mapSetName', uvSet, type='string')
+            cmds.connectAttr(paramPlugs[0], follicle + '.parameterU')
+            cmds.connectAttr(paramPlugs[1], follicle + '.parameterV')
+            cmds.connectAttr(follicle + '.outTranslate', pinName + '.translate')
+            cmds.connectAttr(follicle + '.outRotate', pinName + '.rotate')
+            pinNodes.append(follicle)
+        pins.append(pinName)
+
+    report = {
+        'pins': len(pins),
+        'nodes': len(pinNodes) + len(sharedNodes),
+        'shared_nodes': len(sharedNodes),
+        'nodes_per_pin': (len(pinNodes) + len(sharedNodes)) / float(max(1, len(pins))),
+        'faces': faces.tolist(),
+        'barycentric': barycentric.tolist(),
+        }
+    print('Pinned {pins} transforms to {surface} with {nodes} nodes ({nodes_per_pin:.2f} per pin).'.format(
+        surface=meshName, **report))
+    return pins, report
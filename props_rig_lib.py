@@ -0,0 +1,161 @@
+#!/usr/bin/env mayapy
+# encoding: utf-8
+"""
+The base prop rig: the world, master and COG controls, their roots, and the Geo constraints.
+
+Everything is built through scene_backend, so the rig can be built and counted in a MemoryBackend,
+without Maya. props_tools.build_basic_guides() and build_base_rig() call these inside an undo chunk.
+Nodes are handled as names here. The controls are handed back wrapped by the backend.
+
+    with scene_backend.use_backend(scene_backend.MemoryBackend()) as scene:
+        props_rig_lib.build_base_rig()
+        print(scene.node_count('transform'))
+"""
+
+import props_icon_lib
+import scene_backend
+
+GLOBAL_NAME = 'world_ctl'
+LOCAL_NAME = 'master_C0_ctl'
+BODY_NAME = 'COG_C0_ctl'
+# the overrideColor of the world, master and COG controls.
+GLOBAL_COLOR = 13
+LOCAL_COLOR = 22
+BODY_COLOR = 24
+
+
+def _short_name(node):
+    return node.rsplit('|', 1)[-1]
+
+
+def chain_parent(scene, names):
+    """Parent each node under the one before it. Nodes already in place are skipped. Returns the new names."""
+    names = list(names)
+    for i in range(1, len(names)):
+        currentParent = scene.listRelatives(names[i], parent=True)
+        if currentParent and _short_name(currentParent[0]) == _short_name(names[i - 1]):
+            continue
+        names[i] = scene.parent(names[i], names[i - 1])
+    return names
+
+
+def make_roots(scene, names, suffix='npo'):
+    """Give each node a root group, in the same world position and rotation, under the node's old parent.
+    The root takes the node's name with the last _word swapped for suffix. Returns the root names.
+    """
+    roots = []
+    for name in names:
+        shortName = _short_name(name)
+        rootName = shortName.replace(shortName.split('_')[-1], '') + suffix
+        nodeParent = scene.listRelatives(name, parent=True)
+        oRoot = scene.createNode('transform', name=rootName, parent=nodeParent[0] if nodeParent else None)
+        scene.matchTransform(oRoot, name)
+        scene.parent(name, oRoot)
+        scene.lockAttr(oRoot + '.v', locked=True)
+        roots.append(oRoot)
+    return roots
+
+
+def _box_size(scene, name):
+    """The width and depth of a control, in its own space."""
+    bbox = scene.objectBoundingBox(name)
+    return bbox[3] - bbox[0], bbox[5] - bbox[2]
+
+
+def build_basic_guides():
+    """The world, master and COG guide controls, parented in a chain. Returns them."""
+    scene = scene_backend.get_backend()
+    oGlobal = props_icon_lib.create_control_icon('arrowBox', GLOBAL_NAME, [10.0, 1.0, 10.0], color=GLOBAL_COLOR)
+    oLocal = props_icon_lib.create_control_icon(
+            'square', LOCAL_NAME, [9.0, 1.0, 9.0], offset=[0, 0.2, 0], color=LOCAL_COLOR)
+    oBody = props_icon_lib.create_control_icon('square', BODY_NAME, [8.0, 1.0, 8.0], color=BODY_COLOR)
+    scene.setAttr(str(oBody) + '.translate', [0.0, 3.0, 0.0])
+    names = chain_parent(scene, [str(x) for x in [oGlobal, oLocal, oBody]])
+    return [scene.wrap(x) for x in names]
+
+
+def _find_or_create_guide(scene, name, existingGuides, color, iconType, iconScale):
+    """The guide control called name. Guides that were already in the scene are added to existingGuides."""
+    if scene.objExists(name):
+        existingGuides.append((name, color))
+        return name
+    return str(props_icon_lib.create_control_icon(iconType, name, iconScale, color=color))
+
+
+def build_base_rig():
+    """The base rig, built around the guides in the scene, or around new guides when they are missing.
+    The Geo group is constrained to the COG. Returns the world, master, local, COG and COG offset controls.
+    """
+    scene = scene_backend.get_backend()
+    rigGroup = 'Rig' if scene.objExists('Rig') else scene.group(name='Rig')
+
+    for layerName in ['RigLayer', 'GeoLayer']:
+        if scene.objExists(layerName):
+            scene.delete(layerName)
+    scene.displayLayer('RigLayer', [rigGroup], color=14)
+    scene.displayLayer('GeoLayer', ['Geo'] if scene.objExists('Geo') else [], color=7)
+
+    # guides that were already in the scene are recolored at the end.
+    existingGuides = []
+    oGlobal = _find_or_create_guide(scene, GLOBAL_NAME, existingGuides, GLOBAL_COLOR, 'arrowBox', [10.0, 1.0, 10.0])
+    oLocal = _find_or_create_guide(scene, LOCAL_NAME, existingGuides, LOCAL_COLOR, 'square', [9.0, 1.0, 9.0])
+
+    localWidth, localDepth = _box_size(scene, oLocal)
+    oLocal2 = str(props_icon_lib.create_control_icon(
+            'square',
+            'local_C0_ctl',
+            [localWidth - 1.0, 1.0, localDepth - 1.0],
+            offset = [0.0, 0.2, 0.0],
+            color = LOCAL_COLOR,
+            ))
+    scene.xform(oLocal2, translation=scene.worldTranslation(oLocal))
+
+    if scene.objExists(BODY_NAME):
+        oBody = BODY_NAME
+        existingGuides.append((oBody, BODY_COLOR))
+    else:
+        oBody = str(props_icon_lib.create_control_icon('square', BODY_NAME, [8.0, 1.0, 8.0], color=BODY_COLOR))
+        scene.setAttr(oBody + '.translate', [0.0, 3.0, 0.0])
+
+    bodyWidth, bodyDepth = _box_size(scene, oBody)
+    oBody2 = str(props_icon_lib.create_control_icon(
+            'square',
+            'COG_C1_ctl',
+            [bodyWidth - 1.0, 1.0, bodyDepth - 1.0],
+            offset = [0.0, 0.0, 0.0],
+            color = BODY_COLOR,
+            ))
+    scene.xform(oBody2, translation=scene.worldTranslation(oBody))
+
+    controls = chain_parent(scene, [rigGroup, oGlobal, oLocal, oLocal2, oBody, oBody2])[1:]
+    make_roots(scene, controls, suffix='npo')
+    scene.constrain('parentConstraint', controls[-1], 'Geo', maintainOffset=True)
+    scene.constrain('scaleConstraint', controls[-1], 'Geo', maintainOffset=True)
+
+    # an existing guide may share its shape with other controls, so it gets its own before the color changes.
+    props_icon_lib.make_unique_shapes([x for x, color in existingGuides])
+    for oGuide, color in existingGuides:
+        shapeName = scene.listRelatives(oGuide, shapes=True)[0]
+        scene.setAttr(shapeName + '.overrideEnabled', True)
+        scene.setAttr(shapeName + '.overrideColor', color)
+    return [scene.wrap(x) for x in controls]
+
+
+def constrain_geo(control, geoNames):
+    """Parent and scale constrain each geo to control, keeping the offset."""
+    scene = scene_backend.get_backend()
+    control = str(control)
+    for geoName in [str(x) for x in geoNames]:
+        shortName = _short_name(geoName)
+        scene.constrain('parentConstraint', control, geoName, name='{}_parentconstraint'.format(shortName))
+        scene.constrain('scaleConstraint', control, geoName, name='{}_scaleconstraint'.format(shortName))
+
+
+def place_geo_control(controlName, position, geoNames):
+    """A locator control at a world position, driving geoNames. Its visibility is locked. Returns the control."""
+    scene = scene_backend.get_backend()
+    oControl = scene.spaceLocator(name=controlName)
+    scene.xform(oControl, translation=position)
+    constrain_geo(oControl, geoNames)
+    scene.lockAttr(oControl + '.v', locked=True)
+    return scene.wrap(oControl)
@@ -0,0 +1,100 @@
+#!/usr/bin/env mayapy
+# encoding: utf-8
+"""
+Skin weight helpers shared by the ribbon rigs and the vehicle autorig.
+
+Weights are written as a whole (components x influences) matrix in one API call,
+instead of one skinPercent per CV. The rows are every CV or vertex of the skinned geometry,
+in Maya's order. For surfaces that is U as the outer loop, like cvPositions().
+The columns follow the influences list, or the skinCluster's own influence order.
+
+    skinCls = skin_geometry(controlJoints, oRibbon, 'l__belt_skincluster')
+    props_skin_lib.set_skin_weights(skinCls, props_skin_lib.one_to_one_weights(skinCls), controlJoints)
+"""
+
+import numpy as np
+
+try:
+    import maya.api.OpenMaya as om2
+    import maya.api.OpenMayaAnim as oma2
+except ImportError:
+    om2 = None
+    oma2 = None
+
+
+def _skin_fn(skinCluster):
+    selList = om2.MSelectionList()
+    selList.add(str(skinCluster))
+    return oma2.MFnSkinCluster(selList.getDependNode(0))
+
+
+def _complete_component(dagPath):
+    """A component of every CV or vertex of the geometry, and its (rows, cvs per row) layout."""
+    if dagPath.hasFn(om2.MFn.kNurbsSurface):
+        fnSurface = om2.MFnNurbsSurface(dagPath)
+        fnComponent = om2.MFnDoubleIndexedComponent()
+        component = fnComponent.create(om2.MFn.kSurfaceCVComponent)
+        fnComponent.setCompleteData(fnSurface.numCVsInU, fnSurface.numCVsInV)
+        return component, (fnSurface.numCVsInU, fnSurface.numCVsInV)
+    fnComponent = om2.MFnSingleIndexedComponent()
+    if dagPath.hasFn(om2.MFn.kNurbsCurve):
+        count = om2.MFnNurbsCurve(dagPath).numCVs
+        component = fnComponent.create(om2.MFn.kCurveCVComponent)
+    elif dagPath.hasFn(om2.MFn.kMesh):
+        count = om2.MFnMesh(dagPath).numVertices
+        component = fnComponent.create(om2.MFn.kMeshVertComponent)
+    else:
+        raise TypeError('{} is not a mesh, curve or surface.'.format(dagPath.partialPathName()))
+    fnComponent.setCompleteData(count)
+    return component, (count, 1)
+
+
+def influence_names(skinCluster):
+    """The influences of a skinCluster, in the order of its weight columns."""
+    return [x.partialPathName() for x in _skin_fn(skinCluster).influenceObjects()]
+
+
+def one_to_one_weights(skinCluster):
+    """A weight matrix where CV i belongs entirely to influence i. On a surface, row i of CVs
+    (every V for U = i) belongs to influence i. The CV rows and influences must have the same count.
+    """
+    fnSkin = _skin_fn(skinCluster)
+    component, (rowCount, rowLength) = _complete_component(fnSkin.getPathAtIndex(0))
+    influenceCount = len(fnSkin.influenceObjects())
+    if rowCount != influenceCount:
+        raise ValueError('{} has {} rows of CVs, but {} influences.'.format(skinCluster, rowCount, influenceCount))
+    return np.repeat(np.eye(influenceCount), rowLength, axis=0)
+
+
+def set_skin_weights(skinCluster, weights, influences=None, normalize=True):
+    """Write a whole (components x influences) weight matrix to the skinCluster in one call.
+    influences are the joints of each column, as names or PyNodes. Defaults to every influence, in order.
+    With normalize, each row is scaled to add up to 1.0 here, once for the whole matrix.
+    The API call isn't undoable by itself. Undo the skinCluster, or set the weights again.
+    """
+    fnSkin = _skin_fn(skinCluster)
+    dagPath = fnSkin.getPathAtIndex(0)
+    component, (rowCount, rowLength) = _complete_component(dagPath)
+
+    influencePaths = [x.fullPathName() for x in fnSkin.influenceObjects()]
+    if influences is None:
+        influenceIndices = list(range(len(influencePaths)))
+    else:
+        influenceIndices = []
+        for each in influences:
+            selList = om2.MSelectionList()
+            selList.add(str(each))
+            influenceIndices.append(influencePaths.index(selList.getDagPath(0).fullPathName()))
+
+    weights = np.asarray(weights, dtype=float)
+    if weights.shape != (rowCount * rowLength, len(influenceIndices)):
+        raise ValueError('Expected a {} x {} weight matrix for {}, got {}.'.format(
+            rowCount * rowLength, len(influenceIndices), skinCluster, weights.shape))
+    if normalize:
+        totals = weights.sum(axis=1)[:, None]
+        weights = weights / np.where(totals == 0.0, 1.0, totals)
+
+    fnSkin.setWeights(
+            dagPath, component, om2.MIntArray(influenceIndices),
+            om2.MDoubleArray(weights.ravel().tolist()), False, False)
+    return weights
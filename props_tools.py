@@ -46,7 +46,11 @@ import maya.OpenMayaUI as omui
 
 import tenave
 import tenave.props_icon_lib as props_icon_lib
-import tenave.car_autorig
+import tenave.props_geo_lib as props_geo_lib
+import tenave.props_naming_lib as props_naming_lib
+import tenave.props_cmds_lib as props_cmds_lib
+import tenave.props_rig_lib as props_rig_lib
+import tenave.props_launcher as props_launcher
 
 import os
 import posixpath
@@ -86,7 +90,10 @@ def maya_main_window():
 
 class PropRiggingTools(QtWidgets.QDialog):
 
-    def __init__(self, parent=maya_main_window()):
+    def __init__(self, parent=None):
+        # the main window is found when the UI opens, not when this module is imported.
+        if parent is None:
+            parent = maya_main_window()
         super(PropRiggingTools, self).__init__(parent)
 
 
@@ -339,7 +346,8 @@ class PropRiggingTools(QtWidgets.QDialog):
     def vehicleAutorigBtn_pressed(self):
         sender = self.sender()
         print('"{}" pressed'.format(sender.text()))
-        import car_autorig
+        # the autorigger is only imported the first time it is opened.
+        props_launcher.launch('car_autorig')
     
 
     def createRibbonBtn_pressed(self):
@@ -375,21 +383,11 @@ class PropRiggingTools(QtWidgets.QDialog):
 def build_basic_guides():
     ##### 1. BUILD THE BASIC GUIDE CONTROLS #####
     #TODO: If user has a selection, size the controls to match? What about position?
-    oGlobal = props_icon_lib.create_control_icon('arrowBox', 'world_ctl', [10.0, 1.0, 10.0])
-    oLocal = props_icon_lib.create_control_icon('square', 'master_C0_ctl', [9.0, 1.0, 9.0], offset=[0, 0.2, 0])
-    oBody = props_icon_lib.create_control_icon('square', 'COG_C0_ctl', [8.0, 1.0, 8.0])
-    oBody.setTranslation([0.0, 3.0, 0.0])
-    chain_parent([oGlobal, oLocal, oBody])
+    # built through scene_backend by props_rig_lib, so it can be tested without Maya.
+    guides = props_rig_lib.build_basic_guides()
+    pm.select(guides)
     reorder_outliner_nicely()
 
-    oGlobal.getShape().overrideEnabled.set(True)
-    oLocal.getShape().overrideEnabled.set(True)
-    oBody.getShape().overrideEnabled.set(True)
-
-    oGlobal.getShape().overrideColor.set(13)
-    oLocal.getShape().overrideColor.set(22)
-    oBody.getShape().overrideColor.set(24)
-
 
 @undo
 def build_base_rig():
@@ -397,98 +395,21 @@ def build_base_rig():
     #TODO: Generate my own generic shapes here.
     #TODO: Better naming conventions
     #TODO: If the guide doesn't exist, just build a rig with all controls at 0,0,0. Don't be an ass about it.
-    #nSRT = 'globalsrt'
-    nGlobal = 'world_ctl'
-    nLocal = 'master_C0_ctl'
-    nBody = 'COG_C0_ctl'
-
-    if not pm.objExists("Rig"):
-        rigGroup = pm.group(em=True, n='Rig')
-    else:
-        rigGroup = pm.PyNode("Rig")
-
-    if pm.objExists('RigLayer'):
-        pm.delete('RigLayer')
-    if pm.objExists('GeoLayer'):
-        pm.delete('GeoLayer')
-    oLayer = pm.createDisplayLayer('Rig', n='RigLayer', number=1, nr=True)
-    oLayer.color.set(14)
-    oLayer = pm.createDisplayLayer(pm.ls('Geo'), n='GeoLayer', number=1, nr=True)
-    oLayer.color.set(7)
-
-    # Find or create the guide controls
-    #if pm.objExists(nSRT):
-    #    oSRT = pm.PyNode(nSRT)
-    #else:
-    #    oSRT = pm.spaceLocator(n='globalsrt')
-    if pm.objExists(nGlobal):
-        oGlobal = pm.PyNode(nGlobal)
-    else:
-        oGlobal = props_icon_lib.create_control_icon('arrowBox', 'world_ctl', [10.0, 1.0, 10.0])
-    if pm.objExists(nLocal):
-        oLocal = pm.PyNode(nLocal)
-    else:
-        oLocal = props_icon_lib.create_control_icon('square', 'master_C0_ctl', [9.0, 1.0, 9.0])
-
-    localBB = oLocal.getBoundingBox()
-    localWidth = localBB.width() - 1.0
-    localDepth = localBB.depth() - 1.0
-    oLocal2 = props_icon_lib.create_control_icon(
-            'square',
-            'local_C0_ctl',
-            [localWidth, 1.0, localDepth],
-            offset = [0.0, 0.2, 0.0],
-            )
-    oLocal2.setTranslation(oLocal.getTranslation(space='world'), space='world')
-
-    if pm.objExists(nBody):
-        oBody = pm.PyNode(nBody)
-    else:
-        oBody = props_icon_lib.create_control_icon('square', 'COG_C0_ctl', [8.0, 1.0, 8.0])
-        oBody.setTranslation([0.0, 3.0, 0.0])
-
-    bodyBB = oBody.getBoundingBox()
-    bodyWidth = bodyBB.width() - 1.0
-    bodyDepth = bodyBB.depth() - 1.0
-    oBody2 = props_icon_lib.create_control_icon(
-            'square',
-            'COG_C1_ctl',
-            [bodyWidth, 1.0, bodyDepth],
-            offset = [0.0, 0.0, 0.0],
-            )
-    oBody2.setTranslation(oBody.getTranslation(space='world'), space='world')
-
-    #chain_parent([rigGroup, oSRT, oGlobal, oLocal, oBody, oBody2])
-    chain_parent([rigGroup, oGlobal, oLocal, oLocal2, oBody, oBody2])
-    make_a_root([oGlobal, oLocal, oLocal2, oBody, oBody2])
-
-    pm.parentConstraint(oBody2, "Geo", mo=True)
-    pm.scaleConstraint(oBody2, "Geo", mo=True)
-    
-    oGlobal.getShape().overrideEnabled.set(True)
-    oLocal.getShape().overrideEnabled.set(True)
-    oLocal2.getShape().overrideEnabled.set(True)
-    oBody.getShape().overrideEnabled.set(True)
-    oBody2.getShape().overrideEnabled.set(True)
-
-    oGlobal.getShape().overrideColor.set(13)
-    oLocal.getShape().overrideColor.set(22)
-    oLocal2.getShape().overrideColor.set(22)
-    oBody.getShape().overrideColor.set(24)
-    oBody2.getShape().overrideColor.set(24)
+    # the guides are found or made, then rooted and constrained to "Geo", by props_rig_lib.
+    controls = props_rig_lib.build_base_rig()
+    #TODO: Find a way to expand the outliner automatically afterwards.
+    pm.select(controls)
 
 
 @undo
 def make_ctrl_square():
     # This assumed the base controls were already built
     geoColl = pm.selected()
-    totalBox = dt.BoundingBox()
     if geoColl:
-        [ totalBox.expand(x.getBoundingBox(space='world').min()) for x in geoColl ]
-        [ totalBox.expand(x.getBoundingBox(space='world').max()) for x in geoColl ]
+        totalBB = props_geo_lib.total_bounding_box(props_geo_lib.get_bounding_boxes(geoColl))
     else:
-        totalBox.expand([5.0, 1.0, 5.0])
-        totalBox.expand([-5.0, 1.0, -5.0])
+        totalBB = [-5.0, 1.0, -5.0, 5.0, 1.0, 5.0]
+    totalBox = props_geo_lib.to_bounding_box(totalBB)
 
     width = totalBox.width()
     depth = totalBox.depth()
@@ -625,66 +546,15 @@ def find_closest_vert(geo, pos):
         geoList = geo
     else:
         geoList = [geo]
-    closestVerts = []
-    for eachGeo in geoList:
-        nodeDagPath = om.MObject()
-        selectionList = om.MSelectionList()
-        selectionList.add(eachGeo.name())
-        nodeDagPath = om.MDagPath()
-        selectionList.getDagPath(0, nodeDagPath)
-
-        mfnMesh = om.MFnMesh(nodeDagPath)
-
-        pointA = om.MPoint(pos[0], pos[1], pos[2])
-        pointB = om.MPoint()
-        space = om.MSpace.kWorld
-
-        util = om.MScriptUtil()
-        util.createFromInt(0)
-        idPointer = util.asIntPtr()
-
-        mfnMesh.getClosestPoint(pointA, pointB, space, idPointer)
-        idx = om.MScriptUtil(idPointer).asInt()
-
-        # getClosestPoint() finds a point on a face. Next find the closest vertex to that point.
-        faceVerts = [eachGeo.vtx[i] for i in eachGeo.f[idx].getVertices()]
-        # measure each from the original pos
-        compareFaceVerts = [(pos - x.getPosition(space='world')).length() for x in faceVerts]
-        # and get the index of the shortest one
-        closestIndex = compareFaceVerts.index(min(compareFaceVerts))
-        closestVerts.append(faceVerts[closestIndex])
-        
-    # Now we have the closest vertex for each geo. Find the closest out of those ones.
-    compareVerts = [(pos - x.getPosition(space='world')).length() for x in closestVerts]
-    # and get the index of the shortest one
-    closestIndex = compareVerts.index(min(compareVerts))
-    finalClosest = closestVerts[closestIndex]
-    return (finalClosest, finalClosest.getPosition())
+    # each mesh is exported once into a cached KD-tree, instead of walking the face verts with PyMEL.
+    geoIndices, vertIndices, vertPositions = props_geo_lib.closest_vertices(geoList, [pos])
+    finalClosest = geoList[geoIndices[0]].vtx[int(vertIndices[0])]
+    return (finalClosest, dt.Point(vertPositions[0].tolist()))
 
 
 @undo
 def make_a_root(oColl):
-    newSuffix = 'npo'
-
-    for each in oColl:
-        try:
-            suffix = each.name().split('_')[-1]
-            #cutsuffix = '_{}_'.format(suffix)
-        except:
-            suffix, cutsuffix = '', ''
-        oRoot = pm.group(n=each.name().replace(suffix,'') + '{}'.format(newSuffix), em=True)
-        #TODO: Fix this logic. But in the meantime, hack away any extra underscores
-        #for i in xrange(4):
-        #    oRoot.rename(oRoot.name().replace('__','_'))
-        oRoot.setTranslation(each.getTranslation(space='world'), space='world')
-        oRoot.setRotation(each.getRotation(space='world'), space='world')
-        try:
-            pm.parent(oRoot, each.getParent())
-        except:
-            pass
-        pm.parent(each, oRoot)
-        pm.setAttr(oRoot.v, keyable=False, cb=False)
-        oRoot.v.lock()
+    props_cmds_lib.make_roots(oColl, suffix='npo')
     #TODO: Find a way to expand the outliner automatically afterwards.
     pm.select(oColl)
 
@@ -700,32 +570,15 @@ def reorder_outliner_nicely():
 
 def add_a_keyable_attribute(myObj, oDataType, oParamName, oMin=None, oMax=None, oDefault=0.0):
     """adds an attribute that shows up in the channel box; returns the newly created attribute"""
-    oFullName = '.'.join( [str(myObj),oParamName] )
-    if pm.objExists(oFullName):
-        return pm.PyNode(oFullName)
-    else:
-        myObj.addAttr(oParamName, at=oDataType, keyable=True, dv=oDefault)
-        myAttr = pm.PyNode(myObj + '.' + oParamName)
-        if oMin != None:
-            myAttr.setMin(oMin)
-        if oMax != None:
-            myAttr.setMax(oMax)
-        pm.setAttr(myAttr, e=True, channelBox=True)
-        pm.setAttr(myAttr, e=True, keyable=True)
-        return myAttr
+    # made through cmds. Only the attribute that is handed back is a PyMEL object.
+    plugs = props_cmds_lib.add_keyable_attributes([myObj], oDataType, oParamName, oMin, oMax, oDefault)
+    return pm.Attribute(plugs[0])
 
 
 def add_meta_attribute(myObj, oParamName, oValue):
     """adds a string attribute into "extra" attributes. Useful for meta information"""
-    oFullName = '.'.join( [str(myObj),oParamName] )
-    if pm.objExists(oFullName):
-        pm.PyNode(str(oFullName)).set(oValue) # if it exists, just set the value
-        return pm.PyNode(oFullName)
-    else:
-        myObj.addAttr(oParamName, dt='string')
-        oParam = pm.PyNode(str(oFullName))
-        oParam.set(oValue)
-        return oParam
+    plugs = props_cmds_lib.set_string_attributes([myObj], oParamName, oValue)
+    return pm.Attribute(plugs[0])
 
 
 def lock_main_params(oNode, pLocked=False, pChannelBox=True, pKeyable=True, pParams=None):
@@ -735,22 +588,15 @@ def lock_main_params(oNode, pLocked=False, pChannelBox=True, pKeyable=True, pPar
     example: lock_main_params('locator1', pLocked=True, pParams=['.tx','.rz'])
     example: lock_main_params(pm.PyNode('locator1'), pLocked=False, pChannel=True)
     """
-    if pParams == None:
-        pParams = ['.tx','.ty','.tz','.rx','.ry','.rz','.sx','.sy','.sz','.v']
     if oNode:
-        for param in pParams:
-            try:
-                pm.setAttr( pm.Attribute(oNode + param), keyable = pKeyable)
-                pm.setAttr( pm.Attribute(oNode + param), channelBox = pChannelBox)
-                pm.setAttr( pm.Attribute(oNode + param), lock = pLocked)
-            except:
-                print('{} lock failed on node: {}.'.format(param, oNode))
-                continue
+        # one cmds.setAttr per param, instead of three PyMEL Attributes.
+        failed = props_cmds_lib.lock_params([oNode], pLocked, pChannelBox, pKeyable, pParams)
+        for plug in failed:
+            print('.{} lock failed on node: {}.'.format(plug.rsplit('.', 1)[-1], oNode))
 
 
 def create_rig_joint(jointName='unnamed_sjnt', radius=1.0):
-    pm.select(None)
-    oJoint = pm.joint(n=jointName, r=radius)
+    oJoint = pm.PyNode(props_cmds_lib.create_joints([jointName], radius=radius)[0])
     pm.select(None)
     return oJoint
 
@@ -840,8 +686,7 @@ def hide_all_bones(oColl):
 
 
 def bb_volume(obj):
-    oBB = obj.getBoundingBox()
-    return oBB.width() * oBB.height() * oBB.depth()
+    return float(props_geo_lib.box_volumes(props_geo_lib.get_bounding_boxes([obj]))[0])
 
 
 def group_geometry_masses(geoColl):
@@ -849,53 +694,24 @@ def group_geometry_masses(geoColl):
     If they ARE intersecting, they are grouped together. The groups are then returned.
     eg. A intersects with B. B intersects with A and C. C intersects with B.
     [ABC] is a single group. Even if A and C do not intersect. """
-    oGeoColl = [pm.PyNode(x) for x in geoColl] # initialize as PyNodes.
-    bbGroups = []
-    smallBBs = []
-    for i, each in enumerate(oGeoColl):
-        # slightly shrink the boundingBox to avoid clumping doors which are modelled right beside each other.
-        fullBB = each.getBoundingBox()
-        smallBB = dt.BoundingBox()
-        
-        # next, I only want to scale the 2 longest sides. 2 doors beside each other should shrink.
-        # But a handle that is sitting on the broad side of the door should not.
-        fullScale = [fullBB.width(), fullBB.height(), fullBB.depth()]
-        
-        # get the shortest axis with an integer truth-table. example: [0, 0, 1] means Z is the shortest width
-        shortTrue = [x == min(fullScale) for x in fullScale]
-        # use the truth table as an index to choose whether to use the center or edge
-        for axis in fullBB:
-            comparisonPos = [
-                [fullBB.center()[0], axis[0]][ shortTrue[0] ],
-                [fullBB.center()[1], axis[1]][ shortTrue[1] ],
-                [fullBB.center()[2], axis[2]][ shortTrue[2] ],
-                ]
-            # scale the BB relative to its center point.
-            smallBB.expand(get_midpoint(axis, comparisonPos, 0.03)) # the smaller the number, the less the BB shrinks.
-        smallBBs.append(smallBB)
-        
-    for i, each in enumerate(oGeoColl):
-        group = [x for j, x in enumerate(oGeoColl) if smallBBs[i].intersects(smallBBs[j])]
-        bbGroups.append(group)
-    # iterate over each geo again. Gather each group that it belongs to in one joined group.
-    for each in oGeoColl:
-        # find the index of each group that contains this geo. Reverse the matches so I can pop them safely later.
-        matchingGroups = list(reversed(sorted( [i for i, x in enumerate(bbGroups) if each in x] )))
-        # Create a new list of the matching groups. This clumps all the matching groups together.
-        newList = [bbGroups[i] for i in matchingGroups]
-        # Cycle through the list of lists and then use set() to filter out duplicates.
-        newListUnique = list(set( [item for subitem in newList for item in subitem] ))
-        # Then pop those old groups out of bbGroups, leaving only the clumps.
-        [bbGroups.pop(i) for i in matchingGroups]
-        # The append the clumped group to bbGroups
-        bbGroups.append(newListUnique)
-    return bbGroups
+    # initialize as PyNodes, and skip any geo that was passed twice.
+    oGeoColl = []
+    seen = set()
+    for each in [pm.PyNode(x) for x in geoColl]:
+        if each.longName() not in seen:
+            seen.add(each.longName())
+            oGeoColl.append(each)
+
+    # slightly shrink the boundingBox to avoid clumping doors which are modelled right beside each other.
+    smallBBs = props_geo_lib.shrink_bounding_boxes(props_geo_lib.get_bounding_boxes(oGeoColl), 0.03)
+
+    # sweep-and-prune the boxes and merge every intersecting pair with a union-find.
+    bbGroups = props_geo_lib.cluster_boxes(smallBBs)
+    return [[oGeoColl[i] for i in group] for group in bbGroups]
 
 
 def constrain_geo(oControl, geoColl):
-    for each in geoColl:
-        oCons = pm.parentConstraint(oControl, each, mo=True, n='{}_parentconstraint'.format(each.name()))
-        oCons2 = pm.scaleConstraint(oControl, each, mo=True, n='{}_scaleconstraint'.format(each.name()))
+    props_rig_lib.constrain_geo(oControl, geoColl)
 
 
 def delete_constraints(oColl, filter=None):
@@ -919,47 +735,33 @@ def delete_constraints(oColl, filter=None):
 def place_control_at_bottom(geoColl):
     """ place a control at the ground and in the center of the biggest geo """
     #TODO: If nothing selected, just place a controller at origin?
-    totalBox = dt.BoundingBox()
-    [ totalBox.expand(x.getBoundingBox().min()) for x in geoColl ]
-    [ totalBox.expand(x.getBoundingBox().max()) for x in geoColl ]
-
-    sizeComp = [x.getBoundingBox().width() * x.getBoundingBox().height() * x.getBoundingBox().depth() for x in geoColl]
-    biggestGeo = geoColl[sizeComp.index(max(sizeComp))]
-
-    controlName = 'm__{}__ctrl'.format(biggestGeo.name().split('|')[-1].split('_')[1])
-    oControl = pm.spaceLocator(n=controlName)
-    oPos = biggestGeo.getBoundingBox().center()
-    oPos[1] = totalBox.min()[1] # a float value that defaults to 0.0
-
-    oControl.setTranslation(oPos, space='world')
-    constrain_geo(oControl, geoColl)
-    pm.setAttr(oControl.v, keyable=False, cb=False)
-    oControl.v.lock()
+    geoBoxes = props_geo_lib.get_bounding_boxes(geoColl)
+    totalBB = props_geo_lib.total_bounding_box(geoBoxes)
+    biggestIndex = props_geo_lib.biggest_box_index(geoBoxes)
+    biggestGeo = geoColl[biggestIndex]
+
+    controlName = 'm__{}__ctrl'.format(props_naming_lib.control_base(biggestGeo))
+    oPos = props_geo_lib.box_centers(geoBoxes[biggestIndex]).tolist()
+    oPos[1] = float(totalBB[1]) # a float value that defaults to 0.0
+
+    oControl = props_rig_lib.place_geo_control(controlName, oPos, geoColl)
     pm.select(oControl)
 
 
 @undo
 def place_control_in_bb_center(geoColl, useBiggest=False):
     """ place a control in the center of the geo. Or use the biggest geometry """
-    totalBox = dt.BoundingBox()
-    [ totalBox.expand(x.getBoundingBox().min()) for x in geoColl ]
-    [ totalBox.expand(x.getBoundingBox().max()) for x in geoColl ]
-    
-    sizeComp = [
-            x.getBoundingBox().width() * x.getBoundingBox().height() * x.getBoundingBox().depth()
-            for x in geoColl
-            ]
-    biggestGeo = geoColl[sizeComp.index(max(sizeComp))]
+    geoBoxes = props_geo_lib.get_bounding_boxes(geoColl)
+    totalBB = props_geo_lib.total_bounding_box(geoBoxes)
+    biggestIndex = props_geo_lib.biggest_box_index(geoBoxes)
+    biggestGeo = geoColl[biggestIndex]
 
-    oControl = pm.spaceLocator(n='m_{}'.format(biggestGeo.name().replace('_geo','_ctl')))
+    controlName = 'm_{}'.format(biggestGeo.name().replace('_geo','_ctl'))
     if useBiggest:
-        oPos = biggestGeo.getBoundingBox().center()
+        oPos = props_geo_lib.box_centers(geoBoxes[biggestIndex]).tolist()
     else:
-        oPos = totalBox.center()
-    oControl.setTranslation(oPos, space='world')
-    constrain_geo(oControl, geoColl)
-    pm.setAttr(oControl.v, keyable=False, cb=False)
-    oControl.v.lock()
+        oPos = props_geo_lib.box_centers(totalBB).tolist()
+    oControl = props_rig_lib.place_geo_control(controlName, oPos, geoColl)
     pm.select(oControl)
 
 
@@ -971,12 +773,7 @@ def reorder_collection(oColl):
 
 @undo
 def chain_parent(oColl):
-    for oParent, oChild in zip(oColl[0:-1], oColl[1:]):
-        try:
-            pm.parent(oChild, None)
-            pm.parent(oChild, oParent)
-        except:
-            continue
+    props_cmds_lib.chain_parent(oColl)
     pm.select(oColl) # restore original selection
 
 
@@ -1031,32 +828,32 @@ def cEasing(bx, by, cx, cy, density=10, direction='up'):
 
 
 def swap_shape(oParent, oChild):
-    shapeName = oParent.getShape().name()
-    shapeColor = oParent.getShape().overrideColor.get()
-    oChild.getShape().overrideEnabled.set(True)
-    oChild.getShape().overrideColor.set(shapeColor)
-    pm.delete(oParent.getShapes())
-    if oChild.getParent() != oParent:
-        pm.parent(oChild, oParent)
-    pm.makeIdentity(oChild, apply=True, t=1, r=1, s=1)
-    pm.parent(oChild.getShape(), oParent, shape=True, relative=True)
-    pm.delete(oChild)
-
-
-# Development workaround for PySide winEvent error (Maya 2014)
-# Make sure the UI is deleted before recreating
-try:
-    props_tools_ui
-    props_tools_ui.deleteLater()
-except NameError:
-    pass
+    props_icon_lib.swap_shape(oParent, oChild)
 
-# Create UI object
-props_tools_ui = PropRiggingTools()
-# Delete the UI if errors occur to avoid causing winEvent and event errors
-try:
-    props_tools_ui.create()
-    props_tools_ui.show()
-except:
-    props_tools_ui.deleteLater()
-    traceback.print_exc()
+
+# kept through reload(), so show() can still close the dialog that is open.
+props_tools_ui = globals().get('props_tools_ui')
+
+
+def show():
+    """Open the Prop Rigging Tools. Importing this module doesn't, so use show() or props_launcher."""
+    global props_tools_ui
+    # Development workaround for PySide winEvent error (Maya 2014)
+    # Make sure the UI is deleted before recreating
+    if props_tools_ui is not None:
+        props_tools_ui.deleteLater()
+
+    # Create UI object
+    props_tools_ui = PropRiggingTools()
+    # Delete the UI if errors occur to avoid causing winEvent and event errors
+    try:
+        props_tools_ui.create()
+        props_tools_ui.show()
+    except:
+        props_tools_ui.deleteLater()
+        traceback.print_exc()
+    return props_tools_ui
+
+
+if __name__ == '__main__':
+    show()
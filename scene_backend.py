@@ -0,0 +1,652 @@
+#!/usr/bin/env mayapy
+# encoding: utf-8
+"""
+A pluggable scene backend, so a build can be run without talking to pymel.core directly.
+
+CmdsBackend passes everything through to maya.cmds.
+MemoryBackend is a pure python DAG that implements the same small subset of commands
+(group, spaceLocator, curve, createNode, connectAttr, parent, attributes, shape instances,
+display layers and bounding boxes).
+
+These build through the backend, so they can be run, benchmarked and have their node counts
+checked on a plain Linux box, without a Maya license:
+    - the controls of props_icon_lib: create_control_icons() and make_unique_shapes()
+    - the base prop rig of props_rig_lib, which props_tools.build_base_rig() calls
+    - build_plan.execute_plan(), and so the rigs that emit BuildPlans
+    - the guide and constraint groups of car_autorig.build_guide() and build_rig()
+
+The API is cmds-style: nodes are passed around as name strings, and plugs as 'node.attr'.
+wrap() turns a name into what the builders hand back: a PyNode in Maya, the name itself in a MemoryBackend.
+
+    import scene_backend
+    with scene_backend.use_backend(scene_backend.MemoryBackend()) as scene:
+        build_something()
+        print(scene.node_count('transform'))
+"""
+
+import collections
+import contextlib
+import math
+
+import numpy as np
+
+try:
+    import maya.cmds as cmds
+except ImportError:
+    cmds = None
+
+
+class CmdsBackend(object):
+    """The real scene. A thin layer over maya.cmds."""
+
+    def wrap(self, node):
+        # PyMEL is only imported when a builder hands a node back, not with this module.
+        import pymel.core as pm
+        return pm.PyNode(node)
+
+    def createNode(self, nodeType, name=None, parent=None):
+        kwargs = {}
+        if name:
+            kwargs['name'] = name
+        if parent:
+            kwargs['parent'] = parent
+        return cmds.createNode(nodeType, **kwargs)
+
+    def group(self, *nodes, **kwargs):
+        groupArgs = {}
+        if kwargs.get('name'):
+            groupArgs['name'] = kwargs['name']
+        if kwargs.get('parent'):
+            groupArgs['parent'] = kwargs['parent']
+        if not nodes:
+            groupArgs['empty'] = True
+        return cmds.group(*nodes, **groupArgs)
+
+    def spaceLocator(self, name=None):
+        if name:
+            return cmds.spaceLocator(name=name)[0]
+        return cmds.spaceLocator()[0]
+
+    def curve(self, points, degree=1, name=None, periodic=False):
+        points = [tuple(p) for p in points]
+        kwargs = {'degree': degree}
+        if name:
+            kwargs['name'] = name
+        if periodic:
+            # a periodic curve repeats its first "degree" points, and needs its knots spelled out.
+            points = points + points[:degree]
+            kwargs['periodic'] = True
+            kwargs['knot'] = list(range(-(degree - 1), len(points)))
+        return cmds.curve(point=points, **kwargs)
+
+    def connectAttr(self, source, destination, force=False):
+        cmds.connectAttr(source, destination, force=force)
+
+    def parent(self, node, parentName=None, shape=False, add=False):
+        """node can be a list, parented in one call. Returns the new name, or a list of them for a list.
+        shape moves a shape under parentName, and add instances it there instead.
+        """
+        kwargs = {}
+        if shape:
+            kwargs['shape'] = True
+            kwargs['add' if add else 'relative'] = True
+        if parentName is None:
+            result = cmds.parent(node, world=True, **kwargs)
+        else:
+            result = cmds.parent(node, parentName, **kwargs)
+        return result if isinstance(node, (list, tuple)) else result[0]
+
+    def uninstanceShape(self, shape, parentName):
+        """Give parentName its own copy of a shape that is instanced under more than one parent. Returns the copy."""
+        shortName = shape.split('|')[-1]
+        oShape = cmds.createNode('nurbsCurve', name=parentName.split('|')[-1] + 'Shape', parent=parentName)
+        # copy the curve data across, then let it go.
+        cmds.connectAttr(shape + '.local', oShape + '.create')
+        cmds.dgeval(oShape + '.local')
+        cmds.disconnectAttr(shape + '.local', oShape + '.create')
+        for attr in ['overrideEnabled', 'overrideColor']:
+            cmds.setAttr('{}.{}'.format(oShape, attr), cmds.getAttr('{}.{}'.format(shape, attr)))
+        cmds.parent('{}|{}'.format(cmds.ls(parentName, long=True)[0], shortName), removeObject=True, shape=True)
+        return oShape
+
+    def addAttr(self, node, attrName, attrType='double', defaultValue=0.0, keyable=True):
+        if attrType == 'string':
+            cmds.addAttr(node, longName=attrName, dataType='string')
+        else:
+            cmds.addAttr(node, longName=attrName, attributeType=attrType, defaultValue=defaultValue, keyable=keyable)
+
+    def setAttr(self, plug, value):
+        if isinstance(value, str):
+            cmds.setAttr(plug, value, type='string')
+        elif isinstance(value, (list, tuple)):
+            cmds.setAttr(plug, *value)
+        else:
+            cmds.setAttr(plug, value)
+
+    def setAttrs(self, attrValues):
+        """Set a list of (plug, value) in as few setAttr calls as possible. See merge_attr_values()."""
+        for plug, value in merge_attr_values(attrValues):
+            self.setAttr(plug, value)
+
+    def getAttr(self, plug):
+        value = cmds.getAttr(plug)
+        # compound attributes come back as [(x, y, z)]
+        if isinstance(value, list) and len(value) == 1 and isinstance(value[0], tuple):
+            return value[0]
+        return value
+
+    def constrain(self, constraintType, driver, driven, name=None, maintainOffset=True, skip=None):
+        """skip is the axes a point, orient or scale constraint leaves alone. eg. ['y', 'z']"""
+        kwargs = {'maintainOffset': maintainOffset}
+        if name:
+            kwargs['name'] = name
+        if skip:
+            kwargs['skip'] = list(skip)
+        return getattr(cmds, constraintType)(driver, driven, **kwargs)[0]
+
+    def xform(self, node, translation=None, rotation=None):
+        """Place a transform in world space."""
+        if translation is not None:
+            cmds.xform(node, worldSpace=True, translation=list(translation))
+        if rotation is not None:
+            cmds.xform(node, worldSpace=True, rotation=list(rotation))
+
+    def lockAttr(self, plug, locked=True, keyable=False, channelBox=False):
+        cmds.setAttr(plug, keyable=keyable, channelBox=channelBox, lock=locked)
+
+    def worldTranslation(self, node):
+        return cmds.xform(node, q=True, worldSpace=True, translation=True)
+
+    def matchTransform(self, node, target):
+        """Move and rotate node onto target in world space."""
+        cmds.matchTransform(node, target, position=True, rotation=True)
+
+    def exactWorldBoundingBox(self, node):
+        return cmds.exactWorldBoundingBox(node)
+
+    def objectBoundingBox(self, node):
+        """The bounding box of node, in its own space, like PyMEL's getBoundingBox()."""
+        return cmds.xform(node, q=True, boundingBox=True, objectSpace=True)
+
+    def displayLayer(self, name, nodes=None, color=None):
+        """A display layer holding nodes, and nothing below them."""
+        if nodes:
+            oLayer = cmds.createDisplayLayer(nodes, name=name, number=1, noRecurse=True)
+        else:
+            # with no nodes, createDisplayLayer would take the selection.
+            oLayer = cmds.createDisplayLayer(name=name, number=1, empty=True)
+        if color is not None:
+            cmds.setAttr(oLayer + '.color', color)
+        return oLayer
+
+    def delete(self, node):
+        cmds.delete(node)
+
+    def objExists(self, node):
+        return cmds.objExists(node)
+
+    def rename(self, node, newName):
+        return cmds.rename(node, newName)
+
+    def nodeType(self, node):
+        return cmds.nodeType(node)
+
+    def ls(self, nodeType=None):
+        if nodeType:
+            return cmds.ls(type=nodeType) or []
+        return cmds.ls() or []
+
+    def listRelatives(self, node, shapes=False, parent=False, allParents=False):
+        """Full paths, so a shape or instance is never ambiguous."""
+        if allParents:
+            return cmds.listRelatives(node, allParents=True, fullPath=True) or []
+        if parent:
+            return cmds.listRelatives(node, parent=True, fullPath=True) or []
+        if shapes:
+            return cmds.listRelatives(node, shapes=True, fullPath=True) or []
+        return cmds.listRelatives(node, children=True, fullPath=True) or []
+
+    def node_count(self, nodeType=None):
+        return len(self.ls(nodeType))
+
+
+class _MemoryNode(object):
+    """One node of the MemoryBackend DAG."""
+
+    def __init__(self, name, nodeType, parent=None):
+        self.name = name
+        self.nodeType = nodeType
+        self.parent = parent
+        self.children = []
+        # the other parents of a shape that is instanced under more than one transform.
+        self.instanceParents = []
+        self.attrs = {}
+        self.locked = set()
+        # only nurbsCurve shapes use this. An (N, 3) array of local CV positions.
+        self.points = None
+
+
+class MemoryBackend(object):
+    """A pure python scene. Good enough to run the builders and count what they make.
+    It doesn't evaluate anything: a connected plug just reads the value of its source plug.
+    Node names are kept unique across the whole scene, instead of per parent like Maya.
+    It doesn't know the built-in attributes of every node type, so setting one it hasn't seen adds it.
+    Reading an attribute that was never added or set is still an error.
+    """
+    # the node types that live under a transform, like Maya shapes do.
+    SHAPE_TYPES = ('nurbsCurve', 'locator', 'mesh', 'nurbsSurface')
+    # the node types that get translate, rotate and scale.
+    DAG_TYPES = ('transform', 'joint')
+    CONSTRAINT_TYPES = ('parentConstraint', 'scaleConstraint', 'pointConstraint', 'orientConstraint', 'aimConstraint')
+    ATTR_ALIASES = {
+        't': 'translate', 'r': 'rotate', 's': 'scale', 'v': 'visibility',
+        'tx': 'translateX', 'ty': 'translateY', 'tz': 'translateZ',
+        'rx': 'rotateX', 'ry': 'rotateY', 'rz': 'rotateZ',
+        'sx': 'scaleX', 'sy': 'scaleY', 'sz': 'scaleZ',
+        }
+    COMPOUND_ATTRS = ('translate', 'rotate', 'scale')
+
+    def __init__(self):
+        self.nodes = {}
+        # destination plug: source plug
+        self.connections = {}
+
+    def _unique_name(self, name):
+        if name not in self.nodes:
+            return name
+        base = name.rstrip('0123456789')
+        i = 1
+        while '{}{}'.format(base, i) in self.nodes:
+            i += 1
+        return '{}{}'.format(base, i)
+
+    def _node(self, node):
+        try:
+            return self.nodes[node]
+        except KeyError:
+            raise ValueError('No object matches name: {}'.format(node))
+
+    def _split_plug(self, plug):
+        node, attr = plug.split('.', 1)
+        return self._node(node), self.ATTR_ALIASES.get(attr, attr)
+
+    def _add_node(self, nodeType, name, parent=None):
+        oNode = _MemoryNode(self._unique_name(name or '{}1'.format(nodeType)), nodeType)
+        self.nodes[oNode.name] = oNode
+        if nodeType in self.DAG_TYPES:
+            for compound, default in zip(self.COMPOUND_ATTRS, (0.0, 0.0, 1.0)):
+                for axis in 'XYZ':
+                    oNode.attrs[compound + axis] = default
+            oNode.attrs['visibility'] = True
+        if nodeType in self.SHAPE_TYPES:
+            oNode.attrs['overrideEnabled'] = False
+            oNode.attrs['overrideColor'] = 0
+        if parent:
+            self._reparent(oNode, self._node(parent))
+        return oNode
+
+    def _reparent(self, oNode, oParent):
+        if oNode.parent:
+            oNode.parent.children.remove(oNode)
+        oNode.parent = oParent
+        if oParent:
+            oParent.children.append(oNode)
+
+    def createNode(self, nodeType, name=None, parent=None):
+        if nodeType in self.SHAPE_TYPES and not parent:
+            # like Maya, a shape with no parent gets a transform made for it.
+            oTransform = self._add_node('transform', self._unique_name('transform1'))
+            parent = oTransform.name
+        return self._add_node(nodeType, name, parent).name
+
+    def group(self, *nodes, **kwargs):
+        oGroup = self._add_node('transform', kwargs.get('name') or 'group1', kwargs.get('parent'))
+        for each in nodes:
+            self._reparent(self._node(each), oGroup)
+        return oGroup.name
+
+    def spaceLocator(self, name=None):
+        oTransform = self._add_node('transform', name or 'locator1')
+        self._add_node('locator', oTransform.name + 'Shape', oTransform.name)
+        return oTransform.name
+
+    def curve(self, points, degree=1, name=None, periodic=False):
+        oTransform = self._add_node('transform', name or 'curve1')
+        oShape = self._add_node('nurbsCurve', oTransform.name + 'Shape', oTransform.name)
+        oShape.points = np.asarray(points, dtype=float).reshape(-1, 3)
+        oShape.attrs['degree'] = degree
+        oShape.attrs['form'] = 2 if periodic else 0
+        return oTransform.name
+
+    def connectAttr(self, source, destination, force=False):
+        self._split_plug(source)
+        self._split_plug(destination)
+        if destination in self.connections and not force:
+            raise RuntimeError('{} is already connected.'.format(destination))
+        self.connections[destination] = source
+
+    def wrap(self, node):
+        return node
+
+    def parent(self, node, parentName=None, shape=False, add=False):
+        """node can be a list. Returns the node, or the list. add instances a shape under parentName."""
+        if isinstance(node, (list, tuple)):
+            return [self._parent_node(x, parentName, add) for x in node]
+        return self._parent_node(node, parentName, add)
+
+    def _parent_node(self, node, parentName, add):
+        oNode = self._node(node)
+        oParent = self._node(parentName) if parentName else None
+        if add:
+            if oNode.nodeType not in self.SHAPE_TYPES:
+                raise RuntimeError('Only shapes can be instanced: {}'.format(node))
+            oParent.children.append(oNode)
+            oNode.instanceParents.append(oParent)
+            return node
+        # like Maya, a transform keeps its place in the world when it changes parents.
+        worldMatrix = self.world_matrix(node)
+        self._reparent(oNode, oParent)
+        if oNode.nodeType in self.DAG_TYPES:
+            self._set_world_matrix(oNode, worldMatrix)
+        return node
+
+    def uninstanceShape(self, shape, parentName):
+        """Give parentName its own copy of a shape that is instanced under more than one parent. Returns the copy."""
+        oShape = self._node(shape)
+        oParent = self._node(parentName)
+        oCopy = self._add_node(oShape.nodeType, parentName + 'Shape', parentName)
+        oCopy.attrs.update(oShape.attrs)
+        oCopy.points = None if oShape.points is None else oShape.points.copy()
+        self._remove_instance(oShape, oParent)
+        return oCopy.name
+
+    def _remove_instance(self, oShape, oParent):
+        """Take one parent away from an instanced shape, keeping it under the others."""
+        oParent.children.remove(oShape)
+        if oShape.parent is oParent:
+            oShape.parent = oShape.instanceParents.pop(0)
+        else:
+            oShape.instanceParents.remove(oParent)
+
+    def addAttr(self, node, attrName, attrType='double', defaultValue=0.0, keyable=True):
+        oNode = self._node(node)
+        if attrName in oNode.attrs:
+            raise RuntimeError('Found more than one attribute named {}.{}'.format(node, attrName))
+        if attrType == 'string':
+            defaultValue = ''
+        elif attrType == 'bool':
+            defaultValue = bool(defaultValue)
+        oNode.attrs[attrName] = defaultValue
+
+    def setAttr(self, plug, value):
+        oNode, attr = self._split_plug(plug)
+        if attr in self.COMPOUND_ATTRS:
+            for axis, each in zip('XYZ', value):
+                self.setAttr('{}.{}{}'.format(oNode.name, attr, axis), float(each))
+            return
+        if attr in oNode.locked:
+            raise RuntimeError('The attribute \'{}\' is locked or connected and cannot be modified.'.format(plug))
+        oNode.attrs[attr] = value
+
+    def setAttrs(self, attrValues):
+        for plug, value in merge_attr_values(attrValues):
+            self.setAttr(plug, value)
+
+    def getAttr(self, plug):
+        if plug in self.connections:
+            return self.getAttr(self.connections[plug])
+        oNode, attr = self._split_plug(plug)
+        if attr in self.COMPOUND_ATTRS:
+            return tuple(self.getAttr('{}.{}{}'.format(oNode.name, attr, axis)) for axis in 'XYZ')
+        if attr not in oNode.attrs:
+            raise ValueError('No attribute named {}'.format(plug))
+        return oNode.attrs[attr]
+
+    def constrain(self, constraintType, driver, driven, name=None, maintainOffset=True, skip=None):
+        """Only records the constraint. Like Maya, the constraint node is parented under the driven node."""
+        if constraintType not in self.CONSTRAINT_TYPES:
+            raise ValueError('Unknown constraint type: {}'.format(constraintType))
+        self._node(driver)
+        oCons = self._add_node(constraintType, name or '{}_{}1'.format(driven, constraintType), driven)
+        # constraints are transforms in Maya too, so they can be moved around.
+        for compound, default in zip(self.COMPOUND_ATTRS, (0.0, 0.0, 1.0)):
+            for axis in 'XYZ':
+                oCons.attrs[compound + axis] = default
+        oCons.attrs['target'] = driver
+        oCons.attrs['maintainOffset'] = maintainOffset
+        oCons.attrs['skip'] = list(skip or [])
+        return oCons.name
+
+    def xform(self, node, translation=None, rotation=None):
+        """Place a transform in world space, by working out the local values under its parent."""
+        oNode = self._node(node)
+        parentMatrix = self.world_matrix(oNode.parent.name) if oNode.parent else np.identity(4)
+        if translation is not None:
+            worldPoint = np.append(np.asarray(translation, dtype=float), 1.0)
+            self.setAttr(node + '.translate', worldPoint.dot(np.linalg.inv(parentMatrix))[:3].tolist())
+        if rotation is not None:
+            # build the world rotation matrix, then take the parent's rotation back out. Scale is ignored.
+            self.setAttr(node + '.rotate', rotation)
+            worldRotation = _normalize_rows(self._local_matrix(oNode)[:3, :3])
+            parentRotation = _normalize_rows(parentMatrix[:3, :3])
+            self.setAttr(node + '.rotate', _euler_xyz(worldRotation.dot(parentRotation.T)))
+
+    def lockAttr(self, plug, locked=True, keyable=False, channelBox=False):
+        oNode, attr = self._split_plug(plug)
+        if attr not in oNode.attrs:
+            raise ValueError('No attribute named {}'.format(plug))
+        if locked:
+            oNode.locked.add(attr)
+        else:
+            oNode.locked.discard(attr)
+
+    def _local_matrix(self, oNode):
+        """The 4x4 row-vector matrix of a transform. Rotate order is always XYZ."""
+        if 'translateX' not in oNode.attrs:
+            return np.identity(4)
+        t = self.getAttr(oNode.name + '.translate')
+        rx, ry, rz = [math.radians(x) for x in self.getAttr(oNode.name + '.rotate')]
+        s = self.getAttr(oNode.name + '.scale')
+        rotX = np.array([[1, 0, 0], [0, math.cos(rx), math.sin(rx)], [0, -math.sin(rx), math.cos(rx)]])
+        rotY = np.array([[math.cos(ry), 0, -math.sin(ry)], [0, 1, 0], [math.sin(ry), 0, math.cos(ry)]])
+        rotZ = np.array([[math.cos(rz), math.sin(rz), 0], [-math.sin(rz), math.cos(rz), 0], [0, 0, 1]])
+        matrix = np.identity(4)
+        matrix[:3, :3] = np.diag(s).dot(rotX).dot(rotY).dot(rotZ)
+        matrix[3, :3] = t
+        return matrix
+
+    def world_matrix(self, node):
+        oNode = self._node(node)
+        matrix = np.identity(4)
+        while oNode:
+            matrix = matrix.dot(self._local_matrix(oNode))
+            oNode = oNode.parent
+        return matrix
+
+    def _shape_points(self, oShape):
+        if oShape.nodeType == 'nurbsCurve' and oShape.points is not None:
+            return oShape.points
+        if oShape.nodeType == 'locator':
+            return np.array([[-1.0, -1.0, -1.0], [1.0, 1.0, 1.0]])
+        return np.zeros((0, 3))
+
+    def _set_world_matrix(self, oNode, worldMatrix):
+        """Set the translate, rotate and scale of a transform so it ends up at worldMatrix. Shear is dropped."""
+        parentMatrix = self.world_matrix(oNode.parent.name) if oNode.parent else np.identity(4)
+        localMatrix = worldMatrix.dot(np.linalg.inv(parentMatrix))
+        self.setAttr(oNode.name + '.translate', localMatrix[3, :3].tolist())
+        self.setAttr(oNode.name + '.rotate', _euler_xyz(_normalize_rows(localMatrix[:3, :3])))
+        self.setAttr(oNode.name + '.scale', np.linalg.norm(localMatrix[:3, :3], axis=1).tolist())
+
+    def worldTranslation(self, node):
+        return self.world_matrix(node)[3, :3].tolist()
+
+    def matchTransform(self, node, target):
+        """Move and rotate node onto target in world space. Its world scale becomes 1."""
+        targetMatrix = self.world_matrix(target)
+        worldMatrix = np.identity(4)
+        worldMatrix[:3, :3] = _normalize_rows(targetMatrix[:3, :3])
+        worldMatrix[3, :3] = targetMatrix[3, :3]
+        self._set_world_matrix(self._node(node), worldMatrix)
+
+    def _bounding_box(self, node, spaceMatrix):
+        """[minX, minY, minZ, maxX, maxY, maxZ] of every shape below node, after its world matrix and spaceMatrix."""
+        boxPoints = []
+        stack = [self._node(node)]
+        while stack:
+            oNode = stack.pop()
+            stack.extend(oNode.children)
+            points = self._shape_points(oNode)
+            if len(points):
+                homogeneous = np.hstack([points, np.ones((len(points), 1))])
+                boxPoints.append(homogeneous.dot(self.world_matrix(oNode.name)).dot(spaceMatrix)[:, :3])
+        if not boxPoints:
+            return [0.0] * 6
+        boxPoints = np.vstack(boxPoints)
+        return boxPoints.min(axis=0).tolist() + boxPoints.max(axis=0).tolist()
+
+    def exactWorldBoundingBox(self, node):
+        """Like cmds.exactWorldBoundingBox(), [minX, minY, minZ, maxX, maxY, maxZ] of everything below node."""
+        return self._bounding_box(node, np.identity(4))
+
+    def objectBoundingBox(self, node):
+        """The bounding box of everything below node, in the space of node."""
+        return self._bounding_box(node, np.linalg.inv(self.world_matrix(node)))
+
+    def displayLayer(self, name, nodes=None, color=None):
+        """Only records the members. The layer doesn't hide or color anything."""
+        oLayer = self._add_node('displayLayer', name)
+        oLayer.attrs['members'] = [self._node(x).name for x in nodes or []]
+        oLayer.attrs['color'] = 0 if color is None else color
+        return oLayer.name
+
+    def delete(self, node):
+        """node can be a list."""
+        if isinstance(node, (list, tuple)):
+            for each in node:
+                self.delete(each)
+            return
+        oNode = self._node(node)
+        for child in list(oNode.children):
+            if child.instanceParents:
+                # an instanced shape stays under its other parents.
+                self._remove_instance(child, oNode)
+            else:
+                self.delete(child.name)
+        self._reparent(oNode, None)
+        del self.nodes[oNode.name]
+        # deleting a node breaks every connection to or from it.
+        prefix = oNode.name + '.'
+        for destination, source in list(self.connections.items()):
+            if destination.startswith(prefix) or source.startswith(prefix):
+                del self.connections[destination]
+
+    def objExists(self, node):
+        return node in self.nodes
+
+    def rename(self, node, newName):
+        oNode = self._node(node)
+        del self.nodes[oNode.name]
+        oNode.name = self._unique_name(newName)
+        self.nodes[oNode.name] = oNode
+        oldPrefix = node + '.'
+        for destination, source in list(self.connections.items()):
+            if destination.startswith(oldPrefix) or source.startswith(oldPrefix):
+                del self.connections[destination]
+                if destination.startswith(oldPrefix):
+                    destination = oNode.name + destination[len(node):]
+                if source.startswith(oldPrefix):
+                    source = oNode.name + source[len(node):]
+                self.connections[destination] = source
+        return oNode.name
+
+    def nodeType(self, node):
+        return self._node(node).nodeType
+
+    def ls(self, nodeType=None):
+        return [name for name, oNode in self.nodes.items() if nodeType in (None, oNode.nodeType)]
+
+    def listRelatives(self, node, shapes=False, parent=False, allParents=False):
+        oNode = self._node(node)
+        if allParents:
+            return [x.name for x in [oNode.parent] + oNode.instanceParents if x]
+        if parent:
+            return [oNode.parent.name] if oNode.parent else []
+        if shapes:
+            return [x.name for x in oNode.children if x.nodeType in self.SHAPE_TYPES]
+        return [x.name for x in oNode.children]
+
+    def node_count(self, nodeType=None):
+        return len(self.ls(nodeType))
+
+
+def merge_attr_values(attrValues):
+    """Merge a list of (plug, value) into the fewest setAttrs. The last value of a plug wins,
+    and the X, Y and Z of a translate, rotate or scale on one node become one compound value.
+    Returns a list of (plug, value), in the order each plug was first set.
+    """
+    values = collections.OrderedDict()
+    for plug, value in attrValues:
+        node, attr = plug.split('.', 1)
+        values[(node, MemoryBackend.ATTR_ALIASES.get(attr, attr))] = value
+
+    merged = []
+    done = set()
+    for (node, attr), value in values.items():
+        if (node, attr) in done:
+            continue
+        compound = attr[:-1]
+        if compound in MemoryBackend.COMPOUND_ATTRS and attr[-1] in 'XYZ':
+            axes = [(node, compound + axis) for axis in 'XYZ']
+            if all([x in values for x in axes]):
+                merged.append(('{}.{}'.format(node, compound), [values[x] for x in axes]))
+                done.update(axes)
+                continue
+        merged.append(('{}.{}'.format(node, attr), value))
+    return merged
+
+
+def _normalize_rows(matrix):
+    return matrix / np.linalg.norm(matrix, axis=1)[:, np.newaxis]
+
+
+def _euler_xyz(rotation):
+    """Decompose a 3x3 row-vector rotation matrix into XYZ rotate order euler angles, in degrees."""
+    sinY = max(-1.0, min(1.0, -rotation[0, 2]))
+    if abs(sinY) < 0.999999:
+        rx = math.atan2(rotation[1, 2], rotation[2, 2])
+        rz = math.atan2(rotation[0, 1], rotation[0, 0])
+    else:
+        # gimbal lock. Put all of the rotation into X.
+        rx = math.atan2(-rotation[2, 1], rotation[1, 1])
+        rz = 0.0
+    return tuple(math.degrees(x) for x in (rx, math.asin(sinY), rz))
+
+
+_backend = None
+
+
+def get_backend():
+    """The current scene backend. Defaults to the real scene in Maya, and a MemoryBackend outside of it."""
+    global _backend
+    if _backend is None:
+        _backend = CmdsBackend() if cmds else MemoryBackend()
+    return _backend
+
+
+def set_backend(backend):
+    """Swap the scene backend. Returns the previous one. None goes back to the default."""
+    global _backend
+    previous = _backend
+    _backend = backend
+    return previous
+
+
+@contextlib.contextmanager
+def use_backend(backend):
+    """Run a block of code against a different backend, and put the old one back afterwards."""
+    previous = set_backend(backend)
+    try:
+        yield backend
+    finally:
+        set_backend(previous)
@@ -0,0 +1,188 @@
+#!/usr/bin/env mayapy
+# encoding: utf-8
+"""
+A snapshot of the rig guides in the scene, read in one pass.
+
+Finding guides used to mean an ls, then an objExists and a getAttr per guide, per attribute,
+every time the UI refreshed. A snapshot reads the name, node type, parent and every gid_* and meta_*
+string attribute of every guide at once through OpenMaya, and indexes them in memory.
+
+    snapshot = scene_snapshot.get_snapshot()
+    for guide in snapshot.by_type('wheel'):
+        print(guide.name, guide.get('gid_side'), guide.get('gid_front_side'))
+
+A snapshot is a copy. It doesn't notice guides being added or deleted afterwards.
+Inside a snapshot_scope() block, get_snapshot() reads the scene once and reuses it,
+so one UI action or one build only pays for it once:
+
+    with scene_snapshot.snapshot_scope():
+        build_rig()
+"""
+
+import contextlib
+
+try:
+    import maya.cmds as cmds
+    import maya.api.OpenMaya as om2
+except ImportError:
+    cmds = None
+    om2 = None
+
+GUIDE_PATTERN = '*__gid__'
+ATTR_PREFIXES = ('gid_', 'meta_')
+
+# one slot per open snapshot_scope(). None until something asks for the snapshot.
+_scopes = []
+
+
+class GuideRecord(object):
+    """What the snapshot knows about one guide node. attrs holds its gid_* and meta_* strings."""
+
+    def __init__(self, name, longName, nodeType, parent, uuid, attrs):
+        self.name = name
+        self.longName = longName
+        self.nodeType = nodeType
+        self.parent = parent
+        self.uuid = uuid
+        self.attrs = attrs
+
+    def __repr__(self):
+        return 'GuideRecord({!r})'.format(self.name)
+
+    def get(self, attrName, default=None):
+        return self.attrs.get(attrName, default)
+
+    @property
+    def gid_type(self):
+        return self.attrs.get('gid_type')
+
+    @property
+    def side(self):
+        return self.attrs.get('gid_side')
+
+    @property
+    def front_side(self):
+        return self.attrs.get('gid_front_side')
+
+    @property
+    def basename(self):
+        return self.attrs.get('gid_basename')
+
+
+def _string_attributes(fnNode, prefixes):
+    """Every dynamic string attribute of the node that starts with one of prefixes, as {name: value}.
+    Dynamic attributes come after the node type's own attributes, so read backwards and stop at the first static one.
+    """
+    attrs = {}
+    for i in range(fnNode.attributeCount() - 1, -1, -1):
+        oAttr = fnNode.attribute(i)
+        fnAttr = om2.MFnAttribute(oAttr)
+        if not fnAttr.dynamic:
+            break
+        if not fnAttr.name.startswith(prefixes) or not oAttr.hasFn(om2.MFn.kTypedAttribute):
+            continue
+        if om2.MFnTypedAttribute(oAttr).attrType() != om2.MFnData.kString:
+            continue
+        attrs[fnAttr.name] = fnNode.findPlug(oAttr, False).asString()
+    return attrs
+
+
+def read_guides(pattern=GUIDE_PATTERN, prefixes=ATTR_PREFIXES):
+    """Read every transform matching pattern that has a gid_type attribute. Returns a list of GuideRecords, in ls order."""
+    names = cmds.ls(pattern, type='transform', long=True) or []
+    if not names:
+        return []
+    selList = om2.MSelectionList()
+    for each in names:
+        selList.add(each)
+
+    guides = []
+    for i in range(selList.length()):
+        dagPath = selList.getDagPath(i)
+        fnDag = om2.MFnDagNode(dagPath)
+        attrs = _string_attributes(fnDag, prefixes)
+        if 'gid_type' not in attrs:
+            continue
+        parentObj = fnDag.parent(0)
+        parent = None
+        if not parentObj.hasFn(om2.MFn.kWorld):
+            parent = om2.MFnDagNode(parentObj).fullPathName()
+        guides.append(GuideRecord(
+                dagPath.partialPathName(), dagPath.fullPathName(), fnDag.typeName,
+                parent, fnDag.uuid().asString(), attrs))
+    return guides
+
+
+class SceneSnapshot(object):
+    """The guides of the scene, indexed by guide type, side, front/back and basename.
+    Every lookup returns a list in scene order, and an empty list when nothing matches.
+    """
+
+    def __init__(self, guides):
+        self.guides = list(guides)
+        self._names = {}
+        self._indexes = {'gid_type': {}, 'gid_side': {}, 'gid_front_side': {}, 'gid_basename': {}}
+        for guide in self.guides:
+            self._names[guide.name] = guide
+            self._names[guide.longName] = guide
+            for attrName, index in self._indexes.items():
+                index.setdefault(guide.get(attrName), []).append(guide)
+
+    @classmethod
+    def from_scene(cls, pattern=GUIDE_PATTERN):
+        return cls(read_guides(pattern))
+
+    def __len__(self):
+        return len(self.guides)
+
+    def __iter__(self):
+        return iter(self.guides)
+
+    def guide(self, name):
+        """The GuideRecord of a short or long node name, or None."""
+        return self._names.get(str(name))
+
+    def by_type(self, gidType):
+        return list(self._indexes['gid_type'].get(gidType, []))
+
+    def by_side(self, side):
+        return list(self._indexes['gid_side'].get(side, []))
+
+    def by_front_side(self, frontSide):
+        return list(self._indexes['gid_front_side'].get(frontSide, []))
+
+    def by_basename(self, basename):
+        return list(self._indexes['gid_basename'].get(basename, []))
+
+    def find(self, **attrs):
+        """Guides matching every gid attribute given. eg. find(gid_type='wheel', gid_side='l')"""
+        return [x for x in self.guides if all(x.get(key) == value for key, value in attrs.items())]
+
+    def grouped(self, gidTypes):
+        """{ gidType: [GuideRecord, ...] } for each of gidTypes."""
+        return { gidType: self.by_type(gidType) for gidType in gidTypes }
+
+
+def get_snapshot():
+    """Inside a snapshot_scope(), the scope's snapshot, read on first use. Otherwise a fresh one."""
+    if not _scopes:
+        return SceneSnapshot.from_scene()
+    if _scopes[-1] is None:
+        _scopes[-1] = SceneSnapshot.from_scene()
+    return _scopes[-1]
+
+
+def invalidate_snapshot():
+    """Call after adding, renaming or deleting guides inside a scope. The next get_snapshot() reads the scene again."""
+    if _scopes:
+        _scopes[-1] = None
+
+
+@contextlib.contextmanager
+def snapshot_scope():
+    """Reuse one snapshot for everything inside the with block. Scopes can be nested."""
+    _scopes.append(None)
+    try:
+        yield
+    finally:
+        _scopes.pop()
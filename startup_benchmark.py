@@ -0,0 +1,140 @@
+#!/usr/bin/env mayapy
+# encoding: utf-8
+"""
+Times how long the tool modules take to import, each in a fresh interpreter, against a budget.
+
+Opening the toolbox should only pay for the toolbox. Each target also lists modules it must not
+pull in, like props_tools importing the whole car autorigger. Run it with mayapy, so PyMEL and
+PySide are there, and the numbers are the ones an artist waits for:
+
+    mayapy startup_benchmark.py
+    mayapy startup_benchmark.py --repeat 5 --budget props_tools=1.5 --package tenave
+
+The tools import each other through the package (import tenave.props_naming_lib), so the targets are
+imported the same way: with the folder above this one on the path, through the package named after
+this folder. --package '' imports them flat, from this folder. A target that fails to import is
+reported, along with the last line of its error.
+
+It exits with 1 when a target is over budget, fails, or imports something it shouldn't.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+# module, budget in seconds, modules it must not import.
+TARGETS = [
+    ('props_launcher', 0.05, ['PySide2', 'PySide', 'pymel.core', 'props_tools', 'car_autorig']),
+    ('props_tools', 3.0, ['car_autorig']),
+    ('car_autorig', 4.0, []),
+    ]
+
+# runs in the fresh interpreter. Prints a JSON line: the import time, and every module it loaded.
+_CHILD = '''
+import json, sys, time
+before = set(sys.modules)
+start = time.time()
+import {module}
+seconds = time.time() - start
+print(json.dumps({{'seconds': seconds, 'loaded': sorted(set(sys.modules) - before)}}))
+'''
+
+
+_TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+PACKAGE = os.path.basename(_TOOLS_DIR)
+
+
+def time_import(moduleName, python=None, path=None, package=None):
+    """Import package.moduleName in a new interpreter, with path (the folder above the package) on the path.
+    An empty package imports moduleName flat, with this folder on the path.
+    Returns {'seconds': float, 'loaded': [module names], 'error': None}.
+    If the import fails, seconds is None and error is the last line the interpreter printed.
+    """
+    package = PACKAGE if package is None else package
+    path = path or (os.path.dirname(_TOOLS_DIR) if package else _TOOLS_DIR)
+    fullName = '{}.{}'.format(package, moduleName) if package else moduleName
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join([path] + [x for x in [env.get('PYTHONPATH')] if x])
+    try:
+        output = subprocess.check_output(
+                [python or sys.executable, '-c', _CHILD.format(module=fullName)], env=env, stderr=subprocess.STDOUT)
+    except subprocess.CalledProcessError as e:
+        lines = (e.output or b'').decode('utf-8', 'replace').strip().splitlines()
+        return {'seconds': None, 'loaded': [], 'error': lines[-1] if lines else 'exit code {}'.format(e.returncode)}
+    result = json.loads(output.decode('utf-8').strip().splitlines()[-1])
+    result['error'] = None
+    return result
+
+
+def _matches(loaded, forbidden):
+    # the tools are imported flat, or through the tenave package.
+    return sorted([x for x in loaded if any(x == name or x.endswith('.' + name) or x.startswith(name + '.') for name in forbidden)])
+
+
+def run_benchmark(targets=None, repeat=3, python=None, path=None, package=None):
+    """Time every target. The best of repeat runs counts, to leave out the disk cache warming up.
+    Returns a list of dicts: module, seconds, budget, forbidden (the forbidden modules it loaded),
+    error (why the import failed, or None) and ok.
+    """
+    report = []
+    for moduleName, budget, forbidden in targets or TARGETS:
+        runs = [time_import(moduleName, python=python, path=path, package=package) for i in range(max(1, repeat))]
+        failed = [x for x in runs if x['error']]
+        if failed:
+            report.append({
+                'module': moduleName,
+                'seconds': None,
+                'budget': budget,
+                'forbidden': [],
+                'error': failed[0]['error'],
+                'ok': False,
+                })
+            continue
+        best = min(runs, key=lambda x: x['seconds'])
+        loadedForbidden = _matches(best['loaded'], forbidden)
+        report.append({
+            'module': moduleName,
+            'seconds': best['seconds'],
+            'budget': budget,
+            'forbidden': loadedForbidden,
+            'error': None,
+            'ok': best['seconds'] <= budget and not loadedForbidden,
+            })
+    return report
+
+
+def print_report(report):
+    print('{:<20} {:>9} {:>9}  {}'.format('module', 'seconds', 'budget', 'result'))
+    for row in report:
+        if row.get('error'):
+            print('{:<20} {:>9} {:>9.3f}  FAILED: {}'.format(row['module'], '-', row['budget'], row['error']))
+            continue
+        result = 'ok' if row['ok'] else 'OVER BUDGET' if not row['forbidden'] else 'imports ' + ', '.join(row['forbidden'])
+        print('{:<20} {:>9.3f} {:>9.3f}  {}'.format(row['module'], row['seconds'], row['budget'], result))
+
+
+def main(args):
+    repeat = 3
+    budgets = {}
+    package = None
+    while args:
+        flag = args.pop(0)
+        if flag == '--repeat':
+            repeat = int(args.pop(0))
+        elif flag == '--budget':
+            moduleName, seconds = args.pop(0).split('=')
+            budgets[moduleName] = float(seconds)
+        elif flag == '--package':
+            package = args.pop(0)
+        else:
+            print('Unknown argument: {}'.format(flag))
+            return 2
+    targets = [(name, budgets.get(name, budget), forbidden) for name, budget, forbidden in TARGETS]
+    report = run_benchmark(targets, repeat=repeat, package=package)
+    print_report(report)
+    return 0 if all(row['ok'] for row in report) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
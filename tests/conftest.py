@@ -0,0 +1,20 @@
+# encoding: utf-8
+"""The tools are flat modules in the repo root. The NumPy ones, and the builders that go through
+scene_backend, import without Maya, so they are tested here. The builders run in a MemoryBackend.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scene_backend
+
+
+@pytest.fixture
+def scene():
+    """An empty MemoryBackend, used by every builder for the length of the test."""
+    with scene_backend.use_backend(scene_backend.MemoryBackend()) as memoryScene:
+        yield memoryScene
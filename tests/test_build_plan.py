@@ -0,0 +1,64 @@
+# encoding: utf-8
+import build_plan
+import scene_backend
+
+
+class CountingBackend(scene_backend.MemoryBackend):
+    """Counts the parent calls that execute_plan() makes."""
+
+    def __init__(self):
+        super(CountingBackend, self).__init__()
+        self.parentCalls = 0
+
+    def parent(self, node, parentName=None, shape=False, add=False):
+        self.parentCalls += 1
+        return super(CountingBackend, self).parent(node, parentName, shape=shape, add=add)
+
+
+def test_execute_plan_parents_once_for_each_parent():
+    plan = build_plan.BuildPlan()
+    rigGroup = plan.add_group('rig_grp')
+    otherGroup = plan.add_group('other_grp')
+    children = [plan.add_locator('loc{}'.format(i)) for i in range(5)]
+    for each in children:
+        plan.parent(each, rigGroup)
+    # parented twice, so it ends up under the last one.
+    plan.parent(children[0], otherGroup)
+
+    scene = CountingBackend()
+    build_plan.execute_plan(plan, scene)
+    assert scene.parentCalls == 2
+    assert scene.listRelatives('rig_grp') == children[1:]
+    assert scene.listRelatives('other_grp') == children[:1]
+
+
+def test_execute_plan_merges_the_axes_of_an_attribute():
+    plan = build_plan.BuildPlan()
+    oGroup = plan.add_group('grp')
+    plan.set_attr(oGroup + '.tx', 1.0)
+    plan.set_attr(oGroup + '.ty', 2.0)
+    plan.set_attr(oGroup + '.tz', 3.0)
+    plan.set_attr(oGroup + '.rx', 10.0)
+    plan.set_attr(oGroup + '.rx', 20.0)
+
+    merged = scene_backend.merge_attr_values([(plug, value) for plug, value, shape in plan.attrs])
+    assert merged == [('grp.translate', [1.0, 2.0, 3.0]), ('grp.rotateX', 20.0)]
+
+    scene = scene_backend.MemoryBackend()
+    build_plan.execute_plan(plan, scene)
+    assert scene.getAttr('grp.translate') == (1.0, 2.0, 3.0)
+    assert scene.getAttr('grp.rotateX') == 20.0
+
+
+def test_joint_curves_and_new_attributes():
+    plan = build_plan.BuildPlan()
+    oJoint = plan.add_curve('arm_jnt', [[0, 0, 0], [1, 0, 0]], joint=True)
+    plug = plan.add_attr(oJoint, 'spin')
+    plan.delete('not_in_the_scene')
+
+    scene = scene_backend.MemoryBackend()
+    names = build_plan.execute_plan(plan, scene)
+    assert scene.nodeType(names['arm_jnt']) == 'joint'
+    assert scene.node_count('transform') == 0
+    assert scene.node_count('nurbsCurve') == 1
+    assert scene.getAttr(plug) == 0.0
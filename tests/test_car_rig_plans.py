@@ -0,0 +1,121 @@
+# encoding: utf-8
+import numpy as np
+
+import build_plan
+import car_rig_plans
+
+
+def _door_data():
+    return {
+        'ctrlName': 'l__door',
+        'side': 'l',
+        'basename': 'door',
+        'geo': ['l__door__msh__', 'l__door_handle__msh__'],
+        'rigFlip': 1.0,
+        'bbCenter': [80.0, 60.0, 10.0],
+        'position': [85.0, 60.0, 60.0],
+        'rotation': [0.0, 0.0, 0.0],
+        'partsGroup': 'x__body__parts__grp__',
+        'constraintParent': 'x__constraints__grp__',
+        'rootOffset': 'm__element__root_offset__ctrl__',
+        }
+
+
+def _wheel_data():
+    return {
+        'ctrlName': 'l__front_tire',
+        'side': 'l',
+        'basename': 'front_tire',
+        'frontSide': 'front',
+        'geo': ['l__front_tire__msh__'],
+        'radius': 30.0,
+        'guidePosition': [75.0, 30.0, 120.0],
+        'basePosition': [90.0, 0.0, 120.0],
+        'innerPosition': [60.0, 0.0, 120.0],
+        'altPivotPosition': [75.0, 30.0, 120.0],
+        'bbCenter': [75.0, 30.0, 120.0],
+        'bbMax': [90.0, 60.0, 150.0],
+        'wheelsGroup': 'x__body__wheels__grp__',
+        'wheelPin': 'm__element__wheel_pin__hook__',
+        'wheelPinPosition': [0.0, 0.0, 0.0],
+        'wheelTurn': 'm__element__wheel_turn__ctrl__',
+        'trajectory': 'm__element__trajectory__ctrl__',
+        'constraintParent': 'x__constraints__grp__',
+        'positionCtrl': 'm__element__position__ctrl__',
+        'rootCtrl': 'm__element__root__ctrl__',
+        'rootJointOrig': 'm__element__root__ctrl_jorig__',
+        'autoWheel': None,
+        }
+
+
+def _body_nodes(scene, guideData, keys):
+    """The body rig nodes the plan expects to find in the scene, and the geo."""
+    for key in keys:
+        if guideData.get(key):
+            scene.group(name=guideData[key])
+    for each in guideData['geo']:
+        scene.group(name=each)
+
+
+def test_door_plan(scene):
+    plan = car_rig_plans.door_rig_plan('door', _door_data())
+    summary = plan.summary()
+    assert summary['nodes'] == 3
+    assert summary['nodes.curve'] == 1
+    assert summary['parents'] == 3
+    # a parent and a scale constraint for each geo, and for the rig group.
+    assert summary['constraints'] == 6
+    assert summary['locks'] == 4
+
+    _body_nodes(scene, _door_data(), ['partsGroup', 'constraintParent', 'rootOffset'])
+    names = build_plan.execute_plan(plan)
+    assert scene.node_count('transform') == 3 + 5
+    assert scene.node_count('nurbsCurve') == 1
+    assert scene.node_count('parentConstraint') == 3
+    assert scene.listRelatives(names['l__door_door__ctrl__'], parent=True) == ['l__door_door__ctrlroot__']
+    assert np.allclose(scene.worldTranslation('l__door_door__ctrl__'), [85.0, 60.0, 60.0])
+    assert len(scene.listRelatives('x__constraints__grp__')) == 4
+
+
+def test_wheel_plan(scene):
+    guideData = _wheel_data()
+    plan, parts = car_rig_plans.wheel_rig_plan('wheel', guideData)
+    summary = plan.summary()
+    assert summary['nodes.group'] == 14
+    assert summary['nodes.curve'] == 3
+    assert summary['nodes.node'] == 9
+    assert summary['newAttrs'] == 1
+    assert summary['constraints'] == 10
+    assert summary['locks'] == 8
+    assert parts['center'] == [75.0, 30.0, 120.0]
+
+    _body_nodes(scene, guideData, [
+        'wheelsGroup', 'wheelPin', 'wheelTurn', 'trajectory', 'constraintParent',
+        'positionCtrl', 'rootCtrl', 'rootJointOrig'])
+    names = build_plan.execute_plan(plan)
+    assert scene.node_count('joint') == 1
+    assert scene.node_count('nurbsCurve') == 3
+    assert scene.node_count('multiplyDivide') == 2
+    assert scene.node_count('orientConstraint') == 2
+    assert scene.getAttr(names['l__front_tire_wheel_wobble__grp__'] + '.rotateOrder') == 3
+    assert scene.connections['l__front_tire_pivot__loc__.rx'] == 'l__front_tire_rig_rotation_driver__add__.output2Dx'
+    assert scene.getAttr('l__front_tire_rig_auto_wheel__mlt__.input2') == 1.0
+
+    # the control is a circle around the outside of the wheel, with a point at the top.
+    oShape = scene.listRelatives(names[parts['control']], shapes=True)[0]
+    points = scene._node(oShape).points
+    assert len(points) == 24
+    assert np.allclose(points[:, 0], 15.0 * 1.5)
+    assert np.allclose(points[0], points[2])
+    cvRadius = 30.0 * 0.85 * 6.0 / (4.0 + 2.0 * np.cos(2.0 * np.pi / 24))
+    assert np.isclose(points[1, 1], cvRadius + 30.0 * 0.05)
+    assert np.allclose(scene.worldTranslation(names[parts['control']]), guideData['altPivotPosition'])
+
+
+def test_wheel_control_points():
+    points = car_rig_plans.wheel_control_points(10.0, 2.0, 0.5)
+    # the circle passes through the radius halfway between its CVs.
+    ring = np.sqrt(points[3:, 1] ** 2 + points[3:, 2] ** 2)
+    assert np.all(ring > 10.0)
+    assert np.allclose(ring, ring[0])
+    assert np.allclose(points[1], [2.0, ring[0] + 0.5, 0.0])
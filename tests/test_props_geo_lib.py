@@ -0,0 +1,88 @@
+# encoding: utf-8
+import numpy as np
+
+import props_geo_lib
+
+
+def _random_boxes(count, seed):
+    rng = np.random.RandomState(seed)
+    mins = rng.uniform(-20.0, 20.0, (count, 3))
+    return np.hstack([mins, mins + rng.uniform(0.1, 3.0, (count, 3))])
+
+
+def _brute_force_clusters(boxes):
+    """Flood fill over every pair of boxes."""
+    clusters = []
+    seen = set()
+    for start in range(len(boxes)):
+        if start in seen:
+            continue
+        cluster = set([start])
+        stack = [start]
+        while stack:
+            i = stack.pop()
+            for j in range(len(boxes)):
+                if j not in cluster and props_geo_lib.boxes_intersect(boxes[i], boxes[j]):
+                    cluster.add(j)
+                    stack.append(j)
+        seen |= cluster
+        clusters.append(sorted(cluster))
+    return clusters
+
+
+def test_find_box_overlaps_matches_all_pairs():
+    boxes = _random_boxes(120, 0)
+    expected = set()
+    for i in range(len(boxes)):
+        for j in range(i + 1, len(boxes)):
+            if props_geo_lib.boxes_intersect(boxes[i], boxes[j]):
+                expected.add((i, j))
+    found = set(tuple(sorted(x)) for x in props_geo_lib.find_box_overlaps(boxes))
+    assert found == expected
+
+
+def test_cluster_boxes_matches_brute_force():
+    for seed in range(5):
+        boxes = _random_boxes(80, seed)
+        assert props_geo_lib.cluster_boxes(boxes) == _brute_force_clusters(boxes)
+
+
+def test_cluster_boxes_joins_chains_and_touching_boxes():
+    boxes = np.array([
+        [0, 0, 0, 1, 1, 1],
+        [5, 0, 0, 6, 1, 1],
+        [1, 0, 0, 2, 1, 1],         # touches the first box
+        [1.5, 0, 0, 5.5, 1, 1],     # bridges into the second box
+        [10, 10, 10, 11, 11, 11],
+        ], dtype=float)
+    assert props_geo_lib.cluster_boxes(boxes) == [[0, 1, 2, 3], [4]]
+    assert props_geo_lib.cluster_boxes(np.zeros((0, 6))) == []
+
+
+def test_vertex_tree_matches_brute_force():
+    rng = np.random.RandomState(3)
+    points = rng.uniform(-10.0, 10.0, (1000, 3))
+    positions = rng.uniform(-12.0, 12.0, (300, 3))
+    indices, distances = props_geo_lib.VertexTree(points).query(positions)
+    allDistances = np.sqrt(((positions[:, None, :] - points[None, :, :]) ** 2).sum(axis=2))
+    assert np.allclose(distances, allDistances.min(axis=1))
+    assert np.allclose(allDistances[np.arange(len(positions)), indices], distances)
+
+
+def test_vertex_tree_with_repeated_and_few_points():
+    points = np.array([[1.0, 2.0, 3.0]] * 40 + [[0.0, 0.0, 0.0]])
+    indices, distances = props_geo_lib.VertexTree(points).query([[0.1, 0.0, 0.0], [1.0, 2.0, 3.5]])
+    assert indices[0] == 40
+    assert np.allclose(distances, [0.1, 0.5])
+
+    indices, distances = props_geo_lib.VertexTree(np.zeros((0, 3))).query([[0.0, 0.0, 0.0]])
+    assert indices.tolist() == [-1]
+    assert np.isinf(distances).all()
+
+
+def test_box_helpers():
+    boxes = np.array([[-3, 0, 1, -1, 2, 3], [0, 0, -1, 4, 1, 0], [-1, 0, 0, 1, 1, 0]], dtype=float)
+    assert np.allclose(props_geo_lib.total_bounding_box(boxes), [-3, 0, -1, 4, 2, 3])
+    assert props_geo_lib.biggest_box_index(boxes) == 0
+    assert props_geo_lib.classify_sides(boxes) == ['r', 'l', 'm']
+    assert props_geo_lib.classify_fronts(boxes) == ['front', 'back', 'mid']
@@ -0,0 +1,59 @@
+# encoding: utf-8
+import numpy as np
+
+import props_icon_lib
+
+
+def _cv_count(iconType):
+    """The CVs of the icon's curve. A closed icon loses its repeated end point."""
+    iconLib = props_icon_lib.icon_library(iconType)
+    if iconLib['closed']:
+        return len(props_icon_lib._periodic_points(iconLib['points']))
+    return len(iconLib['points'])
+
+
+def test_every_icon_builds_one_curve(scene):
+    iconTypes = [x for x in props_icon_lib.icon_names() if len(props_icon_lib.icon_library(x)['points'])]
+    for iconType in iconTypes:
+        oControl = props_icon_lib.create_control_icon(iconType, '{}_ctl'.format(iconType), [2.0, 1.0, 2.0])
+        oShape = scene.listRelatives(oControl, shapes=True)[0]
+        assert len(scene._node(oShape).points) == _cv_count(iconType)
+        assert scene.getAttr(oShape + '.form') == (2 if props_icon_lib.icon_library(iconType)['closed'] else 0)
+    assert scene.node_count('transform') == len(iconTypes)
+    assert scene.node_count('nurbsCurve') == len(iconTypes)
+
+
+def test_unique_controls_are_colored_joined_and_parented(scene):
+    oParent = scene.group(name='parent_grp')
+    controls = props_icon_lib.create_control_icons('square', [
+        ('a_ctl', [2.0, 1.0, 2.0], [0.0, 1.0, 0.0], 17, False, oParent),
+        ('b_ctl', [2.0, 1.0, 2.0], False, None, True, oParent),
+        ('c_ctl',),
+        ])
+    assert controls == ['a_ctl', 'b_ctl', 'c_ctl']
+    assert scene.listRelatives(oParent) == ['a_ctl', 'b_ctl']
+    # the temporary curve of the joint control is gone.
+    assert scene.node_count('transform') == 3
+    assert scene.node_count('joint') == 1
+    assert scene.node_count('nurbsCurve') == 3
+
+    oShape = scene.listRelatives('a_ctl', shapes=True)[0]
+    assert scene.getAttr(oShape + '.overrideColor') == 17
+    assert np.allclose(scene.exactWorldBoundingBox('a_ctl'), [-1, 1, -1, 1, 1, 1])
+
+
+def test_shared_controls_share_one_shape_until_made_unique(scene):
+    specs = [('{}_ctl'.format(x), [3.0, 1.0, 3.0], False, 22) for x in 'abc']
+    controls = props_icon_lib.create_control_icons('square', specs, shared=True)
+    assert scene.node_count('nurbsCurve') == 1
+    # the template, its hidden group, and the controls.
+    assert scene.node_count('transform') == 5
+    oShape = scene.listRelatives(controls[0], shapes=True)[0]
+    assert len(scene.listRelatives(oShape, allParents=True)) == 4
+
+    props_icon_lib.make_unique_shapes(controls[:2])
+    assert scene.node_count('nurbsCurve') == 3
+    assert len(scene.listRelatives(oShape, allParents=True)) == 2
+    oCopy = scene.listRelatives(controls[0], shapes=True)[0]
+    assert oCopy != oShape
+    assert scene.getAttr(oCopy + '.overrideColor') == 22
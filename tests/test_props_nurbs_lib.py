@@ -0,0 +1,166 @@
+# encoding: utf-8
+import numpy as np
+import pytest
+
+import props_nurbs_lib
+
+
+def _cox_de_boor(i, degree, knots, param):
+    """The textbook recursive basis function, as the reference. Right-closed on the last knot."""
+    if degree == 0:
+        if knots[i] <= param < knots[i + 1]:
+            return 1.0
+        return 1.0 if param == knots[-1] and knots[i] < knots[i + 1] == knots[-1] else 0.0
+    value = 0.0
+    if knots[i + degree] != knots[i]:
+        value += (param - knots[i]) / (knots[i + degree] - knots[i]) * _cox_de_boor(i, degree - 1, knots, param)
+    if knots[i + degree + 1] != knots[i + 1]:
+        value += ((knots[i + degree + 1] - param) / (knots[i + degree + 1] - knots[i + 1])
+                * _cox_de_boor(i + 1, degree - 1, knots, param))
+    return value
+
+
+def _reference_points(cvs, mayaKnots, degree, params):
+    knots = props_nurbs_lib._full_knots(mayaKnots)
+    return np.array([
+        sum(_cox_de_boor(i, degree, knots, t) * cvs[i] for i in range(len(cvs)))
+        for t in params])
+
+
+def _cubic_curve():
+    """An open cubic with uneven knots, that winds around in 3D."""
+    cvs = np.array([[0, 0, 0], [1, 2, 0], [3, 3, 1], [4, 0, 2], [6, -1, 1], [7, 1, -1], [9, 2, 0]], dtype=float)
+    knots = [0, 0, 0, 0.5, 1.5, 2, 4, 4, 4]
+    return props_nurbs_lib.NurbsCurve(cvs, knots, 3)
+
+
+def _helix(turns=2.0, count=40):
+    """A cubic through a helix, which keeps bending away from any fixed frame."""
+    angles = np.linspace(0.0, turns * 2.0 * np.pi, count)
+    cvs = np.stack([np.cos(angles) * 3.0, angles * 0.5, np.sin(angles) * 3.0], axis=1)
+    knots = [0, 0] + list(range(count - 2)) + [count - 3, count - 3]
+    return props_nurbs_lib.NurbsCurve(cvs, knots, 3)
+
+
+def _double_reflection_normals(curve, params, normal):
+    """Rotation minimizing frames by the double reflection method (Wang et al. 2008), as the reference."""
+    points, tangents = curve.evaluate(params, derivatives=1)
+    tangents = tangents / np.sqrt((tangents ** 2).sum(axis=1))[:, None]
+    normal = np.asarray(normal, dtype=float)
+    normal = normal - tangents[0] * normal.dot(tangents[0])
+    normals = [normal / np.sqrt(normal.dot(normal))]
+    for i in range(len(params) - 1):
+        v1 = points[i + 1] - points[i]
+        c1 = v1.dot(v1)
+        reflectedNormal = normals[-1] - (2.0 / c1) * v1.dot(normals[-1]) * v1
+        reflectedTangent = tangents[i] - (2.0 / c1) * v1.dot(tangents[i]) * v1
+        v2 = tangents[i + 1] - reflectedTangent
+        c2 = v2.dot(v2)
+        nextNormal = reflectedNormal - (2.0 / c2) * v2.dot(reflectedNormal) * v2 if c2 > 1e-20 else reflectedNormal
+        normals.append(nextNormal / np.sqrt(nextNormal.dot(nextNormal)))
+    return np.array(normals)
+
+
+def test_basis_functions_sum_to_one():
+    curve = _cubic_curve()
+    params = np.linspace(0.0, 4.0, 101)
+    spans = props_nurbs_lib.find_spans(3, curve.knots, params)
+    basis = props_nurbs_lib.basis_functions(3, curve.knots, spans, params)
+    assert np.allclose(basis.sum(axis=1), 1.0)
+    assert (basis >= -1e-12).all()
+
+
+def test_curve_points_match_cox_de_boor():
+    curve = _cubic_curve()
+    params = np.linspace(0.0, 4.0, 57)
+    assert np.allclose(curve.points(params), _reference_points(curve.cvs, [0, 0, 0, 0.5, 1.5, 2, 4, 4, 4], 3, params))
+
+
+def test_bezier_curve_matches_bernstein():
+    cvs = np.array([[0, 0, 0], [1, 3, 0], [4, 3, 2], [5, 0, 1]], dtype=float)
+    curve = props_nurbs_lib.NurbsCurve(cvs, [0, 0, 0, 1, 1, 1], 3)
+    t = np.linspace(0.0, 1.0, 11)[:, None]
+    bernstein = (1 - t) ** 3 * cvs[0] + 3 * (1 - t) ** 2 * t * cvs[1] + 3 * (1 - t) * t ** 2 * cvs[2] + t ** 3 * cvs[3]
+    assert np.allclose(curve.points(t.ravel()), bernstein)
+    assert np.allclose(curve.points([0.0, 1.0]), cvs[[0, -1]])
+
+
+def test_curve_derivatives_match_finite_differences():
+    curve = _cubic_curve()
+    # stay away from the knots, where the second derivative jumps.
+    params = np.array([0.2, 0.9, 1.7, 2.6, 3.3, 3.8])
+    step = 1e-5
+    points, first, second = curve.evaluate(params, derivatives=2)
+    assert np.allclose(first, (curve.points(params + step) - curve.points(params - step)) / (2 * step), atol=1e-6)
+    expectedSecond = (curve.points(params + step) - 2 * points + curve.points(params - step)) / step ** 2
+    assert np.allclose(second, expectedSecond, atol=1e-3)
+
+
+def test_curve_closest_params_match_dense_sampling():
+    curve = _cubic_curve()
+    positions = np.random.RandomState(0).uniform([-1, -2, -1], [10, 4, 3], (200, 3))
+    params = curve.closest_params(positions)
+    found = np.sqrt(((curve.points(params) - positions) ** 2).sum(axis=1))
+    samples = curve.points(np.linspace(0.0, 4.0, 20001))
+    brute = np.sqrt(((positions[:, None, :] - samples[None, :, :]) ** 2).sum(axis=2)).min(axis=1)
+    assert (found <= brute + 1e-6).all()
+
+
+def test_curve_closest_params_on_the_curve():
+    curve = _cubic_curve()
+    params = np.array([0.0, 0.3, 1.1, 2.5, 4.0])
+    assert np.allclose(curve.closest_params(curve.points(params)), params, atol=1e-6)
+
+
+def test_transport_frames_are_orthonormal_and_match_double_reflection():
+    curve = _helix()
+    paramMin, paramMax = curve.param_range()
+    params = np.linspace(paramMin, paramMax, 2001)
+    tangents, normals, binormals = curve.transport_frames(params, [0.0, 1.0, 0.0])
+    for a, b in [(tangents, normals), (normals, binormals), (binormals, tangents)]:
+        assert np.allclose((a * b).sum(axis=1), 0.0, atol=1e-9)
+    for vectors in [tangents, normals, binormals]:
+        assert np.allclose((vectors ** 2).sum(axis=1), 1.0)
+    assert np.allclose(normals, _double_reflection_normals(curve, params, [0.0, 1.0, 0.0]), atol=1e-4)
+
+
+def test_transport_frames_of_a_planar_curve_keep_the_plane_normal():
+    cvs = np.array([[0, 0, 0], [2, 0, 0], [3, 0, 2], [1, 0, 4], [-2, 0, 3], [-1, 0, 0]], dtype=float)
+    curve = props_nurbs_lib.NurbsCurve(cvs, [0, 0, 0, 1, 2, 3, 3, 3], 3)
+    tangents, normals, binormals = curve.transport_frames(np.linspace(0.0, 3.0, 400), [0.0, 1.0, 0.0])
+    assert np.allclose(normals, [0.0, 1.0, 0.0], atol=1e-9)
+
+
+def test_transport_frames_need_a_normal_off_the_tangent():
+    with pytest.raises(ValueError):
+        _cubic_curve().transport_frames([0.0, 1.0], [1.0, 2.0, 0.0])
+
+
+def test_surface_points_are_curves_of_curves():
+    rng = np.random.RandomState(4)
+    cvs = rng.uniform(-1.0, 1.0, (5, 4, 3)) + np.stack(list(np.meshgrid(np.arange(5.0), np.arange(4.0), indexing='ij')) + [np.zeros((5, 4))], axis=2)
+    knotsU = [0, 0, 0, 1, 3, 3, 3]
+    knotsV = [0, 0, 1, 2, 2]
+    surface = props_nurbs_lib.NurbsSurface(cvs, knotsU, knotsV, 3, 2)
+    assert surface.span_count() == (2, 2)
+    paramsU = rng.uniform(0.0, 3.0, 30)
+    paramsV = rng.uniform(0.0, 2.0, 30)
+    expected = []
+    for u, v in zip(paramsU, paramsV):
+        # evaluate along V for each row of CVs, then along U through those points.
+        rows = np.array([_reference_points(cvs[i], knotsV, 2, [v])[0] for i in range(5)])
+        expected.append(_reference_points(rows, knotsU, 3, [u])[0])
+    assert np.allclose(surface.points(paramsU, paramsV), expected)
+
+
+def test_surface_closest_params_match_a_dense_grid():
+    angles = np.linspace(0.0, np.pi, 6)
+    cvs = np.array([[[np.cos(a) * 4.0, y, np.sin(a) * 4.0] for y in np.linspace(0.0, 6.0, 4)] for a in angles])
+    surface = props_nurbs_lib.NurbsSurface(cvs, [0, 0, 0, 1, 2, 3, 3, 3], [0, 0, 0, 1, 1, 1], 3, 3)
+    positions = np.random.RandomState(5).uniform([-5, -1, -1], [5, 7, 5], (100, 3))
+    paramsU, paramsV = surface.closest_params(positions)
+    found = np.sqrt(((surface.points(paramsU, paramsV) - positions) ** 2).sum(axis=1))
+    gridU, gridV = np.meshgrid(np.linspace(0.0, 3.0, 301), np.linspace(0.0, 1.0, 201), indexing='ij')
+    samples = surface.points(gridU.ravel(), gridV.ravel())
+    brute = np.sqrt(((positions[:, None, :] - samples[None, :, :]) ** 2).sum(axis=2)).min(axis=1)
+    assert (found <= brute + 1e-6).all()
@@ -0,0 +1,92 @@
+# encoding: utf-8
+import numpy as np
+
+import props_pin_lib
+
+
+def _two_quads():
+    """A big quad, and a small quad on its own floating above the middle of it."""
+    points = np.array([
+        [0, 0, 0], [100, 0, 0], [100, 100, 0], [0, 100, 0],
+        [40, 40, 5], [41, 40, 5], [41, 41, 5], [40, 41, 5],
+        ], dtype=float)
+    uvs = np.array([[0, 0], [1, 0], [1, 1], [0, 1], [0.4, 0.4], [0.41, 0.4], [0.41, 0.41], [0.4, 0.41]])
+    faceCounts = [4, 4]
+    vertexIds = [0, 1, 2, 3, 4, 5, 6, 7]
+    return points, props_pin_lib.MeshUvIndex(uvs, faceCounts, vertexIds, vertexIds)
+
+
+def _grid_mesh(count, seed=0):
+    """A bumpy grid of count x count quads, with UVs matching the grid."""
+    rng = np.random.RandomState(seed)
+    xs, ys = np.meshgrid(np.arange(count + 1, dtype=float), np.arange(count + 1, dtype=float))
+    points = np.stack([xs.ravel(), ys.ravel(), rng.uniform(-0.3, 0.3, xs.size)], axis=1)
+    uvs = points[:, :2] / count
+    vertexIds = []
+    for j in range(count):
+        for i in range(count):
+            first = j * (count + 1) + i
+            vertexIds.extend([first, first + 1, first + count + 2, first + count + 1])
+    return points, props_pin_lib.MeshUvIndex(uvs, [4] * count * count, vertexIds, vertexIds)
+
+
+def _brute_force_closest(uvIndex, points, positions):
+    corners = points[uvIndex.triangleVertices]
+    distances = []
+    for pos in positions:
+        closest, weights = props_pin_lib._closest_on_triangles(
+                np.tile(pos, (len(corners), 1)), corners[:, 0], corners[:, 1], corners[:, 2])
+        distances.append(np.sqrt(((closest - pos) ** 2).sum(axis=1)).min())
+    return np.array(distances)
+
+
+def test_closest_points_finds_a_big_face_away_from_its_vertices():
+    points, uvIndex = _two_quads()
+    faces, triangles, barycentric = uvIndex.closest_points(points, [[40.5, 40.5, 1.0]])
+    assert faces.tolist() == [0]
+    corners = points[uvIndex.triangleVertices[triangles[0]]]
+    closest = (barycentric[0][:, None] * corners).sum(axis=0)
+    assert np.allclose(closest, [40.5, 40.5, 0.0])
+
+
+def test_closest_points_matches_brute_force():
+    points, uvIndex = _grid_mesh(12)
+    positions = np.random.RandomState(1).uniform([-3, -3, -2], [15, 15, 2], (200, 3))
+    faces, triangles, barycentric = uvIndex.closest_points(points, positions)
+    corners = points[uvIndex.triangleVertices[triangles]]
+    closest = (barycentric[:, :, None] * corners).sum(axis=1)
+    distances = np.sqrt(((closest - positions) ** 2).sum(axis=1))
+    assert np.allclose(distances, _brute_force_closest(uvIndex, points, positions))
+    assert (faces == uvIndex.triangleFaces[triangles]).all()
+
+
+def test_triangle_tree_is_kept_until_the_points_move():
+    points, uvIndex = _grid_mesh(4)
+    tree = uvIndex.triangle_tree(points)
+    assert uvIndex.triangle_tree(points.copy()) is tree
+    moved = points + [0.0, 0.0, 1.0]
+    assert uvIndex.triangle_tree(moved) is not tree
+    faces, triangles, barycentric = uvIndex.closest_points(moved, [[2.5, 2.5, 5.0]])
+    assert faces[0] >= 0
+
+
+def test_locate_uvs_round_trips_through_uvs_at():
+    points, uvIndex = _grid_mesh(6)
+    uvs = np.random.RandomState(2).uniform(0.01, 0.99, (100, 2))
+    faces, triangles, barycentric = uvIndex.locate_uvs(uvs)
+    assert (faces >= 0).all()
+    assert np.allclose(uvIndex.uvs_at(triangles, barycentric), uvs)
+
+
+def test_locate_uvs_outside_of_the_uvs():
+    points, uvIndex = _grid_mesh(3)
+    faces, triangles, barycentric = uvIndex.locate_uvs([[1.5, 0.5], [-0.2, 0.5]])
+    assert faces.tolist() == [-1, -1]
+    assert np.isnan(uvIndex.uvs_at(triangles, barycentric)).all()
+
+
+def test_faces_without_uvs_are_skipped():
+    points, uvIndex = _two_quads()
+    noUvs = props_pin_lib.MeshUvIndex(uvIndex.uvs, [4, 4], list(range(8)), [0, 1, 2, 3, -1, -1, -1, -1])
+    faces, triangles, barycentric = noUvs.locate_uvs([[0.405, 0.405]])
+    assert faces.tolist() == [0]
@@ -0,0 +1,53 @@
+# encoding: utf-8
+import numpy as np
+
+import props_rig_lib
+
+
+def test_basic_guides(scene):
+    guides = props_rig_lib.build_basic_guides()
+    assert guides == ['world_ctl', 'master_C0_ctl', 'COG_C0_ctl']
+    assert scene.node_count('transform') == 3
+    assert scene.node_count('nurbsCurve') == 3
+    assert scene.listRelatives('COG_C0_ctl', parent=True) == ['master_C0_ctl']
+    assert np.allclose(scene.worldTranslation('COG_C0_ctl'), [0.0, 3.0, 0.0])
+
+
+def test_base_rig_without_guides(scene):
+    scene.group(name='Geo')
+    controls = props_rig_lib.build_base_rig()
+    assert controls == ['world_ctl', 'master_C0_ctl', 'local_C0_ctl', 'COG_C0_ctl', 'COG_C1_ctl']
+    # Geo, Rig, and a root for each control.
+    assert scene.node_count('transform') == 12
+    assert scene.node_count('nurbsCurve') == 5
+    assert scene.node_count('parentConstraint') == 1
+    assert scene.node_count('scaleConstraint') == 1
+    assert scene.node_count('displayLayer') == 2
+
+    assert scene.listRelatives('COG_C1_ctl', parent=True) == ['COG_C1_npo']
+    assert scene.listRelatives('COG_C1_npo', parent=True) == ['COG_C0_ctl']
+    assert np.allclose(scene.worldTranslation('COG_C1_npo'), [0.0, 3.0, 0.0])
+    assert np.allclose(scene.getAttr('COG_C1_ctl.translate'), [0.0, 0.0, 0.0])
+    localBox = scene.objectBoundingBox('local_C0_ctl')
+    assert np.isclose(localBox[3] - localBox[0], 8.0)
+
+
+def test_base_rig_around_the_basic_guides(scene):
+    scene.group(name='Geo')
+    props_rig_lib.build_basic_guides()
+    scene.setAttr('world_ctl.translate', [1.0, 0.0, 2.0])
+    props_rig_lib.build_base_rig()
+    assert scene.node_count('transform') == 12
+    assert scene.node_count('nurbsCurve') == 5
+    assert np.allclose(scene.worldTranslation('master_C0_npo'), [1.0, 0.0, 2.0])
+    oShape = scene.listRelatives('world_ctl', shapes=True)[0]
+    assert scene.getAttr(oShape + '.overrideColor') == props_rig_lib.GLOBAL_COLOR
+
+
+def test_place_geo_control(scene):
+    geoNames = [scene.group(name='door_geo'), scene.group(name='hood_geo')]
+    oControl = props_rig_lib.place_geo_control('m__door__ctrl', [0.0, 1.0, 2.0], geoNames)
+    assert np.allclose(scene.worldTranslation(oControl), [0.0, 1.0, 2.0])
+    assert scene.node_count('parentConstraint') == 2
+    assert scene.node_count('scaleConstraint') == 2
+    assert scene.objExists('hood_geo_scaleconstraint')
@@ -0,0 +1,65 @@
+# encoding: utf-8
+import numpy as np
+import pytest
+
+import scene_backend
+
+
+def test_parent_keeps_the_world_position():
+    scene = scene_backend.MemoryBackend()
+    oGroup = scene.group(name='grp')
+    scene.setAttr(oGroup + '.translate', [1.0, 2.0, 3.0])
+    scene.setAttr(oGroup + '.rotateY', 90.0)
+    oLoc = scene.spaceLocator(name='loc')
+    scene.setAttr(oLoc + '.translate', [5.0, 0.0, 0.0])
+    scene.parent(oLoc, oGroup)
+    assert scene.listRelatives(oLoc, parent=True) == [oGroup]
+    assert np.allclose(scene.worldTranslation(oLoc), [5.0, 0.0, 0.0])
+    scene.parent(oLoc)
+    assert scene.listRelatives(oLoc, parent=True) == []
+    assert np.allclose(scene.getAttr(oLoc + '.translate'), [5.0, 0.0, 0.0])
+
+
+def test_parent_a_list_in_one_call():
+    scene = scene_backend.MemoryBackend()
+    oGroup = scene.group(name='grp')
+    children = [scene.group(name='child{}'.format(i)) for i in range(3)]
+    assert scene.parent(children, oGroup) == children
+    assert scene.listRelatives(oGroup) == children
+
+
+def test_an_instanced_shape_survives_until_its_last_parent_is_gone():
+    scene = scene_backend.MemoryBackend()
+    oCurve = scene.curve([[0, 0, 0], [1, 0, 0]], name='crv')
+    oShape = scene.listRelatives(oCurve, shapes=True)[0]
+    oOther = scene.createNode('transform', name='other')
+    scene.parent(oShape, oOther, shape=True, add=True)
+    assert scene.listRelatives(oShape, allParents=True) == [oCurve, oOther]
+
+    oCopy = scene.uninstanceShape(oShape, oOther)
+    assert scene.listRelatives(oOther, shapes=True) == [oCopy]
+    assert scene.listRelatives(oShape, allParents=True) == [oCurve]
+
+    scene.parent(oShape, oOther, shape=True, add=True)
+    scene.delete(oCurve)
+    assert scene.objExists(oShape)
+    assert scene.listRelatives(oShape, allParents=True) == [oOther]
+    assert scene.node_count('nurbsCurve') == 2
+
+
+def test_bounding_boxes_in_world_and_object_space():
+    scene = scene_backend.MemoryBackend()
+    oCurve = scene.curve([[-1, 0, -2], [1, 0, 2]], name='crv')
+    scene.setAttr(oCurve + '.translate', [10.0, 0.0, 0.0])
+    scene.setAttr(oCurve + '.rotateY', 90.0)
+    assert np.allclose(scene.objectBoundingBox(oCurve), [-1, 0, -2, 1, 0, 2])
+    assert np.allclose(scene.exactWorldBoundingBox(oCurve), [8, 0, -1, 12, 0, 1])
+
+
+def test_set_attr_adds_an_unknown_attribute_but_get_attr_doesnt():
+    scene = scene_backend.MemoryBackend()
+    oJoint = scene.createNode('joint', name='jnt')
+    scene.setAttr(oJoint + '.radius', 0.5)
+    assert scene.getAttr(oJoint + '.radius') == 0.5
+    with pytest.raises(ValueError):
+        scene.getAttr(oJoint + '.notAnAttr')
@@ -0,0 +1,140 @@
+#!/usr/bin/env mayapy
+# encoding: utf-8
+"""
+Solves the wheel rotation after the animation has been done, and bakes it into keys.
+
+The rig samples where each wheel travels over the frame range, and which way it is facing.
+The spin is solved for every frame at once with NumPy, and the keys are written to the
+wheel_manual_spin channel with one setAttr per wheel. The wheel's *_auto_wheel switch
+is turned off, so the baked spin replaces the live one instead of adding to it.
+Everything that changes the scene goes through cmds, so one undo takes the whole bake back.
+
+    import wheel_spin_bake
+    wheel_spin_bake.bake_all_wheels()
+"""
+
+import math
+from functools import wraps
+
+import numpy as np
+
+try:
+    import maya.cmds as cmds
+    import maya.api.OpenMaya as om2
+except ImportError:
+    # the solver still works outside of Maya, but the sampling and baking don't.
+    cmds = None
+    om2 = None
+
+
+def undo(func):
+    """Puts the wrapped func into a single Maya Undo action, like the one in car_autorig."""
+    @wraps(func)
+    def _undofunc(*args, **kwargs):
+        try:
+            cmds.undoInfo(ock=True)
+            return func(*args, **kwargs)
+        finally:
+            cmds.undoInfo(cck=True)
+    return _undofunc
+
+
+def solve_wheel_spin(positions, facings, radius):
+    """Returns the accumulated spin of a wheel in turns for every frame. The first frame is 0.0.
+    positions: (N, 3) world positions of the wheel, one row per frame.
+    facings: (N, 3) world direction the wheel faces on each frame. It doesn't need to be normalized.
+    Each frame turns the wheel by distance / (2 * pi * radius), negative when it moves against its facing.
+    """
+    positions = np.asarray(positions, dtype=float).reshape(-1, 3)
+    facings = np.asarray(facings, dtype=float).reshape(-1, 3)
+    movement = np.diff(positions, axis=0)
+    distances = np.sqrt((movement ** 2).sum(axis=1))
+    # a frame that doesn't move has nothing to sign, so only reversing counts as negative.
+    directions = np.where((movement * facings[1:]).sum(axis=1) < 0.0, -1.0, 1.0)
+    turns = distances * directions / (2.0 * math.pi * radius)
+    return np.concatenate([[0.0], np.cumsum(turns)])
+
+
+def _world_matrix_plug(node):
+    selList = om2.MSelectionList()
+    selList.add(node)
+    nodeFn = om2.MFnDependencyNode(selList.getDependNode(0))
+    return nodeFn.findPlug('worldMatrix', False).elementByLogicalIndex(0)
+
+
+def sample_world_matrices(nodes, frames):
+    """Returns an (len(nodes), len(frames), 4, 4) array of world matrices.
+    Each frame is evaluated in its own DG context, so the current time never changes.
+    """
+    plugs = [_world_matrix_plug(x) for x in nodes]
+    matrices = np.zeros((len(nodes), len(frames), 4, 4))
+    timeUnit = om2.MTime.uiUnit()
+    for f, frame in enumerate(frames):
+        context = om2.MDGContext(om2.MTime(float(frame), timeUnit))
+        for n, plug in enumerate(plugs):
+            if hasattr(context, 'makeCurrent'):
+                # Maya 2019 and later evaluate in the current context.
+                previous = context.makeCurrent()
+                try:
+                    matrixData = plug.asMObject()
+                finally:
+                    previous.makeCurrent()
+            else:
+                matrixData = plug.asMObject(context)
+            matrices[n, f] = np.array(om2.MFnMatrixData(matrixData).matrix()).reshape(4, 4)
+    return matrices
+
+
+def find_wheels():
+    """Returns the ctrlName of every wheel rig in the scene. eg. 'l__front_wheel_geo'"""
+    suffix = '_ctrl_follow__grp__'
+    return sorted([x[:-len(suffix)] for x in cmds.ls('*' + suffix, type='transform')])
+
+
+@undo
+def bake_wheel_spin(ctrlName, startFrame, endFrame):
+    """Bake the spin of one wheel rig into the wheel_manual_spin channel of its control."""
+    frames = np.arange(startFrame, endFrame + 1)
+    # the follow group is below the driver, so its world position is where the wheel travels.
+    # the offset control points the way the wheel faces, including the steering.
+    followName = '{}_ctrl_follow__grp__'.format(ctrlName)
+    facingName = '{}_offset__ctrl__'.format(ctrlName)
+    matrices = sample_world_matrices([followName, facingName], frames)
+    positions = matrices[0, :, 3, :3]
+    facings = matrices[1, :, 2, :3]
+
+    # the rig stores the circumference of the wheel, to turn distance into turns.
+    circumference = cmds.getAttr('{}_rig_pi__mlt__.input2X'.format(ctrlName))
+    turns = solve_wheel_spin(positions, facings, circumference / (2.0 * math.pi))
+
+    spinPlugName = '{}__ctrl__.wheel_manual_spin'.format(ctrlName)
+    turns += cmds.getAttr(spinPlugName, time=startFrame)
+    cmds.cutKey(spinPlugName, clear=True)
+
+    # every key in one setAttr on the curve's keyTimeValue array. The times are in the UI time unit.
+    animCurve = cmds.createNode('animCurveTU', name=spinPlugName.replace('.', '_'), skipSelect=True)
+    keyTimeValues = np.stack([frames.astype(float), turns], axis=1).ravel().tolist()
+    cmds.setAttr('{}.ktv[0:{}]'.format(animCurve, len(frames) - 1), *keyTimeValues)
+    cmds.keyTangent(animCurve, inTangentType='linear', outTangentType='linear')
+    cmds.connectAttr(animCurve + '.output', spinPlugName)
+
+    # switch off the live auto spin, or the wheel would spin twice as much.
+    switchPlug = '{}_rig_auto_wheel__mlt__.input2'.format(ctrlName)
+    switchSource = cmds.listConnections(switchPlug, source=True, destination=False, plugs=True)
+    if switchSource:
+        cmds.setAttr(switchSource[0], 0.0)
+    else:
+        cmds.setAttr(switchPlug, 0.0)
+    return turns
+
+
+@undo
+def bake_all_wheels(startFrame=None, endFrame=None):
+    """Bake every wheel in the scene. Defaults to the playback range."""
+    if startFrame is None:
+        startFrame = int(cmds.playbackOptions(q=True, minTime=True))
+    if endFrame is None:
+        endFrame = int(cmds.playbackOptions(q=True, maxTime=True))
+    for ctrlName in find_wheels():
+        bake_wheel_spin(ctrlName, startFrame, endFrame)
+        print('Baked the wheel spin of {} from {} to {}.'.format(ctrlName, startFrame, endFrame))